@@ -0,0 +1,61 @@
+"""
+Forwarding cost per hop of store-and-forward and cut-through switching. Frames are sent over a chain of switches that
+have already learned where the receiver is, and the time to get them across is divided by the number of frames and
+hops. Logging of the switches is turned off in both modes.
+
+Run from the root of the repository:  python -m benchmarks.cut_through
+"""
+import time
+
+from layer2.infrastructure.ethernet_devices import EthernetSwitch, EthernetEndpoint
+from layer2.mac import Mac
+
+N = 2_000
+HOPS = 8
+SIZES = (64, 512, 1500)
+
+
+class Endpoint(EthernetEndpoint):
+    def __init__(self, mac: Mac):
+        super().__init__(mac)
+        self.received = 0
+
+    def receive(self, frame, incoming_interface_num: int = 0):
+        self.received += 1
+
+    def say(self, *args):
+        pass
+
+
+def per_hop(size: int, cut_through: bool) -> float:
+    """ The forwarding time per frame and hop in seconds """
+    sender, receiver = Endpoint(Mac.fromstring("02:00:00:00:00:01")), Endpoint(Mac.fromstring("02:00:00:00:00:02"))
+    switches = [EthernetSwitch(2, cut_through=cut_through) for _ in range(HOPS)]
+    for switch in switches:
+        switch.say = lambda *args: None
+    sender.connect_to(switches[0], 0)
+    for left, right in zip(switches, switches[1:]):
+        left.connect_to(right, 0, 1)
+    receiver.connect_to(switches[-1], 1)
+    receiver.send_data(b'learn', sender.mac)
+
+    payload = bytes(size)
+    start = time.perf_counter()
+    for _ in range(N):
+        sender.send_data(payload, receiver.mac)
+    elapsed = time.perf_counter() - start
+    assert receiver.received == N
+    return elapsed / (N * HOPS)
+
+
+def main():
+    print(f"{N} frames over {HOPS} switches, forwarding time per hop")
+    print(f"{'payload':>8}{'store-and-forward (us)':>26}{'cut-through (us)':>20}{'speedup':>10}")
+    for size in SIZES:
+        store_and_forward, cut_through = per_hop(size, False), per_hop(size, True)
+        print(f"{size:>8}{1e6 * store_and_forward:>26.2f}{1e6 * cut_through:>20.2f}"
+              f"{store_and_forward / cut_through:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
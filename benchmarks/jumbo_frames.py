@@ -0,0 +1,73 @@
+"""
+Throughput of a bulk transfer between two Ethernet endpoints with the standard MTU of 1500 bytes and with 9000 byte
+jumbo frames. The data is sent as IPv4 packets that fill the MTU, over a 1 Gbit/s channel. Reports the goodput on the
+channel, for which the preamble, start frame delimiter and inter packet gap are included in the overhead of every
+frame, and the wall clock time the simulation takes, which is dominated by the per frame cost.
+
+Run from the root of the repository:  python -m benchmarks.jumbo_frames
+"""
+import time
+from ipaddress import IPv4Address
+
+from layer2.ethernet.ethernet import EthernetFrame, EtherType
+from layer2.infrastructure.ethernet_devices import EthernetEndpoint
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.mac import Mac
+from layer3.ip.ipv4 import IPv4Packet, IPv4Header
+
+TRANSFER = 16 * 2 ** 20
+BANDWIDTH = 1e9
+MTUS = (1500, 9000)
+# Preamble, start frame delimiter and inter packet gap, which the channel does not see
+PHYSICAL_OVERHEAD = len(EthernetFrame.preamble + EthernetFrame.start_frame_delim) + \
+                    EthernetFrame.inter_packet_gap_size // 8
+
+
+class Endpoint(EthernetEndpoint):
+    def __init__(self, mac: Mac, mtu: int, clock: SimulationClock):
+        super().__init__(mac, mtu=mtu)
+        self.clock = clock
+        self.received = 0
+        self.last_received = 0.0
+
+    def receive(self, frame, incoming_interface_num: int = 0):
+        self.received += len(frame.payload) - 20
+        self.last_received = self.clock.now
+
+    def say(self, *args):
+        pass
+
+
+def transfer(mtu: int) -> tuple[int, float, float]:
+    """ The number of frames, the duration of the transfer on the channel and the wall clock time """
+    clock = SimulationClock()
+    sender = Endpoint(Mac.fromstring("AA:AA:AA:AA:AA:AA"), mtu, clock)
+    receiver = Endpoint(Mac.fromstring("BB:BB:BB:BB:BB:BB"), mtu, clock)
+    sender.connect_to(receiver, 0)
+    sender.get_interface(0).channel = Channel(clock, BANDWIDTH)
+    segment = mtu - 20
+    frames = -(-TRANSFER // segment)
+
+    start = time.perf_counter()
+    source, destination = IPv4Address("10.0.0.1"), IPv4Address("10.0.0.2")
+    for offset in range(0, TRANSFER, segment):
+        data = bytes(min(segment, TRANSFER - offset))
+        packet = IPv4Packet(IPv4Header.default_header(source, destination, len(data)), data)
+        sender.send_data(packet.bytes, receiver.mac, EtherType.IPV4)
+    clock.run()
+    elapsed = time.perf_counter() - start
+    assert receiver.received == TRANSFER
+    return frames, receiver.last_received + frames * PHYSICAL_OVERHEAD * 8 / BANDWIDTH, elapsed
+
+
+def main():
+    print(f"Transfer of {TRANSFER // 2 ** 20} MiB over a {BANDWIDTH / 1e9:.0f} Gbit/s channel")
+    print(f"{'MTU':>6}{'frames':>10}{'goodput (Mbit/s)':>20}{'efficiency':>12}{'wall clock (s)':>16}")
+    for mtu in MTUS:
+        frames, duration, elapsed = transfer(mtu)
+        goodput = 8 * TRANSFER / duration
+        print(f"{mtu:>6}{frames:>10}{goodput / 1e6:>20.1f}{100 * goodput / BANDWIDTH:>11.2f}%{elapsed:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
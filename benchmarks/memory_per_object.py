@@ -0,0 +1,90 @@
+"""
+Memory benchmark for the frame, header and address objects. Reports the number of bytes allocated per object for the
+slotted classes, and for equivalent dict-backed classes (the object model before __slots__ was introduced). The
+dict-backed variant is a subclass without __slots__ whose instance __dict__ holds the same attributes.
+
+Run from the root of the repository:  python -m benchmarks.memory_per_object
+"""
+import gc
+import tracemalloc
+from functools import lru_cache
+from ipaddress import IPv4Address
+from typing import Callable
+
+from layer2.arp.arp import ARPPacket
+from layer2.ethernet.decoding import decode_frame
+from layer2.ethernet.ethernet import EthernetFrame
+from layer2.hdlc.control_field import InformationCf
+from layer2.hdlc.hdlc import HdlcIFrame
+from layer2.mac import Mac
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+from layer3.ip.ipv4 import IPv4Header
+
+N = 2_000
+
+
+def slot_names(cls: type) -> list[str]:
+    return [name for klass in cls.__mro__ for name in getattr(klass, '__slots__', ()) if name != '__weakref__']
+
+
+@lru_cache(maxsize=None)
+def dict_backed_class(cls: type) -> type:
+    return type(f"DictBacked{cls.__name__}", (cls,), {})
+
+
+def dict_backed(obj):
+    """ Copy of obj whose attributes (also) live in an instance __dict__, as they did without __slots__ """
+    copied = object.__new__(dict_backed_class(type(obj)))
+    for name in slot_names(type(obj)):
+        if hasattr(obj, name):
+            object.__setattr__(copied, name, getattr(obj, name))
+            copied.__dict__[name] = getattr(obj, name)
+    return copied
+
+
+def bytes_per_object(create: Callable[[int], object], transform: Callable[[object], object] = None) -> float:
+    """ The memory allocated per object, excluding the data that is shared with other objects """
+    originals = [create(i) for i in range(N)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [transform(o) for o in originals] if transform is not None else [create(i) for i in range(N)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / N
+
+
+def shallow_copy(obj):
+    copied = object.__new__(type(obj))
+    for name in slot_names(type(obj)):
+        if hasattr(obj, name):
+            object.__setattr__(copied, name, getattr(obj, name))
+    return copied
+
+
+def main():
+    source, destination = Mac(b'\x02\x00\x00\x00\x00\x01'), Mac(b'\x02\x00\x00\x00\x00\x02')
+    payload = bytes(100)
+    received = EthernetFrame(destination, source, payload).bytes()
+
+    cases = {
+        "Mac": lambda i: Mac(i.to_bytes(6, 'big')),
+        "EthernetFrame (decoded)": lambda i: decode_frame(received),
+        "HdlcIFrame": lambda i: HdlcIFrame(1, InformationCf(False, i, i), payload),
+        "PppFrame": lambda i: PppFrame(PppProtocol.IPv4, payload),
+        "ARPPacket": lambda i: ARPPacket(source, IPv4Address(i), IPv4Address(i + 1)),
+        "IPv4Header": lambda i: IPv4Header.default_header(IPv4Address(i), IPv4Address(i + 1), 100),
+    }
+
+    print(f"{'object':<26}{'dict-backed':>14}{'slotted':>14}{'saved':>10}")
+    for name, create in cases.items():
+        slotted = bytes_per_object(create)
+        # Both copies share their attribute values with the originals, so the difference is the cost of the __dict__
+        dict_overhead = bytes_per_object(create, dict_backed) - bytes_per_object(create, shallow_copy)
+        with_dict = slotted + dict_overhead
+        print(f"{name:<26}{with_dict:>14.0f}{slotted:>14.0f}{100 * (1 - slotted / with_dict):>9.0f}%")
+
+
+if __name__ == '__main__':
+    main()
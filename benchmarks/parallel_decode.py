@@ -0,0 +1,43 @@
+"""
+Decoding time of a large capture of bit-stuffed HDLC frames, sequentially and with a pool of worker processes. The
+first parallel run of each pool size includes starting the worker processes.
+
+Run from the root of the repository:  python -m benchmarks.parallel_decode
+"""
+import os
+import time
+
+from layer2.frame import encode, decode
+from layer2.hdlc.control_field import InformationCf
+from layer2.hdlc.hdlc import HdlcIFrame, HdlcFrame
+from layer2.hdlc_base import HdlcMode
+
+N = 2_000
+
+
+def timed_decode(bits, workers: int) -> float:
+    start = time.perf_counter()
+    frames = decode(bits, HdlcFrame, workers=workers, mode=HdlcMode.NORMAL, extended=False)
+    elapsed = time.perf_counter() - start
+    assert len(frames) == N
+    return elapsed
+
+
+def main():
+    frames = [HdlcIFrame(i % 256, InformationCf(False, i % 8, 0), os.urandom(100)) for i in range(N)]
+    bits = encode(frames, HdlcMode.NORMAL)
+    print(f"{N} frames, {len(bits) // 8} bytes, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    HdlcFrame.separate_frames(bits)
+    print(f"{'flag separation':>20}: {time.perf_counter() - start:.3f} s")
+
+    sequential = timed_decode(bits, 1)
+    print(f"{'sequential':>20}: {sequential:.3f} s")
+    for workers in (2, 4, 8):
+        first, second = timed_decode(bits, workers), timed_decode(bits, workers)
+        print(f"{f'{workers} workers':>20}: {first:.3f} s, then {second:.3f} s ({sequential / second:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Throughput of small packets over a PPP link with and without address/control field compression (ACFC) and protocol
+field compression (PFC). Reports the number of packets per second, and the information throughput, that a 64 kbit/s
+link achieves for a range of packet sizes.
+
+Run from the root of the repository:  python -m benchmarks.ppp_header_compression
+"""
+from layer2.infrastructure.network_interface import DeviceWithInterfaces, PppInterface
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+
+N = 1_000
+BANDWIDTH = 64_000
+SIZES = (20, 40, 64, 128, 576, 1500)
+OPTIONS = {"none": (False, False), "PFC": (False, True), "ACFC": (True, False), "ACFC+PFC": (True, True)}
+
+
+class Receiver(DeviceWithInterfaces):
+    def __init__(self, clock: SimulationClock):
+        super().__init__(0)
+        self._interfaces = [PppInterface(0, self)]
+        self.clock = clock
+        self.last_received = 0.0
+
+    def receive(self, frame: PppFrame, incoming_interface_num: int) -> None:
+        self.last_received = self.clock.now
+
+
+def packets_per_second(size: int, acfc: bool, pfc: bool) -> float:
+    clock = SimulationClock()
+    sender, receiver = Receiver(clock), Receiver(clock)
+    sender._interfaces = [PppInterface(0, sender, acfc=acfc, pfc=pfc)]
+    sender.connect_to(receiver, 0, 0)
+    sender.get_interface(0).channel = Channel(clock, BANDWIDTH)
+    frame = PppFrame(PppProtocol.IPv4, bytes(size))
+    for _ in range(N):
+        sender.get_interface(0).send(frame)
+    clock.run()
+    return N / receiver.last_received
+
+
+def main():
+    print(f"Packets per second (information throughput in kbit/s) over a {BANDWIDTH // 1000} kbit/s link")
+    print(f"{'size':>6}" + "".join(f"{name:>20}" for name in OPTIONS) + f"{'gain':>8}")
+    for size in SIZES:
+        rates = [packets_per_second(size, *option) for option in OPTIONS.values()]
+        cells = "".join(f"{rate:>12.1f} ({8 * size * rate / 1000:>4.1f})" for rate in rates)
+        print(f"{size:>6}{cells}{100 * (rates[-1] / rates[0] - 1):>7.1f}%")
+
+
+if __name__ == '__main__':
+    main()
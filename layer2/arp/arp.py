@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from enum import Enum
 from ipaddress import IPv4Address
-from copy import deepcopy, copy
+from copy import copy
 from typing import Final
 
 from layer2.ethernet.ethernet import EthernetFrame, EtherType
@@ -10,9 +10,10 @@ from layer2.mac import Mac
 
 
 class ARPFrame(EthernetFrame):
+    __slots__ = ()
+
     def __init__(self, arp_packet: ARPPacket):
-        super().__init__(Mac(arp_packet.target_hw_addr), Mac(arp_packet.sender_hw_addr), arp_packet.bytes,
-                         EtherType.ARP)
+        super().__init__(arp_packet.target_mac, arp_packet.sender_mac, arp_packet.bytes, EtherType.ARP)
 
 
 class ARPOperation(Enum):
@@ -33,6 +34,8 @@ class HardwareType(Enum):
 
 
 class ARPPacket(object):
+    __slots__ = ('htype', 'ptype', 'hlen', 'plen', 'operation', 'sender_mac', 'sender_ip', 'target_mac', 'target_ip')
+
     UNKNOWN_MAC: Final = Mac(b'\xff\xff\xff\xff\xff\xff')
 
     def __init__(self, sender_hw_addr: Mac, sender_protocol_addr: IPv4Address, target_protocol_addr: IPv4Address,
@@ -43,9 +46,9 @@ class ARPPacket(object):
         self.hlen = (6).to_bytes(1, byteorder="big")
         self.plen = (4).to_bytes(1, byteorder="big")
         self.operation = operation
-        self.sender_mac = Mac(sender_hw_addr.address)
+        self.sender_mac = sender_hw_addr
         self.sender_ip = sender_protocol_addr
-        self.target_mac = Mac(target_hw_addr.address)
+        self.target_mac = target_hw_addr
         self.target_ip = target_protocol_addr
 
     @property
@@ -56,11 +59,11 @@ class ARPPacket(object):
     def get_response(self, answer_hw_address: Mac):
         if self.operation_bytes != ARPOperation.REQUEST.bytes:
             raise ValueError("Can only generate a reply to an ARP packet with REQUEST operation.")
-        response_packet: ARPPacket = deepcopy(self)
+        response_packet: ARPPacket = copy(self)
         response_packet.operation = ARPOperation.REPLY
-        response_packet.sender_mac = copy(answer_hw_address)
+        response_packet.sender_mac = answer_hw_address
         response_packet.sender_ip = self.target_ip
-        response_packet.target_mac = copy(self.sender_mac)
+        response_packet.target_mac = self.sender_mac
         response_packet.target_ip = self.sender_ip
         return ARPFrame(arp_packet=response_packet)
 
@@ -96,9 +99,9 @@ def extract_arp_packet(frame: EthernetFrame):
     hlen = int.from_bytes(frame.payload[4:5], byteorder='big')
     plen = int.from_bytes(frame.payload[5:6], byteorder='big')
     operation = ARPOperation(int.from_bytes(frame.payload[6:8], byteorder='big'))
-    sender_hw_addr = Mac(frame.payload[8:14])
+    sender_hw_addr = Mac.fromint(int.from_bytes(frame.payload[8:14], byteorder='big'))
     sender_protocol_addr = IPv4Address(int.from_bytes(frame.payload[14:18], byteorder='big'))
-    target_hw_addr = Mac(frame.payload[18:24])
+    target_hw_addr = Mac.fromint(int.from_bytes(frame.payload[18:24], byteorder='big'))
     target_protocol_addr = IPv4Address(int.from_bytes(frame.payload[24:28], byteorder='big'))
 
     if htype != HardwareType.ETHERNET:
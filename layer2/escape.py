@@ -1,3 +1,6 @@
+from layer2.frame_errors import FrameDecodeError, DropReason
+
+
 class EscapeSchema(object):
     def __init__(self, escape_byte: bytes, replacement_map: dict[bytes, bytes]):
         self._validate_input(escape_byte, replacement_map)
@@ -31,19 +34,26 @@ class EscapeSchema(object):
                 escaped += current
         return escaped
 
-    def _safe_unescape_char(self, char: bytes):
+    def _safe_unescape_char(self, char: bytes, data: bytes, strict: bool):
+        """
+        The byte that char replaces. If it isn't a replacement, a FrameDecodeError is raised when strict, or else char
+        itself is returned (the FCS check will then fail).
+        """
         try:
             return self._unescape_map[char]
-        except KeyError as e:
-            print("WARNING! Provided data was not properly escaped")
+        except KeyError:
+            if strict:
+                raise FrameDecodeError(DropReason.BAD_ESCAPE, f"Escape byte followed by {char} instead of a "
+                                                              f"replacement", data)
             return char
 
-    def unescape(self, data: bytes) -> bytes:
+    def unescape(self, data: bytes, strict: bool = False) -> bytes:
+        """ Replace the escape sequences in data, an invalid escape sequence raises a FrameDecodeError when strict """
         unescaped = bytes()
         i = 0
         while i < len(data):
             if (current := data[i:i + 1]) == self.escape_byte:
-                unescaped += self._safe_unescape_char(data[i + 1:i + 2])
+                unescaped += self._safe_unescape_char(data[i + 1:i + 2], data, strict)
                 i += 1
             else:
                 unescaped += current
@@ -1,38 +1,218 @@
-from bitstring import BitArray
+import zlib
+from enum import Enum, auto
+from typing import Final, Iterable, Generator, Optional
 
-from layer2.ethernet.ethernet import EthernetFrame, EtherType
+from bitstring import Bits
+
+from layer2.ethernet.ethernet import EthernetFrame, EtherType, VlanTag
 from layer2.ethernet.noneable_data_structures import NoneableBitArray, NoneableBytes
+from layer2.frame_errors import FrameDecodeError, DropReason
 from layer2.mac import Mac
-from layer2.tools import separate, crc32, bits_to_bytes
+from layer2.tools import crc32_to_bytes
 
 
 def decode(data: NoneableBitArray) -> list[EthernetFrame]:
-    start_flag = BitArray(auto=EthernetFrame.preamble + EthernetFrame.start_frame_delim)
-    bit_sections = separate(data, NoneableBitArray.from_bits(start_flag), [None] * EthernetFrame.inter_packet_gap_size)
-    return [decode_frame(bits_to_bytes(frame_bytes)) for frame_bytes in bit_sections]
+    if not isinstance(data, NoneableBitArray):
+        data = NoneableBitArray(data)
+    start_flag = Bits(bytes=EthernetFrame.preamble + EthernetFrame.start_frame_delim)
+    bit_sections = data.separate(NoneableBitArray.from_bits(start_flag), EthernetFrame.inter_packet_gap_size)
+    return [decode_frame(frame_bits.to_bytes()) for frame_bits in bit_sections]
 
 
 def decode_bytes(data: NoneableBytes) -> list[EthernetFrame]:
-    start_flag = list(EthernetFrame.preamble + EthernetFrame.start_frame_delim)
-    end_flag = NoneableBytes.nones(int(EthernetFrame.inter_packet_gap_size / 8))
-    separated_sections = separate(data, start_flag, end_flag)
-    byte_sections = [bytes([0 if x is None else x for x in frame_bytes]) for frame_bytes in separated_sections]
-    return [decode_frame(byte_section) for byte_section in byte_sections]
+    if not isinstance(data, NoneableBytes):
+        data = NoneableBytes(data)
+    start_flag = EthernetFrame.preamble + EthernetFrame.start_frame_delim
+    separated_sections = data.separate(start_flag, EthernetFrame.inter_packet_gap_size // 8)
+    return [decode_frame(frame_bytes.to_bytes()) for frame_bytes in separated_sections]
+
+
+def is_tagged(frame_bytes: bytes | memoryview) -> bool:
+    """ Whether the frame in frame_bytes has an 802.1Q VLAN tag """
+    return frame_bytes[12:14] == VlanTag.TPID_BYTES
 
 
-def decode_frame(frame_bytes: bytes) -> EthernetFrame:
+def payload_size(frame_bytes: bytes | memoryview) -> int:
+    """ The size of the payload of the frame in frame_bytes, i.e. without its header, VLAN tag and FCS """
+    return len(frame_bytes) - (18 + VlanTag.SIZE if is_tagged(frame_bytes) else 18)
+
+
+def decode_frame(frame_bytes: bytes | memoryview) -> EthernetFrame:
+    """
+    Create an EthernetFrame from the provided bytes, or throw a FrameDecodeError if the bytes are corrupted. The payload
+    of the frame is a view into frame_bytes, so no copy is made of it. Frames with an 802.1Q tag are 4 bytes longer.
     """
-    Create an EthernetFrame from the provided bytes, or throw an ValueError if the bytes are corrupted
+    view = memoryview(frame_bytes)
+    header_size = 14 + VlanTag.SIZE if is_tagged(view) else 14
+    if (n := len(view)) < header_size + 4:
+        message = f"Received frame of length {n} which can't be processed as Ethernet."
+        raise FrameDecodeError(DropReason.SHORT_FRAME, message, frame_bytes)
+    if n > EthernetFrame.MAX_JUMBO_PAYLOAD + header_size + 4:
+        message = f"Received frame of length {n}, the largest jumbo frame is " \
+                  f"{EthernetFrame.MAX_JUMBO_PAYLOAD + header_size + 4}."
+        raise FrameDecodeError(DropReason.OVERSIZE_FRAME, message, frame_bytes)
+    fcs = view[-4:].tobytes()
+    crc = zlib.crc32(view[:-4])
+    if fcs != (calculated_fcs := crc32_to_bytes(crc)):
+        message = f"The calculated FCS '{calculated_fcs}' does not equal FCS of the received frame: '{fcs}'"
+        raise FrameDecodeError(DropReason.BAD_FCS, message, frame_bytes)
+
+    mac_dest = Mac.fromint(int.from_bytes(view[0:6], byteorder='big'))
+    mac_src = Mac.fromint(int.from_bytes(view[6:12], byteorder='big'))
+    vlan = None
+    if header_size > 14:
+        try:
+            vlan = VlanTag.fromint(int.from_bytes(view[14:16], byteorder='big'))
+        except ValueError as e:
+            raise FrameDecodeError(DropReason.MALFORMED, str(e), frame_bytes) from e
+    try:
+        ether_type = EtherType(int.from_bytes(view[header_size - 2:header_size], byteorder='big'))
+    except ValueError as e:
+        raise FrameDecodeError(DropReason.UNKNOWN_PROTOCOL, str(e), frame_bytes) from e
+    payload = view[header_size:-4]
+
+    frame = EthernetFrame(mac_dest, mac_src, payload, ether_type, vlan)
+    if len(payload) >= EthernetFrame.MIN_PAYLOAD:  # Else it was padded, so the received bytes are not its wire image
+        frame._seed_cache(crc, frame_bytes)
+    return frame
+
+
+class DeframerState(Enum):
+    IDLE = auto()  # No signal on the line
+    PREAMBLE = auto()  # Receiving the alternating bits of the preamble
+    SFD = auto()  # Receiving the start frame delimiter
+    PAYLOAD = auto()  # Receiving the frame itself, which lasts until the signal drops
+    GAP = auto()  # Waiting for the inter packet gap to pass, any bits received in this state are discarded
+
+
+class EthernetDeframer(object):
     """
-    mac_dest = Mac(frame_bytes[0:6])
-    mac_src = Mac(frame_bytes[6:12])
-    ether_type = EtherType(int.from_bytes(frame_bytes[12:14], byteorder='big'))
-    payload = frame_bytes[14:-4]
-    fcs = frame_bytes[-4:]
-
-    calculated_fcs = crc32(frame_bytes[:-4])
-    if fcs != calculated_fcs:
-        raise ValueError(f"The calculated FCS '{calculated_fcs}' does not equal FCS of the received frame: '{fcs}'",
-                         mac_dest, mac_src, ether_type, frame_bytes)
-
-    return EthernetFrame(mac_dest, mac_src, payload, ether_type)
+    Incremental counterpart of decode(): the bits coming from the physical layer (None if there was no signal) are fed
+    in as they arrive and frames are emitted as soon as they are complete, so only the frame that is currently being
+    received is kept in memory. Frames that cannot be accepted are dropped and counted instead of raising an error,
+    among which frames with a payload larger than the MTU. The payload of tagged frames may be as large as the MTU.
+    """
+    MIN_FRAME_SIZE: Final = EthernetFrame.MIN_PAYLOAD + 18
+    _PREAMBLE_SIZE: Final = 8 * len(EthernetFrame.preamble)
+    _SFD: Final = int.from_bytes(EthernetFrame.start_frame_delim, byteorder='big')
+
+    def __init__(self, mtu: int = EthernetFrame.MAX_PAYLOAD):
+        if not EthernetFrame.MIN_PAYLOAD <= mtu <= EthernetFrame.MAX_JUMBO_PAYLOAD:
+            raise ValueError(f"The MTU should be between {EthernetFrame.MIN_PAYLOAD} and "
+                             f"{EthernetFrame.MAX_JUMBO_PAYLOAD} bytes, got {mtu}")
+        self.mtu = mtu
+        self.max_frame_size = mtu + 18 + VlanTag.SIZE  # If the frame is tagged
+        self.state = DeframerState.IDLE
+        self._bit_count = 0  # Bits of the preamble, SFD or current byte received so far, or the length of the gap
+        self._byte = 0
+        self._buffer = bytearray()
+
+        self.frames_received = 0
+        self.runt_frames = 0
+        self.oversize_frames = 0
+        self.bad_fcs_frames = 0
+        self.malformed_frames = 0
+
+    def feed(self, bits: Iterable[bool | None]) -> list[EthernetFrame]:
+        """ Process the next bits of the signal, returns the frames that were completed by them """
+        frames = []
+        for bit in bits:
+            if (frame := self._step(bit)) is not None:
+                frames.append(frame)
+        return frames
+
+    def flush(self) -> list[EthernetFrame]:
+        """ Signal the end of the stream: a frame that is still being received is ended as if the signal dropped """
+        frame = self._end_of_frame() if self.state is DeframerState.PAYLOAD else None
+        self._to_state(DeframerState.IDLE)
+        return [frame] if frame is not None else []
+
+    def frames(self, source: Iterable[bool | None]) -> Generator[EthernetFrame, None, None]:
+        """ Generator stage that turns a stream of bits, e.g. the output of the layer1 decoder, into frames """
+        for bit in source:
+            if (frame := self._step(bit)) is not None:
+                yield frame
+        yield from self.flush()
+
+    def _to_state(self, state: DeframerState) -> None:
+        self.state = state
+        self._bit_count = 0
+        self._byte = 0
+
+    def _discard(self) -> None:
+        self.malformed_frames += 1
+        self._to_state(DeframerState.GAP)
+
+    def _step(self, bit: bool | None) -> Optional[EthernetFrame]:
+        state = self.state
+        if state is DeframerState.PAYLOAD:
+            if bit is None:
+                return self._end_of_frame()
+            self._byte = (self._byte << 1) | bit
+            self._bit_count += 1
+            if self._bit_count == 8:
+                self._buffer.append(self._byte)
+                self._bit_count = 0
+                self._byte = 0
+                if len(self._buffer) > self.max_frame_size:
+                    self.oversize_frames += 1
+                    self._buffer.clear()
+                    self._to_state(DeframerState.GAP)
+        elif state is DeframerState.GAP:
+            if bit is None:
+                self._bit_count += 1
+                if self._bit_count >= EthernetFrame.inter_packet_gap_size:
+                    self._to_state(DeframerState.IDLE)
+            else:
+                if self._bit_count > 0:  # A new transmission started before the gap passed, so it is dropped
+                    self.malformed_frames += 1
+                self._bit_count = 0
+        elif state is DeframerState.IDLE:
+            if bit is not None:
+                self._to_state(DeframerState.PREAMBLE)
+                self._step(bit)
+        elif bit is None:
+            self.malformed_frames += 1
+            self._to_state(DeframerState.IDLE)
+        elif state is DeframerState.PREAMBLE:
+            if bit != (self._bit_count % 2 == 0):  # The preamble is 1010...10
+                self._discard()
+                return None
+            self._bit_count += 1
+            if self._bit_count == self._PREAMBLE_SIZE:
+                self._to_state(DeframerState.SFD)
+        elif state is DeframerState.SFD:
+            self._byte = (self._byte << 1) | bit
+            self._bit_count += 1
+            if self._bit_count == 8:
+                if self._byte != self._SFD:
+                    self._discard()
+                    return None
+                self._buffer.clear()
+                self._to_state(DeframerState.PAYLOAD)
+        return None
+
+    def _end_of_frame(self) -> Optional[EthernetFrame]:
+        misaligned = self._bit_count != 0
+        frame_bytes = bytes(self._buffer)
+        self._buffer.clear()
+        self._to_state(DeframerState.GAP)
+        self._bit_count = 1  # The bit that ended the frame already belongs to the gap
+
+        if misaligned:
+            self.malformed_frames += 1
+        elif len(frame_bytes) < self.MIN_FRAME_SIZE:
+            self.runt_frames += 1
+        elif payload_size(frame_bytes) > self.mtu:
+            self.oversize_frames += 1
+        elif zlib.crc32(frame_bytes[:-4]) != int.from_bytes(frame_bytes[-4:], byteorder='little'):
+            self.bad_fcs_frames += 1
+        else:
+            try:
+                frame = decode_frame(frame_bytes)
+            except ValueError:
+                self.malformed_frames += 1
+                return None
+            self.frames_received += 1
+            return frame
+        return None
@@ -1,55 +1,92 @@
-from abc import ABC, abstractmethod
+from __future__ import annotations
+
+import warnings
+from abc import abstractmethod
 from enum import Enum
-from typing import Final
+from typing import Final, Optional
 
-from bitstring import BitArray
+from bitstring import Bits
 
+from layer2.fcs import FcsProtectedFrame
 from layer2.mac import Mac
-from layer2.tools import crc32
 
 
-class EthernetFrameBase(ABC):
+class EthernetFrameBase(FcsProtectedFrame):
+    __slots__ = ('_destination', '_source', '_other_headers', '_payload', '_phys_bytes', '_phys_bits')
+
     preamble: Final = int("10" * 28, 2).to_bytes(7, byteorder="big")
     start_frame_delim: Final = int("10101011", 2).to_bytes(1, byteorder="big")
     inter_packet_gap_size: Final = 96
 
     MIN_PAYLOAD = 46
-    MAX_PAYLOAD = 1500
+    MAX_PAYLOAD = 1500  # The standard MTU, interfaces may be configured for up to MAX_JUMBO_PAYLOAD
+    MAX_JUMBO_PAYLOAD = 9216
 
     @abstractmethod
     def __init__(self, destination: Mac, source: Mac, payload: bytes, other_headers: bytes) -> None:
-        if len(payload) > self.MAX_PAYLOAD:
-            raise ValueError(f"Max payload size si {self.MAX_PAYLOAD} bytes, received {len(payload)} bytes.")
+        self._destination = destination
+        self._source = source
+        self._other_headers = other_headers
+        self._payload = self._padded(payload)
+        self._reset_fcs_cache()
+
+    def _padded(self, payload: bytes | memoryview) -> bytes | memoryview:
+        if len(payload) > self.MAX_JUMBO_PAYLOAD:
+            raise ValueError(f"Max payload size is {self.MAX_JUMBO_PAYLOAD} bytes, received {len(payload)} bytes.")
         if len(payload) < self.MIN_PAYLOAD:
-            payload += bytearray(self.MIN_PAYLOAD - len(payload))
-
-        self.destination = destination
-        self.source = source
-        self.other_headers = other_headers
-        self.payload = payload
-        self.fcs = self.calculate_fcs()
-
-    def calculate_fcs(self):
-        all_data = self.destination.address + self.source.address + self.other_headers + self.payload
-        return crc32(all_data)
+            payload = bytes(payload) + bytes(self.MIN_PAYLOAD - len(payload))
+        return payload
 
-    def bytes(self):
-        return self.destination.address + self.source.address + self.other_headers + self.payload + self.fcs
-
-    def phys_bytes(self):
-        return self.preamble + self.start_frame_delim + self.bytes()
-
-    def bits(self):
-        return BitArray(auto=self.bytes())
+    @property
+    def destination(self) -> Mac:
+        return self._destination
 
-    def phys_bits(self):
-        return BitArray(auto=self.phys_bytes())
+    @property
+    def source(self) -> Mac:
+        return self._source
 
-    def __eq__(self, other):
-        return isinstance(other, self.__class__) and other.bytes() == self.bytes()
+    @property
+    def other_headers(self) -> bytes:
+        return self._other_headers
 
-    def fcs_is_valid(self):
-        return self.fcs == self.calculate_fcs()
+    @property
+    def payload(self) -> bytes:
+        return self._payload
+
+    def header_fields(self) -> tuple[bytes, ...]:
+        return self._destination.address, self._source.address, self._other_headers
+
+    def payload_field(self) -> bytes:
+        return self._payload
+
+    def replace(self, destination: Mac = None, source: Mac = None, payload: bytes = None):
+        """
+        Create a copy of this frame with the given fields replaced. The FCS of the copy is calculated lazily, when it is
+        needed; payloads are far below CRC_COMBINE_THRESHOLD, so it is never combined from the FCS of this frame.
+        """
+        changes = {}
+        if destination is not None:
+            changes['_destination'] = destination
+        if source is not None:
+            changes['_source'] = source
+        if payload is not None:
+            changes['_payload'] = self._padded(payload)
+        return self._derive(payload is not None, **changes)
+
+    def _reset_serialization(self) -> None:
+        super()._reset_serialization()
+        self._phys_bytes = None
+        self._phys_bits = None
+
+    def phys_bytes(self) -> bytes:
+        if self._phys_bytes is None:
+            self._phys_bytes = self.preamble + self.start_frame_delim + self.bytes()
+        return self._phys_bytes
+
+    def phys_bits(self) -> Bits:
+        if self._phys_bits is None:
+            self._phys_bits = Bits(bytes=self.phys_bytes())
+        return self._phys_bits
 
 
 class EtherType(Enum):
@@ -67,15 +104,98 @@ class EtherType(Enum):
         return self.value.to_bytes(2, byteorder="big")
 
 
+class VlanTag(object):
+    """
+    An IEEE 802.1Q tag, which is inserted between the source address and the EtherType. Its tag control information
+    consists of the priority code point (0-7), the drop eligible indicator and the VLAN identifier. VLAN 0 means that
+    the frame only carries a priority, and VLAN 4095 is reserved.
+    """
+    __slots__ = ('vid', 'pcp', 'dei')
+
+    TPID: Final = 0x8100  # The tag protocol identifier, in the place of the EtherType
+    TPID_BYTES: Final = TPID.to_bytes(2, byteorder='big')
+    SIZE: Final = 4
+
+    def __init__(self, vid: int, pcp: int = 0, dei: bool = False):
+        if not 0 <= vid < 4095:
+            raise ValueError(f"The VLAN identifier should be between 0 and 4094, got {vid}")
+        if not 0 <= pcp < 8:
+            raise ValueError(f"The priority code point should be between 0 and 7, got {pcp}")
+        self.vid = vid
+        self.pcp = pcp
+        self.dei = dei
+
+    @classmethod
+    def fromint(cls, tci: int) -> VlanTag:
+        """ The tag with the given tag control information """
+        return cls(tci & 0xFFF, tci >> 13, bool(tci & 0x1000))
+
+    @property
+    def tci(self) -> int:
+        return self.pcp << 13 | self.dei << 12 | self.vid
+
+    @property
+    def bytes(self) -> bytes:
+        return self.TPID_BYTES + self.tci.to_bytes(2, byteorder='big')
+
+    def with_vid(self, vid: int) -> VlanTag:
+        """ This tag for another VLAN, with the same priority and drop eligibility """
+        return self if vid == self.vid else VlanTag(vid, self.pcp, self.dei)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, VlanTag) and other.tci == self.tci
+
+    def __hash__(self) -> int:
+        return hash(self.tci)
+
+    def __repr__(self):
+        return f"VlanTag(vid={self.vid}, pcp={self.pcp}, dei={self.dei})"
+
+
 class EthernetFrame(EthernetFrameBase):
+    """ An Ethernet II frame, optionally with an 802.1Q VLAN tag """
+    __slots__ = ('_ether_type', '_vlan')
+
     MIN_PAYLOAD: Final = 46
     MAX_PAYLOAD: Final = 1500
+    MAX_JUMBO_PAYLOAD: Final = 9216
 
-    def __init__(self, destination: Mac, source: Mac, payload: bytes, ether_type: EtherType = EtherType.IPV4) -> None:
+    def __init__(self, destination: Mac, source: Mac, payload: bytes, ether_type: EtherType = EtherType.IPV4,
+                 vlan: VlanTag = None) -> None:
         if not (ether_type == EtherType.IPV4 or ether_type == EtherType.IPV6 or ether_type == EtherType.ARP):
             raise ValueError("This ether type is not yet implemented")
-        super().__init__(destination, source, payload, ether_type.to_bytes())
-        self.ether_type = ether_type
+        super().__init__(destination, source, payload, self._tag_and_type(vlan, ether_type))
+        self._ether_type = ether_type
+        self._vlan = vlan
+
+    @property
+    def ether_type(self) -> EtherType:
+        return self._ether_type
+
+    @property
+    def vlan(self) -> Optional[VlanTag]:
+        return self._vlan
+
+    def replace(self, destination: Mac = None, source: Mac = None, payload: bytes = None,
+                ether_type: EtherType = None) -> EthernetFrame:
+        """ See EthernetFrameBase.replace, the EtherType is part of the header. The VLAN tag is replaced by tagged. """
+        frame = super().replace(destination, source, payload)
+        if ether_type is None or ether_type is self._ether_type:
+            return frame
+        return frame._derive(False, _ether_type=ether_type, _other_headers=self._tag_and_type(self._vlan, ether_type))
+
+    @staticmethod
+    def _tag_and_type(vlan: Optional[VlanTag], ether_type: EtherType) -> bytes:
+        return ether_type.to_bytes() if vlan is None else vlan.bytes + ether_type.to_bytes()
+
+    def tagged(self, vlan: Optional[VlanTag]) -> EthernetFrame:
+        """
+        This frame with the given VLAN tag, or without a tag if vlan is None. The FCS is recalculated lazily, when it is
+        needed.
+        """
+        if vlan == self.vlan:
+            return self
+        return self._derive(False, _vlan=vlan, _other_headers=self._tag_and_type(vlan, self._ether_type))
 
 
 class LlcType(Enum):  # IEEE 802.1Q
@@ -92,17 +212,34 @@ class LlcType(Enum):  # IEEE 802.1Q
 
 
 class Ethernet802_3Frame(EthernetFrameBase):
+    __slots__ = ('_size', '_llc_type')
+
     MIN_PAYLOAD: Final = 42
     MAX_PAYLOAD: Final = 1500
+    MAX_JUMBO_PAYLOAD: Final = 1500  # Larger values of the length field are EtherTypes
 
     def __init__(self, destination: Mac, source: Mac, payload: bytes, llc_type: LlcType = LlcType.DEFAULT) -> None:
         if llc_type != LlcType.DEFAULT:
             raise ValueError("This LLC type is not yet implemented")
-        print("WARNING: this frame type is not implemented everywhere")
+        warnings.warn("This frame type is not implemented everywhere", stacklevel=2)
 
-        self.size = len(payload).to_bytes(2, byteorder='big')
-        if len(payload) < self.MIN_PAYLOAD:
-            payload += bytearray(self.MIN_PAYLOAD - len(payload))
+        size = len(payload).to_bytes(2, byteorder='big')  # Of the payload before it is padded
+        super().__init__(destination, source, payload, size + llc_type.to_bytes())
+        self._size = size
+        self._llc_type = llc_type
 
-        super().__init__(destination, source, payload, self.size + llc_type.to_bytes())
-        self.llc_type = llc_type
+    def replace(self, destination: Mac = None, source: Mac = None, payload: bytes = None) -> Ethernet802_3Frame:
+        """ See EthernetFrameBase.replace, the length field in the header follows a replaced payload. """
+        frame = super().replace(destination, source, payload)
+        if payload is None:
+            return frame
+        size = len(payload).to_bytes(2, byteorder='big')
+        return frame._derive(True, _size=size, _other_headers=size + self._llc_type.to_bytes())
+
+    @property
+    def size(self) -> bytes:
+        return self._size
+
+    @property
+    def llc_type(self) -> LlcType:
+        return self._llc_type
@@ -1,21 +1,293 @@
-from bitstring import BitArray
+from __future__ import annotations
 
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from bitstring import Bits
+
+_CHUNK_SIZE = 8 * 4096  # Number of elements converted at once when going from and to Python objects
+
+
+class NoneableSequence(ABC):
+    """
+    Sequence of values where each value may also be None, meaning that no signal was present. Instead of a list of
+    Python objects the values are kept in a numpy array, accompanied by a bit-packed "signal present" mask.
+    """
+
+    def __init__(self, values: Iterable = ()):
+        if isinstance(values, self.__class__):
+            self._set_state(values._values, values._mask, len(values))
+            return
+        value_chunks, mask_chunks, length = [], [], 0
+        iterator = iter(values)
+        while chunk := list(islice(iterator, _CHUNK_SIZE)):
+            value_chunks.append(self._pack_values([False if x is None else x for x in chunk]))
+            mask_chunks.append(np.packbits(np.fromiter((x is not None for x in chunk), dtype=bool, count=len(chunk))))
+            length += len(chunk)
+        self._set_state(self._concatenate_values(value_chunks, length), _concatenate_arrays(mask_chunks), length)
+
+    def _set_state(self, values: np.ndarray, mask: np.ndarray, length: int) -> None:
+        self._values = values
+        self._mask = mask
+        self._length = length
+
+    @classmethod
+    def _from_state(cls, values: np.ndarray, mask: np.ndarray, length: int):
+        sequence = cls.__new__(cls)
+        sequence._set_state(values, mask, length)
+        return sequence
+
+    @classmethod
+    def nones(cls, n: int):
+        return cls._from_state(cls._pack_values(np.zeros(n, dtype=np.uint8)), np.zeros((n + 7) // 8, dtype=np.uint8),
+                               n)
+
+    @classmethod
+    def concatenate(cls, sequences: Iterable[NoneableSequence]):
+        """ Concatenate all sequences at once, which avoids the repeated copying of chaining them with + """
+        sequences = list(sequences)
+        length = sum(len(s) for s in sequences)
+        values = cls._concatenate_values([s._values for s in sequences], length, [len(s) for s in sequences])
+        mask = _concatenate_bits([(s._mask, len(s)) for s in sequences])
+        return cls._from_state(values, mask, length)
+
+    @staticmethod
+    @abstractmethod
+    def _pack_values(values) -> np.ndarray:
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    def _unpack_values(values: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """ Unpack the values with index start up to stop into an array with one element per value """
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    def _concatenate_values(cls, arrays: list[np.ndarray], length: int, lengths: list[int] = None) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def nbytes(self) -> int:
+        """ Memory used for storing the values and the mask """
+        return self._values.nbytes + self._mask.nbytes
+
+    def mask(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """ Array with a 1 for each element in [start, stop) that carries a value and a 0 for each None """
+        return _unpack_bit_range(self._mask, start, self._length if stop is None else stop)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator:
+        for start in range(0, self._length, _CHUNK_SIZE):
+            stop = min(start + _CHUNK_SIZE, self._length)
+            values = self._unpack_values(self._values, start, stop).tolist()
+            for value, present in zip(values, self.mask(start, stop).tolist()):
+                yield self._to_python(value) if present else None
+
+    @staticmethod
+    def _to_python(value):
+        return value
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._length)
+            if step != 1:
+                return self.__class__(list(self)[item])
+            stop = max(start, stop)
+            values = self._pack_values(self._unpack_values(self._values, start, stop))
+            return self._from_state(values, np.packbits(self.mask(start, stop)), stop - start)
+        index = item + self._length if item < 0 else item
+        if not 0 <= index < self._length:
+            raise IndexError(f"Index {item} out of range for sequence of length {self._length}")
+        if not _bit_at(self._mask, index):
+            return None
+        return self._value_at(index)
+
+    @abstractmethod
+    def _value_at(self, index: int):
+        raise NotImplementedError
+
+    def __add__(self, other: Iterable):
+        if not isinstance(other, self.__class__):
+            other = self.__class__(other)
+        return self.concatenate([self, other])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, self.__class__):
+            return self._length == other._length and np.array_equal(self._mask, other._mask) and \
+                np.array_equal(self._values, other._values)
+        if isinstance(other, (list, tuple)):
+            return len(other) == self._length and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(length={self._length}, nbytes={self.nbytes})"
+
+    @abstractmethod
+    def find(self, pattern: Iterable, start: int = 0) -> Optional[int]:
+        """ Index of the first occurrence of the pattern (which may contain None) at or after start, or None """
+        raise NotImplementedError
+
+    def find_gap(self, n: int, start: int = 0) -> Optional[int]:
+        """ Index of the first run of (at least) n Nones at or after start, or None if there is no such gap """
+        if n == 0:
+            return start if start <= self._length else None
+        idx = self.mask().tobytes().find(b'\x00' * n, start)
+        return None if idx == -1 else idx
+
+    def separate(self, start_flag: Iterable, gap: int) -> list:
+        """
+        Get all blocks of this sequence that are preceded by the start_flag and succeeded by a gap of at least gap
+        Nones. Equivalent to layer2.tools.separate(data, start_flag, [None] * gap), but without rescanning the data.
+        """
+        start_flag = start_flag if isinstance(start_flag, self.__class__) else self.__class__(start_flag)
+        blocks = []
+        position = 0
+        while (start_idx := self.find(start_flag, position)) is not None:
+            block_start = start_idx + len(start_flag)
+            if (end_idx := self.find_gap(gap, block_start)) is None:
+                break
+            blocks.append(self[block_start:end_idx])
+            position = end_idx
+        return blocks
+
+
+class NoneableBitArray(NoneableSequence):
+    """
+    Bits that are either True, False or None (no signal). Both the bits and the mask are packed, so storage costs 2 bits
+    per element instead of a pointer to a Python object per element.
+    """
+
+    @staticmethod
+    def from_bits(bits: Bits):
+        length = len(bits)
+        values = np.frombuffer(bits.tobytes(), dtype=np.uint8).copy()
+        mask = np.packbits(np.ones(length, dtype=bool))
+        return NoneableBitArray._from_state(values, mask, length)
 
-class NoneableBitArray(list[bool | None]):
     @staticmethod
-    def from_bits(bits: BitArray):
-        return NoneableBitArray() + [b for b in bits]
+    def _pack_values(values) -> np.ndarray:
+        return np.packbits(np.asarray(values, dtype=bool))
+
+    @staticmethod
+    def _unpack_values(values: np.ndarray, start: int, stop: int) -> np.ndarray:
+        return _unpack_bit_range(values, start, stop)
+
+    def _value_at(self, index: int) -> bool:
+        return bool(_bit_at(self._values, index))
+
+    @classmethod
+    def _concatenate_values(cls, arrays: list[np.ndarray], length: int, lengths: list[int] = None) -> np.ndarray:
+        if lengths is None:  # All but the last array are a multiple of 8 bits long
+            return _concatenate_arrays(arrays)
+        return _concatenate_bits(list(zip(arrays, lengths)))
 
     @staticmethod
-    def nones(n: int):
-        return NoneableBitArray() + [None] * n
+    def _to_python(value):
+        return bool(value)
+
+    def _symbols(self) -> bytes:
+        """ One byte per element: 0 or 1 for the value of a bit, and 2 for None """
+        symbols = np.unpackbits(self._values, count=self._length)
+        symbols[self.mask() == 0] = 2
+        return symbols.tobytes()
+
+    def find(self, pattern: Iterable, start: int = 0) -> Optional[int]:
+        pattern = pattern if isinstance(pattern, NoneableBitArray) else NoneableBitArray(pattern)
+        if len(pattern) == 0:
+            return None
+        idx = self._symbols().find(pattern._symbols(), start)
+        return None if idx == -1 else idx
+
+    def separate(self, start_flag: Iterable, gap: int) -> list[NoneableBitArray]:
+        start_flag = start_flag if isinstance(start_flag, NoneableBitArray) else NoneableBitArray(start_flag)
+        symbols = self._symbols()  # Computed once, instead of once for every find
+        flag, gap_symbols = start_flag._symbols(), b'\x02' * gap
+        blocks = []
+        position = 0
+        while (start_idx := symbols.find(flag, position)) != -1:
+            block_start = start_idx + len(flag)
+            if (end_idx := symbols.find(gap_symbols, block_start)) == -1:
+                break
+            blocks.append(self[block_start:end_idx])
+            position = end_idx
+        return blocks
+
+    def present_bits(self) -> Bits:
+        """ All bits of this array for which a signal was present, i.e. leaving out all Nones """
+        bits = np.unpackbits(self._values, count=self._length)[self.mask() == 1]
+        return Bits(bytes=np.packbits(bits).tobytes(), length=len(bits))
+
+    def to_bytes(self) -> bytes:
+        """ The bits packed into bytes (Nones are read as 0), the last byte is padded with 0's if needed """
+        return self._values.tobytes()
+
 
+class NoneableBytes(NoneableSequence):
+    """
+    Bytes that may also be None (no signal). The bytes are kept in an uint8 array and the mask is bit-packed.
+    """
 
-class NoneableBytes(list[int | None]):
     @staticmethod
     def from_bytes(byte_data: bytes):
-        return NoneableBytes() + [x for x in byte_data]
+        length = len(byte_data)
+        values = np.frombuffer(byte_data, dtype=np.uint8).copy()
+        return NoneableBytes._from_state(values, np.packbits(np.ones(length, dtype=bool)), length)
 
     @staticmethod
-    def nones(n: int):
-        return NoneableBytes() + [None] * n
\ No newline at end of file
+    def _pack_values(values) -> np.ndarray:
+        return np.asarray(values, dtype=np.uint8)
+
+    @staticmethod
+    def _unpack_values(values: np.ndarray, start: int, stop: int) -> np.ndarray:
+        return values[start:stop]
+
+    def _value_at(self, index: int) -> int:
+        return int(self._values[index])
+
+    @classmethod
+    def _concatenate_values(cls, arrays: list[np.ndarray], length: int, lengths: list[int] = None) -> np.ndarray:
+        return _concatenate_arrays(arrays)
+
+    def find(self, pattern: Iterable, start: int = 0) -> Optional[int]:
+        pattern = list(pattern)
+        if len(pattern) == 0:
+            return None
+        if any(x is None for x in pattern):
+            raise ValueError("Searching for a pattern containing None is not supported, use find_gap instead")
+        data, pattern_bytes, mask = self._values.tobytes(), bytes(pattern), None
+        while (idx := data.find(pattern_bytes, start)) != -1:
+            mask = self.mask() if mask is None else mask
+            if mask[idx:idx + len(pattern_bytes)].all():  # A match that includes Nones is not a match
+                return idx
+            start = idx + 1
+        return None
+
+    def to_bytes(self) -> bytes:
+        """ The bytes of this sequence, where any None is read as a 0 byte """
+        return self._values.tobytes()
+
+
+def _bit_at(packed: np.ndarray, index: int) -> int:
+    return (int(packed[index >> 3]) >> (7 - (index & 7))) & 1
+
+
+def _unpack_bit_range(packed: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """ Unpack only the bits with index start up to stop, without unpacking the bits before them """
+    offset = start & ~7
+    return np.unpackbits(packed[offset >> 3:(stop + 7) >> 3], count=stop - offset)[start - offset:]
+
+
+def _concatenate_arrays(arrays: list[np.ndarray]) -> np.ndarray:
+    return np.concatenate(arrays) if len(arrays) > 0 else np.zeros(0, dtype=np.uint8)
+
+
+def _concatenate_bits(parts: list[tuple[np.ndarray, int]]) -> np.ndarray:
+    """ Concatenate bit-packed arrays, each with the given number of bits """
+    if all(length % 8 == 0 for _, length in parts[:-1]):
+        return _concatenate_arrays([packed for packed, _ in parts])
+    return np.packbits(_concatenate_arrays([np.unpackbits(packed, count=length) for packed, length in parts]))
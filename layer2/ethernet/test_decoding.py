@@ -1,8 +1,10 @@
 from unittest import TestCase
 
-from layer2.ethernet.decoding import decode, decode_bytes
+from bitstring import Bits
+
+from layer2.ethernet.decoding import decode, decode_bytes, EthernetDeframer, DeframerState, decode_frame, payload_size
 from layer2.ethernet.encoding import encode, encode_bytes
-from layer2.ethernet.ethernet import EthernetFrame
+from layer2.ethernet.ethernet import EthernetFrame, VlanTag
 from layer2.mac import Mac
 
 
@@ -33,3 +35,79 @@ class TestDecoding(TestCase):
         self.assertEqual(2, len(decoded_frames))
         self.assertEqual(frame1, decoded_frames[0])
         self.assertEqual(frame2, decoded_frames[1])
+
+    def test_deframer_emits_frames_while_bits_are_fed(self):
+        payload1 = b'This is some ASCII encoded text that we put into this ethernet frame'
+        frame1 = EthernetFrame(self.dest, self.src, payload1)
+        frame2 = EthernetFrame(self.dest, self.src, b'This is some more ASCII text {}[]~0123456789')
+        encoded = list(encode([frame1, frame2]))
+        split = 96 + len(frame1.phys_bits()) + 1  # Right after the signal of the first frame dropped
+
+        deframer = EthernetDeframer()
+        self.assertEqual([frame1], deframer.feed(encoded[:split]))
+        self.assertEqual(DeframerState.GAP, deframer.state)
+        self.assertEqual([frame2], deframer.feed(encoded[split:]))
+        self.assertEqual(DeframerState.IDLE, deframer.state)
+        self.assertEqual(2, deframer.frames_received)
+
+    def test_deframer_as_generator_stage(self):
+        frame = EthernetFrame(self.dest, self.src, b'Some payload')
+        bits = (b for b in encode([frame]))
+        self.assertEqual([frame], list(EthernetDeframer().frames(bits)))
+
+    def test_deframer_counts_dropped_frames(self):
+        frame = EthernetFrame(self.dest, self.src, b'Some payload')
+        corrupted = Bits(bytes=frame.phys_bytes()[:-1] + bytes([frame.phys_bytes()[-1] ^ 0x01]))
+        runt = Bits(bytes=frame.phys_bytes()[:40])
+        oversize = Bits(bytes=frame.phys_bytes() + bytes(1500))
+        gap = [None] * EthernetFrame.inter_packet_gap_size
+
+        deframer = EthernetDeframer()
+        for bits in (corrupted, runt, oversize):
+            self.assertEqual([], deframer.feed(list(bits) + gap))
+        self.assertEqual(1, deframer.bad_fcs_frames)
+        self.assertEqual(1, deframer.runt_frames)
+        self.assertEqual(1, deframer.oversize_frames)
+        self.assertEqual(0, deframer.malformed_frames)
+
+        self.assertEqual([frame], deframer.feed(list(frame.phys_bits()) + gap))
+
+    def test_deframer_drops_frames_with_invalid_preamble(self):
+        frame = EthernetFrame(self.dest, self.src, b'Some payload')
+        bits = list(frame.phys_bits())
+        bits[10] = not bits[10]
+        deframer = EthernetDeframer()
+        self.assertEqual([], deframer.feed(bits + [None] * EthernetFrame.inter_packet_gap_size))
+        self.assertEqual(1, deframer.malformed_frames)
+        self.assertEqual(DeframerState.IDLE, deframer.state)
+
+    def test_decode_frame_payload_is_a_view_into_the_received_buffer(self):
+        frame = EthernetFrame(self.dest, self.src, b'This is some ASCII encoded text')
+        received = bytearray(frame.bytes())
+        decoded = decode_frame(memoryview(received))
+        self.assertEqual(frame, decoded)
+        self.assertIs(received, decoded.payload.obj)
+
+    def test_deframer_accepts_jumbo_frames_up_to_its_mtu(self):
+        frame = EthernetFrame(self.dest, self.src, bytes(9000))
+        gap = [None] * EthernetFrame.inter_packet_gap_size
+        standard, jumbo = EthernetDeframer(), EthernetDeframer(mtu=9000)
+        self.assertEqual([], standard.feed(list(frame.phys_bits()) + gap))
+        self.assertEqual(1, standard.oversize_frames)
+        self.assertEqual([frame], jumbo.feed(list(frame.phys_bits()) + gap))
+        with self.assertRaises(ValueError):
+            EthernetDeframer(mtu=EthernetFrame.MAX_JUMBO_PAYLOAD + 1)
+
+    def test_decode_tagged_frame(self):
+        frame = EthernetFrame(self.dest, self.src, bytes(range(100)), vlan=VlanTag(42, pcp=3, dei=True))
+        decoded = decode_frame(frame.bytes())
+        self.assertEqual(frame, decoded)
+        self.assertEqual(VlanTag(42, pcp=3, dei=True), decoded.vlan)
+        self.assertEqual(100, payload_size(frame.bytes()))
+
+    def test_deframer_accepts_tagged_frames_within_the_mtu(self):
+        deframer = EthernetDeframer(mtu=1500)
+        frames = [EthernetFrame(self.dest, self.src, bytes(1500), vlan=VlanTag(7)),
+                  EthernetFrame(self.dest, self.src, bytes(1501), vlan=VlanTag(7))]
+        self.assertEqual(frames[:1], deframer.feed(encode(frames)))
+        self.assertEqual(1, deframer.oversize_frames)
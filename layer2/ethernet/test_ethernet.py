@@ -1,4 +1,9 @@
+import zlib
 from unittest import TestCase
+from unittest.mock import patch
+
+from bitstring import BitArray
+
 from ethernet import *
 
 
@@ -33,3 +38,106 @@ class TestEthernetFrame(TestCase):
         payload = b'Payload is way too large' * 500
         with self.assertRaises(ValueError):
             EthernetFrame(self.dest, self.src, payload)
+
+    def test_replacing_macs_derives_fcs_and_bytes(self):
+        payload = b'This is some ASCII encoded text that we put into this ethernet frame'
+        frame = EthernetFrame(self.dest, self.src, payload)
+        frame.bytes()
+
+        replaced = frame.replace(destination=self.src, source=self.dest)
+
+        expected = EthernetFrame(self.src, self.dest, payload)
+        self.assertEqual(expected.bytes(), replaced.bytes())
+        self.assertEqual(expected.fcs, replaced.fcs)
+        self.assertTrue(replaced.fcs_is_valid())
+        self.assertEqual(self.dest, frame.destination)
+
+    def test_replacing_macs_of_a_large_payload_combines_crcs(self):
+        payload = bytes(range(256)) * 36
+        frame = EthernetFrame(self.dest, self.src, payload)
+        frame.bytes()
+        with patch('layer2.fcs.CRC_COMBINE_THRESHOLD', len(payload)), patch('zlib.crc32', wraps=zlib.crc32) as crc32:
+            replaced = frame.replace(destination=self.src, source=self.dest)
+            replaced.fcs
+        self.assertTrue(all(len(call.args[0]) < len(payload) for call in crc32.call_args_list))  # Only the header
+        expected = EthernetFrame(self.src, self.dest, payload)
+        self.assertEqual(expected.fcs, replaced.fcs)
+        self.assertEqual(expected.bytes(), replaced.bytes())
+        self.assertEqual(expected, replaced)
+
+    def test_replacing_payload_recalculates_fcs_and_bytes(self):
+        frame = EthernetFrame(self.dest, self.src, b'This is payload')
+        frame.bytes()
+
+        replaced = frame.replace(payload=b'This is some other payload')
+
+        expected = EthernetFrame(self.dest, self.src, b'This is some other payload')
+        self.assertEqual(expected.bytes(), replaced.bytes())
+        self.assertTrue(replaced.fcs_is_valid())
+
+    def test_frames_are_immutable(self):
+        frame = EthernetFrame(self.dest, self.src, b'This is payload')
+        for name, value in (('destination', self.src), ('ether_type', EtherType.ARP), ('vlan', VlanTag(10))):
+            with self.assertRaises(AttributeError):
+                setattr(frame, name, value)
+
+    def test_replacing_ether_type_derives_fcs(self):
+        frame = EthernetFrame(self.dest, self.src, b'This is payload', vlan=VlanTag(10))
+        frame.fcs
+        replaced = frame.replace(ether_type=EtherType.ARP)
+        self.assertEqual(EthernetFrame(self.dest, self.src, b'This is payload', EtherType.ARP, VlanTag(10)), replaced)
+        self.assertTrue(replaced.fcs_is_valid())
+        self.assertEqual(EtherType.IPV4, frame.ether_type)
+
+    def test_802_3_frame_pads_views(self):
+        with self.assertWarns(UserWarning):
+            frame = Ethernet802_3Frame(self.dest, self.src, memoryview(b'short payload'))
+        self.assertEqual(b'short payload' + bytes(29), frame.payload)
+        self.assertEqual(13, int.from_bytes(frame.size, 'big'))
+        with self.assertRaises(AttributeError):
+            frame.size = b'\x00\x2a'
+
+    def test_replacing_the_802_3_payload_updates_the_length(self):
+        with self.assertWarns(UserWarning):
+            frame = Ethernet802_3Frame(self.dest, self.src, bytes(100))
+            expected = Ethernet802_3Frame(self.dest, self.src, bytes(200))
+        frame.bytes()
+        replaced = frame.replace(payload=bytes(200))
+        self.assertEqual(b'\x00\xc8', replaced.size)
+        self.assertEqual(expected.bytes(), replaced.bytes())
+
+    def test_wire_image_is_built_once(self):
+        frame = EthernetFrame(self.dest, self.src, b'This is payload')
+        self.assertIs(frame.bytes(), frame.bytes())
+        self.assertIs(frame.bits(), frame.bits())
+        self.assertIs(frame.phys_bits(), frame.phys_bits())
+
+    def test_equal_frames_have_equal_hashes(self):
+        frame1 = EthernetFrame(self.dest, self.src, b'This is payload')
+        frame2 = EthernetFrame(self.dest, self.src, b'This is payload')
+        self.assertEqual(frame1, frame2)
+        self.assertEqual(hash(frame1), hash(frame2))
+        self.assertEqual(1, len({frame1, frame2}))
+
+    def test_create_jumbo_frame(self):
+        payload = bytes(range(256)) * 36
+        frame = EthernetFrame(self.dest, self.src, payload)
+        self.assertEqual(EthernetFrame.MAX_JUMBO_PAYLOAD, len(frame.payload))
+        with self.assertRaises(ValueError):
+            EthernetFrame(self.dest, self.src, payload + b'\x00')
+
+    def test_vlan_tag_is_inserted_before_the_ether_type(self):
+        frame = EthernetFrame(self.dest, self.src, b'This is payload', EtherType.ARP, VlanTag(100, pcp=5))
+        self.assertEqual(bytes.fromhex('8100a0640806'), frame.bytes()[12:18])
+        self.assertEqual(VlanTag(100, pcp=5), VlanTag.fromint(frame.vlan.tci))
+        with self.assertRaises(ValueError):
+            VlanTag(4095)
+
+    def test_tagging_derives_fcs(self):
+        frame = EthernetFrame(self.dest, self.src, b'This is payload')
+        frame.fcs
+        tagged = frame.tagged(VlanTag(10))
+        self.assertEqual(EthernetFrame(self.dest, self.src, b'This is payload', vlan=VlanTag(10)), tagged)
+        self.assertTrue(tagged.fcs_is_valid())
+        self.assertEqual(frame, tagged.tagged(None))
+        self.assertIs(tagged, tagged.tagged(VlanTag(10)))
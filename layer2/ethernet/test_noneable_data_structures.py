@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+from bitstring import Bits
+
+from layer2.ethernet.noneable_data_structures import NoneableBitArray, NoneableBytes
+
+
+class TestNoneableBitArray(TestCase):
+    values = [True, None, False, False, True, None, None, True, True, False, None]
+
+    def test_round_trip_preserves_values_and_nones(self):
+        array = NoneableBitArray(self.values)
+        self.assertEqual(len(self.values), len(array))
+        self.assertEqual(self.values, list(array))
+        self.assertEqual(self.values, array)
+        self.assertEqual([self.values[i] for i in range(len(self.values))], [array[i] for i in range(len(array))])
+        self.assertEqual(self.values[-1], array[-1])
+
+    def test_slicing(self):
+        array = NoneableBitArray(self.values)
+        self.assertEqual(self.values[3:10], array[3:10])
+        self.assertEqual(self.values[::2], array[::2])
+        self.assertIsInstance(array[3:10], NoneableBitArray)
+
+    def test_concatenation_of_unaligned_arrays(self):
+        array = NoneableBitArray(self.values) + NoneableBitArray.nones(3) + [True, False]
+        self.assertEqual(self.values + [None] * 3 + [True, False], array)
+        self.assertEqual(array, NoneableBitArray.concatenate([NoneableBitArray(self.values), NoneableBitArray.nones(3),
+                                                              NoneableBitArray([True, False])]))
+
+    def test_find_pattern_and_gap(self):
+        array = NoneableBitArray(self.values)
+        self.assertEqual(3, array.find([False, True, None]))
+        self.assertEqual(7, array.find([True], start=5))
+        self.assertIsNone(array.find([False, False, False]))
+        self.assertEqual(5, array.find_gap(2))
+        self.assertIsNone(array.find_gap(3))
+
+    def test_separate(self):
+        flag = [True, True]
+        data = [None, True, True, False, True, None, None, True, True, True, None, None, True, True, False]
+        blocks = NoneableBitArray(data).separate(flag, 2)
+        self.assertEqual([[False, True], [True]], [list(block) for block in blocks])
+
+    def test_from_bits_and_present_bits(self):
+        bits = Bits(bin='1011001110')
+        array = NoneableBitArray.nones(5) + NoneableBitArray.from_bits(bits) + NoneableBitArray.nones(4)
+        self.assertEqual(bits, array.present_bits())
+        self.assertEqual(b'\x05\x9c\x00', array.to_bytes())
+
+    def test_memory_is_two_bits_per_element(self):
+        array = NoneableBitArray.nones(1_000_000)
+        self.assertEqual(250_000, array.nbytes)
+
+
+class TestNoneableBytes(TestCase):
+
+    def test_round_trip_and_concatenation(self):
+        array = NoneableBytes.from_bytes(b'\x01\x02') + NoneableBytes.nones(2) + [255, None]
+        self.assertEqual([1, 2, None, None, 255, None], array)
+        self.assertEqual(b'\x01\x02\x00\x00\xff\x00', array.to_bytes())
+
+    def test_find_ignores_matches_that_contain_nones(self):
+        array = NoneableBytes([7, None, 7, 8, None, None])
+        self.assertEqual(2, array.find(b'\x07\x08'))
+        self.assertEqual(4, array.find_gap(2))
+        self.assertIsNone(NoneableBytes([0, None]).find(b'\x00\x00'))
+
+    def test_separate(self):
+        array = NoneableBytes([1, 9, 9, 2, None, None, 9, 9, 3, 4, None, None])
+        self.assertEqual([b'\x02', b'\x03\x04'], [block.to_bytes() for block in array.separate(b'\x09\x09', 2)])
@@ -0,0 +1,108 @@
+import builtins
+import zlib
+from abc import ABC, abstractmethod
+from copy import copy
+from typing import Final
+
+from bitstring import Bits
+
+from layer2.tools import crc32_of, crc32_to_bytes, crc32_replace_prefix
+
+# Payloads from which on a CRC combination is cheaper than rehashing them with zlib, which hashes about 3 bytes per ns
+CRC_COMBINE_THRESHOLD: Final = 16384
+
+
+class FcsProtectedFrame(ABC):
+    """
+    Base for frames that consist of header fields followed by a payload, closed off with a CRC32 frame check sequence.
+
+    These frames are immutable: the wire image (bytes and bits) and the FCS are computed lazily, at most once, and are
+    also used for equality and hashing. The CRC is chained over the separate fields instead of being calculated over a
+    concatenation of them. Changed frames are derived with replace(); if only the header changes (e.g. a MAC rewrite)
+    the FCS of the derived frame is obtained by means of a CRC combination, so that a large payload is not rehashed.
+    """
+    __slots__ = ('_header_crc', '_crc', '_bytes', '_bits')
+
+    @abstractmethod
+    def header_fields(self) -> tuple[builtins.bytes, ...]:
+        """ The fields preceding the payload, in the order in which they are put on the wire """
+        raise NotImplementedError
+
+    @abstractmethod
+    def payload_field(self) -> builtins.bytes:
+        """ The field following the header fields, the FCS is appended directly after it """
+        raise NotImplementedError
+
+    def _reset_fcs_cache(self) -> None:
+        self._header_crc = None  # CRC32 of the header fields
+        self._crc = None  # CRC32 of the header fields followed by the payload, i.e. the value of the FCS
+        self._reset_serialization()
+
+    def _reset_serialization(self) -> None:
+        self._bytes = None
+        self._bits = None
+
+    def _seed_cache(self, crc: int, wire_bytes: builtins.bytes = None) -> None:
+        """
+        Fill the caches of a freshly constructed frame with values that are already known, e.g. when it was decoded from
+        received bytes whose FCS has just been verified. This way the wire image is never rebuilt when forwarding.
+        """
+        self._crc = crc
+        if type(wire_bytes) is builtins.bytes:
+            self._bytes = wire_bytes
+
+    def _header_changed(self) -> None:
+        if self._crc is not None and len(self.payload_field()) >= CRC_COMBINE_THRESHOLD:
+            new_header_crc = crc32_of(*self.header_fields())
+            self._crc = crc32_replace_prefix(self._crc, self._header_crc, new_header_crc, len(self.payload_field()))
+            self._header_crc = new_header_crc
+            self._reset_serialization()
+        else:  # Rehashed by fcs when it is needed
+            self._reset_fcs_cache()
+
+    def _derive(self, payload_changed: bool, **fields):
+        """
+        Create a copy of this frame in which the given (private) fields are replaced. Cached values are carried over as
+        far as they remain valid.
+        """
+        if self._crc is not None and self._header_crc is None:
+            self._header_crc = crc32_of(*self.header_fields())
+        frame = copy(self)
+        for name, value in fields.items():
+            setattr(frame, name, value)
+        if payload_changed:
+            frame._reset_fcs_cache()
+        else:
+            frame._header_changed()
+        return frame
+
+    @property
+    def fcs(self) -> builtins.bytes:
+        if self._crc is None:
+            if self._header_crc is None:
+                self._header_crc = crc32_of(*self.header_fields())
+            self._crc = zlib.crc32(self.payload_field(), self._header_crc)
+        return crc32_to_bytes(self._crc)
+
+    def calculate_fcs(self) -> builtins.bytes:
+        """ Calculate the FCS from scratch, i.e. without making use of any of the cached values """
+        return crc32_to_bytes(crc32_of(*self.header_fields(), self.payload_field()))
+
+    def fcs_is_valid(self) -> bool:
+        return self.fcs == self.calculate_fcs()
+
+    def bits(self) -> Bits:
+        if self._bits is None:
+            self._bits = Bits(bytes=self.bytes())
+        return self._bits
+
+    def __eq__(self, other) -> bool:
+        return self is other or (isinstance(other, self.__class__) and other.bytes() == self.bytes())
+
+    def __hash__(self) -> int:
+        return hash(self.bytes())
+
+    def bytes(self) -> builtins.bytes:
+        if self._bytes is None:
+            self._bytes = b''.join((*self.header_fields(), self.payload_field(), self.fcs))
+        return self._bytes
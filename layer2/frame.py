@@ -1,13 +1,22 @@
+import atexit
 import builtins
+import math
 from abc import ABC, abstractmethod
-from typing import Union
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Union, Final, Optional
 
 from bitstring import BitArray
 
-from layer2.tools import interleave, reduce_bits, reduce_bytes, separate
+from layer2.frame_errors import DropStatistics, FrameDecodeError
+from layer2.tools import interleave, reduce_bits, reduce_bytes
+
+PARALLEL_DECODE_THRESHOLD: Final = 2 ** 16  # Bytes of encoded data below which decode() does not use worker processes
 
 
 class Frame(ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def flag(self) -> bytes:
@@ -28,6 +37,9 @@ class Frame(ABC):
     def __eq__(self, o: object) -> bool:
         return isinstance(o, self.__class__) and o.bytes() == self.bytes()
 
+    def __hash__(self) -> int:
+        return hash(self.bytes())
+
     # ENCODING
 
     @abstractmethod
@@ -45,20 +57,42 @@ class Frame(ABC):
     @classmethod
     def separate_frames(cls, data: BitArray) -> list[BitArray]:
         """Separate data into blocks separated by the class' flag """
-        return [BitArray(auto=x) for x in separate(list(data), list(cls.flag_bits))]
+        return [data[start:end] for start, end in cls.section_bounds(data)]
+
+    @classmethod
+    def section_bounds(cls, data: BitArray) -> list[tuple[int, int]]:
+        """
+        The start and end positions of the blocks between flags, as given by layer2.tools.separate(): flags are matched
+        from left to right without overlapping each other, and the flag at the end of a block also starts the next one.
+        """
+        flag_length = len(cls.flag_bits)
+        bounds = []
+        block_start = None
+        for position in data.findall(cls.flag_bits):
+            if block_start is not None:
+                if position < block_start:  # Overlaps with the previous flag
+                    continue
+                bounds.append((block_start, position))
+            block_start = position + flag_length
+        return bounds
 
     @classmethod
-    def safe_extract_frames(cls, decoded_frame_bytes: list[bytes], **kwargs) -> list:
+    def safe_extract_frames(cls, decoded_frame_bytes: list[builtins.bytes | FrameDecodeError],
+                            drops: DropStatistics = None, **kwargs) -> list:
         """
-        Decode a Frame for each element of frames_bytes, or drop it if an error occurs.
+        Decode a Frame for each element of frames_bytes, or drop it if an error occurs or the element is the error that
+        occurred while decoding its section. Dropped frames are counted in drops, if given.
         """
         received_frames = []
         for decoded in decoded_frame_bytes:
             try:
+                if isinstance(decoded, FrameDecodeError):
+                    raise decoded
                 frame = cls.interpret_frame_from_bytes(decoded, **kwargs)
                 received_frames.append(frame)
             except ValueError as e:
-                print(f"Error while receiving frame: {e}. It will be dropped.")
+                if drops is not None:
+                    drops.record(cls, e, None if isinstance(decoded, FrameDecodeError) else decoded)
         return received_frames
 
     @classmethod
@@ -95,10 +129,68 @@ def encode_bytes(frames: list[Frame], *args) -> bytes:
     return reduce_bytes(marked_frame_boundaries)
 
 
-def decode(data: BitArray, frame_type: Frame.__class__, **kwargs) -> list[Frame]:
+def decode(data: BitArray, frame_type: Frame.__class__, workers: int = 1,
+           parallel_threshold: int = PARALLEL_DECODE_THRESHOLD, drops: DropStatistics = None, **kwargs) -> list[Frame]:
+    """
+    Decode the frames in data. With more than one worker, and at least parallel_threshold bytes of data, the separated
+    sections are decoded by a pool of worker processes, each of which gets contiguous ranges of sections. The frames
+    are then constructed in the calling process, so the result is the same as that of decoding sequentially.
+    Frames that can't be decoded are dropped, and counted in drops if given.
+    """
     bit_sections = frame_type.separate_frames(data)
-    decoded_bytes = [frame_type.decode_from(section, **kwargs) for section in bit_sections]
-    return frame_type.safe_extract_frames(decoded_bytes, **kwargs)
+    if workers > 1 and len(data) >= 8 * parallel_threshold:
+        decoded_bytes = _decode_in_parallel(bit_sections, frame_type, workers, kwargs)
+    else:
+        decoded_bytes = _decode_sections(frame_type, kwargs, bit_sections)
+    return frame_type.safe_extract_frames(decoded_bytes, drops, **kwargs)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    The pool of worker processes, which is kept for later calls to decode() with the same number of workers. A call
+    with another number of workers replaces it.
+    """
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_workers()
+        _pool, _pool_workers = ProcessPoolExecutor(workers), workers
+    return _pool
+
+
+def shutdown_workers() -> None:
+    """ Stop the worker processes of decode(), which starts new ones when it needs them again """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+atexit.register(shutdown_workers)
+
+
+def _decode_section(frame_type: Frame.__class__, kwargs: dict, section: BitArray) -> bytes | FrameDecodeError:
+    """ The decoded bytes of the section, or the FrameDecodeError if it is a frame that has to be dropped """
+    try:
+        return frame_type.decode_from(section, **kwargs)
+    except FrameDecodeError as e:
+        return e
+
+
+def _decode_sections(frame_type: Frame.__class__, kwargs: dict,
+                     sections: list[BitArray]) -> list[bytes | FrameDecodeError]:
+    return [_decode_section(frame_type, kwargs, section) for section in sections]
+
+
+def _decode_in_parallel(sections: list[BitArray], frame_type: Frame.__class__, workers: int,
+                        kwargs: dict) -> list[bytes | FrameDecodeError]:
+    chunk_size = max(math.ceil(len(sections) / (4 * workers)), 1)  # A few chunks per worker to even out the load
+    chunks = [sections[i:i + chunk_size] for i in range(0, len(sections), chunk_size)]
+    results = _process_pool(workers).map(partial(_decode_sections, frame_type, kwargs), chunks)
+    return [decoded for chunk in results for decoded in chunk]
 
 
 def decode_bytes(data: bytes, frame_type: Frame.__class__, **kwargs) -> list[Frame]:
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from collections import deque
+from enum import Enum
+from typing import Optional
+
+
+class DropReason(Enum):
+    BAD_FCS = "bad FCS"
+    SHORT_FRAME = "short frame"
+    OVERSIZE_FRAME = "frame exceeds MTU"
+    BAD_ADDRESS = "bad address"
+    BAD_CONTROL = "bad control field"
+    UNKNOWN_PROTOCOL = "unknown protocol"
+    VLAN_FILTERED = "VLAN not allowed on port"
+    BAD_ESCAPE = "invalid escape sequence"
+    MALFORMED = "malformed"  # Any other error while decoding
+
+
+class FrameDecodeError(ValueError):
+    """ Raised when received bytes can't be decoded as a frame. The data is the offending frame, if available. """
+
+    def __init__(self, reason: DropReason, message: str, data: bytes | memoryview = None):
+        super().__init__(message)
+        self.reason = reason
+        self.data = data
+
+    def __reduce__(self):  # So that it can be returned by worker processes
+        return type(self), (self.reason, str(self), None if self.data is None else bytes(self.data))
+
+
+class DroppedFrame(object):
+    """ A sample of a dropped frame, with a copy of its data """
+    __slots__ = ('frame_type', 'reason', 'message', 'data')
+
+    def __init__(self, frame_type: str, reason: DropReason, message: str, data: Optional[bytes]):
+        self.frame_type = frame_type
+        self.reason = reason
+        self.message = message
+        self.data = data
+
+    def __repr__(self):
+        return f"DroppedFrame({self.frame_type}, {self.reason}, {self.message!r}, {self.data!r})"
+
+
+class DropStatistics(object):
+    """
+    Counts the frames that were dropped because they could not be decoded, per frame type and reason. The last
+    sample_size dropped frames are kept as samples (none by default).
+    """
+
+    def __init__(self, sample_size: int = 0):
+        self.counts: dict[tuple[str, DropReason], int] = {}
+        self.samples: deque[DroppedFrame] = deque(maxlen=sample_size)
+
+    def record(self, frame_type: type | str, error: ValueError, data: bytes | memoryview = None) -> None:
+        """ Count a frame that was dropped because of the error, which is a FrameDecodeError or any other ValueError """
+        name = frame_type if isinstance(frame_type, str) else frame_type.__name__
+        reason = error.reason if isinstance(error, FrameDecodeError) else DropReason.MALFORMED
+        key = (name, reason)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.samples.maxlen:
+            if data is None and isinstance(error, FrameDecodeError):
+                data = error.data
+            self.samples.append(DroppedFrame(name, reason, str(error), None if data is None else bytes(data)))
+
+    def count(self, frame_type: type | str = None, reason: DropReason = None) -> int:
+        """ The number of dropped frames of the frame type and for the reason, or of all of them if omitted """
+        name = frame_type if frame_type is None or isinstance(frame_type, str) else frame_type.__name__
+        return sum(n for (t, r), n in self.counts.items() if name in (None, t) and reason in (None, r))
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def by_reason(self) -> dict[DropReason, int]:
+        totals: dict[DropReason, int] = {}
+        for (_, reason), n in self.counts.items():
+            totals[reason] = totals.get(reason, 0) + n
+        return totals
+
+    def by_frame_type(self) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for (frame_type, _), n in self.counts.items():
+            totals[frame_type] = totals.get(frame_type, 0) + n
+        return totals
+
+    def clear(self) -> None:
+        self.counts.clear()
+        self.samples.clear()
+
+    def __str__(self):
+        if not self.counts:
+            return "no frames dropped"
+        return ", ".join(f"{n} {frame_type} ({reason.value})" for (frame_type, reason), n in sorted(
+            self.counts.items(), key=lambda item: -item[1]))
@@ -0,0 +1,449 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from enum import Enum
+from typing import Callable, Optional
+
+from layer2.hdlc.control_field import InformationCf, ExtendedInfoCf, SupervisoryCf, ExtendedSupervisoryCf, \
+    SupervisoryType, UnnumberedCf, UnnumberedType
+from layer2.hdlc.hdlc import HdlcFrame
+from layer2.infrastructure.simulation import SimulationClock, Timer
+
+
+class ArqMode(Enum):
+    GO_BACK_N = 0  # Out-of-sequence frames are discarded and recovered with REJ
+    SELECTIVE_REJECT = 1  # Out-of-sequence frames are buffered and only the missing ones are requested with SREJ
+
+
+class LinkState(Enum):
+    DISCONNECTED = 0
+    SETUP = 1
+    CONNECTED = 2
+    DISCONNECTING = 3
+
+
+class HdlcLinkStatistics(object):
+    """ Counters of an HdlcLink. Information bytes are counted without the HDLC header and FCS. """
+
+    def __init__(self):
+        self.i_frames_sent = 0  # Including retransmissions
+        self.retransmissions = 0
+        self.s_frames_sent = 0
+        self.u_frames_sent = 0
+        self.rej_sent = 0
+        self.srej_sent = 0
+        self.rnr_sent = 0
+        self.timeouts = 0
+        self.link_failures = 0
+        self.frames_received = 0
+        self.out_of_sequence = 0
+        self.duplicates = 0
+        self.invalid_nr = 0
+        self.bytes_sent = 0  # Including retransmissions
+        self.bytes_acknowledged = 0
+        self.bytes_delivered = 0
+        self.first_transmission: Optional[float] = None
+        self.last_acknowledgement: Optional[float] = None
+
+    @property
+    def retransmission_ratio(self) -> float:
+        """ The fraction of the transmitted I-frames that were retransmissions """
+        return self.retransmissions / self.i_frames_sent if self.i_frames_sent else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """ The acknowledged information in bits per second, from the first transmission to the last acknowledgement """
+        if self.first_transmission is None or self.last_acknowledgement is None:
+            return 0.0
+        elapsed = self.last_acknowledgement - self.first_transmission
+        return 8 * self.bytes_acknowledged / elapsed if elapsed > 0 else math.inf
+
+    def __str__(self):
+        return f"{self.i_frames_sent} I-frames sent ({self.retransmissions} retransmissions, " \
+               f"{100 * self.retransmission_ratio:.1f}%), {self.rej_sent} REJ, {self.srej_sent} SREJ, " \
+               f"{self.timeouts} timeouts, {self.bytes_acknowledged} bytes acknowledged at " \
+               f"{self.throughput / 1000:.1f} kbit/s, {self.bytes_delivered} bytes delivered"
+
+
+def required_window_size(bandwidth: float, round_trip_time: float, frame_length: int) -> int:
+    """
+    The window size (in frames) needed to keep a link with the given bandwidth (bits per second) and round trip time
+    (seconds) busy when sending frames of frame_length bytes: one frame plus the bandwidth-delay product.
+    """
+    return 1 + math.ceil(bandwidth * round_trip_time / (8 * frame_length))
+
+
+class HdlcLink(object):
+    """
+    The data link procedures of a combined HDLC station in asynchronous balanced mode: link setup and disconnection
+    (SABM(E)/DISC/UA), sliding window transmission of I-frames with piggybacked acknowledgements, recovery with REJ
+    (go-back-N) or SREJ (selective reject), flow control with RNR, and a retransmission timer (T1).
+
+    When T1 expires the link does not retransmit blindly, instead it polls the remote station (RR with the P-bit set)
+    and retransmits from the N(R) of the response. Hence a window of modulus - 1 frames (7, or 127 for the extended
+    modulo-128 format) is unambiguous in both modes.
+
+    Commands are addressed to the remote station and responses carry our own address, so the remote station should be
+    configured with the addresses swapped. Frames are passed to transmit for sending, and the I-frames that are
+    received in sequence are passed to deliver.
+    """
+
+    def __init__(self, clock: SimulationClock, transmit: Callable[[HdlcFrame], None],
+                 deliver: Callable[[HdlcFrame], None], address: int, remote_address: int, window_size: int = 7,
+                 extended: bool = None, mode: ArqMode = ArqMode.GO_BACK_N, retransmission_timeout: float = 1.0,
+                 ack_delay: float = 0.0, max_retries: int = 10):
+        self.extended = window_size > 7 if extended is None else extended
+        self.modulus = 128 if self.extended else 8
+        if not 1 <= window_size < self.modulus:
+            raise ValueError(f"The window size should be between 1 and {self.modulus - 1} for modulo-{self.modulus} "
+                             f"sequence numbers, got {window_size}")
+        if address == remote_address:
+            raise ValueError("The address of the remote station should differ from our own address")
+        self.clock = clock
+        self.transmit = transmit
+        self.deliver = deliver
+        self.address = address
+        self.remote_address = remote_address
+        self.window_size = window_size
+        self.mode = mode
+        self.retransmission_timeout = retransmission_timeout
+        self.ack_delay = ack_delay
+        self.max_retries = max_retries
+        self.statistics = HdlcLinkStatistics()
+
+        self.state = LinkState.DISCONNECTED
+        self.busy = False  # Whether we are unable to accept I-frames
+        self.remote_busy = False
+        self._send_queue: deque[bytes] = deque()  # Information that has not been assigned a sequence number yet
+        self._t1: Optional[Timer] = None
+        self._ack_timer: Optional[Timer] = None
+        self._retries = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        """ Reset the state variables, outstanding frames are queued again to be sent first """
+        outstanding = getattr(self, '_outstanding', deque())
+        self._send_queue.extendleft(reversed(outstanding))
+        # Sequence numbers are counted without wrapping around, the modulus is only applied on the wire
+        self._v_a = 0  # Oldest unacknowledged sequence number
+        self._v_s = 0  # Next sequence number to assign
+        self._send_pointer = 0  # Next sequence number to (re)transmit in sequence, go-back-N sets it back
+        self._outstanding: deque[bytes] = deque()  # The information of sequence numbers v_a ... v_s - 1
+        self._selective_retransmissions: deque[int] = deque()
+        self._v_r = 0  # Next sequence number expected
+        self._acknowledged_v_r = 0  # The last N(R) sent
+        self._received: dict[int, HdlcFrame] = {}  # Out-of-sequence frames buffered in selective reject mode
+        self._srej_sent: set[int] = set()
+        self._reject_sent = False
+        self._poll_pending = False
+        self.remote_busy = False
+        self._retries = 0
+        self._stop_t1()
+        if self._ack_timer is not None:
+            self._ack_timer.cancel()
+            self._ack_timer = None
+
+    # --- Interface towards the upper layer
+
+    def connect(self) -> None:
+        """ Set up the link, information that is sent before the link is connected is queued until it is """
+        if self.state != LinkState.CONNECTED:
+            self.state = LinkState.SETUP
+            self._retries = 0
+            self._send_setup()
+
+    def disconnect(self) -> None:
+        if self.state != LinkState.DISCONNECTED:
+            self.state = LinkState.DISCONNECTING
+            self._retries = 0
+            self._send_unnumbered(UnnumberedType.DISC, command=True)
+            self._start_t1()
+
+    def send(self, information: bytes) -> None:
+        self._send_queue.append(information)
+        self._pump()
+
+    def set_busy(self, busy: bool) -> None:
+        """ Enter or leave the busy condition, in which received I-frames are discarded and RNR is sent """
+        if busy != self.busy:
+            self.busy = busy
+            if self.state == LinkState.CONNECTED:
+                self._send_supervisory(SupervisoryType.RNR if busy else SupervisoryType.RR, command=False)
+
+    @property
+    def outstanding(self) -> int:
+        """ The number of I-frames that have been sent but are not yet acknowledged """
+        return self._v_s - self._v_a
+
+    @property
+    def queued(self) -> int:
+        return len(self._send_queue)
+
+    @property
+    def idle(self) -> bool:
+        return not self._send_queue and self._v_a == self._v_s
+
+    # --- Receiving frames
+
+    def receive(self, frame: HdlcFrame) -> None:
+        self.statistics.frames_received += 1
+        command = frame.address == self.address
+        if not command and frame.address != self.remote_address:
+            return  # Not for us
+        match frame.control:
+            case InformationCf():
+                self._receive_information(frame)
+            case SupervisoryCf():
+                self._receive_supervisory(frame, command)
+            case UnnumberedCf():
+                self._receive_unnumbered(frame, command)
+
+    def _receive_unnumbered(self, frame: HdlcFrame, command: bool) -> None:
+        control: UnnumberedCf = frame.control
+        u_type = control.type
+        if command and u_type in (UnnumberedType.SABM, UnnumberedType.SABME):
+            if (u_type == UnnumberedType.SABME) != self.extended:
+                self._send_unnumbered(UnnumberedType.DM, command=False, pf=control.pf)
+                return
+            self._reset()
+            self.state = LinkState.CONNECTED
+            self._send_unnumbered(UnnumberedType.UA, command=False, pf=control.pf)
+            self._pump()
+        elif command and u_type == UnnumberedType.DISC:
+            self._reset()
+            self.state = LinkState.DISCONNECTED
+            self._send_unnumbered(UnnumberedType.UA, command=False, pf=control.pf)
+        elif not command and u_type == UnnumberedType.UA:
+            if self.state == LinkState.SETUP:
+                self._reset()
+                self.state = LinkState.CONNECTED
+                self._pump()
+            elif self.state == LinkState.DISCONNECTING:
+                self._reset()
+                self.state = LinkState.DISCONNECTED
+        elif not command and u_type == UnnumberedType.DM:
+            self._reset()
+            self.state = LinkState.DISCONNECTED
+        else:
+            self.deliver(frame)  # Unnumbered information etc. is not subject to the link procedures
+
+    def _receive_supervisory(self, frame: HdlcFrame, command: bool) -> None:
+        if self.state != LinkState.CONNECTED:
+            if command and frame.control.pf:
+                self._send_unnumbered(UnnumberedType.DM, command=False, pf=True)
+            return
+        control: SupervisoryCf = frame.control
+        if control.type == SupervisoryType.SREJ:
+            self._receive_srej(control)
+        else:
+            if not self._acknowledge(control.nr):
+                return
+            if control.type == SupervisoryType.RNR:
+                self.remote_busy = True
+                self._start_t1()  # To poll for the end of the busy condition in case the RR that ends it is lost
+            else:
+                self.remote_busy = False
+                if control.type == SupervisoryType.REJ:
+                    self._send_pointer = self._v_a
+
+        if command and control.pf:
+            self._send_supervisory(SupervisoryType.RNR if self.busy else SupervisoryType.RR, command=False, pf=True)
+        elif not command and control.pf and self._poll_pending:
+            self._checkpoint_recovery()
+        self._pump()
+
+    def _receive_srej(self, control: SupervisoryCf) -> None:
+        sequence_number = self._absolute_nr(control.nr)
+        if sequence_number is None or sequence_number == self._v_s:
+            self.statistics.invalid_nr += 1
+        elif sequence_number not in self._selective_retransmissions:
+            self._selective_retransmissions.append(sequence_number)
+
+    def _receive_information(self, frame: HdlcFrame) -> None:
+        control: InformationCf = frame.control
+        if self.state != LinkState.CONNECTED:
+            self._send_unnumbered(UnnumberedType.DM, command=False, pf=control.pf)
+            return
+        self._acknowledge(control.nr)
+
+        if self.busy:
+            self._send_supervisory(SupervisoryType.RNR, command=False, pf=control.pf)
+            return
+
+        offset = (control.ns - self._v_r) % self.modulus
+        if offset == 0:
+            self._accept(frame)
+            while (buffered := self._received.pop(self._v_r, None)) is not None:
+                self._accept(buffered)
+            self._reject_sent = False
+        elif self.mode == ArqMode.GO_BACK_N:
+            self.statistics.out_of_sequence += 1
+            if not self._reject_sent:
+                self._reject_sent = True
+                self.statistics.rej_sent += 1
+                self._send_supervisory(SupervisoryType.REJ, command=False)
+        elif offset < self.window_size and (sequence_number := self._v_r + offset) not in self._received:
+            self.statistics.out_of_sequence += 1
+            self._received[sequence_number] = frame
+            for missing in range(self._v_r, sequence_number):
+                if missing not in self._received and missing not in self._srej_sent:
+                    self._srej_sent.add(missing)
+                    self.statistics.srej_sent += 1
+                    self._send_supervisory(SupervisoryType.SREJ, command=False, nr=missing)
+        else:
+            self.statistics.duplicates += 1
+
+        if control.pf:
+            self._send_supervisory(SupervisoryType.RR, command=False, pf=True)
+        else:
+            self._schedule_acknowledgement()
+        self._pump()
+
+    def _accept(self, frame: HdlcFrame) -> None:
+        self._srej_sent.discard(self._v_r)
+        self._v_r += 1
+        self.statistics.bytes_delivered += len(frame.information)
+        self.deliver(frame)
+
+    def _absolute_nr(self, nr: int) -> Optional[int]:
+        """ The sequence number that N(R) refers to, or None if it is not in the range v_a ... v_s """
+        offset = (nr - self._v_a) % self.modulus
+        return self._v_a + offset if offset <= self._v_s - self._v_a else None
+
+    def _acknowledge(self, nr: int) -> bool:
+        """ Process an acknowledgement of all frames before N(R), returns whether N(R) was valid """
+        if (acknowledged := self._absolute_nr(nr)) is None:
+            self.statistics.invalid_nr += 1
+            return False
+        if acknowledged > self._v_a:
+            for _ in range(acknowledged - self._v_a):
+                self.statistics.bytes_acknowledged += len(self._outstanding.popleft())
+            self._v_a = acknowledged
+            self._send_pointer = max(self._send_pointer, acknowledged)
+            while self._selective_retransmissions and self._selective_retransmissions[0] < acknowledged:
+                self._selective_retransmissions.popleft()
+            self.statistics.last_acknowledgement = self.clock.now
+            self._retries = 0
+            self._stop_t1()
+            if self._v_a < self._v_s:
+                self._start_t1()
+        return True
+
+    def _checkpoint_recovery(self) -> None:
+        """ Retransmit after the response to a poll, N(R) of which has already been processed """
+        self._poll_pending = False
+        self._stop_t1()
+        if self._v_a < self._v_s:
+            if self.mode == ArqMode.GO_BACK_N:
+                self._send_pointer = self._v_a
+            elif self._v_a not in self._selective_retransmissions:
+                self._selective_retransmissions.appendleft(self._v_a)
+            self._start_t1()
+
+    # --- Sending frames
+
+    def _pump(self) -> None:
+        """ Transmit as many I-frames as the window and the remote station allow """
+        if self.state != LinkState.CONNECTED:
+            return
+        while not self.remote_busy:
+            if self._selective_retransmissions:
+                self._send_information(self._selective_retransmissions.popleft(), retransmission=True)
+            elif self._send_pointer < self._v_s:
+                self._send_pointer += 1
+                self._send_information(self._send_pointer - 1, retransmission=True)
+            elif self._send_queue and self._v_s - self._v_a < self.window_size:
+                self._outstanding.append(self._send_queue.popleft())
+                self._v_s += 1
+                self._send_pointer = self._v_s
+                self._send_information(self._v_s - 1, retransmission=False)
+            else:
+                break
+
+    def _send_information(self, sequence_number: int, retransmission: bool) -> None:
+        information = self._outstanding[sequence_number - self._v_a]
+        control_type = ExtendedInfoCf if self.extended else InformationCf
+        frame = HdlcFrame.construct_hdlc_frame(self.remote_address, control_type(False, sequence_number, self._v_r),
+                                               information)
+        statistics = self.statistics
+        statistics.i_frames_sent += 1
+        statistics.bytes_sent += len(information)
+        if retransmission:
+            statistics.retransmissions += 1
+        if statistics.first_transmission is None:
+            statistics.first_transmission = self.clock.now
+        self._acknowledged(self._v_r)
+        self.transmit(frame)
+        if self._t1 is None:
+            self._start_t1()
+
+    def _send_supervisory(self, s_type: SupervisoryType, command: bool, pf: bool = False, nr: int = None) -> None:
+        if s_type == SupervisoryType.RNR:
+            self.statistics.rnr_sent += 1
+        if s_type != SupervisoryType.SREJ:
+            nr = self._v_r
+            self._acknowledged(nr)
+        control_type = ExtendedSupervisoryCf if self.extended else SupervisoryCf
+        address = self.remote_address if command else self.address
+        self.statistics.s_frames_sent += 1
+        self.transmit(HdlcFrame.construct_hdlc_frame(address, control_type(pf, s_type, nr), None))
+
+    def _send_unnumbered(self, u_type: UnnumberedType, command: bool, pf: bool = True) -> None:
+        address = self.remote_address if command else self.address
+        self.statistics.u_frames_sent += 1
+        self.transmit(HdlcFrame.construct_hdlc_frame(address, UnnumberedCf(pf, u_type), None))
+
+    def _send_setup(self) -> None:
+        self._send_unnumbered(UnnumberedType.SABME if self.extended else UnnumberedType.SABM, command=True)
+        self._start_t1()
+
+    def _acknowledged(self, nr: int) -> None:
+        """ Register that N(R) is being sent, which makes a pending acknowledgement unnecessary """
+        self._acknowledged_v_r = nr
+        if self._ack_timer is not None:
+            self._ack_timer.cancel()
+            self._ack_timer = None
+
+    def _schedule_acknowledgement(self) -> None:
+        """ Acknowledge received I-frames, unless the acknowledgement is piggybacked on an I-frame in the meantime """
+        if self._v_r == self._acknowledged_v_r or self._ack_timer is not None:
+            return
+        if self._v_r - self._acknowledged_v_r >= self.window_size:
+            self._send_supervisory(SupervisoryType.RR, command=False)
+        else:
+            self._ack_timer = self.clock.schedule(self.ack_delay, self._acknowledgement_timeout)
+
+    def _acknowledgement_timeout(self) -> None:
+        self._ack_timer = None
+        if self._v_r != self._acknowledged_v_r and self.state == LinkState.CONNECTED:
+            self._send_supervisory(SupervisoryType.RNR if self.busy else SupervisoryType.RR, command=False)
+
+    # --- Retransmission timer
+
+    def _start_t1(self) -> None:
+        self._stop_t1()
+        self._t1 = self.clock.schedule(self.retransmission_timeout, self._t1_expired)
+
+    def _stop_t1(self) -> None:
+        if self._t1 is not None:
+            self._t1.cancel()
+            self._t1 = None
+
+    def _t1_expired(self) -> None:
+        self._t1 = None
+        self.statistics.timeouts += 1
+        self._retries += 1
+        if self._retries > self.max_retries:
+            self.statistics.link_failures += 1
+            self._reset()
+            self.state = LinkState.DISCONNECTED
+        elif self.state == LinkState.SETUP:
+            self._send_setup()
+        elif self.state == LinkState.DISCONNECTING:
+            self._send_unnumbered(UnnumberedType.DISC, command=True)
+            self._start_t1()
+        elif self.state == LinkState.CONNECTED and (self._v_a < self._v_s or self.remote_busy or self._poll_pending):
+            self._poll_pending = True
+            self._send_supervisory(SupervisoryType.RNR if self.busy else SupervisoryType.RR, command=True, pf=True)
+            self._start_t1()
@@ -1,34 +1,96 @@
 from abc import ABC, abstractmethod
 from enum import Enum
+from functools import lru_cache
+from typing import Optional
 
-from bitstring import BitArray
+from bitstring import Bits
 
 
 class ControlField(ABC):
+    """
+    The control field of an HDLC(-like) frame. Control fields are immutable and shared: there is only a single
+    instance for each encoding, which is kept in a lookup table indexed by the value of the encoding. Hence
+    constructing a control field is a table lookup once it has been seen before, and its bytes are a constant.
+    """
+    __slots__ = ('_bytes', '_pf')
+
+    byte_length = 1
+
+    @classmethod
+    def _create(cls, control_bytes: bytes, pf: bool, **fields):
+        control_field = object.__new__(cls)
+        control_field._bytes = control_bytes
+        control_field._pf = bool(pf)
+        for name, value in fields.items():
+            setattr(control_field, name, value)
+        return control_field
+
+    @classmethod
+    def _intern(cls, code: int, pf: bool, **fields):
+        table = _lookup_table(cls.byte_length)
+        if (control_field := table[code]) is None:
+            control_field = table[code] = cls._create(code.to_bytes(cls.byte_length, 'big'), pf, **fields)
+        return control_field
+
     @abstractmethod
-    def __init__(self, bits: BitArray, pf: bool):
-        self.bits = bits
-        self.pf = pf
+    def _constructor_args(self) -> tuple:
+        """ The arguments with which the constructor of this class returns this instance """
+        raise NotImplementedError
 
     @property
-    def bytes(self):
-        return self.bits.bytes
+    def pf(self) -> bool:
+        return self._pf
+
+    @property
+    def bytes(self) -> bytes:
+        return self._bytes
+
+    @property
+    def bits(self) -> Bits:
+        return Bits(bytes=self._bytes)
 
     def __eq__(self, o: object) -> bool:
-        return isinstance(o, self.__class__) and self.bits == o.bits
+        return self is o or (isinstance(o, self.__class__) and self._bytes == o._bytes)
+
+    def __hash__(self) -> int:
+        return hash(self._bytes)
+
+    def __reduce__(self):
+        return self.__class__, self._constructor_args()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memodict={}):
+        return self
 
 
 class InformationCf(ControlField):
+    __slots__ = ('_ns', '_nr')
     ns_bit_length = 3
     nr_bit_length = 3
 
-    def __init__(self, pf: bool, ns: int, nr: int):
-        self.ns = BitArray(uint=ns % 2 ** self.ns_bit_length, length=self.ns_bit_length)
-        self.nr = BitArray(uint=nr % 2 ** self.nr_bit_length, length=self.nr_bit_length)
-        super().__init__(BitArray(auto=[0] + self.ns + [pf] + self.nr), pf)
+    def __new__(cls, pf: bool, ns: int, nr: int):
+        ns %= 2 ** cls.ns_bit_length
+        nr %= 2 ** cls.nr_bit_length
+        code = (ns << (cls.nr_bit_length + 1)) | (bool(pf) << cls.nr_bit_length) | nr  # The leading bit is 0
+        return cls._intern(code, pf, _ns=ns, _nr=nr)
+
+    @property
+    def ns(self) -> int:
+        return self._ns
+
+    @property
+    def nr(self) -> int:
+        return self._nr
+
+    def _constructor_args(self) -> tuple:
+        return self._pf, self._ns, self._nr
 
 
 class ExtendedInfoCf(InformationCf):
+    __slots__ = ()
+    byte_length = 2
     ns_bit_length = 7
     nr_bit_length = 7
 
@@ -58,18 +120,33 @@ class SupervisoryType(Enum):
 
 
 class SupervisoryCf(ControlField):
+    __slots__ = ('_type', '_nr')
     s_type_length = 2
     s_type_bit_length = s_type_length
     nr_bit_length = 3
 
-    def __init__(self, pf: bool, s_type: SupervisoryType, nr: int):
-        self.type = s_type
-        type_bits = BitArray(uint=s_type.code % 2 ** self.s_type_length, length=self.s_type_bit_length)
-        self.nr = BitArray(uint=nr % 2 ** self.nr_bit_length, length=self.nr_bit_length)
-        super().__init__(BitArray(auto=[1, 0] + type_bits + [pf] + self.nr), pf)
+    def __new__(cls, pf: bool, s_type: SupervisoryType, nr: int):
+        nr %= 2 ** cls.nr_bit_length
+        code = (0b10 << (cls.s_type_bit_length + 1 + cls.nr_bit_length)) | \
+               ((s_type.code % 2 ** cls.s_type_length) << (cls.nr_bit_length + 1)) | \
+               (bool(pf) << cls.nr_bit_length) | nr
+        return cls._intern(code, pf, _type=s_type, _nr=nr)
+
+    @property
+    def type(self) -> SupervisoryType:
+        return self._type
+
+    @property
+    def nr(self) -> int:
+        return self._nr
+
+    def _constructor_args(self) -> tuple:
+        return self._pf, self._type, self._nr
 
 
 class ExtendedSupervisoryCf(SupervisoryCf):
+    __slots__ = ()
+    byte_length = 2
     s_type_length = 2
     s_type_bit_length = 6  # to pad with 4 zeroes
     nr_bit_length = 7
@@ -120,11 +197,61 @@ class UnnumberedType(Enum):
 
 
 class UnnumberedCf(ControlField):
+    __slots__ = ('_type',)
     m1_bits = 2
     m2_bits = 3
 
-    def __init__(self, pf: bool, u_type: UnnumberedType):
-        self.type = u_type
-        self.m1 = BitArray(uint=u_type.m1 % 2 ** self.m1_bits, length=self.m1_bits)
-        self.m2 = BitArray(uint=u_type.m2 % 2 ** self.m2_bits, length=self.m2_bits)
-        super().__init__(BitArray(auto=[1, 1] + self.m1 + [pf] + self.m2), pf)
+    def __new__(cls, pf: bool, u_type: UnnumberedType):
+        m1 = u_type.m1 % 2 ** cls.m1_bits
+        m2 = u_type.m2 % 2 ** cls.m2_bits
+        code = (0b11 << (cls.m1_bits + 1 + cls.m2_bits)) | (m1 << (cls.m2_bits + 1)) | (bool(pf) << cls.m2_bits) | m2
+        return cls._intern(code, pf, _type=u_type)
+
+    @property
+    def type(self) -> UnnumberedType:
+        return self._type
+
+    @property
+    def m1(self) -> int:
+        return self._type.m1
+
+    @property
+    def m2(self) -> int:
+        return self._type.m2
+
+    def _constructor_args(self) -> tuple:
+        return self._pf, self._type
+
+
+@lru_cache(maxsize=None)
+def _lookup_table(byte_length: int) -> list[Optional[ControlField]]:
+    """ The table with the control fields that are encoded with byte_length bytes, filled as they are encountered """
+    return [None] * 2 ** (8 * byte_length)
+
+
+def decode_control_field(control_bytes: bytes) -> ControlField:
+    """
+    The control field encoded by the given (1 or 2) control_bytes. Raises a ValueError if they're not a valid encoding.
+    """
+    if len(control_bytes) not in (1, 2):
+        raise ValueError(f"A control field consists of 1 or 2 bytes, got {len(control_bytes)} bytes instead.")
+    extended = len(control_bytes) == 2
+    code = int.from_bytes(control_bytes, byteorder='big')
+    if (control_field := _lookup_table(len(control_bytes))[code]) is not None:
+        return control_field
+
+    if extended:
+        pf = (code >> 7) & 1
+        if not code & 0x8000:  # I-Frame = 0...
+            return ExtendedInfoCf(pf, ns=(code >> 8) & 0x7F, nr=code & 0x7F)
+        elif not code & 0x4000:  # S-Frame = 10...
+            return ExtendedSupervisoryCf(pf, SupervisoryType((code >> 8) & 0x3F), nr=code & 0x7F)
+        raise ValueError(f"Control field {control_bytes} is not valid, U-frames have a control field of a single byte")
+    else:
+        pf = (code >> 3) & 1
+        if not code & 0x80:  # I-Frame = 0...
+            return InformationCf(pf, ns=(code >> 4) & 0x07, nr=code & 0x07)
+        elif not code & 0x40:  # S-Frame = 10...
+            return SupervisoryCf(pf, SupervisoryType((code >> 4) & 0x03), nr=code & 0x07)
+        else:  # U-Frame = 11...
+            return UnnumberedCf(pf, UnnumberedType(((code >> 4) & 0x03, code & 0x07)))
@@ -1,16 +1,18 @@
 from __future__ import annotations
 
+import zlib
 from abc import abstractmethod
 
-from bitstring import BitArray
-
 from layer2.hdlc.control_field import ControlField, InformationCf, SupervisoryCf, UnnumberedCf, ExtendedInfoCf, \
-    ExtendedSupervisoryCf, SupervisoryType, UnnumberedType
+    ExtendedSupervisoryCf, SupervisoryType, UnnumberedType, decode_control_field
+from layer2.frame_errors import FrameDecodeError, DropReason
 from layer2.hdlc_base import HdlcLikeBaseFrame
-from layer2.tools import crc32, bits_to_int
+from layer2.tools import crc32_to_bytes
 
 
 class HdlcFrame(HdlcLikeBaseFrame):
+    __slots__ = ()
+
     @abstractmethod
     def __init__(self, address: int, control: ControlField, information: bytes = None) -> None:
         super().__init__(address, control, information, optional_field=None)
@@ -20,66 +22,50 @@ class HdlcFrame(HdlcLikeBaseFrame):
         return HdlcFrame.decode_frame_from_bytes(decoded_bytes, kwargs['extended'])
 
     @staticmethod
-    def decode_frame_from_bytes(frame_bytes: bytes, extended: bool) -> HdlcFrame:
+    def decode_frame_from_bytes(frame_bytes: bytes | memoryview, extended: bool) -> HdlcFrame:
         """
-        Decode a single HDLC frame from the provided frame_bytes, or raise an ValueError if bytes are not compatible.
+        Decode a single HDLC frame from the provided frame_bytes, or raise a FrameDecodeError if bytes are not
+        compatible.
+        The information field of the frame is a view into frame_bytes, so no copy is made of it.
         """
         if (n := len(frame_bytes)) < 6:
-            raise ValueError(f"Received frame of length {n} which can't be processed as HDLC.", n)
-
-        end_control_index = 3 if (not HdlcFrame.is_u_frame(frame_bytes[1:2]) and extended) else 2
-        address = frame_bytes[0]
-        control_bytes = frame_bytes[1:end_control_index]
-        information = frame_bytes[end_control_index:-4]
-        fcs = frame_bytes[-4:]
-
-        calculated_fcs = crc32(frame_bytes[:-4])
-        if fcs != calculated_fcs:
-            raise ValueError(f"The calculated FCS '{calculated_fcs}' does not equal FCS of the received frame: '{fcs}'",
-                             n, address, control_bytes, frame_bytes)
-
-        control_field = HdlcFrame.interpret_control_field_from(control_bytes)
-        return HdlcFrame.construct_hdlc_frame(address, control_field, information)
+            message = f"Received frame of length {n} which can't be processed as HDLC."
+            raise FrameDecodeError(DropReason.SHORT_FRAME, message, frame_bytes)
+
+        view = memoryview(frame_bytes)
+        end_control_index = 3 if (not HdlcFrame.is_u_frame(view[1:2]) and extended) else 2
+        address = view[0]
+        control_bytes = view[1:end_control_index].tobytes()
+        information = view[end_control_index:-4]
+        fcs = view[-4:].tobytes()
+
+        crc = zlib.crc32(view[:-4])
+        if fcs != (calculated_fcs := crc32_to_bytes(crc)):
+            message = f"The calculated FCS '{calculated_fcs}' does not equal FCS of the received frame: '{fcs}'"
+            raise FrameDecodeError(DropReason.BAD_FCS, message, frame_bytes)
+
+        try:
+            control_field = HdlcFrame.interpret_control_field_from(control_bytes)
+        except ValueError as e:
+            raise FrameDecodeError(DropReason.BAD_CONTROL, str(e), frame_bytes) from e
+        frame = HdlcFrame.construct_hdlc_frame(address, control_field, information)
+        frame._seed_cache(crc, frame_bytes)
+        return frame
 
     @staticmethod
     def is_u_frame(control_bytes: bytes) -> bool:
-        bits = BitArray(auto=control_bytes)
-        return bits[0] == 1 and bits[1] == 1
+        return control_bytes[0] & 0xC0 == 0xC0  # 11...
 
     @staticmethod
     def is_i_frame(control_bytes: bytes) -> bool:
-        bits = BitArray(auto=control_bytes)
-        return bits[0] == 0
+        return control_bytes[0] & 0x80 == 0  # 0...
 
     @staticmethod
     def interpret_control_field_from(control_bytes: bytes):
         """
         By interpreting the bits of the control_bytes this returns a ControlField sub-type
         """
-        extended = len(control_bytes) == 2
-        bits = BitArray(auto=control_bytes)
-
-        pf_index = 8 if extended else 4
-        part1_index = 1 if HdlcFrame.is_i_frame(control_bytes) else 2
-        pf = bits[pf_index]
-        x1 = bits_to_int(bits[part1_index:pf_index])
-        x2 = bits_to_int(bits[pf_index + 1:])
-
-        if not bits[0]:  # I-Frame = 0...
-            if extended:
-                return ExtendedInfoCf(pf, ns=x1, nr=x2)
-            else:
-                return InformationCf(pf, ns=x1, nr=x2)
-        else:
-            if not bits[1]:  # S-Frame = 10...
-                s_type = SupervisoryType(x1)
-                if extended:
-                    return ExtendedSupervisoryCf(pf, s_type, nr=x2)
-                else:
-                    return SupervisoryCf(pf, s_type, nr=x2)
-            else:  # U-Frame = 11...
-                u_type = UnnumberedType((x1, x2))
-                return UnnumberedCf(pf, u_type)
+        return decode_control_field(control_bytes)
 
     @staticmethod
     def construct_hdlc_frame(address: int, control: ControlField, information: bytes) -> HdlcFrame:
@@ -97,10 +83,12 @@ class HdlcFrame(HdlcLikeBaseFrame):
                 return HdlcSFrame(address, control)
             case UnnumberedCf():
                 return HdlcUFrame(address, control, information)
-        raise ValueError("The control field is not recognized.")
+        raise FrameDecodeError(DropReason.BAD_CONTROL, "The control field is not recognized.")
 
 
 class HdlcIFrame(HdlcFrame):
+    __slots__ = ()
+
     def __init__(self, address: int, control: InformationCf, information: bytes) -> None:
         if isinstance(control, ExtendedInfoCf):
             raise TypeError("Extended control frames not supported, please use HdlcExtendedIFrame")
@@ -108,11 +96,15 @@ class HdlcIFrame(HdlcFrame):
 
 
 class HdlcExtendedIFrame(HdlcFrame):
+    __slots__ = ()
+
     def __init__(self, address: int, control: ExtendedInfoCf, information: bytes) -> None:
         super().__init__(address, control, information)
 
 
 class HdlcSFrame(HdlcFrame):
+    __slots__ = ()
+
     def __init__(self, address: int, control: SupervisoryCf) -> None:
         if isinstance(control, ExtendedSupervisoryCf):
             raise TypeError("Extended control frames not supported, please use HdlcExtendedSFrame")
@@ -120,10 +112,14 @@ class HdlcSFrame(HdlcFrame):
 
 
 class HdlcExtendedSFrame(HdlcFrame):
+    __slots__ = ()
+
     def __init__(self, address: int, control: ExtendedSupervisoryCf) -> None:
         super().__init__(address, control)
 
 
 class HdlcUFrame(HdlcFrame):
+    __slots__ = ()
+
     def __init__(self, address: int, control: UnnumberedCf, information: bytes) -> None:
         super().__init__(address, control, information)
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import deque
+from statistics import mean
+from typing import Callable, Optional
+
+from layer2.hdlc.control_field import InformationCf, SupervisoryCf, SupervisoryType, UnnumberedCf, UnnumberedType
+from layer2.hdlc.hdlc import HdlcFrame
+from layer2.infrastructure.simulation import SimulationClock, Timer, Channel
+
+MODULUS = 8
+
+
+class SecondaryStatus(object):
+    """ The administration of the primary station for one of its secondary stations """
+
+    def __init__(self, address: int):
+        self.address = address
+        self.connected = False
+        self.setup_attempts = 0
+        self.v_r = 0  # Next sequence number expected, without wrapping around
+        self.polls = 0
+        self.timeouts = 0
+        self.frames_received = 0
+        self.bytes_received = 0
+        self.out_of_sequence = 0
+        self.last_burst = 0  # The number of I-frames received in response to the last poll
+        self.skipped = 0  # The number of polls of other secondaries since the last poll of this one
+
+
+class PollScheduler(ABC):
+    """ Decides which of the connected secondary stations the primary station polls next """
+
+    @abstractmethod
+    def select(self, secondaries: list[SecondaryStatus]) -> SecondaryStatus:
+        raise NotImplementedError
+
+
+class RoundRobinScheduler(PollScheduler):
+    def __init__(self):
+        self._last_address: Optional[int] = None
+
+    def select(self, secondaries: list[SecondaryStatus]) -> SecondaryStatus:
+        following = [s for s in secondaries if self._last_address is not None and s.address > self._last_address]
+        selected = min(following or secondaries, key=lambda s: s.address)
+        self._last_address = selected.address
+        return selected
+
+
+class WeightedScheduler(PollScheduler):
+    """
+    Smooth weighted round robin: a secondary with weight w is polled w times per cycle, and these polls are spread over
+    the cycle. Secondaries without a weight have weight 1.
+    """
+
+    def __init__(self, weights: dict[int, int]):
+        if any(weight < 1 for weight in weights.values()):
+            raise ValueError("Weights should be positive integers")
+        self.weights = weights
+        self._current: dict[int, int] = {}
+
+    def select(self, secondaries: list[SecondaryStatus]) -> SecondaryStatus:
+        total = 0
+        for secondary in secondaries:
+            weight = self.weights.get(secondary.address, 1)
+            self._current[secondary.address] = self._current.get(secondary.address, 0) + weight
+            total += weight
+        selected = max(secondaries, key=lambda s: (self._current[s.address], -s.address))
+        self._current[selected.address] -= total
+        return selected
+
+
+class BacklogAwareScheduler(PollScheduler):
+    """
+    Polls the secondary that is expected to have the most data waiting: the number of I-frames it sent in response to
+    its last poll, plus the number of times it was passed over since. Hence busy secondaries are polled more often,
+    while idle ones are still polled once every so many polls.
+    """
+
+    def select(self, secondaries: list[SecondaryStatus]) -> SecondaryStatus:
+        return max(secondaries, key=lambda s: (s.last_burst + s.skipped, -s.address))
+
+
+class PrimaryStation(object):
+    """
+    The primary station of a multi-drop line in normal response mode. The secondaries only transmit when polled, so the
+    primary controls the line: it sets up each secondary with SNRM, and then repeatedly polls one of them with an RR
+    command with the P-bit set. The polled secondary responds with its I-frames, the last of which has the F-bit set,
+    or with RR if it has nothing to send. The N(R) of the next poll acknowledges these frames. The turn of a secondary
+    also ends when nothing is received from it during the response timeout.
+    """
+
+    def __init__(self, clock: SimulationClock, transmit: Callable[[HdlcFrame], None],
+                 deliver: Callable[[HdlcFrame], None], scheduler: PollScheduler = None,
+                 response_timeout: float = 0.1, max_setup_attempts: int = 3):
+        self.clock = clock
+        self.transmit = transmit
+        self.deliver = deliver
+        self.scheduler = RoundRobinScheduler() if scheduler is None else scheduler
+        self.response_timeout = response_timeout
+        self.max_setup_attempts = max_setup_attempts
+        self.secondaries: dict[int, SecondaryStatus] = {}
+        self._current: Optional[SecondaryStatus] = None  # The secondary that is allowed to respond
+        self._timer: Optional[Timer] = None
+        self._stop_time: Optional[float] = None
+        self.active = False
+
+    def add_secondary(self, address: int) -> SecondaryStatus:
+        if address in self.secondaries:
+            raise ValueError(f"There is already a secondary station with address {address}")
+        self.secondaries[address] = status = SecondaryStatus(address)
+        return status
+
+    def start(self, duration: float = None) -> None:
+        """ Set up the secondaries and poll them, for the given duration or until stop is called """
+        self._stop_time = None if duration is None else self.clock.now + duration
+        self.active = True
+        if self._current is None:
+            self._next_turn()
+
+    def stop(self) -> None:
+        self.active = False
+
+    def _next_turn(self) -> None:
+        if not self.active or (self._stop_time is not None and self.clock.now >= self._stop_time):
+            self.active = False
+            return
+        for status in self.secondaries.values():
+            if not status.connected and status.setup_attempts < self.max_setup_attempts:
+                status.setup_attempts += 1
+                self._command(status, UnnumberedCf(True, UnnumberedType.SNRM))
+                return
+        connected = [status for status in self.secondaries.values() if status.connected]
+        if not connected:
+            self.active = False
+            return
+        selected = self.scheduler.select(connected)
+        for status in connected:
+            status.skipped += 1
+        selected.skipped = 0
+        selected.last_burst = 0
+        selected.polls += 1
+        self._command(selected, SupervisoryCf(True, SupervisoryType.RR, selected.v_r))
+
+    def _command(self, status: SecondaryStatus, control) -> None:
+        self._current = status
+        self.transmit(HdlcFrame.construct_hdlc_frame(status.address, control, None))
+        self._timer = self.clock.schedule(self.response_timeout, self._response_timeout)
+
+    def _response_timeout(self) -> None:
+        self._timer = None
+        self._current.timeouts += 1
+        self._end_turn()
+
+    def _end_turn(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._current = None
+        self.clock.schedule(0, self._next_turn)
+
+    def receive(self, frame: HdlcFrame) -> None:
+        status = self._current
+        if status is None or frame.address != status.address:
+            return  # Secondaries may only respond when they are polled
+        match frame.control:
+            case InformationCf(ns=ns) if status.connected:
+                if ns == status.v_r % MODULUS:
+                    status.v_r += 1
+                    status.frames_received += 1
+                    status.bytes_received += len(frame.information)
+                    status.last_burst += 1
+                    self.deliver(frame)
+                else:
+                    status.out_of_sequence += 1
+            case UnnumberedCf(type=UnnumberedType.UA):
+                status.connected = True
+                status.v_r = 0
+            case UnnumberedCf(type=UnnumberedType.DM):
+                status.connected = False
+        if frame.control.pf:
+            self._end_turn()
+        else:  # The secondary is still responding
+            self._timer.cancel()
+            self._timer = self.clock.schedule(self.response_timeout, self._response_timeout)
+
+
+class SecondaryStation(object):
+    """
+    A secondary station in normal response mode, which only transmits in response to a poll. Every poll carries the
+    N(R) of the primary, so the I-frames it does not acknowledge were lost and are sent again first (go-back-N).
+    """
+
+    def __init__(self, clock: SimulationClock, transmit: Callable[[HdlcFrame], None], address: int,
+                 window_size: int = MODULUS - 1):
+        if not 1 <= window_size < MODULUS:
+            raise ValueError(f"The window size should be between 1 and {MODULUS - 1}, got {window_size}")
+        self.clock = clock
+        self.transmit = transmit
+        self.address = address
+        self.window_size = window_size
+        self.connected = False
+        self._queue: deque[tuple[bytes, float]] = deque()  # Information with the time at which it was queued
+        self._outstanding: deque[tuple[bytes, float]] = deque()
+        self._v_a = 0
+        self.frames_sent = 0
+        self.retransmissions = 0
+        self.latencies: list[float] = []  # From queueing until acknowledgement by the primary
+
+    def send(self, information: bytes) -> None:
+        self._queue.append((information, self.clock.now))
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queue) + len(self._outstanding)
+
+    def receive(self, frame: HdlcFrame) -> None:
+        if frame.address != self.address or not frame.control.pf:
+            return
+        match frame.control:
+            case UnnumberedCf(type=UnnumberedType.SNRM):
+                self._queue.extendleft(reversed(self._outstanding))
+                self._outstanding.clear()
+                self._v_a = 0
+                self.connected = True
+                self._respond(UnnumberedCf(True, UnnumberedType.UA))
+            case UnnumberedCf(type=UnnumberedType.DISC):
+                self.connected = False
+                self._respond(UnnumberedCf(True, UnnumberedType.UA))
+            case SupervisoryCf(nr=nr) if self.connected:
+                self._acknowledge(nr)
+                self._send_information()
+            case _:
+                self._respond(UnnumberedCf(True, UnnumberedType.DM))
+
+    def _acknowledge(self, nr: int) -> None:
+        acknowledged = (nr - self._v_a) % MODULUS
+        if acknowledged <= len(self._outstanding):
+            for _ in range(acknowledged):
+                self.latencies.append(self.clock.now - self._outstanding.popleft()[1])
+            self._v_a += acknowledged
+
+    def _send_information(self) -> None:
+        self.retransmissions += len(self._outstanding)
+        while self._queue and len(self._outstanding) < self.window_size:
+            self._outstanding.append(self._queue.popleft())
+        if not self._outstanding:
+            self._respond(SupervisoryCf(True, SupervisoryType.RR, 0))
+        for i, (information, _) in enumerate(self._outstanding):
+            control = InformationCf(i == len(self._outstanding) - 1, self._v_a + i, 0)
+            self.frames_sent += 1
+            self.transmit(HdlcFrame.construct_hdlc_frame(self.address, control, information))
+
+    def _respond(self, control) -> None:
+        self.transmit(HdlcFrame.construct_hdlc_frame(self.address, control, None))
+
+
+class MultiDropLine(object):
+    """
+    A half-duplex line that connects a primary station with a number of secondary stations. All frames share a single
+    channel, the frames of the primary reach every secondary and the frames of the secondaries reach the primary.
+    """
+
+    def __init__(self, clock: SimulationClock, scheduler: PollScheduler = None, bandwidth: float = 64_000,
+                 delay: float = 0.0, loss_rate: float = 0.0, seed: Optional[int] = None, **kwargs):
+        self.clock = clock
+        self.channel = Channel(clock, bandwidth, delay, loss_rate, seed=seed)
+        self.primary = PrimaryStation(clock, self._transmit_to_secondaries, self._deliver, scheduler, **kwargs)
+        self.secondaries: dict[int, SecondaryStation] = {}
+        self.received: dict[int, list[bytes]] = {}
+
+    def add_secondary(self, address: int, window_size: int = MODULUS - 1) -> SecondaryStation:
+        self.primary.add_secondary(address)
+        self.secondaries[address] = secondary = SecondaryStation(self.clock, self._transmit_to_primary, address,
+                                                                 window_size)
+        self.received[address] = []
+        return secondary
+
+    def _transmit_to_secondaries(self, frame: HdlcFrame) -> None:
+        def deliver(data: bytes):
+            received = HdlcFrame.decode_frame_from_bytes(data, extended=False)
+            for secondary in self.secondaries.values():
+                secondary.receive(received)
+        self.channel.transmit(frame.bytes(), deliver)
+
+    def _transmit_to_primary(self, frame: HdlcFrame) -> None:
+        def deliver(data: bytes):
+            self.primary.receive(HdlcFrame.decode_frame_from_bytes(data, extended=False))
+        self.channel.transmit(frame.bytes(), deliver)
+
+    def _deliver(self, frame: HdlcFrame) -> None:
+        self.received[frame.address].append(bytes(frame.information))
+
+    @property
+    def utilization(self) -> float:
+        return self.channel.utilization
+
+    @property
+    def throughput(self) -> float:
+        """ The information received by the primary in bits per second """
+        received = sum(status.bytes_received for status in self.primary.secondaries.values())
+        return 8 * received / self.clock.now if self.clock.now > 0 else 0.0
+
+    def report(self) -> str:
+        lines = [f"{'address':>8}{'polls':>8}{'frames':>8}{'timeouts':>10}{'kbit/s':>10}{'mean ms':>10}{'max ms':>10}"]
+        for address, status in self.primary.secondaries.items():
+            latencies = self.secondaries[address].latencies or [0.0]
+            kbps = 8 * status.bytes_received / self.clock.now / 1000 if self.clock.now > 0 else 0.0
+            lines.append(f"{address:>8}{status.polls:>8}{status.frames_received:>8}{status.timeouts:>10}{kbps:>10.2f}"
+                         f"{1000 * mean(latencies):>10.1f}{1000 * max(latencies):>10.1f}")
+        lines.append(f"line utilization {100 * self.utilization:.1f}%, throughput {self.throughput / 1000:.2f} kbit/s")
+        return "\n".join(lines)
@@ -0,0 +1,182 @@
+from unittest import TestCase
+
+from layer2.hdlc.arq import ArqMode, LinkState, HdlcLink, required_window_size
+from layer2.frame_errors import DropReason
+from layer2.hdlc.control_field import InformationCf
+from layer2.hdlc.hdlc import HdlcFrame, HdlcIFrame
+from layer2.infrastructure.network_interface import DeviceWithInterfaces, HdlcInterface
+from layer2.infrastructure.simulation import SimulationClock, Channel
+
+
+class Station(DeviceWithInterfaces):
+    def __init__(self, name: str, extended: bool):
+        super().__init__(0, name)
+        self._interfaces = [HdlcInterface(0, self, extended)]
+        self.received: list[bytes] = []
+
+    def receive(self, frame: HdlcFrame, incoming_interface_num: int) -> None:
+        self.received.append(bytes(frame.information))
+
+
+class TestHdlcLink(TestCase):
+    messages = [f"Message number {i}".encode() for i in range(300)]
+
+    def connect(self, mode: ArqMode = ArqMode.GO_BACK_N, extended: bool = False, window_size: int = None,
+                bandwidth: float = 1e6, delay: float = 0.001, loss_rate: float = 0.0, seed: int = 0, **kwargs):
+        self.clock = SimulationClock()
+        self.a, self.b = Station("A", extended), Station("B", extended)
+        self.a.connect_to(self.b, 0, 0)
+        self.a_to_b = Channel(self.clock, bandwidth, delay, loss_rate, seed=seed)
+        self.b_to_a = Channel(self.clock, bandwidth, delay, loss_rate, seed=seed + 1)
+        self.link_a = self.a.get_interface(0).enable_arq(self.clock, 0x03, 0x01, window_size, mode, self.a_to_b,
+                                                         **kwargs)
+        self.link_b = self.b.get_interface(0).enable_arq(self.clock, 0x01, 0x03, window_size, mode, self.b_to_a,
+                                                         **kwargs)
+        self.link_a.connect()
+        self.clock.run()
+        self.assertEqual(LinkState.CONNECTED, self.link_a.state)
+        self.assertEqual(LinkState.CONNECTED, self.link_b.state)
+
+    @staticmethod
+    def drop_once(information: bytes):
+        """ A drop filter for the first (non-extended) I-frame that carries the given information """
+        dropped = []
+
+        def drop_filter(data: bytes) -> bool:
+            if not dropped and data[2:-4] == information:
+                dropped.append(data)
+                return True
+            return False
+        return drop_filter
+
+    def send_all(self, messages=None):
+        for message in self.messages if messages is None else messages:
+            self.a.get_interface(0).send_information(message)
+        self.clock.run()
+
+    def test_window_size_should_fit_sequence_numbers(self):
+        clock = SimulationClock()
+        with self.assertRaises(ValueError):
+            HdlcLink(clock, print, print, 1, 3, window_size=8, extended=False)
+        with self.assertRaises(ValueError):
+            HdlcLink(clock, print, print, 1, 3, window_size=128)
+        self.assertEqual(128, HdlcLink(clock, print, print, 1, 3, window_size=127).modulus)
+
+    def test_lossless_transfer_without_retransmissions(self):
+        self.connect()
+        self.send_all()
+        self.assertEqual(self.messages, self.b.received)
+        self.assertEqual(0, self.link_a.statistics.retransmissions)
+        self.assertEqual(len(self.messages), self.link_a.statistics.i_frames_sent)
+        self.assertEqual(sum(map(len, self.messages)), self.link_a.statistics.bytes_acknowledged)
+        self.assertTrue(self.link_a.idle)
+
+    def test_go_back_n_recovers_a_lost_frame_with_rej(self):
+        self.connect()
+        self.a_to_b.drop_filter = self.drop_once(b'Message number 3')
+        self.send_all(self.messages[:7])
+
+        self.assertEqual(self.messages[:7], self.b.received)
+        self.assertEqual(1, self.link_b.statistics.rej_sent)
+        self.assertEqual(4, self.link_a.statistics.retransmissions)  # Frames 3 up to 6 were sent before the REJ
+        self.assertEqual(0, self.link_a.statistics.timeouts)
+
+    def test_selective_reject_only_retransmits_the_lost_frame(self):
+        self.connect(ArqMode.SELECTIVE_REJECT)
+        self.a_to_b.drop_filter = self.drop_once(b'Message number 3')
+        self.send_all(self.messages[:7])
+
+        self.assertEqual(self.messages[:7], self.b.received)
+        self.assertEqual(1, self.link_b.statistics.srej_sent)
+        self.assertEqual(1, self.link_a.statistics.retransmissions)
+
+    def test_lost_last_frame_is_recovered_by_polling_after_timeout(self):
+        self.connect(retransmission_timeout=0.1)
+        self.a_to_b.drop_filter = self.drop_once(b'Message number 2')
+        self.send_all(self.messages[:3])
+
+        self.assertEqual(self.messages[:3], self.b.received)
+        self.assertEqual(1, self.link_a.statistics.timeouts)
+        self.assertEqual(1, self.link_a.statistics.retransmissions)
+
+    def test_lossy_link_delivers_everything_in_order(self):
+        for mode in ArqMode:
+            for extended in (False, True):
+                for seed in range(3):
+                    with self.subTest(mode=mode, extended=extended, seed=seed):
+                        self.connect(mode, extended, loss_rate=0.1, seed=seed, retransmission_timeout=0.05)
+                        self.send_all()
+                        self.assertEqual(self.messages, self.b.received)
+                        self.assertTrue(self.link_a.idle)
+                        self.assertGreater(self.link_a.statistics.retransmissions, 0)
+
+    def test_selective_reject_retransmits_less_than_go_back_n(self):
+        retransmissions = {}
+        for mode in ArqMode:
+            self.connect(mode, extended=True, loss_rate=0.05, seed=7, delay=0.01, retransmission_timeout=0.1)
+            self.send_all()
+            self.assertEqual(self.messages, self.b.received)
+            retransmissions[mode] = self.link_a.statistics.retransmissions
+        self.assertLess(retransmissions[ArqMode.SELECTIVE_REJECT], retransmissions[ArqMode.GO_BACK_N])
+
+    def test_window_of_bandwidth_delay_product_fills_a_long_delay_link(self):
+        frame_length = len(self.messages[0]) + 8  # address, extended control field, information and FCS
+        window_size = required_window_size(1e6, 2 * 0.02, frame_length)
+        self.assertEqual(210, window_size)  # More than modulo-128 allows, so a 127 window can't fill this link
+
+        throughput = {}
+        for window_size in (7, 63, 127):
+            self.connect(extended=True, window_size=window_size, delay=0.02)
+            self.send_all()
+            throughput[window_size] = self.link_a.statistics.throughput
+        self.assertLess(throughput[7], throughput[63])
+        self.assertLess(throughput[63], throughput[127])
+        self.assertLess(throughput[127], 1e6)
+
+    def test_acknowledgements_are_piggybacked_on_information_in_the_reverse_direction(self):
+        self.connect(ack_delay=0.01)
+        for i, message in enumerate(self.messages[:50]):
+            self.a.get_interface(0).send_information(message)
+            self.b.get_interface(0).send_information(message)
+            self.clock.run(until=0.002 * (i + 1))
+        self.clock.run()
+        self.assertEqual(self.messages[:50], self.a.received)
+        self.assertEqual(self.messages[:50], self.b.received)
+        self.assertLess(self.link_a.statistics.s_frames_sent + self.link_b.statistics.s_frames_sent, 10)
+
+    def test_busy_receiver_stops_sender(self):
+        self.connect(retransmission_timeout=0.1)
+        self.link_b.set_busy(True)
+        self.clock.run()
+        self.send_all(self.messages[:5])
+        self.assertEqual([], self.b.received)
+        self.assertTrue(self.link_a.remote_busy)
+
+        self.link_b.set_busy(False)
+        self.clock.run()
+        self.assertEqual(self.messages[:5], self.b.received)
+
+    def test_link_fails_after_max_retries(self):
+        self.connect(retransmission_timeout=0.1, max_retries=3)
+        self.a_to_b.loss_rate = 1.0
+        self.send_all(self.messages[:2])
+        self.assertEqual(LinkState.DISCONNECTED, self.link_a.state)
+        self.assertEqual(1, self.link_a.statistics.link_failures)
+        self.assertEqual(2, self.link_a.queued)  # The information is kept to be sent once the link is set up again
+
+        self.a_to_b.loss_rate = 0.0
+        self.link_a.connect()
+        self.clock.run()
+        self.assertEqual(self.messages[:2], self.b.received)
+
+    def test_frames_for_other_stations_are_dropped(self):
+        self.connect()
+        stray = HdlcIFrame(0x07, InformationCf(True, 0, 0), b'not for this link')
+        self.b.get_interface(0).receive(stray.bytes(), 0)
+        corrupted = bytearray(stray.bytes())
+        corrupted[-1] ^= 0xFF
+        self.b.get_interface(0).receive(bytes(corrupted), 0)
+        self.clock.run()
+        drops = self.b.get_interface(0).drops
+        self.assertEqual({DropReason.BAD_ADDRESS: 1, DropReason.BAD_FCS: 1}, drops.by_reason())
+        self.assertEqual([], self.b.received)
@@ -1,5 +1,9 @@
+import pickle
+from copy import copy
 from unittest import TestCase
 
+from bitstring import BitArray
+
 from layer2.hdlc.control_field import *
 
 
@@ -52,3 +56,31 @@ class TestControlField(TestCase):
         m1_bits = "11"
         m2_bits = "001"
         self.assertEqual(BitArray(bin="11" + m1_bits + "1" + m2_bits), ucf.bits)
+
+    def test_control_fields_are_shared(self):
+        icf = InformationCf(pf=True, ns=17, nr=35)
+        self.assertIs(icf, InformationCf(pf=True, ns=1, nr=3))
+        self.assertIs(icf, decode_control_field(icf.bytes))
+        self.assertIs(icf, copy(icf))
+        self.assertIs(icf, pickle.loads(pickle.dumps(icf)))
+        self.assertEqual((1, 3), (icf.ns, icf.nr))
+        with self.assertRaises(AttributeError):
+            icf.pf = False
+
+    def test_decode_all_basic_control_fields(self):
+        for code in range(256):
+            control_bytes = bytes([code])
+            try:
+                control_field = decode_control_field(control_bytes)
+            except ValueError:
+                self.assertEqual(0b11, code >> 6)  # Only some of the unnumbered types are defined
+                continue
+            self.assertEqual(control_bytes, control_field.bytes)
+
+    def test_decode_extended_control_fields(self):
+        escf = ExtendedSupervisoryCf(pf=True, s_type=SupervisoryType.RNR, nr=541)
+        self.assertIs(escf, decode_control_field(escf.bytes))
+        eicf = ExtendedInfoCf(pf=False, ns=100, nr=3)
+        self.assertIs(eicf, decode_control_field(eicf.bytes))
+        with self.assertRaises(ValueError):
+            decode_control_field(b'\xc0\x00')
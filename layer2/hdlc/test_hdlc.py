@@ -1,5 +1,7 @@
 from unittest import TestCase
 
+from bitstring import BitArray
+
 from layer2.hdlc.hdlc import *
 from layer2.tools import bits_to_bytes
 
@@ -100,3 +102,25 @@ class TestHdlcFrame(TestCase):
         frame_bytes = self.ext_sframe.bytes()
         frame = HdlcFrame.decode_frame_from_bytes(frame_bytes, True)
         self.assertEqual(self.ext_sframe, frame)
+
+    def test_replacing_address_and_control_derives_fcs(self):
+        information = b'Some information that we send in this frame!'
+        iframe = HdlcIFrame(address=129, control=InformationCf(pf=True, ns=17, nr=35), information=information)
+        iframe.bytes()
+
+        replaced = iframe.replace(address=78, control=InformationCf(pf=False, ns=2, nr=3))
+
+        expected = HdlcIFrame(address=78, control=InformationCf(pf=False, ns=2, nr=3), information=information)
+        self.assertEqual(expected.bytes(), replaced.bytes())
+        self.assertTrue(replaced.fcs_is_valid())
+
+    def test_decoded_frame_reuses_received_bytes(self):
+        frame_bytes = self.uframe.bytes()
+        frame = HdlcFrame.decode_frame_from_bytes(frame_bytes, False)
+        self.assertIs(frame_bytes, frame.bytes())
+
+    def test_decoded_information_is_a_view_into_the_received_buffer(self):
+        received = bytearray(self.uframe.bytes())
+        frame = HdlcFrame.decode_frame_from_bytes(memoryview(received), False)
+        self.assertEqual(self.uframe, frame)
+        self.assertIs(received, frame.information.obj)
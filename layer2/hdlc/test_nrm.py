@@ -0,0 +1,104 @@
+from statistics import mean
+from unittest import TestCase
+
+from layer2.hdlc.nrm import MultiDropLine, RoundRobinScheduler, WeightedScheduler, BacklogAwareScheduler, \
+    SecondaryStatus
+from layer2.infrastructure.simulation import SimulationClock
+
+
+class TestPollSchedulers(TestCase):
+    def setUp(self) -> None:
+        self.secondaries = [SecondaryStatus(address) for address in (1, 2, 3)]
+
+    def test_round_robin(self):
+        scheduler = RoundRobinScheduler()
+        self.assertEqual([1, 2, 3, 1, 2, 3, 1], [scheduler.select(self.secondaries).address for _ in range(7)])
+
+    def test_weighted_polls_are_spread_over_the_cycle(self):
+        scheduler = WeightedScheduler({1: 3, 2: 1})
+        self.assertEqual([1, 2, 1, 3, 1], [scheduler.select(self.secondaries).address for _ in range(5)])
+
+    def test_backlog_aware_prefers_secondaries_that_had_data(self):
+        busy, idle, _ = self.secondaries
+        busy.last_burst, busy.skipped = 7, 0
+        idle.last_burst, idle.skipped = 0, 5
+        self.assertIs(busy, BacklogAwareScheduler().select(self.secondaries))
+        idle.skipped = 8
+        self.assertIs(idle, BacklogAwareScheduler().select(self.secondaries))
+
+
+class TestMultiDropLine(TestCase):
+
+    def create_line(self, scheduler=None, num_secondaries: int = 4, **kwargs) -> MultiDropLine:
+        self.clock = SimulationClock()
+        line = MultiDropLine(self.clock, scheduler, **kwargs)
+        for address in range(1, num_secondaries + 1):
+            line.add_secondary(address)
+        return line
+
+    @staticmethod
+    def messages(address: int, n: int) -> list[bytes]:
+        return [f"Measurement {i} of station {address}".encode() for i in range(n)]
+
+    def test_secondaries_are_set_up_and_deliver_their_information_in_order(self):
+        line = self.create_line(loss_rate=0.05, seed=3)
+        for address, secondary in line.secondaries.items():
+            for message in self.messages(address, 40):
+                secondary.send(message)
+        line.primary.start(duration=10)
+        self.clock.run()
+
+        for address, secondary in line.secondaries.items():
+            self.assertTrue(line.primary.secondaries[address].connected)
+            self.assertEqual(self.messages(address, 40), line.received[address])
+            self.assertEqual(40, len(secondary.latencies))
+        self.assertGreater(sum(s.retransmissions for s in line.secondaries.values()), 0)
+        self.assertTrue(0 < line.utilization < 1)
+        self.assertIn("line utilization", line.report())
+
+    def test_missing_secondary_is_not_polled(self):
+        line = self.create_line(num_secondaries=2)
+        line.primary.add_secondary(9)
+        line.primary.start(duration=1)
+        self.clock.run()
+        status = line.primary.secondaries[9]
+        self.assertFalse(status.connected)
+        self.assertEqual(line.primary.max_setup_attempts, status.timeouts)
+        self.assertEqual(0, status.polls)
+
+    def test_weighted_polling(self):
+        line = self.create_line(WeightedScheduler({1: 3}), num_secondaries=3)
+        line.primary.start(duration=2)
+        self.clock.run()
+        polls = {address: status.polls for address, status in line.primary.secondaries.items()}
+        self.assertAlmostEqual(3, polls[1] / polls[2], delta=0.1)
+        self.assertAlmostEqual(1, polls[3] / polls[2], delta=0.1)
+
+    def test_backlog_aware_polling_reduces_latency_of_busy_secondary_among_many_idle_ones(self):
+        mean_latency, polls = {}, {}
+        for scheduler in (RoundRobinScheduler(), BacklogAwareScheduler()):
+            line = self.create_line(scheduler, num_secondaries=20)
+            busy = line.secondaries[1]
+            for i in range(400):
+                self.clock.schedule(i * 0.01, busy.send, b'x' * 40)
+            line.primary.start(duration=6)
+            self.clock.run()
+            self.assertEqual(400, len(busy.latencies))
+            mean_latency[type(scheduler)] = mean(busy.latencies)
+            polls[type(scheduler)] = line.primary.secondaries[1].polls / line.primary.secondaries[2].polls
+        self.assertLess(mean_latency[BacklogAwareScheduler], 0.8 * mean_latency[RoundRobinScheduler])
+        self.assertAlmostEqual(1, polls[RoundRobinScheduler], delta=0.01)
+        self.assertGreater(polls[BacklogAwareScheduler], 1.1)
+
+    def test_polling_overhead_grows_with_the_number_of_secondaries(self):
+        throughput = []
+        for num_secondaries in (2, 8, 32):
+            line = self.create_line(num_secondaries=num_secondaries)
+            for secondary in list(line.secondaries.values())[:2]:
+                for _ in range(200):
+                    secondary.send(b'x' * 100)
+            line.primary.start(duration=2)
+            self.clock.run()
+            throughput.append(line.throughput)
+        self.assertGreater(throughput[0], throughput[1])
+        self.assertGreater(throughput[1], throughput[2])
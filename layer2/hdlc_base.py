@@ -6,9 +6,10 @@ from typing import Final
 from bitstring import BitArray
 
 from layer2.escape import EscapeSchema
+from layer2.fcs import FcsProtectedFrame
 from layer2.frame import Frame
 from layer2.hdlc.control_field import ControlField
-from layer2.tools import crc32, stuff_bit_array, destuff_bits, bits_to_bytes
+from layer2.tools import stuff_bit_array, destuff_bits, bits_to_bytes
 
 
 class HdlcMode(Enum):
@@ -17,7 +18,9 @@ class HdlcMode(Enum):
     ASYNC_BALANCED = 2
 
 
-class HdlcLikeBaseFrame(Frame):
+class HdlcLikeBaseFrame(FcsProtectedFrame, Frame):
+    __slots__ = ('_address_byte', '_address', '_control', '_information', '_optional_field')
+
     flag: Final = b'\x7E'  # 01111110
     escape_byte: Final = b'\x7D'  # 01111101
     escape_schema: Final = EscapeSchema(b'\x7D', {b'\x7D': b'\x5D', b'\x7E': b'\x5E'})
@@ -28,30 +31,56 @@ class HdlcLikeBaseFrame(Frame):
 
     @abstractmethod
     def __init__(self, address: int, control: ControlField, information: bytes = None, optional_field: bytes = None):
+        self._address_byte = self._checked_address_byte(address)
+        self._address = address
+        self._control = control
+        self._information = bytes() if information is None else information
+        self._optional_field = bytes() if optional_field is None else optional_field
+        self._reset_fcs_cache()
+
+    @staticmethod
+    def _checked_address_byte(address: int) -> builtins.bytes:
         if not (0 <= address < 2 ** 8):
             raise ValueError("Address must not be >= 0 and < 256")
-
-        self.address = address
-        self.control = control
-
-        if information is None:
-            self.information = bytes()
-        else:
-            self.information = information
-
-        if optional_field is None:
-            self.optional_field = bytes()
-        else:
-            self.optional_field = optional_field
-
-        self.fcs = self.calculate_fcs()
-
-    def calculate_fcs(self) -> bytes:
-        all_data = self.address.to_bytes(1, 'big') + self.control.bytes + self.optional_field + self.information
-        return crc32(all_data)
-
-    def bytes(self) -> bytes:
-        return self.address.to_bytes(1, 'big') + self.control.bytes + self.optional_field + self.information + self.fcs
+        return address.to_bytes(1, 'big')
+
+    @property
+    def address(self) -> int:
+        return self._address
+
+    @property
+    def control(self) -> ControlField:
+        return self._control
+
+    @property
+    def optional_field(self) -> builtins.bytes:
+        return self._optional_field
+
+    @property
+    def information(self) -> builtins.bytes:
+        return self._information
+
+    def header_fields(self) -> tuple[builtins.bytes, ...]:
+        return self._address_byte, self._control.bytes, self._optional_field
+
+    def payload_field(self) -> builtins.bytes:
+        return self._information
+
+    def replace(self, address: int = None, control: ControlField = None, information: builtins.bytes = None):
+        """
+        Create a copy of this frame with the given fields replaced. When only the address and/or control field are
+        replaced and the information is at least CRC_COMBINE_THRESHOLD (16 KiB) long, the FCS of the copy is combined
+        from the FCS of this frame; otherwise it is rehashed lazily, when it is needed.
+        """
+        changes = {}
+        if address is not None:
+            changes['_address_byte'] = self._checked_address_byte(address)
+            changes['_address'] = address
+        if control is not None:
+            changes['_control'] = control
+        if information is not None:
+            changes['_information'] = information
+        return self._derive(information is not None, **changes)
 
     def encode_as_bytes(self, mode: HdlcMode) -> builtins.bytes:
         if mode == HdlcMode.NORMAL:
@@ -79,7 +108,7 @@ class HdlcLikeBaseFrame(Frame):
 
     @classmethod
     def decode_from_bytes(cls, encoded_bytes: bytes) -> builtins.bytes:
-        return cls.escape_schema.unescape(encoded_bytes)
+        return cls.escape_schema.unescape(encoded_bytes, strict=True)
 
     @classmethod
     def decode_from_bits(cls, encoded_bits: BitArray, mode: HdlcMode) -> builtins.bytes:
@@ -90,4 +119,4 @@ class HdlcLikeBaseFrame(Frame):
                     f"Decoded frame contained {len(destuffed)} bits, multiple of 8 needed to read as bytes")
             return bits_to_bytes(destuffed)
         else:
-            return cls.decode_from_bytes(bits_to_bytes(list(encoded_bits)))
+            return cls.decode_from_bytes(bits_to_bytes(encoded_bits))
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import time
+from typing import Optional, Final
+
+from layer2.frame_errors import FrameDecodeError, DropReason
+from layer2.ppp.ccp import CcpCode, CcpPacket, DeflateCompressor, DeflateDecompressor, is_compressible
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+
+
+_CCP_CODES: Final = frozenset(code.value for code in CcpCode)
+
+
+class CompressionStatistics(object):
+    """ Counters of the compression on a link. Sizes are those of the information fields of the frames. """
+
+    def __init__(self):
+        self.packets_compressed = 0
+        self.packets_uncompressed = 0  # Sent uncompressed because compression did not make them smaller
+        self.bytes_in = 0  # Before compression
+        self.bytes_out = 0  # As sent, compressed or not
+        self.compress_time = 0.0  # CPU seconds
+        self.packets_decompressed = 0
+        self.decompress_time = 0.0  # CPU seconds, including adding uncompressed packets to the history
+        self.decompression_errors = 0
+        self.packets_discarded = 0  # Compressed packets received while waiting for a Reset-Ack
+        self.reset_requests_sent = 0
+        self.resets = 0  # Of the compressor, on request of the remote decompressor
+
+    @property
+    def ratio(self) -> float:
+        """ The size of the sent packets before compression divided by their size as sent """
+        return self.bytes_in / self.bytes_out if self.bytes_out else 1.0
+
+    @property
+    def compress_cost(self) -> float:
+        """ CPU seconds spent on compression per megabyte of data before compression """
+        return 1e6 * self.compress_time / self.bytes_in if self.bytes_in else 0.0
+
+    def __str__(self):
+        return f"{self.packets_compressed} packets compressed, {self.packets_uncompressed} sent uncompressed, " \
+               f"{self.bytes_in} bytes compressed to {self.bytes_out} bytes (ratio {self.ratio:.2f}), " \
+               f"{1000 * self.compress_time:.1f} ms CPU ({self.compress_cost:.3f} s/MB), " \
+               f"{self.packets_decompressed} packets decompressed in {1000 * self.decompress_time:.1f} ms CPU, " \
+               f"{self.decompression_errors} errors, {self.resets} resets"
+
+
+class PppCompression(object):
+    """
+    Deflate compression (RFC 1979) of the network layer packets sent over the link of a PppInterface, with one history
+    for each direction. Both ends of the link have to enable compression, with the same window size.
+
+    When the decompressor misses a packet, or cannot decompress one, it sends a CCP Reset-Request and discards
+    compressed packets until the Reset-Ack arrives. The remote compressor starts a new history when it receives the
+    request, and its Reset-Ack marks the start of this history in the stream of packets. The request is repeated after
+    every retry_after discarded packets in case it was lost.
+    """
+
+    def __init__(self, interface, level: int = 6, window_bits: int = 15, retry_after: int = 16):
+        self.interface = interface
+        self.compressor = DeflateCompressor(level, window_bits)
+        self.decompressor = DeflateDecompressor(window_bits)
+        self.retry_after = retry_after
+        self.statistics = CompressionStatistics()
+        self._awaiting_reset = False
+        self._reset_identifier = 0
+        self._discarded_since_request = 0
+        interface.compression = self
+
+    def detach(self) -> None:
+        if self.interface.compression is self:
+            self.interface.compression = None
+
+    def compress(self, frame: PppFrame) -> PppFrame:
+        """ The frame to send instead of the given frame """
+        if not is_compressible(frame.protocol):
+            return frame
+        information = frame.information
+        start = time.process_time()
+        compressed = self.compressor.compress(frame.protocol, information)
+        self.statistics.compress_time += time.process_time() - start
+        self.statistics.bytes_in += len(information)
+        if compressed is None:
+            self.statistics.packets_uncompressed += 1
+            self.statistics.bytes_out += len(information)
+            return frame
+        self.statistics.packets_compressed += 1
+        self.statistics.bytes_out += len(compressed)
+        return PppFrame(PppProtocol.COMPRESSED_DATAGRAM, compressed)
+
+    def receive(self, frame: PppFrame) -> Optional[PppFrame]:
+        """ The frame to process instead of the received frame, or None if there is nothing to process """
+        if frame.protocol is PppProtocol.CCP:
+            if (packet := self._decode_ccp(frame.information)) is not None:
+                self._process_ccp(packet)
+            return None
+        elif frame.protocol is PppProtocol.COMPRESSED_DATAGRAM:
+            return self._decompress(frame)
+        elif is_compressible(frame.protocol) and not self._awaiting_reset:
+            start = time.process_time()
+            self.decompressor.add_to_history(frame.protocol, frame.information)
+            self.statistics.decompress_time += time.process_time() - start
+        return frame
+
+    def _decompress(self, frame: PppFrame) -> Optional[PppFrame]:
+        if self._awaiting_reset:
+            self.statistics.packets_discarded += 1
+            self._discarded_since_request += 1
+            if self._discarded_since_request >= self.retry_after:
+                self._request_reset()
+            return None
+        start = time.process_time()
+        try:
+            protocol, information = self.decompressor.decompress(frame.information)
+        except ValueError:
+            self.statistics.decompression_errors += 1
+            self._request_reset()
+            return None
+        finally:
+            self.statistics.decompress_time += time.process_time() - start
+        self.statistics.packets_decompressed += 1
+        return PppFrame(protocol, information)
+
+    def _request_reset(self) -> None:
+        self._awaiting_reset = True
+        self._discarded_since_request = 0
+        self._reset_identifier = (self._reset_identifier + 1) % 2 ** 8
+        self.statistics.reset_requests_sent += 1
+        self._send_ccp(CcpPacket(CcpCode.RESET_REQUEST, self._reset_identifier))
+
+    def _decode_ccp(self, information: bytes) -> Optional[CcpPacket]:
+        """ The CCP packet, or None if it is dropped because it is malformed or has an unknown code """
+        try:
+            if information and information[0] not in _CCP_CODES:
+                raise FrameDecodeError(DropReason.UNKNOWN_PROTOCOL, f"Unknown CCP code {information[0]}")
+            return CcpPacket.decode(information)
+        except ValueError as e:
+            self.interface.drops.record(CcpPacket, e, information)
+            return None
+
+    def _process_ccp(self, packet: CcpPacket) -> None:
+        if packet.code == CcpCode.RESET_REQUEST:
+            self.compressor.reset()
+            self.statistics.resets += 1
+            self._send_ccp(CcpPacket(CcpCode.RESET_ACK, packet.identifier))
+        elif packet.code == CcpCode.RESET_ACK:
+            # Every Reset-Ack follows a reset of the remote compressor, also those of repeated requests
+            self.decompressor.reset()
+            self._awaiting_reset = False
+
+    def _send_ccp(self, packet: CcpPacket) -> None:
+        self.interface.send(PppFrame(PppProtocol.CCP, packet.bytes))
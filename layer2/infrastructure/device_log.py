@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from collections import deque
+from enum import IntEnum
+from typing import Callable, ClassVar, Optional
+
+
+class LogLevel(IntEnum):
+    DEBUG = 10  # Every frame or packet that is forwarded, received or dropped
+    INFO = 20  # Events of protocols, such as ARP, and messages of say()
+    WARNING = 30
+    ERROR = 40
+    OFF = 100
+
+
+class LogEvent(object):
+    """
+    A message logged by a device. The message is a %-format string, that is only formatted with its arguments when the
+    text of the event is needed. Memoryviews among the arguments are shown as the bytes they view.
+    """
+    __slots__ = ('level', 'source', 'message', 'args')
+
+    def __init__(self, level: LogLevel, source, message: str, args: tuple):
+        self.level = level
+        self.source = source
+        self.message = message
+        self.args = args
+
+    @property
+    def text(self) -> str:
+        if not self.args:
+            return self.message
+        return self.message % tuple(bytes(arg) if isinstance(arg, memoryview) else arg for arg in self.args)
+
+    def __str__(self):
+        return f"[{self.source}]: {self.text}"
+
+    def __repr__(self):
+        return f"LogEvent({self.level.name}, {str(self.source)!r}, {self.text!r})"
+
+
+Sink = Callable[[LogEvent], None]
+
+
+def print_sink(event: LogEvent) -> None:
+    print(event)
+
+
+class RingBufferSink(object):
+    """ Keeps the last capacity events in memory, e.g. to inspect what happened before a test failed """
+
+    def __init__(self, capacity: int = 1000):
+        self.events: deque[LogEvent] = deque(maxlen=capacity)
+
+    def __call__(self, event: LogEvent) -> None:
+        self.events.append(event)
+
+    def texts(self, level: LogLevel = LogLevel.DEBUG) -> list[str]:
+        """ The text of the events of at least the given level, in the order in which they were logged """
+        return [event.text for event in self.events if event.level >= level]
+
+    def clear(self) -> None:
+        self.events.clear()
+
+
+class DeviceLog(object):
+    """
+    The log of a device. Events below the level of the log, or below default_level if it has none, are discarded
+    before anything is formatted. The other events are passed to each of the sinks, which are shared by all devices.
+    """
+    __slots__ = ('source', 'level')
+
+    # Shared by all logs, like the formatting defaults of Mac
+    default_level: ClassVar[LogLevel] = LogLevel.WARNING
+    sinks: ClassVar[list[Sink]] = [print_sink]
+
+    def __init__(self, source, level: Optional[LogLevel] = None):
+        self.source = source  # Converted to a string only when an event is formatted
+        self.level = level
+
+    def enabled(self, level: LogLevel) -> bool:
+        return level >= (DeviceLog.default_level if self.level is None else self.level)
+
+    def log(self, level: LogLevel, message: str, *args) -> None:
+        if level >= (DeviceLog.default_level if self.level is None else self.level):
+            event = LogEvent(level, self.source, message, args)
+            for sink in DeviceLog.sinks:
+                sink(event)
+
+    def debug(self, message: str, *args) -> None:
+        self.log(LogLevel.DEBUG, message, *args)
+
+    def info(self, message: str, *args) -> None:
+        self.log(LogLevel.INFO, message, *args)
+
+    def warning(self, message: str, *args) -> None:
+        self.log(LogLevel.WARNING, message, *args)
+
+    def error(self, message: str, *args) -> None:
+        self.log(LogLevel.ERROR, message, *args)
@@ -2,20 +2,30 @@ from __future__ import annotations
 
 from abc import ABC
 from ipaddress import IPv4Address
-from typing import Optional, List
+from typing import Optional, List, Callable, Iterable
 
 from layer2.arp.arp import ARPPacket
-from layer2.ethernet.ethernet import EthernetFrameBase, EtherType, EthernetFrame, LlcType, Ethernet802_3Frame
+from layer2.ethernet.decoding import decode_frame, is_tagged
+from layer2.ethernet.ethernet import EthernetFrameBase, EtherType, EthernetFrame, LlcType, Ethernet802_3Frame, VlanTag
+from layer2.frame_errors import FrameDecodeError, DropReason
+from layer2.infrastructure.mac_table import MacTable
 from layer2.infrastructure.network_error import NetworkError
 from layer2.infrastructure.network_interface import EthernetInterface, DeviceWithInterfaces, EthernetInterfaceWithArp
+from layer2.infrastructure.queueing import EgressPort, EgressQueue, Scheduler, StrictPriority, DropPolicy, TailDrop, \
+    Classifier, precedence_classifier
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.infrastructure.spanning_tree import SpanningTree
+from layer2.infrastructure.storm_control import StormControl
+from layer2.infrastructure.vlan import VlanPort, DEFAULT_VLAN
 from layer2.mac import Mac
 
 
 class DeviceWithEthernetInterfaces(DeviceWithInterfaces, ABC):
     def __init__(self, num_interfaces: int, name: str = None, name_prefix: str = "eth", name_suffix: str = "",
-                 mac: Mac = Mac()):
+                 mac: Mac = Mac(), mtu: int = EthernetFrame.MAX_PAYLOAD):
         super().__init__(num_interfaces, name, name_prefix, name_suffix)
-        self._interfaces: List[EthernetInterface] = [EthernetInterface(i, self, mac) for i in range(num_interfaces)]
+        self._interfaces: List[EthernetInterface] = [EthernetInterface(i, self, mac, mtu)
+                                                     for i in range(num_interfaces)]
         self.mac = mac
 
     def get_interface(self, interface_num: int) -> EthernetInterface:
@@ -23,53 +33,228 @@ class DeviceWithEthernetInterfaces(DeviceWithInterfaces, ABC):
 
 
 class EthernetSwitch(DeviceWithEthernetInterfaces):
-    def __init__(self, num_interfaces, name: Optional[str] = None, mac: Mac = Mac()):
-        super().__init__(num_interfaces, name, name_prefix="SWITCH", mac=mac)
-        self.cache: dict[Mac, EthernetInterface] = {}
+    """
+    A learning switch. Frames are forwarded as they are, so frames that exceed the MTU of the port they are forwarded
+    to are dropped there. The ports of the source addresses are learned in the cache, a MacTable that by default has no
+    clock, so its entries do not age.
+
+    The switch is VLAN aware (IEEE 802.1Q). Every port is an access port of DEFAULT_VLAN until it is configured
+    otherwise with set_access_port or set_trunk_port. Each VLAN has its own MacTable, frames are only forwarded and
+    flooded to the ports that are a member of their VLAN, and frames are tagged or untagged as they leave through a
+    port. The cache is the table of DEFAULT_VLAN, the tables of other VLANs have the same configuration.
+
+    Switches that are connected in a loop need a spanning tree (see enable_spanning_tree), which blocks the redundant
+    ports. Frames are neither learned nor forwarded on the ports it blocks. Storm control is the safety net for loops
+    without one: it stops flooding when a storm is detected.
+
+    In cut-through mode only the addresses are read from the received bytes, which are then forwarded as they are,
+    without decoding the frame or checking its FCS: frames with a bad FCS are dropped by the first hop that does
+    decode them. Frames forwarded to a port with egress queues are still decoded, as they have to be classified, and so
+    are frames that are tagged, untagged or retagged on the port they are forwarded to.
+    """
+    def __init__(self, num_interfaces, name: Optional[str] = None, mac: Mac = Mac(),
+                 mtu: int = EthernetFrame.MAX_PAYLOAD, cache: MacTable[EthernetInterface] = None,
+                 cut_through: bool = False, storm_control: StormControl = None):
+        super().__init__(num_interfaces, name, name_prefix="SWITCH", mac=mac, mtu=mtu)
+        self.cache: MacTable[EthernetInterface] = MacTable() if cache is None else cache
+        self.caches: dict[int, MacTable[EthernetInterface]] = {DEFAULT_VLAN: self.cache}
+        self.vlan_ports = [VlanPort() for _ in range(num_interfaces)]
+        self.storm_control = StormControl() if storm_control is None else storm_control
+        self.spanning_tree: Optional[SpanningTree] = None
+        self.cut_through = cut_through
+
+    @property
+    def cut_through(self) -> bool:
+        return self._cut_through
+
+    @cut_through.setter
+    def cut_through(self, cut_through: bool) -> None:
+        self._cut_through = cut_through
+        for interface in self._interfaces:
+            interface.cut_through = cut_through
+
+    def set_access_port(self, port_num: int, vid: int = DEFAULT_VLAN) -> None:
+        self._configure_port(port_num, VlanPort.access(vid))
+
+    def set_trunk_port(self, port_num: int, allowed: Iterable[int] = None, native: int = DEFAULT_VLAN) -> None:
+        """ Make the port a trunk of the allowed VLANs, all of them if omitted """
+        self._configure_port(port_num, VlanPort.trunk(allowed, native))
+
+    def _configure_port(self, port_num: int, vlan_port: VlanPort) -> None:
+        interface = self.get_interface(port_num)
+        self.vlan_ports[port_num] = vlan_port
+        self.flush_cache(interface)  # Addresses learned on the port may now be in another VLAN
+
+    def flush_cache(self, interface: EthernetInterface = None) -> None:
+        """ Forget the addresses learned on the interface in all VLANs, or all addresses if omitted """
+        for cache in self.caches.values():
+            cache.flush(interface)
+
+    def enable_spanning_tree(self, clock: SimulationClock, priority: int = 32768, **kwargs) -> SpanningTree:
+        """
+        Run the rapid spanning tree protocol on all ports, with the timers of the clock. The keyword arguments are
+        passed on to SpanningTree, e.g. the bridge address, which is the MAC of the switch by default.
+        """
+        self.spanning_tree = SpanningTree(self, self._interfaces, clock, priority, **kwargs)
+        return self.spanning_tree
+
+    def cache_for(self, vid: int) -> MacTable[EthernetInterface]:
+        """ The MacTable of the VLAN, which is created on first use """
+        if (cache := self.caches.get(vid)) is None:
+            template = self.cache
+            cache = MacTable(template.capacity, template.aging_time, template.max_per_port, template.clock)
+            self.caches[vid] = cache
+        return cache
+
+    def _ingress_vlan(self, tag_vid: Optional[int], incoming_interface_num: int, data) -> Optional[int]:
+        """ The VLAN of a received frame, or None if the frame is not admitted on the port, which is then counted """
+        if (vid := self.vlan_ports[incoming_interface_num].ingress_vlan(tag_vid)) is None:
+            message = f"Received a frame of VLAN {tag_vid} on port {incoming_interface_num}, which does not carry it"
+            self._interfaces[incoming_interface_num].drops.record(
+                EthernetFrame, FrameDecodeError(DropReason.VLAN_FILTERED, message), data)
+        return vid
 
     def receive(self, frame: EthernetFrameBase, incoming_interface_num: int) -> None:
-        self.update_cache(frame.source, incoming_interface_num)
-        self.forward(frame, incoming_interface_num)
+        tag = getattr(frame, 'vlan', None)
+        if (vid := self._ingress_vlan(None if tag is None else tag.vid, incoming_interface_num, None)) is None:
+            return
+        if (stp_port := self._interfaces[incoming_interface_num].stp_port) is not None and not stp_port.forwarding:
+            if stp_port.learning:
+                self.update_cache(frame.source, incoming_interface_num, vid)
+            return
+        self.update_cache(frame.source, incoming_interface_num, vid)
+        self.forward(frame, incoming_interface_num, vid)
+
+    def enable_queueing(self, clock: SimulationClock, bandwidth: float = 1e9, num_queues: int = 1, capacity: int = 64,
+                        scheduler: Callable[[], Scheduler] = StrictPriority,
+                        drop_policy: Callable[[], DropPolicy] = TailDrop, weights: list[float] = None,
+                        classifier: Classifier = None) -> list[EgressPort]:
+        """
+        Give every port num_queues egress queues of capacity frames, which are served by a new scheduler over a new
+        channel of the given bandwidth. The weights are those of the queues, by default all 1. Frames are classified by
+        the classifier, by default on the IPv4 precedence.
+        """
+        weights = [1.0] * num_queues if weights is None else weights
+        if len(weights) != num_queues:
+            raise ValueError(f"Expected a weight for each of the {num_queues} queues, got {len(weights)}")
+        if classifier is None:
+            classifier = precedence_classifier(num_queues)
+        return [EgressPort(interface, [EgressQueue(capacity, drop_policy(), weight) for weight in weights],
+                           scheduler(), classifier, Channel(clock, bandwidth)) for interface in self._interfaces]
 
     def send(self, frame: EthernetFrameBase, outgoing_interface_num: int) -> None:
         self.get_interface(outgoing_interface_num).send(frame)
 
-    def forward(self, frame: EthernetFrameBase, incoming_interface_num):
-        if frame.destination in self.cache:
-            if self.cache[frame.destination].connector is None:
-                self.say(f"No interface connected on {incoming_interface_num}, we'll just silently drop the frame.")
+    def _egress_frame(self, frame: EthernetFrameBase, port_num: int, vid: int) -> EthernetFrameBase:
+        """ The frame as it is sent on the port: tagged for its VLAN, or untagged """
+        if not isinstance(frame, EthernetFrame):
+            return frame
+        if not self.vlan_ports[port_num].tags(vid):
+            return frame.tagged(None)
+        return frame.tagged(VlanTag(vid) if frame.vlan is None else frame.vlan.with_vid(vid))
+
+    def _floods_to(self, interface: EthernetInterface, vid: int) -> bool:
+        """ Whether frames of the VLAN may be sent on the interface """
+        return interface.connector is not None and self.vlan_ports[interface.interface_num].carries(vid) and \
+            (interface.stp_port is None or interface.stp_port.forwarding)
+
+    def _admit_flood(self) -> bool:
+        storms = self.storm_control.storms
+        if self.storm_control.admit():
+            return True
+        if self.storm_control.storms != storms:
+            self.log.warning("Broadcast storm detected, flooding is suppressed")
+        return False
+
+    def forward(self, frame: EthernetFrameBase, incoming_interface_num, vid: int = DEFAULT_VLAN):
+        if (interface := self.cache_for(vid).lookup(frame.destination)) is not None:
+            if interface.connector is None or (interface.stp_port is not None and not interface.stp_port.forwarding):
+                self.log.debug("No interface connected on %d, we'll just silently drop the frame.",
+                               incoming_interface_num)
             else:
-                self.say(f"Forwarding data from {frame.source}. Target {frame.destination} was cached "
-                         f"on interface {self.cache[frame.destination].interface_num}")
-                self.cache[frame.destination].send(frame=frame)
+                self.log.debug("Forwarding data from %s. Target %s was cached on interface %d", frame.source,
+                               frame.destination, interface.interface_num)
+                interface.send(frame=self._egress_frame(frame, interface.interface_num, vid))
         else:
-            self.say(f"Unknown target {frame.destination}, broadcasting frame to all")
-            self.broadcast_to_all(frame, incoming_interface_num)
+            self.log.debug("Unknown target %s, broadcasting frame to all", frame.destination)
+            self.broadcast_to_all(frame, incoming_interface_num, vid)
 
-    def broadcast_to_all(self, frame: EthernetFrameBase, incoming_interface_num):
-        for interface in self._interfaces:
-            if interface.connector is not None and interface.interface_num != incoming_interface_num:
-                self.say(
-                    f"[eth_{interface.interface_num}]: Forwarding frame from {frame.source} to {frame.destination}")
-                interface.send(frame=frame)
+    def forward_bytes(self, data: bytes, incoming_interface_num: int) -> None:
+        """ Learn and forward a frame in cut-through mode """
+        incoming = self._interfaces[incoming_interface_num]
+        tagged = is_tagged(data)
+        if len(data) < (22 if tagged else 18):
+            message = f"Received frame of length {len(data)} which can't be forwarded as Ethernet."
+            incoming.drops.record(EthernetFrame, FrameDecodeError(DropReason.SHORT_FRAME, message), data)
+            return
+        tag_vid = int.from_bytes(data[14:16], 'big') & 0xFFF if tagged else None
+        if (vid := self._ingress_vlan(tag_vid, incoming_interface_num, data)) is None:
+            return
+        cache = self.cache_for(vid)
+        if (stp_port := incoming.stp_port) is not None and not stp_port.forwarding:
+            if stp_port.learning:
+                cache.learn(Mac.fromint(int.from_bytes(data[6:12], 'big')), incoming)
+            return
+        cache.learn(Mac.fromint(int.from_bytes(data[6:12], 'big')), incoming)
+        if (interface := cache.lookup(Mac.fromint(int.from_bytes(data[0:6], 'big')))) is not None:
+            if interface.connector is not None and (interface.stp_port is None or interface.stp_port.forwarding):
+                self._transmit_bytes(interface, incoming, data, vid, tag_vid)
+            return
+        if not self._admit_flood():
+            return
+        cache.statistics.floods += 1
+        try:
+            for interface in self._interfaces:
+                if interface is not incoming and self._floods_to(interface, vid):
+                    self._transmit_bytes(interface, incoming, data, vid, tag_vid)
+        finally:
+            self.storm_control.leave()
+
+    def _transmit_bytes(self, interface: EthernetInterface, incoming: EthernetInterface, data: bytes, vid: int,
+                        tag_vid: Optional[int]) -> None:
+        """ Transmit the bytes as they are, unless the frame has to be queued or its tag changes on this port """
+        egress_vid = vid if self.vlan_ports[interface.interface_num].tags(vid) else None
+        if interface.egress is None and tag_vid == egress_vid:
+            interface.transmit_bytes(data)
+            return
+        try:
+            frame = decode_frame(data)
+        except ValueError as e:
+            incoming.drops.record(EthernetFrame, e, data)
+            return
+        interface.send(self._egress_frame(frame, interface.interface_num, vid))
+
+    def broadcast_to_all(self, frame: EthernetFrameBase, incoming_interface_num, vid: int = DEFAULT_VLAN):
+        """ Flood the frame to the other ports that are a member of its VLAN, unless storm control suppresses it """
+        if not self._admit_flood():
+            return
+        self.cache_for(vid).statistics.floods += 1
+        try:
+            for interface in self._interfaces:
+                if interface.interface_num != incoming_interface_num and self._floods_to(interface, vid):
+                    self.log.debug("[eth_%d]: Forwarding frame from %s to %s", interface.interface_num, frame.source,
+                                   frame.destination)
+                    interface.send(frame=self._egress_frame(frame, interface.interface_num, vid))
+        finally:
+            self.storm_control.leave()
 
-    def update_cache(self, source: Mac, port_num):
-        self.cache[source] = self.get_interface(port_num)
+    def update_cache(self, source: Mac, port_num, vid: int = DEFAULT_VLAN):
+        self.cache_for(vid).learn(source, self.get_interface(port_num))
 
 
 class EthernetEndpoint(DeviceWithEthernetInterfaces):  # With a single interface in this case
-    def __init__(self, mac: Mac = Mac(), name: str = None):
-        super().__init__(1, name, name_prefix="COMPUTER", name_suffix=f" <{mac}>", mac=mac)
+    def __init__(self, mac: Mac = Mac(), name: str = None, mtu: int = EthernetFrame.MAX_PAYLOAD):
+        super().__init__(1, name, name_prefix="COMPUTER", name_suffix=f" <{mac}>", mac=mac, mtu=mtu)
 
     def receive(self, frame: EthernetFrameBase, incoming_interface_num: int = 0):
         if self.mac == frame.destination:
-            self.say(f"Received from {frame.source} the following frame data:\n    > {frame.payload}")
+            self.log.debug("Received from %s the following frame data:\n    > %s", frame.source, frame.payload)
             return frame
         elif frame.destination == ARPPacket.UNKNOWN_MAC:
-            self.say(f"Received possible ARP from {frame.source}, opening payload...")
+            self.log.debug("Received possible ARP from %s, opening payload...", frame.source)
             return frame
         else:
-            self.say(f"Dropping received frame addressed at {frame.destination}...")
+            self.log.debug("Dropping received frame addressed at %s...", frame.destination)
 
     def connect_to(self, device: DeviceWithEthernetInterfaces, other_interface_num: int, own_interface_num=0):
         super().connect_to(device, other_interface_num, own_interface_num=own_interface_num)
@@ -82,8 +267,9 @@ class EthernetEndpoint(DeviceWithEthernetInterfaces):  # With a single interface
             raise NetworkError("Source MAC of the frame is not the same as self.mac")
         super().send(frame, outgoing_interface_num=outgoing_interface_num)
 
-    def send_data(self, payload: bytes, destination: Mac, ether_type: EtherType = EtherType.IPV4):
-        self.send(EthernetFrame(destination, self.mac, payload, ether_type))
+    def send_data(self, payload: bytes, destination: Mac, ether_type: EtherType = EtherType.IPV4,
+                  vlan: VlanTag = None):
+        self.send(EthernetFrame(destination, self.mac, payload, ether_type, vlan))
 
     def send_data_802_3(self, payload: bytes, destination: Mac, ether_type: LlcType = LlcType.DEFAULT):
         self.send(Ethernet802_3Frame(destination, self.mac, payload, ether_type))
@@ -91,9 +277,9 @@ class EthernetEndpoint(DeviceWithEthernetInterfaces):  # With a single interface
 
 class DeviceWithArpEthernetInterfaces(DeviceWithInterfaces, ABC):
     def __init__(self, num_interfaces: int, ip_list: List[IPv4Address], name: str = None, name_prefix: str = "eth",
-                 name_suffix: str = "", mac: Mac = Mac()):
+                 name_suffix: str = "", mac: Mac = Mac(), mtu: int = EthernetFrame.MAX_PAYLOAD):
         DeviceWithInterfaces.__init__(self, num_interfaces, name, name_prefix, name_suffix)
-        self._interfaces = [EthernetInterfaceWithArp(i, self, ip_list[i], mac) for i in range(num_interfaces)]
+        self._interfaces = [EthernetInterfaceWithArp(i, self, ip_list[i], mac, mtu) for i in range(num_interfaces)]
         self.mac = mac
 
     def get_interface(self, interface_num: int) -> EthernetInterfaceWithArp:
@@ -101,8 +287,8 @@ class DeviceWithArpEthernetInterfaces(DeviceWithInterfaces, ABC):
 
 
 class EthernetEndpointWithArp(DeviceWithArpEthernetInterfaces, EthernetEndpoint):
-    def __init__(self, ip4: IPv4Address, mac: Mac = Mac(), name: str = None):
-        EthernetEndpoint.__init__(self, mac, name)
+    def __init__(self, ip4: IPv4Address, mac: Mac = Mac(), name: str = None, mtu: int = EthernetFrame.MAX_PAYLOAD):
+        EthernetEndpoint.__init__(self, mac, name, mtu)
         DeviceWithArpEthernetInterfaces.__init__(self, num_interfaces=1, ip_list=[ip4], name=name,
-                                                 name_prefix="COMPUTER", name_suffix=f" <{mac}>", mac=mac)
+                                                 name_prefix="COMPUTER", name_suffix=f" <{mac}>", mac=mac, mtu=mtu)
         self.get_interface(0).name = self.name + ": " + self.get_interface(0).name
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import math
+import os
+import struct
+import time
+from collections import deque, OrderedDict
+from typing import Optional
+
+from layer2.infrastructure.simulation import SimulationClock, Timer
+
+
+class RttHistogram(object):
+    """
+    Round trip times of the last window samples, counted in logarithmic buckets: bucket i holds the samples in the range
+    [2^(i-1), 2^i) microseconds (bucket 0 holds everything below a microsecond). Adding a sample is O(1).
+    """
+    num_buckets = 32
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: deque[float] = deque()
+        self._buckets = [0] * self.num_buckets
+        self._total = 0.0
+
+    @classmethod
+    def bucket_of(cls, rtt: float) -> int:
+        microseconds = int(rtt * 1e6)
+        return min(microseconds.bit_length(), cls.num_buckets - 1)
+
+    @staticmethod
+    def bucket_bounds(bucket: int) -> tuple[float, float]:
+        """ The range of round trip times of the bucket, in seconds """
+        return (0.0 if bucket == 0 else 2 ** (bucket - 1) / 1e6), 2 ** bucket / 1e6
+
+    def add(self, rtt: float) -> None:
+        if len(self._samples) == self.window:
+            evicted = self._samples.popleft()
+            self._buckets[self.bucket_of(evicted)] -= 1
+            self._total -= evicted
+        self._samples.append(rtt)
+        self._buckets[self.bucket_of(rtt)] += 1
+        self._total += rtt
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def buckets(self) -> list[int]:
+        return list(self._buckets)
+
+    @property
+    def mean(self) -> float:
+        return self._total / len(self._samples) if self._samples else math.nan
+
+    @property
+    def min(self) -> float:
+        return min(self._samples, default=math.nan)
+
+    @property
+    def max(self) -> float:
+        return max(self._samples, default=math.nan)
+
+    def percentile(self, p: float) -> float:
+        """ The p-th percentile (0 <= p <= 100) of the samples in the window, by the nearest-rank method """
+        if not self._samples:
+            return math.nan
+        ordered = sorted(self._samples)
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+    def __str__(self):
+        if not self._samples:
+            return "no samples"
+        lines = [f"{len(self)} samples, min {1000 * self.min:.3f} ms, mean {1000 * self.mean:.3f} ms, "
+                 f"p99 {1000 * self.percentile(99):.3f} ms, max {1000 * self.max:.3f} ms"]
+        scale = 50 / max(self._buckets)
+        for bucket, count in enumerate(self._buckets):
+            if count:
+                low, high = self.bucket_bounds(bucket)
+                bar = '#' * math.ceil(count * scale)
+                lines.append(f"{1000 * low:>10.3f} - {1000 * high:>10.3f} ms {count:>7} {bar}")
+        return "\n".join(lines)
+
+
+class LinkProbe(object):
+    """
+    Measures the round trip time of the link of an interface that supports probing (HDLC with TEST frames, PPP with LCP
+    Echo-Requests). A probe carries the id of this probe, a sequence number and the time at which it was sent, which the
+    remote interface returns unchanged. Probes that are not answered within the timeout are counted as lost.
+
+    Times are taken from the clock when the link is simulated, and from time.perf_counter otherwise. Attaching a probe
+    to an interface only adds a check for probe frames to its receive path.
+    """
+    _format = struct.Struct('!4sId')
+
+    def __init__(self, interface, clock: SimulationClock = None, window: int = 1000, timeout: float = 1.0):
+        self.interface = interface
+        self.clock = clock
+        self.timeout = timeout
+        self.histogram = RttHistogram(window)
+        self.probe_id = os.urandom(4)
+        self._sequence = 0
+        self._outstanding: OrderedDict[int, float] = OrderedDict()  # Sequence number to time sent
+        self._timer: Optional[Timer] = None
+        self.sent = 0
+        self.received = 0
+        self.unexpected = 0
+        self._lost = 0
+        interface.probe = self
+
+    def now(self) -> float:
+        return time.perf_counter() if self.clock is None else self.clock.now
+
+    def detach(self) -> None:
+        self.stop()
+        if self.interface.probe is self:
+            self.interface.probe = None
+
+    def send_probe(self) -> int:
+        """ Send a single probe, returns its sequence number """
+        now = self.now()
+        self._expire(now)
+        sequence = self._sequence
+        self._sequence = (self._sequence + 1) % 2 ** 32
+        self._outstanding[sequence] = now
+        self.sent += 1
+        self.interface.send_probe(self._format.pack(self.probe_id, sequence, now), sequence)
+        return sequence
+
+    def start(self, interval: float, count: int = None) -> None:
+        """ Send a probe every interval seconds on the simulation clock, count times or until stopped """
+        if self.clock is None:
+            raise ValueError("Periodic probing requires a simulation clock")
+        self.stop()
+        self._schedule(interval, count)
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule(self, interval: float, remaining: Optional[int]) -> None:
+        if remaining is None or remaining > 0:
+            self._timer = self.clock.schedule(interval, self._periodic_probe, interval, remaining)
+        else:
+            self._timer = None
+
+    def _periodic_probe(self, interval: float, remaining: Optional[int]) -> None:
+        self.send_probe()
+        self._schedule(interval, None if remaining is None else remaining - 1)
+
+    def owns(self, payload: bytes) -> bool:
+        """ Whether the payload is that of a probe sent by this probe (as opposed to one that should be answered) """
+        return len(payload) == self._format.size and payload[:4] == self.probe_id
+
+    def receive_response(self, payload: bytes) -> None:
+        _, sequence, sent_at = self._format.unpack(payload)
+        now = self.now()
+        self._expire(now)
+        if self._outstanding.pop(sequence, None) is None:
+            self.unexpected += 1  # A duplicate, or a response that arrived after the timeout
+            return
+        self.received += 1
+        self.histogram.add(now - sent_at)
+
+    def _expire(self, now: float) -> None:
+        while self._outstanding:
+            sequence, sent_at = next(iter(self._outstanding.items()))
+            if now - sent_at < self.timeout:
+                break
+            del self._outstanding[sequence]
+            self._lost += 1
+
+    @property
+    def lost(self) -> int:
+        self._expire(self.now())
+        return self._lost
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._outstanding)
+
+    def __str__(self):
+        return f"{self.sent} probes sent, {self.received} answered, {self.lost} lost\n{self.histogram}"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TypeVar, Generic, Optional, Iterator
+
+from layer2.infrastructure.simulation import SimulationClock
+from layer2.mac import Mac
+
+P = TypeVar('P')
+
+
+class MacTableStatistics(object):
+    """ Counters of a MacTable, and of the frames flooded by the switch that uses it """
+
+    def __init__(self):
+        self.learned = 0
+        self.moves = 0  # Addresses that were learned on another port than the one they were known on
+        self.evictions = 0  # Entries removed to make room for a new one
+        self.aged_out = 0
+        self.port_limit_refusals = 0  # Addresses not learned because their port has reached its limit
+        self.hits = 0
+        self.misses = 0
+        self.floods = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return f"{self.learned} addresses learned ({self.moves} moved), {self.evictions} evicted, " \
+               f"{self.aged_out} aged out, {self.port_limit_refusals} refused, {self.hits} hits, " \
+               f"{self.misses} misses ({100 * self.hit_ratio:.1f}% hits), {self.floods} floods"
+
+
+class _Entry(object):
+    __slots__ = ('port', 'last_seen')
+
+    def __init__(self, port, last_seen: float):
+        self.port = port
+        self.last_seen = last_seen
+
+
+class MacTable(Generic[P]):
+    """
+    The table in which a switch learns on which port each MAC address is, with at most capacity entries and at most
+    max_per_port entries per port (unlimited if None).
+
+    Entries are kept in the order in which they were last learned. An entry ages out when its address has not been
+    learned again for aging_time seconds of the clock (never without a clock, or when aging_time is None). When the
+    table is full the least recently learned entry is evicted. An address that is not learned because its port is at its
+    limit is not known, so frames addressed to it are flooded.
+    """
+
+    def __init__(self, capacity: int = 8192, aging_time: Optional[float] = 300.0, max_per_port: int = None,
+                 clock: SimulationClock = None):
+        if capacity <= 0:
+            raise ValueError(f"The capacity should be positive, got {capacity}")
+        if max_per_port is not None and max_per_port <= 0:
+            raise ValueError(f"The number of entries per port should be positive, got {max_per_port}")
+        self.capacity = capacity
+        self.aging_time = aging_time
+        self.max_per_port = max_per_port
+        self.clock = clock
+        self.statistics = MacTableStatistics()
+        self._entries: OrderedDict[Mac, _Entry] = OrderedDict()
+        self._per_port: dict[P, int] = {}
+
+    def _has_room_on(self, port: P) -> bool:
+        return self.max_per_port is None or self._per_port.get(port, 0) < self.max_per_port
+
+    def _add_to_port(self, port: P, n: int) -> None:
+        if (count := self._per_port.get(port, 0) + n) > 0:
+            self._per_port[port] = count
+        else:
+            del self._per_port[port]
+
+    def _remove(self, mac: Mac) -> None:
+        self._add_to_port(self._entries.pop(mac).port, -1)
+
+    def learn(self, mac: Mac, port: P) -> bool:
+        """ Learn that mac is on port, returns whether it was learned (else the port has reached its limit) """
+        now = 0.0 if self.clock is None else self.clock.now
+        self.expire()
+        if (entry := self._entries.get(mac)) is not None and entry.port == port:
+            entry.last_seen = now
+            self._entries.move_to_end(mac)
+            return True
+        if not self._has_room_on(port):
+            if entry is not None:
+                self._remove(mac)  # It is no longer on its old port
+            self.statistics.port_limit_refusals += 1
+            return False
+        if entry is not None:
+            self._remove(mac)
+            self.statistics.moves += 1
+        elif len(self._entries) >= self.capacity:
+            self._remove(next(iter(self._entries)))
+            self.statistics.evictions += 1
+        self._entries[mac] = _Entry(port, now)
+        self._add_to_port(port, 1)
+        self.statistics.learned += 1
+        return True
+
+    def lookup(self, mac: Mac) -> Optional[P]:
+        """ The port on which mac is, or None if it is unknown. Counted as a hit or miss. """
+        self.expire()
+        if (entry := self._entries.get(mac)) is None:
+            self.statistics.misses += 1
+            return None
+        self.statistics.hits += 1
+        return entry.port
+
+    def expire(self) -> int:
+        """ Remove the entries that have aged out, returns their number """
+        if self.clock is None or self.aging_time is None:
+            return 0
+        oldest = self.clock.now - self.aging_time
+        expired = 0
+        while self._entries and next(iter(self._entries.values())).last_seen <= oldest:
+            self._remove(next(iter(self._entries)))
+            expired += 1
+        self.statistics.aged_out += expired
+        return expired
+
+    def flush(self, port: P = None) -> None:
+        """ Forget the entries on the port, or all entries if omitted """
+        for mac in [mac for mac, entry in self._entries.items() if port is None or entry.port == port]:
+            self._remove(mac)
+
+    def entries_on(self, port: P) -> int:
+        self.expire()
+        return self._per_port.get(port, 0)
+
+    def __getitem__(self, mac: Mac) -> P:
+        self.expire()
+        return self._entries[mac].port
+
+    def __contains__(self, mac: Mac) -> bool:
+        self.expire()
+        return mac in self._entries
+
+    def __len__(self) -> int:
+        self.expire()
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Mac]:
+        self.expire()
+        return iter(list(self._entries))
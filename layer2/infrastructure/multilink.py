@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from layer2.frame_errors import FrameDecodeError, DropReason
+from layer2.infrastructure.network_error import NetworkError
+from layer2.infrastructure.network_interface import PppInterface
+from layer2.ppp.multilink import MultilinkHeader
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+
+
+class MultilinkStatistics(object):
+    def __init__(self):
+        self.packets_sent = 0
+        self.fragments_sent = 0
+        self.packets_delivered = 0
+        self.fragments_received = 0
+        self.fragments_lost = 0  # Never received
+        self.fragments_discarded = 0  # Received, but part of a packet of which a fragment was lost
+        self.late_fragments = 0  # Received after their packet was delivered or given up on
+        self.buffer_overflows = 0  # Missing fragments that were given up on because the reorder buffer was full
+        self.malformed_fragments = 0  # Too short to hold a multilink header
+        self.unknown_protocols = 0  # Reassembled packets with a protocol field that is not known
+
+
+class MultilinkBundle(object):
+    """
+    A PPP Multilink bundle (RFC 1990) of several PppInterfaces that together act as a single link.
+
+    A packet (its PPP protocol field followed by its information) is split into fragments that are sent over the
+    member links at the same time. Their sizes are such that all fragments are expected to arrive at the same moment,
+    given the bandwidth of each link and the data that is already queued on it. Packets that are too small to be worth
+    splitting are sent whole over the link on which they will arrive first. Links without a channel count as equally
+    fast.
+
+    Each fragment carries a multilink header with a sequence number. The receiver puts the packets back together in
+    order of these numbers. Each link delivers its fragments in order, so a missing fragment whose sequence number is
+    below the last one received on every link has been lost. The reorder buffer is bounded by max_buffered fragments:
+    when it is full the missing fragment is given up on as well.
+    """
+
+    def __init__(self, interfaces: list[PppInterface], deliver: Callable[[PppFrame], None] = None,
+                 short_sequence: bool = False, min_fragment_size: int = 64, max_buffered: int = 256):
+        if not interfaces:
+            raise ValueError("A bundle needs at least one member link")
+        for interface in interfaces:
+            if interface.bundle is not None:
+                raise NetworkError(f"Interface {interface.name} is already a member of a bundle")
+        for interface in interfaces:
+            interface.bundle = self
+        self.interfaces = interfaces
+        self.deliver = self._deliver_to_parent if deliver is None else deliver
+        self.short_sequence = short_sequence
+        self.modulus = MultilinkHeader.modulus_for(short_sequence)
+        self.min_fragment_size = min_fragment_size
+        self.max_buffered = max_buffered
+        # Frame overhead per fragment: address, control, protocol, multilink header and FCS
+        self.fragment_overhead = 8 + MultilinkHeader.length_for(short_sequence)
+        self.statistics = MultilinkStatistics()
+
+        # Sequence numbers are counted without wrapping around, the modulus is only applied on the wire
+        self._next_sequence = 0
+        self._expected = 0
+        self._buffer: dict[int, tuple[MultilinkHeader, bytes]] = {}
+        self._last_received: dict[int, int] = {id(interface): -1 for interface in interfaces}
+
+    def _deliver_to_parent(self, frame: PppFrame) -> None:
+        interface = self.interfaces[0]
+        interface.parent.receive(frame, incoming_interface_num=interface.interface_num)
+
+    # --- Sending
+
+    def send(self, protocol: PppProtocol, information: bytes) -> None:
+        packet = protocol.value.to_bytes(2, 'big') + information
+        start = 0
+        shares = self.fragment_sizes(len(packet))
+        for i, (interface, size) in enumerate(shares):
+            header = MultilinkHeader(i == 0, i == len(shares) - 1, self._next_sequence % self.modulus,
+                                     self.short_sequence)
+            self._next_sequence += 1
+            self.statistics.fragments_sent += 1
+            interface.send(PppFrame(PppProtocol.MULTILINK, header.bytes + packet[start:start + size]))
+            start += size
+        self.statistics.packets_sent += 1
+
+    def _link_state(self, interface: PppInterface) -> tuple[float, float]:
+        """ The bandwidth (bits per second) of the link, and the time it takes to transmit what is queued on it """
+        if interface.channel is None:
+            return 1.0, 0.0
+        return interface.channel.bandwidth, interface.channel.backlog
+
+    def fragment_sizes(self, length: int) -> list[tuple[PppInterface, int]]:
+        """
+        Divide a packet of the given length over the links: each link gets a share such that all links finish at the
+        same time T, i.e. backlog + 8 * (share + overhead) / bandwidth = T, and links whose share would be smaller
+        than the minimal fragment size are left out.
+        """
+        links = {interface: self._link_state(interface) for interface in self.interfaces}
+        if length < 2 * self.min_fragment_size or len(links) == 1:
+            fastest = min(links, key=lambda i: links[i][1] + 8 * (length + self.fragment_overhead) / links[i][0])
+            return [(fastest, length)]
+
+        active = list(self.interfaces)
+        while True:
+            bits = 8 * (length + len(active) * self.fragment_overhead)
+            finish = (bits + sum(links[i][0] * links[i][1] for i in active)) / sum(links[i][0] for i in active)
+            shares = {i: links[i][0] * (finish - links[i][1]) / 8 - self.fragment_overhead for i in active}
+            smallest = min(active, key=shares.get)
+            if len(active) == 1 or shares[smallest] >= self.min_fragment_size:
+                break
+            active.remove(smallest)
+
+        sizes = [(interface, int(shares[interface])) for interface in active]
+        remainder = length - sum(size for _, size in sizes)
+        largest = max(range(len(sizes)), key=lambda k: sizes[k][1])
+        sizes[largest] = (sizes[largest][0], sizes[largest][1] + remainder)
+        return sizes
+
+    # --- Receiving
+
+    def receive(self, frame: PppFrame, interface: PppInterface) -> None:
+        try:
+            header = MultilinkHeader.decode(frame.information, self.short_sequence)
+        except ValueError as e:
+            self.statistics.malformed_fragments += 1
+            interface.drops.record(MultilinkHeader, e, frame.information)
+            return
+        data = frame.information[MultilinkHeader.length_for(self.short_sequence):]
+        self.statistics.fragments_received += 1
+
+        offset = (header.sequence - self._expected) % self.modulus
+        if offset >= self.modulus // 2:
+            self.statistics.late_fragments += 1
+            return
+        sequence = self._expected + offset
+        if id(interface) in self._last_received:  # Not after the link left the bundle, while fragments were underway
+            self._last_received[id(interface)] = max(self._last_received[id(interface)], sequence)
+        self._buffer[sequence] = (header, data)
+        self._reassemble(interface)
+
+    def _reassemble(self, interface: PppInterface) -> None:
+        """ Deliver the packets that are complete, packets that can't be delivered are recorded at interface """
+        while self._buffer:
+            # Every link delivers in order, so anything below the last sequence number received on all links is lost
+            lost_below = min(self._last_received.values(), default=-1)
+            overflow = len(self._buffer) > self.max_buffered
+
+            if (first := self._buffer.get(self._expected)) is None:
+                if self._expected <= lost_below or overflow:
+                    self.statistics.buffer_overflows += self._expected > lost_below
+                    self.statistics.fragments_lost += 1
+                    self._expected += 1
+                    continue
+                return
+            if not first[0].begin:  # The remainder of a packet of which the start was lost
+                del self._buffer[self._expected]
+                self.statistics.fragments_discarded += 1
+                self._expected += 1
+                continue
+
+            end = self._expected
+            while (fragment := self._buffer.get(end)) is not None and not fragment[0].end:
+                end += 1
+            if fragment is None:  # Incomplete packet
+                if end <= lost_below or overflow:
+                    self.statistics.buffer_overflows += end > lost_below
+                    for sequence in range(self._expected, end):
+                        del self._buffer[sequence]
+                    self.statistics.fragments_discarded += end - self._expected
+                    self.statistics.fragments_lost += 1
+                    self._expected = end + 1
+                    continue
+                return
+
+            packet = b''.join(bytes(self._buffer.pop(sequence)[1]) for sequence in range(self._expected, end + 1))
+            self._expected = end + 1
+            try:
+                protocol = PppProtocol(int.from_bytes(packet[:2], byteorder='big'))
+            except ValueError as e:
+                self.statistics.unknown_protocols += 1
+                interface.drops.record(PppFrame, FrameDecodeError(DropReason.UNKNOWN_PROTOCOL, str(e)), packet)
+                continue
+            self.statistics.packets_delivered += 1
+            self.deliver(PppFrame(protocol, packet[2:]))
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def leave(self, interface: Optional[PppInterface] = None) -> None:
+        """ Remove a member link from the bundle, or dissolve the bundle if no interface is given """
+        for member in list(self.interfaces) if interface is None else [interface]:
+            self.interfaces.remove(member)
+            del self._last_received[id(member)]
+            member.bundle = None
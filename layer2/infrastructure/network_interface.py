@@ -2,15 +2,28 @@ from __future__ import annotations
 
 from abc import abstractmethod, ABC
 from ipaddress import IPv4Address
-from typing import Optional
+from typing import Optional, Final
 
 from layer2.arp.arp import extract_arp_packet, ARPOperation, ARPPacket, ARPFrame
-from layer2.ethernet.decoding import decode_frame
+from layer2.ethernet.decoding import decode_frame, payload_size
 from layer2.ethernet.ethernet import EthernetFrameBase, EthernetFrame, EtherType
-from layer2.hdlc.hdlc import HdlcFrame
+from layer2.frame_errors import DropStatistics, FrameDecodeError, DropReason
+from layer2.hdlc.arq import HdlcLink, ArqMode
+from layer2.hdlc.control_field import UnnumberedCf, UnnumberedType
+from layer2.hdlc.hdlc import HdlcFrame, HdlcUFrame
+from layer2.infrastructure.compression import PppCompression
+from layer2.infrastructure.device_log import DeviceLog, LogLevel
+from layer2.infrastructure.link_probe import LinkProbe
 from layer2.infrastructure.network_error import NetworkError
+from layer2.infrastructure.queueing import EgressPort
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.infrastructure.spanning_tree import SpanningTreePort, BRIDGE_GROUP_ADDRESS
 from layer2.mac import Mac
-from layer2.ppp.point_to_point import PppFrame
+from layer2.ppp.lcp import LcpPacket, LcpCode
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+from layer2.tools import owned_bytes
+
+_BRIDGE_GROUP_BYTES: Final = BRIDGE_GROUP_ADDRESS.address
 
 
 class NetworkInterface(object):
@@ -19,6 +32,8 @@ class NetworkInterface(object):
         self.interface_num = interface_num
         self.parent: DeviceWithInterfaces = parent
         self.name = name + f"{interface_num}"
+        self.channel: Optional[Channel] = None  # Without a channel data is received as soon as it is sent
+        self.drops = DropStatistics()  # Received frames that could not be decoded
 
     def receive(self, data: bytes, incoming_interface_num: int) -> None:
         self.parent.receive(data, incoming_interface_num=incoming_interface_num)
@@ -26,8 +41,11 @@ class NetworkInterface(object):
     def send(self, data: bytes) -> None:
         if self.connector is None:
             raise NetworkError("No device connected to this interface")
-        else:
+        elif self.channel is None:
             self.connector.receive(data, incoming_interface_num=self.connector.interface_num)
+        else:
+            connector = self.connector
+            self.channel.transmit(data, lambda received: connector.receive(received, connector.interface_num))
 
     def connect(self, other_interface: NetworkInterface) -> None:
         if self.connector is not None:
@@ -46,14 +64,20 @@ class NetworkInterface(object):
     def __str__(self):
         return f"INTERFACE[interface_num={self.interface_num}, parent={self.parent}]"
 
+    def _log(self, level: LogLevel, message: str, *args) -> None:
+        """ Log an event of this interface in the log of its parent """
+        if (log := self.parent.log).enabled(level):
+            log.log(level, "<[%s]>: " + message, self.name, *args)
+
     def say(self, *args):
-        self.parent.say(f"<[{self.name}]>:", *args)
+        self._log(LogLevel.INFO, " ".join(["%s"] * len(args)), *args)
 
 
 class DeviceWithInterfaces(ABC):
     def __init__(self, num_interfaces: int, name: str = None, name_prefix: str = "DEVICE", name_suffix: str = ""):
         self._interfaces = [NetworkInterface(i, self) for i in range(num_interfaces)]
         self.name = name_prefix + ('' if name is None else f'_{name}') + name_suffix
+        self.log = DeviceLog(self)
 
     def get_interface(self, interface_num: int):
         if not 0 <= interface_num < len(self._interfaces):
@@ -76,48 +100,184 @@ class DeviceWithInterfaces(ABC):
         self.get_interface(interface_num).disconnect()
 
     def say(self, *args):
-        print(f"[{self.name}]:", *args)
+        """ Log the arguments, separated by spaces, at level INFO """
+        self.log.info(" ".join(["%s"] * len(args)), *args)
 
     def __str__(self):
         return self.name
 
 
 class EthernetInterface(NetworkInterface):
-    def __init__(self, interface_num: int, parent: DeviceWithInterfaces, mac: Mac = Mac(), ):
+    """
+    An Ethernet interface with an MTU, the largest payload it sends and receives, of at most MAX_JUMBO_PAYLOAD bytes.
+    Frames with a larger payload are dropped: received ones are counted in drops, sent ones in oversize_sent.
+    With an EgressPort the frames that are sent are queued until the channel can transmit them. In cut-through mode
+    received frames are not decoded, their bytes are passed on to parent.forward_bytes instead.
+    Frames to the bridge group address are BPDUs, which are handed to the spanning tree port of the interface if it has
+    one and discarded otherwise.
+    """
+    def __init__(self, interface_num: int, parent: DeviceWithInterfaces, mac: Mac = Mac(),
+                 mtu: int = EthernetFrame.MAX_PAYLOAD):
         super().__init__(interface_num, parent, name="eth")
         self._mac = mac
+        self.mtu = mtu
+        self.oversize_sent = 0
+        self.egress: Optional[EgressPort] = None
+        self.cut_through = False
+        self.stp_port: Optional[SpanningTreePort] = None
 
     @property
     def mac(self):
         return self._mac
 
+    @property
+    def mtu(self) -> int:
+        return self._mtu
+
+    @mtu.setter
+    def mtu(self, mtu: int) -> None:
+        if not EthernetFrame.MIN_PAYLOAD <= mtu <= EthernetFrame.MAX_JUMBO_PAYLOAD:
+            raise ValueError(f"The MTU should be between {EthernetFrame.MIN_PAYLOAD} and "
+                             f"{EthernetFrame.MAX_JUMBO_PAYLOAD} bytes, got {mtu}")
+        self._mtu = mtu
+
+    def _within_mtu(self, data: bytes) -> bool:
+        """ Whether the payload of the received frame fits the MTU, the frame is counted as dropped if it doesn't """
+        if (size := payload_size(data)) <= self._mtu:
+            return True
+        message = f"Received a payload of {size} bytes on an interface with an MTU of {self._mtu} bytes"
+        self.drops.record(EthernetFrame, FrameDecodeError(DropReason.OVERSIZE_FRAME, message), data)
+        return False
+
     def receive(self, data: bytes, incoming_interface_num: int) -> None:
-        frame = decode_frame(data)
+        if data[:6] == _BRIDGE_GROUP_BYTES:
+            if self.stp_port is not None:
+                self.stp_port.receive(data)
+            return
+        if not self._within_mtu(data):
+            return
+        if self.cut_through:
+            self.parent.forward_bytes(data, incoming_interface_num)
+            return
+        try:
+            frame = decode_frame(data)
+        except ValueError as e:
+            self.drops.record(EthernetFrame, e, data)
+            return
         self.parent.receive(frame, incoming_interface_num=incoming_interface_num)
 
     def send(self, frame: EthernetFrameBase) -> None:
+        if len(frame.payload) > self._mtu:
+            self.oversize_sent += 1
+        elif self.egress is not None:
+            self.egress.enqueue(frame)
+        else:
+            self.transmit(frame)
+
+    def transmit(self, frame: EthernetFrameBase) -> None:
+        """ Put the frame on the channel right away """
         raw_data = frame.bytes()
         super().send(raw_data)
 
+    def transmit_bytes(self, data: bytes) -> None:
+        """ Put the bytes of a frame on the channel as they are, unless the frame exceeds the MTU """
+        if payload_size(data) > self._mtu:
+            self.oversize_sent += 1
+        else:
+            super().send(data)
+
     def connect(self, other_interface: EthernetInterface) -> None:
         if not isinstance(other_interface, EthernetInterface):
             raise NetworkError("Cannot connect to a non-ethernet interface")
         super().connect(other_interface)
+        if self.stp_port is not None:
+            self.stp_port.link_changed()
+
+    def disconnect(self) -> None:
+        connected = self.connector is not None
+        super().disconnect()
+        if connected and self.stp_port is not None:
+            self.stp_port.link_changed()
+
+
+TEST: Final = UnnumberedCf(True, UnnumberedType.TEST)
+ALL_STATIONS: Final = 0xFF  # The address of TEST commands sent by probes
+NO_STATION: Final = 0x00  # The address of TEST responses sent by interfaces without link procedures
+_ECHO_CODES: Final = (LcpCode.ECHO_REQUEST.value, LcpCode.ECHO_REPLY.value)
 
 
 class HdlcInterface(NetworkInterface):  # TODO This needs an ip address when using with IP (or make it ip unnumbered)
     def __init__(self, interface_num: int, parent: DeviceWithInterfaces, extended: bool = False):
         super().__init__(interface_num, parent, name="hdlc")
         self.extended = extended
+        self.link: Optional[HdlcLink] = None
+        self.probe: Optional[LinkProbe] = None
+
+    def enable_arq(self, clock: SimulationClock, address: int, remote_address: int, window_size: int = None,
+                   mode: ArqMode = ArqMode.GO_BACK_N, channel: Channel = None, **kwargs) -> HdlcLink:
+        """
+        Run the HDLC link procedures on this interface, with frames sent over the channel (by default the channel of
+        this interface, or an ideal channel on the clock if it has none). The window size defaults to the largest
+        window of the sequence numbering of this interface.
+        Information is then sent with send_information, and only received I-frames that are in sequence are passed on.
+        """
+        if channel is not None or self.channel is None:
+            self.channel = Channel(clock) if channel is None else channel
+        if window_size is None:
+            window_size = 127 if self.extended else 7
+        self.link = HdlcLink(clock, self.send, self._deliver, address, remote_address, window_size,
+                             extended=self.extended, mode=mode, **kwargs)
+        return self.link
 
     def receive(self, data: bytes, incoming_interface_num: int) -> None:
-        frame = HdlcFrame.decode_frame_from_bytes(data, extended=self.extended)
-        self.parent.receive(frame, incoming_interface_num=incoming_interface_num)
+        try:
+            frame = HdlcFrame.decode_frame_from_bytes(data, extended=self.extended)
+        except ValueError as e:
+            self.drops.record(HdlcFrame, e, data)
+            return
+        if isinstance(frame.control, UnnumberedCf) and frame.control.type is UnnumberedType.TEST:
+            self._process_test(frame)
+        elif self.link is not None:
+            if frame.address not in (self.link.address, self.link.remote_address):
+                message = f"Frame for station {frame.address} on a link between {self.link.address} and " \
+                          f"{self.link.remote_address}"
+                self.drops.record(HdlcFrame, FrameDecodeError(DropReason.BAD_ADDRESS, message), data)
+                return
+            self.link.receive(frame)
+        else:
+            self.parent.receive(frame, incoming_interface_num=incoming_interface_num)
 
     def send(self, frame: HdlcFrame) -> None:
         raw_data = frame.bytes()
         super().send(raw_data)
 
+    def send_information(self, information: bytes) -> None:
+        if self.link is None:
+            raise NetworkError("The link procedures are not enabled on this interface, use enable_arq first")
+        self.link.send(information)
+
+    def _deliver(self, frame: HdlcFrame) -> None:
+        self.parent.receive(frame, incoming_interface_num=self.interface_num)
+
+    def send_probe(self, payload: bytes, sequence: int) -> None:
+        self.send(HdlcUFrame(ALL_STATIONS, TEST, payload))
+
+    def _is_command(self, frame: HdlcFrame) -> bool:
+        """ Commands are sent to all stations or to the address of this station, responses carry another address """
+        return frame.address == ALL_STATIONS or (self.link is not None and frame.address == self.link.address)
+
+    def _process_test(self, frame: HdlcFrame) -> None:
+        """
+        Answer TEST commands with a TEST response, with the F-bit set to the P-bit of the command and our own address.
+        Responses are never answered: the ones to our own probes are handed to the probe, others are discarded.
+        """
+        if self._is_command(frame):
+            address = NO_STATION if self.link is None else self.link.address
+            response = UnnumberedCf(frame.control.pf, UnnumberedType.TEST)
+            self.send(HdlcUFrame(address, response, owned_bytes(frame.information)))
+        elif self.probe is not None and self.probe.owns(frame.information):
+            self.probe.receive_response(frame.information)
+
     def connect(self, other_interface: HdlcInterface) -> None:
         if not isinstance(other_interface, HdlcInterface):
             raise NetworkError("Cannot connect to a non-HDLC interface")
@@ -125,15 +285,38 @@ class HdlcInterface(NetworkInterface):  # TODO This needs an ip address when usi
 
 
 class PppInterface(NetworkInterface):  # TODO This needs an ip address when using with IP (or make it ip unnumbered)
-    def __init__(self, interface_num: int, parent: DeviceWithInterfaces):
+    def __init__(self, interface_num: int, parent: DeviceWithInterfaces, acfc: bool = False, pfc: bool = False):
         super().__init__(interface_num, parent, name="ppp")
+        self.acfc = acfc  # Whether frames are sent with address and control field compression
+        self.pfc = pfc  # Whether frames are sent with protocol field compression
+        self.magic_number = bytes(4)  # Zero as long as no magic number has been negotiated
+        self.probe: Optional[LinkProbe] = None
+        self.bundle = None  # The MultilinkBundle this interface is a member of, if any
+        self.compression: Optional[PppCompression] = None
+        self.header_compression = None  # The IPv4HeaderCompression of layer3.ip.header_compression, if enabled
 
     def receive(self, data: bytes, incoming_interface_num: int) -> None:
-        frame = PppFrame.decode_ppp_frame_from_bytes(data)
-        self.parent.receive(frame, incoming_interface_num=incoming_interface_num)
+        try:
+            frame = PppFrame.decode_ppp_frame_from_bytes(data)
+        except ValueError as e:
+            self.drops.record(PppFrame, e, data)
+            return
+        if self.compression is not None and (frame := self.compression.receive(frame)) is None:
+            return
+        if self.header_compression is not None and (frame := self.header_compression.receive(frame)) is None:
+            return
+        if frame.protocol is PppProtocol.MULTILINK and self.bundle is not None:
+            self.bundle.receive(frame, self)
+        elif frame.protocol is not PppProtocol.LCP or not self._process_lcp(frame):
+            self.parent.receive(frame, incoming_interface_num=incoming_interface_num)
 
     def send(self, frame: PppFrame) -> None:
-        raw_data = frame.bytes()
+        if self.header_compression is not None:
+            frame = self.header_compression.compress(frame)
+        if self.compression is not None:
+            frame = self.compression.compress(frame)
+        acfc = self.acfc and frame.protocol is not PppProtocol.LCP  # LCP packets are never sent with ACFC
+        raw_data = frame.compressed(acfc, self.pfc).bytes()
         super().send(raw_data)
 
     def connect(self, other_interface: PppInterface) -> None:
@@ -141,18 +324,55 @@ class PppInterface(NetworkInterface):  # TODO This needs an ip address when usin
             raise NetworkError("Cannot connect to a non-PPP interface")
         super().connect(other_interface)
 
+    def enable_compression(self, level: int = 6, window_bits: int = 15, **kwargs) -> PppCompression:
+        """ Compress the packets sent over this link with Deflate, the remote interface has to enable it as well """
+        return PppCompression(self, level, window_bits, **kwargs)
+
+    def send_probe(self, payload: bytes, sequence: int) -> None:
+        echo_request = LcpPacket(LcpCode.ECHO_REQUEST, sequence % 2 ** 8, self.magic_number + payload)
+        self.send(PppFrame(PppProtocol.LCP, echo_request.bytes))
+
+    def _process_lcp(self, frame: PppFrame) -> bool:
+        """
+        Answer Echo-Requests and hand Echo-Replies to the probe, returns whether the frame was processed. Other LCP
+        packets are left to the parent undecoded, malformed echo packets are dropped.
+        """
+        if not frame.information or frame.information[0] not in _ECHO_CODES:
+            return False
+        try:
+            packet = LcpPacket.decode(frame.information)
+        except ValueError as e:
+            self.drops.record(LcpPacket, e, frame.information)
+            return True
+        if packet.code == LcpCode.ECHO_REQUEST:
+            echo_data = self.magic_number + owned_bytes(packet.data[4:])
+            echo_reply = LcpPacket(LcpCode.ECHO_REPLY, packet.identifier, echo_data)
+            self.send(PppFrame(PppProtocol.LCP, echo_reply.bytes))
+            return True
+        elif packet.code == LcpCode.ECHO_REPLY and self.probe is not None and self.probe.owns(packet.data[4:]):
+            self.probe.receive_response(packet.data[4:])
+            return True
+        return False
+
 
 class EthernetInterfaceWithArp(EthernetInterface):
     """
     Ethernet interface that automatically handles ARP requests, so only non-ARP frames are forwarded to the parent.
     """
-    def __init__(self, interface_num: int, parent: DeviceWithInterfaces, ip4: IPv4Address, mac: Mac = Mac()):
-        super().__init__(interface_num, parent, mac)
+    def __init__(self, interface_num: int, parent: DeviceWithInterfaces, ip4: IPv4Address, mac: Mac = Mac(),
+                 mtu: int = EthernetFrame.MAX_PAYLOAD):
+        super().__init__(interface_num, parent, mac, mtu)
         self.ip4_cache: dict[IPv4Address, Mac] = {}
         self.ip4 = ip4
 
     def receive(self, data: bytes, incoming_interface_num: int) -> None:
-        frame = self.process_ethernet_frame(decode_frame(data))
+        if data[:6] == _BRIDGE_GROUP_BYTES or not self._within_mtu(data):  # Hosts take no part in the spanning tree
+            return
+        try:
+            frame = self.process_ethernet_frame(decode_frame(data))
+        except ValueError as e:  # Also unsupported EtherTypes and malformed ARP packets
+            self.drops.record(EthernetFrame, e, data)
+            return
         if frame is not None:
             self.parent.receive(frame, incoming_interface_num=incoming_interface_num)
 
@@ -173,14 +393,16 @@ class EthernetInterfaceWithArp(EthernetInterface):
             if arp_packet.operation == ARPOperation.REQUEST:
                 self.respond_to_arp_request(arp_packet)
         else:
-            self.say(f"Received ARP packet targeted at {arp_packet.target_ip}, dropping packet.")
+            self._log(LogLevel.DEBUG, "Received ARP packet targeted at %s, dropping packet.", arp_packet.target_ip)
 
     def store_arp_information(self, arp_packet: ARPPacket):
-        self.say(f"Received ARP packet from {arp_packet.sender_ip}, storing their MAC {arp_packet.sender_mac}")
+        self._log(LogLevel.INFO, "Received ARP packet from %s, storing their MAC %s", arp_packet.sender_ip,
+                  arp_packet.sender_mac)
         self.ip4_cache[arp_packet.sender_ip] = arp_packet.sender_mac
 
     def respond_to_arp_request(self, arp_packet: ARPPacket):
-        self.say(f"Received ARP request targeted at me ({arp_packet.target_ip}), responding with: {self.mac}.")
+        self._log(LogLevel.INFO, "Received ARP request targeted at me (%s), responding with: %s.", arp_packet.target_ip,
+                  self.mac)
         response = arp_packet.get_response(self.mac)
         self.send(response)
 
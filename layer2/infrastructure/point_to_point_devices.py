@@ -22,8 +22,9 @@ class PointToPointRouterBase(DeviceWithInterfaces, ABC):
             raise NetworkError("incoming_interface_num is equal to outgoing_interface_num, dropping frame.")
         else:
             if self.get_interface(outgoing_interface_num).connector is None:
-                self.say(f"No interface connected on {outgoing_interface_num}, we'll just silently drop the frame.")
+                self.log.debug("No interface connected on %d, we'll just silently drop the frame.",
+                               outgoing_interface_num)
             else:
-                self.say(f"Forwarding data to interface {outgoing_interface_num}.")
+                self.log.debug("Forwarding data to interface %d.", outgoing_interface_num)
                 self.get_interface(outgoing_interface_num).connector.send(frame=frame)
 
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import random
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Optional
+
+from layer2.ethernet.ethernet import EthernetFrameBase, EtherType
+from layer2.infrastructure.network_error import NetworkError
+from layer2.infrastructure.simulation import Channel
+
+Classifier = Callable[[EthernetFrameBase], int]
+
+
+def precedence_classifier(num_queues: int) -> Classifier:
+    """
+    Classify IPv4 packets by the precedence in their TOS field (the first 3 bits of the DSCP): the highest precedence
+    goes to queue 0 and the lowest to the last queue. Other frames go to the last queue.
+    """
+    def classify(frame: EthernetFrameBase) -> int:
+        if getattr(frame, 'ether_type', None) is not EtherType.IPV4 or len(frame.payload) < 2:
+            return num_queues - 1
+        return (7 - (frame.payload[1] >> 5)) * num_queues // 8
+    return classify
+
+
+class QueueStatistics(object):
+    """ Counters of an EgressQueue. Latencies are the times between enqueueing and dequeueing of the frames. """
+
+    def __init__(self):
+        self.enqueued = 0
+        self.dequeued = 0
+        self.tail_drops = 0
+        self.early_drops = 0  # By the drop policy, before the queue was full
+        self.bytes_dequeued = 0
+        self.max_depth = 0
+        self.depth_at_arrival = 0  # Summed over all arriving frames, for the mean depth seen by arrivals
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def drops(self) -> int:
+        return self.tail_drops + self.early_drops
+
+    @property
+    def drop_ratio(self) -> float:
+        arrivals = self.enqueued + self.drops
+        return self.drops / arrivals if arrivals else 0.0
+
+    @property
+    def mean_depth(self) -> float:
+        arrivals = self.enqueued + self.drops
+        return self.depth_at_arrival / arrivals if arrivals else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.dequeued if self.dequeued else 0.0
+
+    def __str__(self):
+        return f"{self.enqueued} enqueued, {self.drops} dropped ({self.tail_drops} tail, {self.early_drops} early), " \
+               f"depth {self.mean_depth:.1f} on average and {self.max_depth} at most, latency " \
+               f"{1000 * self.mean_latency:.3f} ms on average and {1000 * self.max_latency:.3f} ms at most"
+
+
+class DropPolicy(ABC):
+    """ Decides whether a frame is admitted to a queue that is not full """
+
+    @abstractmethod
+    def admit(self, depth: int) -> bool:
+        raise NotImplementedError
+
+
+class TailDrop(DropPolicy):
+    """ Admit every frame, so frames are only dropped when the queue is full """
+
+    def admit(self, depth: int) -> bool:
+        return True
+
+
+class RandomEarlyDetection(DropPolicy):
+    """
+    Random early detection (RED, Floyd and Jacobson 1993). The average depth is an exponentially weighted moving average
+    of the depth seen by arriving frames. Below min_threshold every frame is admitted, above max_threshold every frame
+    is dropped, and in between frames are dropped with a probability that rises linearly to max_probability, spread out
+    by the number of frames admitted since the last drop.
+    """
+
+    def __init__(self, min_threshold: float, max_threshold: float, max_probability: float = 0.1,
+                 weight: float = 0.002, seed: Optional[int] = None):
+        if not 0 <= min_threshold < max_threshold:
+            raise ValueError(f"Expected 0 <= min_threshold < max_threshold, got {min_threshold} and {max_threshold}")
+        if not 0 < max_probability <= 1:
+            raise ValueError(f"The maximum drop probability should be in (0, 1], got {max_probability}")
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.max_probability = max_probability
+        self.weight = weight
+        self.average = 0.0
+        self._count = 0  # Frames admitted since the last drop
+        self._random = random.Random(seed)
+
+    def admit(self, depth: int) -> bool:
+        self.average += self.weight * (depth - self.average)
+        if self.average < self.min_threshold:
+            self._count = 0
+            return True
+        if self.average >= self.max_threshold:
+            self._count = 0
+            return False
+        probability = self.max_probability * (self.average - self.min_threshold) / \
+            (self.max_threshold - self.min_threshold)
+        if self._count * probability < 1:
+            probability /= 1 - self._count * probability
+        else:
+            probability = 1.0
+        if self._random.random() < probability:
+            self._count = 0
+            return False
+        self._count += 1
+        return True
+
+
+class _QueuedFrame(object):
+    __slots__ = ('frame', 'size', 'enqueued_at', 'tag')
+
+    def __init__(self, frame: EthernetFrameBase, size: int, enqueued_at: float, tag: float):
+        self.frame = frame
+        self.size = size
+        self.enqueued_at = enqueued_at
+        self.tag = tag
+
+
+class EgressQueue(object):
+    """
+    A FIFO queue of at most capacity frames. The weight is the share of the bandwidth the queue gets from weighted
+    schedulers.
+    """
+
+    def __init__(self, capacity: int = 64, drop_policy: DropPolicy = None, weight: float = 1.0):
+        if capacity <= 0:
+            raise ValueError(f"The capacity should be positive, got {capacity}")
+        if weight <= 0:
+            raise ValueError(f"The weight should be positive, got {weight}")
+        self.capacity = capacity
+        self.drop_policy = TailDrop() if drop_policy is None else drop_policy
+        self.weight = weight
+        self.statistics = QueueStatistics()
+        self._frames: deque[_QueuedFrame] = deque()
+
+    def offer(self, frame: EthernetFrameBase, size: int, now: float, tag: float = 0.0) -> bool:
+        """ Enqueue the frame, unless it is dropped. Returns whether it was enqueued. """
+        statistics = self.statistics
+        depth = len(self._frames)
+        statistics.depth_at_arrival += depth
+        if depth >= self.capacity:
+            statistics.tail_drops += 1
+            return False
+        if not self.drop_policy.admit(depth):
+            statistics.early_drops += 1
+            return False
+        self._frames.append(_QueuedFrame(frame, size, now, tag))
+        statistics.enqueued += 1
+        statistics.max_depth = max(statistics.max_depth, depth + 1)
+        return True
+
+    def pop(self, now: float) -> EthernetFrameBase:
+        queued = self._frames.popleft()
+        latency = now - queued.enqueued_at
+        statistics = self.statistics
+        statistics.dequeued += 1
+        statistics.bytes_dequeued += queued.size
+        statistics.total_latency += latency
+        statistics.max_latency = max(statistics.max_latency, latency)
+        return queued.frame
+
+    @property
+    def head(self) -> _QueuedFrame:
+        return self._frames[0]
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+class Scheduler(ABC):
+    """ Chooses the queue from which the next frame is transmitted """
+
+    def tag(self, index: int, queue: EgressQueue, size: int) -> float:
+        """ The tag of a frame of size bytes that is offered to the queue with the index """
+        return 0.0
+
+    def enqueued(self, index: int, tag: float) -> None:
+        """ Called when the frame with the tag was enqueued in the queue with the index, but not when it was dropped """
+
+    @abstractmethod
+    def select(self, queues: list[EgressQueue]) -> int:
+        """ The index of the queue to dequeue from, at least one of the queues is not empty """
+        raise NotImplementedError
+
+
+class StrictPriority(Scheduler):
+    """ Always serve the first queue that is not empty, so queue 0 has the highest priority """
+
+    def select(self, queues: list[EgressQueue]) -> int:
+        return next(i for i, queue in enumerate(queues) if queue)
+
+
+class DeficitRoundRobin(Scheduler):
+    """
+    Deficit round robin (Shreedhar and Varghese 1995). Each visit in the round adds quantum times its weight to the
+    deficit of a queue, which may then send frames as long as their size fits in the deficit.
+    """
+
+    def __init__(self, quantum: int = 1518):
+        if quantum <= 0:
+            raise ValueError(f"The quantum should be positive, got {quantum}")
+        self.quantum = quantum
+        self._deficits: list[float] = []
+        self._current = 0
+        self._credited = False  # Whether the current queue got its quantum in this visit
+
+    def _next_queue(self, num_queues: int) -> None:
+        self._current = (self._current + 1) % num_queues
+        self._credited = False
+
+    def select(self, queues: list[EgressQueue]) -> int:
+        if len(self._deficits) != len(queues):
+            self._deficits = [0.0] * len(queues)
+        while True:
+            i = self._current
+            queue = queues[i]
+            if not queue:
+                self._deficits[i] = 0.0
+                self._next_queue(len(queues))
+                continue
+            if not self._credited:
+                self._deficits[i] += self.quantum * queue.weight
+                self._credited = True
+            if queue.head.size <= self._deficits[i]:
+                self._deficits[i] -= queue.head.size
+                if len(queue) == 1:  # A queue that becomes empty keeps no deficit
+                    self._deficits[i] = 0.0
+                    self._next_queue(len(queues))
+                return i
+            self._next_queue(len(queues))
+
+
+class WeightedFairQueueing(Scheduler):
+    """
+    Weighted fair queueing in its self-clocked form (SCFQ, Golestani 1994). Each frame gets a virtual finish time of its
+    size divided by the weight of its queue after the later of the virtual time and the finish time of the previous
+    frame of its queue. The frame with the lowest finish time is sent first, and its finish time becomes the virtual
+    time. Dropped frames do not count towards the finish time of their queue.
+    """
+
+    def __init__(self):
+        self.virtual_time = 0.0
+        self._last_finish: dict[int, float] = {}
+
+    def tag(self, index: int, queue: EgressQueue, size: int) -> float:
+        start = max(self.virtual_time, self._last_finish.get(index, 0.0)) if queue else self.virtual_time
+        return start + size / queue.weight
+
+    def enqueued(self, index: int, tag: float) -> None:
+        self._last_finish[index] = tag
+
+    def select(self, queues: list[EgressQueue]) -> int:
+        index = min((i for i, queue in enumerate(queues) if queue), key=lambda i: queues[i].head.tag)
+        self.virtual_time = queues[index].head.tag
+        return index
+
+
+class EgressPort(object):
+    """
+    Egress queueing on an EthernetInterface: the frames sent on the interface are classified into one of the queues
+    (classifier returns the index of the queue, by default 0) and the scheduler chooses the next frame to transmit each
+    time the channel of the interface has finished transmitting the previous one, so frames wait in the queues instead
+    of on the channel.
+    """
+
+    def __init__(self, interface, queues: list[EgressQueue] = None, scheduler: Scheduler = None,
+                 classifier: Classifier = None, channel: Channel = None):
+        if channel is not None:
+            interface.channel = channel
+        if interface.channel is None:
+            raise NetworkError("Egress queueing needs a channel, to know when the interface can transmit")
+        self.interface = interface
+        self.queues = [EgressQueue()] if queues is None else queues
+        self.scheduler = StrictPriority() if scheduler is None else scheduler
+        self.classifier = classifier
+        self.transmitting = False
+        interface.egress = self
+
+    def detach(self) -> None:
+        if self.interface.egress is self:
+            self.interface.egress = None
+
+    @property
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self.queues)
+
+    def enqueue(self, frame: EthernetFrameBase) -> bool:
+        """ Classify and enqueue the frame, returns whether it was enqueued """
+        index = 0 if self.classifier is None else min(self.classifier(frame), len(self.queues) - 1)
+        queue = self.queues[index]
+        size = len(frame.bytes())
+        now = self.interface.channel.clock.now
+        tag = self.scheduler.tag(index, queue, size)
+        if not queue.offer(frame, size, now, tag):
+            return False
+        self.scheduler.enqueued(index, tag)
+        if not self.transmitting:
+            self._transmit_next()
+        return True
+
+    def _transmit_next(self) -> None:
+        if self.depth == 0:
+            self.transmitting = False
+            return
+        channel = self.interface.channel
+        frame = self.queues[self.scheduler.select(self.queues)].pop(channel.clock.now)
+        self.transmitting = True
+        self.interface.transmit(frame)
+        channel.clock.schedule(channel.backlog, self._transmit_next)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import heapq
+import random
+from typing import Callable, Optional
+
+
+class Timer(object):
+    """ A callback that is scheduled on a SimulationClock, it can be cancelled as long as it has not fired yet """
+    __slots__ = ('time', 'callback', 'args', 'active')
+
+    def __init__(self, time: float, callback: Callable, args: tuple):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+    def cancel(self) -> None:
+        self.active = False
+
+
+class SimulationClock(object):
+    """
+    Discrete-event clock: the simulated time only advances by running the callbacks that are scheduled on it, in order
+    of their time (and in order of scheduling for callbacks at the same time). Times are in seconds.
+    """
+
+    def __init__(self):
+        self.now: float = 0.0
+        self._queue: list[tuple[float, int, Timer]] = []
+        self._sequence = 0
+
+    def schedule(self, delay: float, callback: Callable, *args) -> Timer:
+        if delay < 0:
+            raise ValueError(f"Can't schedule a callback in the past, got delay {delay}")
+        timer = Timer(self.now + delay, callback, args)
+        heapq.heappush(self._queue, (timer.time, self._sequence, timer))
+        self._sequence += 1
+        return timer
+
+    def step(self) -> bool:
+        """ Run the next callback that has not been cancelled, returns False if there is none """
+        while self._queue:
+            time, _, timer = heapq.heappop(self._queue)
+            if timer.active:
+                self.now = time
+                timer.active = False
+                timer.callback(*timer.args)
+                return True
+        return False
+
+    def run(self, until: float = None, max_steps: int = 10_000_000) -> None:
+        """ Run callbacks until there are none left, or the next one is scheduled after the time until """
+        for _ in range(max_steps):
+            while self._queue and not self._queue[0][2].active:
+                heapq.heappop(self._queue)
+            if not self._queue or (until is not None and self._queue[0][0] > until):
+                break
+            self.step()
+        else:
+            raise RuntimeError(f"Simulation did not finish within {max_steps} steps")
+        if until is not None:
+            self.now = max(self.now, until)
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for _, _, timer in self._queue if timer.active)
+
+
+class Channel(object):
+    """
+    One direction of a link between two interfaces. Data is serialized onto the channel at the given bandwidth (bits per
+    second), one transmission at a time, and arrives after an additional propagation delay. Each transmission is lost
+    with probability loss_rate, or when the drop filter returns True for it.
+    """
+
+    def __init__(self, clock: SimulationClock, bandwidth: float = 1e6, delay: float = 0.0, loss_rate: float = 0.0,
+                 drop_filter: Callable[[bytes], bool] = None, seed: Optional[int] = None):
+        if bandwidth <= 0:
+            raise ValueError(f"The bandwidth should be positive, got {bandwidth}")
+        if not 0 <= loss_rate <= 1:
+            raise ValueError(f"The loss rate is a probability, got {loss_rate}")
+        self.clock = clock
+        self.bandwidth = bandwidth
+        self.delay = delay
+        self.loss_rate = loss_rate
+        self.drop_filter = drop_filter
+        self._random = random.Random(seed)
+        self._busy_until = 0.0
+
+        self.transmitted = 0
+        self.lost = 0
+        self.bits_transmitted = 0
+        self.busy_time = 0.0
+
+    def transmission_time(self, data: bytes) -> float:
+        return 8 * len(data) / self.bandwidth
+
+    def transmit(self, data: bytes, deliver: Callable[[bytes], None]) -> float:
+        """ Put data on the channel, deliver is called with it on arrival. Returns the (scheduled) arrival time. """
+        start = max(self.clock.now, self._busy_until)
+        self._busy_until = start + self.transmission_time(data)
+        self.busy_time += self._busy_until - start
+        arrival = self._busy_until + self.delay
+        self.transmitted += 1
+        self.bits_transmitted += 8 * len(data)
+        if (self.drop_filter is not None and self.drop_filter(data)) or \
+                (self.loss_rate > 0 and self._random.random() < self.loss_rate):
+            self.lost += 1
+        else:
+            self.clock.schedule(arrival - self.clock.now, deliver, data)
+        return arrival
+
+    @property
+    def backlog(self) -> float:
+        """ The time it takes before everything that has been put on the channel so far has been transmitted """
+        return max(0.0, self._busy_until - self.clock.now)
+
+    @property
+    def utilization(self) -> float:
+        """ The fraction of the simulated time during which the channel was transmitting """
+        elapsed = max(self.clock.now, self._busy_until)
+        return self.busy_time / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def bandwidth_delay_product(self) -> float:
+        """ The number of bits that fit on the channel during a round trip, if the return channel is identical """
+        return self.bandwidth * 2 * self.delay
@@ -0,0 +1,466 @@
+from __future__ import annotations
+
+import struct
+import zlib
+from enum import Enum
+from typing import Final, Optional, Iterable
+
+from layer2.ethernet.ethernet import EthernetFrameBase
+from layer2.frame_errors import FrameDecodeError, DropReason
+from layer2.infrastructure.simulation import SimulationClock, Timer
+from layer2.mac import Mac
+from layer2.tools import crc32_to_bytes
+
+BRIDGE_GROUP_ADDRESS: Final = Mac.fromstring("01:80:C2:00:00:00")  # Frames to this address are never forwarded
+
+
+class PortRole(Enum):
+    DISABLED = "disabled"
+    ROOT = "root"  # The port with the best path to the root bridge
+    DESIGNATED = "designated"  # The port that connects its link to the root bridge
+    ALTERNATE = "alternate"  # Another path to the root bridge, which is blocked
+    BACKUP = "backup"  # A redundant connection to a link for which the bridge has a designated port, blocked
+
+
+class PortState(Enum):
+    DISCARDING = "discarding"
+    LEARNING = "learning"  # Source addresses are learned, but frames are not forwarded yet
+    FORWARDING = "forwarding"
+
+
+class Bpdu(object):
+    """
+    A rapid spanning tree (RSTP) BPDU of 36 bytes (IEEE 802.1D-2004, clause 9.3.3). The priority vector of the BPDU is
+    the root bridge, the cost of the path to it, and the bridge and port that sent it. Times are in seconds.
+    """
+    __slots__ = ('root_id', 'root_path_cost', 'bridge_id', 'port_id', 'role', 'proposal', 'agreement', 'learning',
+                 'forwarding', 'topology_change', 'message_age', 'max_age', 'hello_time', 'forward_delay')
+
+    _FORMAT: Final = struct.Struct('>HBBBQIQHHHHHB')
+    SIZE: Final = _FORMAT.size
+    # The port role in bits 2 and 3 of the flags, alternate and backup ports share a value
+    _ROLE_CODES: Final = {PortRole.ALTERNATE: 1, PortRole.BACKUP: 1, PortRole.ROOT: 2, PortRole.DESIGNATED: 3}
+    _ROLES: Final = {1: PortRole.ALTERNATE, 2: PortRole.ROOT, 3: PortRole.DESIGNATED}
+
+    def __init__(self, root_id: int, root_path_cost: int, bridge_id: int, port_id: int, role: PortRole,
+                 proposal: bool = False, agreement: bool = False, learning: bool = False, forwarding: bool = False,
+                 topology_change: bool = False, message_age: float = 0.0, max_age: float = 20.0,
+                 hello_time: float = 2.0, forward_delay: float = 15.0):
+        self.root_id = root_id
+        self.root_path_cost = root_path_cost
+        self.bridge_id = bridge_id
+        self.port_id = port_id
+        self.role = role
+        self.proposal = proposal
+        self.agreement = agreement
+        self.learning = learning
+        self.forwarding = forwarding
+        self.topology_change = topology_change
+        self.message_age = message_age
+        self.max_age = max_age
+        self.hello_time = hello_time
+        self.forward_delay = forward_delay
+
+    @property
+    def vector(self) -> tuple[int, int, int, int]:
+        """ The priority vector, lower is better """
+        return self.root_id, self.root_path_cost, self.bridge_id, self.port_id
+
+    def bytes(self) -> bytes:
+        flags = self.topology_change | self.proposal << 1 | self._ROLE_CODES.get(self.role, 0) << 2 | \
+            self.learning << 4 | self.forwarding << 5 | self.agreement << 6
+        return self._FORMAT.pack(0, 2, 2, flags, self.root_id, self.root_path_cost, self.bridge_id, self.port_id,
+                                 *(round(256 * t) for t in (self.message_age, self.max_age, self.hello_time,
+                                                            self.forward_delay)), 0)
+
+    @classmethod
+    def decode(cls, data: bytes | memoryview) -> Bpdu:
+        if len(data) < cls.SIZE:
+            raise FrameDecodeError(DropReason.SHORT_FRAME, f"A BPDU has {cls.SIZE} bytes, got {len(data)}", data)
+        protocol, version, bpdu_type, flags, root_id, cost, bridge_id, port_id, age, max_age, hello, delay, _ = \
+            cls._FORMAT.unpack_from(data)
+        if protocol != 0 or version < 2 or bpdu_type != 2:
+            message = f"Not a rapid spanning tree BPDU: protocol {protocol}, version {version} and type {bpdu_type}"
+            raise FrameDecodeError(DropReason.UNKNOWN_PROTOCOL, message, data)
+        return cls(root_id, cost, bridge_id, port_id, cls._ROLES.get(flags >> 2 & 3, PortRole.DISABLED),
+                   bool(flags & 0x02), bool(flags & 0x40), bool(flags & 0x10), bool(flags & 0x20), bool(flags & 0x01),
+                   age / 256, max_age / 256, hello / 256, delay / 256)
+
+    def __repr__(self):
+        return f"Bpdu(root={self.root_id:016x}, cost={self.root_path_cost}, bridge={self.bridge_id:016x}, " \
+               f"port={self.port_id:04x}, {self.role.name})"
+
+
+class BpduFrame(EthernetFrameBase):
+    """
+    An 802.3 frame to the bridge group address with an LLC header for the spanning tree protocol (DSAP and SSAP 0x42,
+    UI control field), which carries a BPDU.
+    """
+    __slots__ = ('bpdu',)
+
+    MIN_PAYLOAD: Final = 43  # The LLC header is part of the data field, which is at least 46 bytes
+    LLC_HEADER: Final = b'\x42\x42\x03'
+    _HEADER_SIZE: Final = 14 + len(LLC_HEADER)
+
+    def __init__(self, source: Mac, bpdu: Bpdu):
+        data = bpdu.bytes()
+        length = (len(self.LLC_HEADER) + len(data)).to_bytes(2, byteorder='big')
+        super().__init__(BRIDGE_GROUP_ADDRESS, source, data, length + self.LLC_HEADER)
+        self.bpdu = bpdu
+
+    @classmethod
+    def decode_frame(cls, frame_bytes: bytes | memoryview) -> BpduFrame:
+        view = memoryview(frame_bytes)
+        if (n := len(view)) < cls._HEADER_SIZE + Bpdu.SIZE + 4:
+            raise FrameDecodeError(DropReason.SHORT_FRAME, f"Received BPDU frame of length {n}", frame_bytes)
+        fcs = view[-4:].tobytes()
+        if fcs != (calculated_fcs := crc32_to_bytes(zlib.crc32(view[:-4]))):
+            message = f"The calculated FCS '{calculated_fcs}' does not equal FCS of the received frame: '{fcs}'"
+            raise FrameDecodeError(DropReason.BAD_FCS, message, frame_bytes)
+        if view[14:cls._HEADER_SIZE] != cls.LLC_HEADER:
+            message = f"Invalid LLC header for a BPDU: {view[14:cls._HEADER_SIZE].tobytes()}"
+            raise FrameDecodeError(DropReason.UNKNOWN_PROTOCOL, message, frame_bytes)
+        bpdu = Bpdu.decode(view[cls._HEADER_SIZE:])
+        return cls(Mac.fromint(int.from_bytes(view[6:12], byteorder='big')), bpdu)
+
+
+class SpanningTreeStatistics(object):
+    """ Counters of a SpanningTree """
+
+    def __init__(self):
+        self.bpdus_sent = 0
+        self.bpdus_received = 0
+        self.bpdus_dropped = 0  # Received BPDUs that could not be decoded
+        self.root_changes = 0
+        self.role_changes = 0
+        self.state_changes = 0
+        self.topology_changes = 0
+
+    def __str__(self):
+        return f"{self.bpdus_sent} BPDUs sent, {self.bpdus_received} received ({self.bpdus_dropped} dropped), " \
+               f"{self.root_changes} root changes, {self.role_changes} role changes, {self.state_changes} state " \
+               f"changes, {self.topology_changes} topology changes"
+
+
+class SpanningTreePort(object):
+    """
+    The spanning tree state of a switch port, which is attached to its interface as interface.stp_port. Edge ports lead
+    to hosts instead of bridges: they forward right away. A port is an edge port if it is configured as such (admin
+    edge), or when it has not received a BPDU within the edge delay of its link coming up.
+    """
+
+    def __init__(self, tree: SpanningTree, interface, path_cost: int, priority: int = 128):
+        if not 0 <= priority < 256 or priority % 16:
+            raise ValueError(f"The port priority should be a multiple of 16 below 256, got {priority}")
+        self.tree = tree
+        self.interface = interface
+        self.port_id = (priority >> 4) << 12 | (interface.interface_num + 1)
+        self.path_cost = path_cost
+        self.role = PortRole.DISABLED
+        self.state = PortState.DISCARDING
+        self.admin_edge = False
+        self.edge = False
+        self.info: Optional[Bpdu] = None  # The designated BPDU received on the port
+        self.info_expires_at = 0.0
+        self.agreed = False  # Whether the bridge on the other side agreed that this designated port forwards
+        self.bpdu_received = False  # Since the link came up
+        self.pending = False  # Whether a BPDU has to be sent
+        self.pending_agreement = False
+        self._forward_delay_timer: Optional[Timer] = None
+        self._edge_delay_timer: Optional[Timer] = None
+        interface.stp_port = self
+
+    def detach(self) -> None:
+        if self.interface.stp_port is self:
+            self.interface.stp_port = None
+
+    @property
+    def learning(self) -> bool:
+        return self.state is not PortState.DISCARDING
+
+    @property
+    def forwarding(self) -> bool:
+        return self.state is PortState.FORWARDING
+
+    def receive(self, data: bytes) -> None:
+        self.tree.receive(self, data)
+
+    def link_changed(self) -> None:
+        self.tree.link_changed(self)
+
+    def _cancel_timers(self) -> None:
+        for timer in (self._forward_delay_timer, self._edge_delay_timer):
+            if timer is not None:
+                timer.cancel()
+        self._forward_delay_timer = self._edge_delay_timer = None
+
+    def __repr__(self):
+        return f"SpanningTreePort({self.interface.interface_num}, {self.role.name}, {self.state.name})"
+
+
+class SpanningTree(object):
+    """
+    The rapid spanning tree protocol (RSTP, IEEE 802.1D-2004) of a switch, which blocks the redundant ports between
+    switches so that the active topology has no loops.
+
+    The bridge with the lowest bridge ID (priority and address) becomes the root. Every other bridge forwards on its
+    root port, the port with the cheapest path to the root, and each link is forwarded to by one designated port: the
+    one that offers the best path to the root. The other ports are alternate or backup ports, which discard frames.
+    Designated ports propose to forward, and start forwarding as soon as the bridge on the other side agrees, after it
+    has blocked its own designated ports (the sync). Without an agreement they go through the learning state, forward
+    delay by forward delay. Topology changes flush the learned addresses and are propagated to the other bridges.
+    Failed links are noticed at once, and silent failures when the information of a port ages out.
+
+    last_change is the time of the last link change, and last_transition the time of the last change of a port role or
+    state: convergence_time reports the time between them.
+    """
+
+    def __init__(self, switch, interfaces: Iterable, clock: SimulationClock, priority: int = 32768, address: Mac = None,
+                 hello_time: float = 2.0, forward_delay: float = 15.0, max_age: float = 20.0, edge_delay: float = 3.0):
+        if not 0 <= priority < 65536 or priority % 4096:
+            raise ValueError(f"The bridge priority should be a multiple of 4096 below 65536, got {priority}")
+        self.switch = switch
+        self.clock = clock
+        self.bridge_id = priority << 48 | (switch.mac if address is None else address).value
+        self.hello_time = hello_time
+        self.forward_delay = forward_delay
+        self.max_age = max_age
+        self.edge_delay = edge_delay
+        self.statistics = SpanningTreeStatistics()
+        self.ports = [SpanningTreePort(self, interface, self.default_path_cost(interface)) for interface in interfaces]
+
+        self.root_id = self.bridge_id
+        self.root_path_cost = 0
+        self.root_port: Optional[SpanningTreePort] = None
+        self.message_age = 0.0
+        self.last_change = clock.now
+        self.last_transition = clock.now
+        self._tc_until = -1.0  # Topology changes are propagated until this time
+        self._update_roles()
+        self._transmit_pending()
+        self._hello_timer = clock.schedule(hello_time, self._hello)
+
+    @staticmethod
+    def default_path_cost(interface) -> int:
+        """ The recommended path cost of 802.1D-2004, by the bandwidth of the channel of the interface (1 Gbit/s) """
+        bandwidth = 1e9 if interface.channel is None else interface.channel.bandwidth
+        return max(1, min(200_000_000, round(20e12 / bandwidth)))
+
+    @property
+    def is_root(self) -> bool:
+        return self.root_id == self.bridge_id
+
+    @property
+    def convergence_time(self) -> float:
+        """ The time it took this bridge to settle after the last link change """
+        return max(0.0, self.last_transition - self.last_change)
+
+    def port(self, port_num: int) -> SpanningTreePort:
+        return self.ports[port_num]
+
+    def set_edge(self, port_num: int, edge: bool = True) -> None:
+        """ Configure the port as an edge port, which forwards right away """
+        port = self.ports[port_num]
+        port.admin_edge = port.edge = edge
+        self._update_roles()
+        self._transmit_pending()
+
+    def receive(self, port: SpanningTreePort, data: bytes) -> None:
+        try:
+            bpdu = BpduFrame.decode_frame(data).bpdu
+        except ValueError as e:
+            self.statistics.bpdus_dropped += 1
+            port.interface.drops.record(BpduFrame, e, data)
+            return
+        self.statistics.bpdus_received += 1
+        port.bpdu_received = True
+        if port.edge and not port.admin_edge:
+            port.edge = False
+        if port._edge_delay_timer is not None:
+            port._edge_delay_timer.cancel()
+            port._edge_delay_timer = None
+
+        if bpdu.role is PortRole.DESIGNATED and bpdu.message_age < bpdu.max_age:
+            stored = port.info
+            if bpdu.vector < self._designated_vector(port) or \
+                    (stored is not None and (bpdu.bridge_id, bpdu.port_id) == (stored.bridge_id, stored.port_id)):
+                port.info = bpdu
+                port.info_expires_at = self.clock.now + 3 * self.hello_time
+                if stored is None or stored.vector != bpdu.vector or stored.message_age != bpdu.message_age:
+                    self._update_roles()
+                if bpdu.proposal and port.role in (PortRole.ROOT, PortRole.ALTERNATE):
+                    if port.role is PortRole.ROOT:
+                        self._sync()
+                    port.pending_agreement = True
+            else:  # The other bridge has worse information, so tell it about ours
+                port.pending = True
+        elif bpdu.agreement and port.role is PortRole.DESIGNATED and bpdu.root_id == self.root_id:
+            port.agreed = True
+            self._set_state(port, PortState.FORWARDING)
+        if bpdu.topology_change:
+            self._topology_change(port)
+        self._transmit_pending()
+
+    def link_changed(self, port: SpanningTreePort) -> None:
+        self.last_change = self.clock.now
+        if port.interface.connector is None:
+            port.info = None
+            port.bpdu_received = False
+            port.agreed = False
+            port.edge = port.admin_edge
+            port._cancel_timers()
+        self._update_roles()
+        self._transmit_pending()
+
+    def _designated_vector(self, port: SpanningTreePort) -> tuple[int, int, int, int]:
+        """ The priority vector this bridge offers on the port """
+        return self.root_id, self.root_path_cost, self.bridge_id, port.port_id
+
+    def _role_of(self, port: SpanningTreePort) -> PortRole:
+        if port.interface.connector is None:
+            return PortRole.DISABLED
+        if port is self.root_port:
+            return PortRole.ROOT
+        if port.info is None or self._designated_vector(port) < port.info.vector:
+            return PortRole.DESIGNATED
+        return PortRole.BACKUP if port.info.bridge_id == self.bridge_id else PortRole.ALTERNATE
+
+    def _update_roles(self) -> None:
+        best = (self.bridge_id, 0, self.bridge_id, 0, 0)
+        root_port = None
+        for port in self.ports:
+            if (info := port.info) is None or port.interface.connector is None or info.bridge_id == self.bridge_id:
+                continue
+            candidate = (info.root_id, info.root_path_cost + port.path_cost, info.bridge_id, info.port_id, port.port_id)
+            if candidate < best:
+                best, root_port = candidate, port
+        root_changed = root_port is not self.root_port or (best[0], best[1]) != (self.root_id, self.root_path_cost)
+        if best[0] != self.root_id:
+            self.statistics.root_changes += 1
+            self.switch.log.info("Root bridge is now %016x", best[0])
+        self.root_id, self.root_path_cost = best[0], best[1]
+        self.root_port = root_port
+        self.message_age = 0.0 if root_port is None else root_port.info.message_age + 1
+
+        for port in self.ports:
+            if (role := self._role_of(port)) is not port.role:
+                port.role = role
+                self.statistics.role_changes += 1
+                self.last_transition = self.clock.now
+                port.pending = port.pending or role is PortRole.DESIGNATED
+            if role is PortRole.ROOT:
+                port._cancel_timers()
+                self._set_state(port, PortState.FORWARDING)
+            elif role is not PortRole.DESIGNATED:
+                port._cancel_timers()
+                port.agreed = False
+                self._set_state(port, PortState.DISCARDING)
+        if root_changed:
+            for port in self.ports:
+                port.agreed = port.agreed and port.edge
+            self._sync()
+        for port in self.ports:
+            if port.role is PortRole.DESIGNATED and not port.forwarding:
+                self._propose(port)
+
+    def _sync(self) -> None:
+        """ Block the designated ports that have not agreed to the current root information, and let them propose """
+        for port in self.ports:
+            if port.role is PortRole.DESIGNATED and not port.edge and not port.agreed:
+                if port.state is not PortState.DISCARDING:
+                    port._cancel_timers()
+                    self._set_state(port, PortState.DISCARDING)
+                self._propose(port)
+
+    def _propose(self, port: SpanningTreePort) -> None:
+        """ Let a designated port that does not forward yet propose to forward, and start its timers """
+        if port.edge or port.agreed:
+            self._set_state(port, PortState.FORWARDING)
+            return
+        port.pending = True
+        if port._forward_delay_timer is None:
+            port._forward_delay_timer = self.clock.schedule(self.forward_delay, self._forward_delay_expired, port)
+        if port._edge_delay_timer is None and not port.bpdu_received:
+            port._edge_delay_timer = self.clock.schedule(self.edge_delay, self._edge_delay_expired, port)
+
+    def _forward_delay_expired(self, port: SpanningTreePort) -> None:
+        port._forward_delay_timer = None
+        if port.role is PortRole.DESIGNATED and not port.forwarding:
+            if port.state is PortState.DISCARDING:
+                self._set_state(port, PortState.LEARNING)
+                port._forward_delay_timer = self.clock.schedule(self.forward_delay, self._forward_delay_expired, port)
+            else:
+                self._set_state(port, PortState.FORWARDING)
+            self._transmit_pending()
+
+    def _edge_delay_expired(self, port: SpanningTreePort) -> None:
+        port._edge_delay_timer = None
+        if port.role is PortRole.DESIGNATED and not port.bpdu_received:
+            port.edge = True
+            self._set_state(port, PortState.FORWARDING)
+            self._transmit_pending()
+
+    def _set_state(self, port: SpanningTreePort, state: PortState) -> None:
+        if state is port.state:
+            return
+        was_forwarding = port.forwarding
+        port.state = state
+        self.statistics.state_changes += 1
+        self.last_transition = self.clock.now
+        if state is PortState.FORWARDING:
+            port._cancel_timers()
+            if not port.edge:
+                self._topology_change(port)
+        elif was_forwarding:
+            self.switch.flush_cache(port.interface)
+
+    def _topology_change(self, origin: SpanningTreePort) -> None:
+        """ Flush the addresses learned on the other ports, and propagate the change if it is new to this bridge """
+        for port in self.ports:
+            if port is not origin and not port.edge:
+                self.switch.flush_cache(port.interface)
+        if self.clock.now < self._tc_until:
+            return
+        self._tc_until = self.clock.now + 2 * self.hello_time
+        self.statistics.topology_changes += 1
+        for port in self.ports:
+            if port is not origin and port.role in (PortRole.ROOT, PortRole.DESIGNATED) and not port.edge:
+                port.pending = True
+
+    def _hello(self) -> None:
+        now = self.clock.now
+        expired = False
+        for port in self.ports:
+            if port.info is not None and now >= port.info_expires_at:
+                port.info = None
+                expired = True
+        if expired:
+            self.last_change = now
+            self._update_roles()
+        for port in self.ports:
+            if port.role is PortRole.DESIGNATED:
+                port.pending = True
+        self._transmit_pending()
+        self._hello_timer = self.clock.schedule(self.hello_time, self._hello)
+
+    def _transmit_pending(self) -> None:
+        for port in self.ports:
+            if (port.pending or port.pending_agreement) and port.interface.connector is not None:
+                agreement = port.pending_agreement
+                port.pending = port.pending_agreement = False
+                self._send(port, agreement)
+
+    def _send(self, port: SpanningTreePort, agreement: bool) -> None:
+        role = port.role
+        bpdu = Bpdu(self.root_id, self.root_path_cost, self.bridge_id, port.port_id, role,
+                    proposal=role is PortRole.DESIGNATED and not port.forwarding and not port.edge,
+                    agreement=agreement, learning=port.learning, forwarding=port.forwarding,
+                    topology_change=self.clock.now < self._tc_until, message_age=self.message_age,
+                    max_age=self.max_age, hello_time=self.hello_time, forward_delay=self.forward_delay)
+        self.statistics.bpdus_sent += 1
+        port.interface.send(BpduFrame(port.interface.mac, bpdu))
+
+
+def convergence_time(trees: Iterable[SpanningTree], since: float) -> float:
+    """ The time from since until the last change of a port role or state among the bridges """
+    return max(0.0, max(tree.last_transition for tree in trees) - since)
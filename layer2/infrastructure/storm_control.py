@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from layer2.infrastructure.simulation import SimulationClock
+
+
+class StormControl(object):
+    """
+    A safety net against broadcast storms, which arise when switches are connected in a loop without a spanning tree.
+    A switch only floods a frame when storm control admits it, and calls leave() when it is done flooding it.
+
+    At most max_depth floods may be in progress at once. Without channels frames are delivered while they are sent, so
+    a frame that loops back to the switch would otherwise be flooded recursively until the Python stack overflows.
+    With a clock, at most rate_limit frames are flooded per interval seconds as well (unlimited if None).
+    A storm starts when a frame is suppressed and lasts until the floods in progress have finished, or until the end of
+    the interval in which the rate limit was reached.
+    """
+
+    def __init__(self, max_depth: int = 8, rate_limit: int = None, interval: float = 1.0,
+                 clock: SimulationClock = None):
+        if max_depth <= 0:
+            raise ValueError(f"The maximum depth should be positive, got {max_depth}")
+        if rate_limit is not None and clock is None:
+            raise ValueError("A rate limit needs a clock")
+        self.max_depth = max_depth
+        self.rate_limit = rate_limit
+        self.interval = interval
+        self.clock = clock
+        self.depth = 0
+        self.suppressed = 0  # Frames that were not flooded
+        self.storms = 0
+        self.storm_started_at: Optional[float] = None
+        self._interval_start = 0.0
+        self._flooded = 0  # In the current interval
+        self._in_storm = False
+
+    @property
+    def in_storm(self) -> bool:
+        return self._in_storm
+
+    def admit(self) -> bool:
+        """ Whether a frame may be flooded, if so leave() has to be called when it has been flooded """
+        if self.rate_limit is not None:
+            if (now := self.clock.now) >= self._interval_start + self.interval:
+                self._interval_start = now - (now - self._interval_start) % self.interval
+                self._flooded = 0
+                self._in_storm = self._in_storm and self.depth > 0
+            if self._flooded >= self.rate_limit:
+                return self._suppress()
+        if self.depth >= self.max_depth:
+            return self._suppress()
+        self.depth += 1
+        self._flooded += 1
+        return True
+
+    def leave(self) -> None:
+        self.depth -= 1
+        if self.depth == 0 and (self.rate_limit is None or self._flooded < self.rate_limit):
+            self._in_storm = False
+
+    def _suppress(self) -> bool:
+        self.suppressed += 1
+        if not self._in_storm:
+            self._in_storm = True
+            self.storms += 1
+            self.storm_started_at = None if self.clock is None else self.clock.now
+        return False
+
+    def __str__(self):
+        return f"{self.storms} storms detected, {self.suppressed} flooded frames suppressed"
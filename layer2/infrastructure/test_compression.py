@@ -0,0 +1,91 @@
+import os
+from unittest import TestCase
+
+from layer2.frame_errors import DropReason
+from layer2.infrastructure.network_interface import DeviceWithInterfaces, PppInterface
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.ppp.ccp import CcpPacket
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+
+
+class Device(DeviceWithInterfaces):
+    def __init__(self):
+        super().__init__(0)
+        self._interfaces = [PppInterface(0, self)]
+        self.received: list[PppFrame] = []
+
+    def receive(self, frame: PppFrame, incoming_interface_num: int) -> None:
+        self.received.append(frame)
+
+    def say(self, *args):
+        pass
+
+
+class TestPppCompression(TestCase):
+    packets = [f"<html><body><p>Item {i}: the quick brown fox jumps over the lazy dog</p></body></html>".encode()
+               for i in range(200)]
+
+    def connect(self, clock: SimulationClock = None, loss_rate: float = 0.0, compression: bool = True):
+        self.a, self.b = Device(), Device()
+        self.a.connect_to(self.b, 0, 0)
+        if clock is not None:
+            self.a.get_interface(0).channel = Channel(clock, bandwidth=64000, loss_rate=loss_rate, seed=3)
+            self.b.get_interface(0).channel = Channel(clock, bandwidth=64000)
+        if compression:
+            return self.a.get_interface(0).enable_compression(), self.b.get_interface(0).enable_compression()
+
+    def send_all(self, packets: list[bytes]) -> list[bytes]:
+        for packet in packets:
+            self.a.get_interface(0).send(PppFrame(PppProtocol.IPv4, packet))
+        return [bytes(frame.information) for frame in self.b.received]
+
+    def test_packets_are_compressed(self):
+        compression_a, compression_b = self.connect()
+        self.assertEqual(self.packets, self.send_all(self.packets))
+        self.assertTrue(all(frame.protocol is PppProtocol.IPv4 for frame in self.b.received))
+        self.assertEqual(len(self.packets), compression_a.statistics.packets_compressed)
+        self.assertEqual(len(self.packets), compression_b.statistics.packets_decompressed)
+        self.assertGreater(compression_a.statistics.ratio, 4)
+        self.assertGreater(compression_a.statistics.compress_time, 0)
+
+    def test_incompressible_packets_are_sent_uncompressed(self):
+        compression_a, compression_b = self.connect()
+        packets = [os.urandom(200) if i % 2 else packet for i, packet in enumerate(self.packets[:20])]
+        self.assertEqual(packets, self.send_all(packets))
+        self.assertEqual(10, compression_a.statistics.packets_uncompressed)
+        self.assertEqual(10, compression_b.statistics.packets_decompressed)
+        self.assertEqual(0, compression_b.statistics.decompression_errors)
+
+    def test_unknown_and_malformed_ccp_packets_are_dropped(self):
+        compression_a, compression_b = self.connect()
+        for information in (b'\x08\x01\x00\x04', b'\x0e\x01'):  # Code 8 is not a CCP code, a truncated Reset-Request
+            self.a.get_interface(0).send(PppFrame(PppProtocol.CCP, information))
+        drops = self.b.get_interface(0).drops
+        self.assertEqual([1, 1], [drops.count(CcpPacket, reason) for reason in (DropReason.UNKNOWN_PROTOCOL,
+                                                                                 DropReason.MALFORMED)])
+        self.assertEqual([], self.b.received)
+        self.assertEqual(self.packets[:3], self.send_all(self.packets[:3]))
+
+    def test_lost_packets_reset_the_history(self):
+        clock = SimulationClock()
+        compression_a, compression_b = self.connect(clock, loss_rate=0.05)
+        for i, packet in enumerate(self.packets):
+            clock.schedule(0.01 * i, self.a.get_interface(0).send, PppFrame(PppProtocol.IPv4, packet))
+        clock.run()
+        received = [bytes(frame.information) for frame in self.b.received]
+        self.assertEqual([packet for packet in self.packets if packet in received], received)  # In order, uncorrupted
+        self.assertGreater(compression_b.statistics.decompression_errors, 0)
+        self.assertEqual(compression_b.statistics.reset_requests_sent, compression_a.statistics.resets)
+        self.assertGreater(len(received), 0.8 * len(self.packets))
+        self.assertIn(self.packets[-1], received)
+
+    def test_compression_increases_throughput(self):
+        duration = {}
+        for compression in (False, True):
+            clock = SimulationClock()
+            self.connect(clock, compression=compression)
+            self.send_all(self.packets)
+            clock.run()
+            self.assertEqual(self.packets, [bytes(frame.information) for frame in self.b.received])
+            duration[compression] = clock.now
+        self.assertGreater(duration[False] / duration[True], 3)
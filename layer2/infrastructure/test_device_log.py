@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+from layer2.infrastructure.device_log import DeviceLog, LogLevel, RingBufferSink
+from layer2.infrastructure.ethernet_devices import EthernetSwitch, EthernetEndpoint
+from layer2.mac import Mac
+
+
+class Unprintable(object):
+    def __str__(self):
+        raise AssertionError("Formatted an event that should have been discarded")
+
+
+class TestDeviceLog(TestCase):
+
+    def setUp(self) -> None:
+        self.sink = RingBufferSink()
+        self.addCleanup(setattr, DeviceLog, 'default_level', DeviceLog.default_level)
+        self.addCleanup(setattr, DeviceLog, 'sinks', DeviceLog.sinks)
+        DeviceLog.sinks = [self.sink]
+
+    def test_events_below_the_level_are_not_formatted(self):
+        DeviceLog.default_level = LogLevel.INFO
+        log = DeviceLog("device")
+        log.debug("%s", Unprintable())
+        log.info("%d frames from %s", 2, memoryview(b'ab'))
+        self.assertEqual(["2 frames from b'ab'"], self.sink.texts())
+        self.assertEqual("[device]: 2 frames from b'ab'", str(self.sink.events[0]))
+
+    def test_level_of_a_log_overrides_the_default(self):
+        DeviceLog.default_level = LogLevel.OFF
+        quiet, verbose = DeviceLog("quiet"), DeviceLog("verbose", LogLevel.DEBUG)
+        for log in (quiet, verbose):
+            log.debug("debug")
+            log.error("error")
+        self.assertEqual(["verbose"] * 2, [event.source for event in self.sink.events])
+        self.assertEqual(["error"], self.sink.texts(LogLevel.WARNING))
+
+    def test_ring_buffer_keeps_the_last_events(self):
+        sink = RingBufferSink(capacity=3)
+        DeviceLog.sinks = [sink]
+        log = DeviceLog("device", LogLevel.DEBUG)
+        for i in range(5):
+            log.debug("event %d", i)
+        self.assertEqual(["event 2", "event 3", "event 4"], sink.texts())
+
+    def test_switch_logs_forwarding_at_debug(self):
+        switch = EthernetSwitch(2)
+        a, b = (EthernetEndpoint(Mac.fromstring(f"02:00:00:00:00:0{i}")) for i in (1, 2))
+        a.connect_to(switch, 0)
+        b.connect_to(switch, 1)
+        a.send_data(b'hello', b.mac)
+        self.assertEqual([], list(self.sink.events))  # WARNING by default
+
+        switch.log.level = LogLevel.DEBUG
+        a.send_data(b'hello', b.mac)
+        self.assertEqual(["Unknown target 02:00:00:00:00:02, broadcasting frame to all",
+                          "[eth_1]: Forwarding frame from 02:00:00:00:00:01 to 02:00:00:00:00:02"], self.sink.texts())
+        self.assertIs(switch, self.sink.events[0].source)
+
+    def test_say_logs_at_info(self):
+        DeviceLog.default_level = LogLevel.INFO
+        switch = EthernetSwitch(1, name="1")
+        switch.say("Hello", 42)
+        switch.get_interface(0).say("up")
+        self.assertEqual(["[SWITCH_1]: Hello 42", "[SWITCH_1]: <[eth0]>: up"], [str(e) for e in self.sink.events])
@@ -1,8 +1,11 @@
 from ipaddress import IPv4Address
 from unittest import TestCase
 
+from layer2.ethernet.ethernet import EthernetFrame
+from layer2.frame_errors import DropReason
 from layer2.infrastructure.ethernet_devices import EthernetEndpoint, EthernetSwitch, EthernetEndpointWithArp
 from layer2.infrastructure.network_error import NetworkError
+from layer2.infrastructure.simulation import SimulationClock
 from layer2.mac import Mac
 
 
@@ -92,3 +95,107 @@ class TestNetworkInterface2(TestCase):
         self.computer_A.connect_to(self.computer_B, 0)
 
         self.assertEqual(self.computer_A.get_interface(0), self.computer_B.get_interface(0).connector)
+
+
+class Receiver(EthernetEndpoint):
+    def __init__(self, mac: Mac, mtu: int):
+        super().__init__(mac, mtu=mtu)
+        self.received: list[bytes] = []
+
+    def receive(self, frame, incoming_interface_num: int = 0):
+        if (frame := super().receive(frame, incoming_interface_num)) is not None:
+            self.received.append(bytes(frame.payload))
+
+    def say(self, *args):
+        pass
+
+
+class TestMtu(TestCase):
+    jumbo = bytes(8000)
+
+    def setUp(self) -> None:
+        self.switch = EthernetSwitch(3, mtu=9216)
+        self.switch.say = lambda *args: None
+        self.a = Receiver(Mac.fromstring("AA:AA:AA:AA:AA:AA"), 9000)
+        self.b = Receiver(Mac.fromstring("BB:BB:BB:BB:BB:BB"), 9000)
+        self.c = Receiver(Mac.fromstring("CC:CC:CC:CC:CC:CC"), 1500)
+        for i, endpoint in enumerate((self.a, self.b, self.c)):
+            endpoint.connect_to(self.switch, i)
+
+    def test_jumbo_frames_are_switched(self):
+        self.a.send_data(self.jumbo, self.b.mac)
+        self.assertEqual([self.jumbo], self.b.received)
+
+    def test_mtu_mismatch_drops_on_receive(self):
+        self.a.send_data(self.jumbo, self.c.mac)
+        self.a.send_data(b'fits', self.c.mac)
+        self.assertEqual([b'fits'.ljust(EthernetFrame.MIN_PAYLOAD, b'\x00')], self.c.received)
+        self.assertEqual(1, self.c.get_interface(0).drops.count(reason=DropReason.OVERSIZE_FRAME))
+
+    def test_switch_drops_frames_that_exceed_the_egress_mtu(self):
+        self.switch.get_interface(1).mtu = 1500
+        self.a.send_data(self.jumbo, self.b.mac)
+        self.assertEqual([], self.b.received)
+        self.assertEqual(1, self.switch.get_interface(1).oversize_sent)
+
+    def test_endpoint_does_not_send_frames_that_exceed_its_mtu(self):
+        self.c.send_data(self.jumbo, self.a.mac)
+        self.assertEqual([], self.a.received)
+        self.assertEqual(1, self.c.get_interface(0).oversize_sent)
+
+    def test_mtu_is_validated(self):
+        for mtu in (EthernetFrame.MIN_PAYLOAD - 1, EthernetFrame.MAX_JUMBO_PAYLOAD + 1):
+            with self.assertRaises(ValueError):
+                EthernetEndpoint(mtu=mtu)
+
+
+class TestCutThrough(TestCase):
+    frame_bytes = EthernetFrame(Mac.fromstring("BB:BB:BB:BB:BB:BB"), Mac.fromstring("AA:AA:AA:AA:AA:AA"),
+                                b'Some payload').bytes()
+
+    def setUp(self) -> None:
+        self.a = Receiver(Mac.fromstring("AA:AA:AA:AA:AA:AA"), 1500)
+        self.b = Receiver(Mac.fromstring("BB:BB:BB:BB:BB:BB"), 1500)
+        self.c = Receiver(Mac.fromstring("CC:CC:CC:CC:CC:CC"), 1500)
+        self.switches = [EthernetSwitch(3, cut_through=True), EthernetSwitch(3, cut_through=True)]
+        for switch in self.switches:
+            switch.say = lambda *args: None
+        self.a.connect_to(self.switches[0], 0)
+        self.switches[0].connect_to(self.switches[1], 0, 1)
+        self.b.connect_to(self.switches[1], 1)
+        self.c.connect_to(self.switches[1], 2)
+
+    def test_frames_are_forwarded_and_addresses_learned(self):
+        self.a.send_data(b'flooded', self.b.mac)
+        self.b.send_data(b'known', self.a.mac)
+        self.a.send_data(b'known', self.b.mac)
+        self.assertEqual([b'flooded', b'known'], [payload[:7].rstrip(b'\x00') for payload in self.b.received])
+        self.assertEqual([], self.c.received)  # The flooded frame is not addressed to c
+        self.assertEqual(self.switches[1].get_interface(1), self.switches[1].cache[self.b.mac])
+        self.assertEqual(1, self.switches[1].cache.statistics.floods)
+
+    def test_bad_fcs_is_detected_by_the_receiver(self):
+        self.b.send_data(b'learn', self.a.mac)
+        corrupted = self.frame_bytes[:-1] + bytes([self.frame_bytes[-1] ^ 0x01])
+        self.switches[0].get_interface(0).receive(corrupted, 0)
+        self.assertEqual([], self.b.received)
+        self.assertEqual(1, self.b.get_interface(0).drops.count(reason=DropReason.BAD_FCS))
+
+        self.switches[0].cut_through = False
+        self.switches[0].get_interface(0).receive(corrupted, 0)
+        self.assertEqual(1, self.switches[0].get_interface(0).drops.count(reason=DropReason.BAD_FCS))
+        self.assertEqual(1, self.b.get_interface(0).drops.total)
+
+    def test_short_frames_are_dropped(self):
+        self.switches[0].get_interface(0).receive(self.frame_bytes[:10], 0)
+        self.assertEqual(1, self.switches[0].get_interface(0).drops.count(reason=DropReason.SHORT_FRAME))
+        self.assertEqual(0, len(self.switches[0].cache))
+
+    def test_frames_are_decoded_for_ports_with_egress_queues(self):
+        clock = SimulationClock()
+        ports = self.switches[1].enable_queueing(clock, num_queues=2)
+        self.a.send_data(bytes((0x45, 0xB8)) + b'expedited', self.b.mac)
+        clock.run()
+        self.assertEqual(1, len(self.b.received))
+        self.assertEqual(1, ports[1].queues[0].statistics.dequeued)
+
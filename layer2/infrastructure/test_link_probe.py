@@ -0,0 +1,161 @@
+from unittest import TestCase
+
+from layer2.hdlc.control_field import UnnumberedCf, UnnumberedType
+from layer2.hdlc.hdlc import HdlcUFrame
+from layer2.infrastructure.link_probe import RttHistogram, LinkProbe
+from layer2.infrastructure.network_interface import DeviceWithInterfaces, HdlcInterface, PppInterface, TEST
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.ppp.lcp import LcpPacket, LcpCode
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+
+
+class Device(DeviceWithInterfaces):
+    def __init__(self, interface_type: type):
+        super().__init__(0)
+        self._interfaces = [interface_type(0, self)]
+        self.received = []
+
+    def receive(self, frame, incoming_interface_num: int) -> None:
+        self.received.append(frame)
+
+
+class TestRttHistogram(TestCase):
+
+    def test_buckets_and_statistics(self):
+        histogram = RttHistogram()
+        for rtt in (0.0000005, 0.0011, 0.0015, 0.003):
+            histogram.add(rtt)
+        self.assertEqual(1, histogram.buckets[0])
+        self.assertEqual(2, histogram.buckets[RttHistogram.bucket_of(0.0011)])  # 1100 and 1500 us are in [1024, 2048)
+        self.assertEqual((0.001024, 0.002048), RttHistogram.bucket_bounds(RttHistogram.bucket_of(0.0011)))
+        self.assertAlmostEqual(0.001400125, histogram.mean)
+        self.assertEqual(0.0015, histogram.percentile(75))
+        self.assertEqual(0.003, histogram.max)
+
+    def test_window_rolls_over(self):
+        histogram = RttHistogram(window=3)
+        for rtt in (1.0, 0.001, 0.002, 0.003):
+            histogram.add(rtt)
+        self.assertEqual(3, len(histogram))
+        self.assertEqual(0.003, histogram.max)
+        self.assertAlmostEqual(0.002, histogram.mean)
+        self.assertEqual(3, sum(histogram.buckets))
+
+
+class TestLinkProbe(TestCase):
+
+    def connect(self, interface_type: type, clock: SimulationClock = None, delay: float = 0.01,
+                loss_rate: float = 0.0) -> tuple[Device, Device]:
+        a, b = Device(interface_type), Device(interface_type)
+        a.connect_to(b, 0, 0)
+        if clock is not None:
+            a.get_interface(0).channel = Channel(clock, bandwidth=1e6, delay=delay, loss_rate=loss_rate, seed=1)
+            b.get_interface(0).channel = Channel(clock, bandwidth=1e6, delay=delay)
+        return a, b
+
+    def test_hdlc_test_frames_measure_round_trip_time(self):
+        clock = SimulationClock()
+        a, b = self.connect(HdlcInterface, clock)
+        probe = LinkProbe(a.get_interface(0), clock)
+        probe.start(interval=0.1, count=10)
+        clock.run()
+
+        frame_length = len(HdlcUFrame(0xFF, UnnumberedCf(True, UnnumberedType.TEST), bytes(16)).bytes())
+        expected = 2 * (0.01 + 8 * frame_length / 1e6)
+        self.assertEqual(10, probe.received)
+        self.assertAlmostEqual(expected, probe.histogram.min)
+        self.assertAlmostEqual(expected, probe.histogram.max)
+        self.assertEqual([], a.received)  # The probes don't reach the devices
+        self.assertEqual([], b.received)
+
+    def test_both_ends_can_probe_at_the_same_time(self):
+        clock = SimulationClock()
+        a, b = self.connect(HdlcInterface, clock)
+        probe_a, probe_b = LinkProbe(a.get_interface(0), clock), LinkProbe(b.get_interface(0), clock)
+        probe_a.start(interval=0.01, count=5)
+        probe_b.start(interval=0.01, count=5)
+        clock.run()
+        self.assertEqual((5, 5), (probe_a.received, probe_b.received))
+
+    def test_probes_share_a_link_with_arq_traffic(self):
+        clock = SimulationClock()
+        a, b = self.connect(HdlcInterface, clock)
+        link_a = a.get_interface(0).enable_arq(clock, 0x03, 0x01)
+        b.get_interface(0).enable_arq(clock, 0x01, 0x03)
+        link_a.connect()
+        probe = LinkProbe(a.get_interface(0), clock)
+        probe.start(interval=0.005, count=20)
+        for i in range(50):
+            a.get_interface(0).send_information(f"information {i}".encode())
+        clock.run()
+        self.assertEqual([f"information {i}".encode() for i in range(50)], [bytes(f.information) for f in b.received])
+        self.assertEqual(20, probe.received)
+
+    def test_unanswered_probes_are_lost(self):
+        clock = SimulationClock()
+        a, b = self.connect(HdlcInterface, clock, loss_rate=1.0)
+        probe = LinkProbe(a.get_interface(0), clock, timeout=0.5)
+        probe.start(interval=0.1, count=3)
+        clock.run(until=0.35)
+        self.assertEqual((3, 0, 0), (probe.sent, probe.received, probe.lost))
+        clock.run(until=1.0)
+        self.assertEqual(3, probe.lost)
+        self.assertEqual(0, probe.outstanding)
+
+    def test_late_responses_are_lost(self):
+        clock = SimulationClock()
+        a, b = self.connect(HdlcInterface, clock, delay=0.3)
+        probe = LinkProbe(a.get_interface(0), clock, timeout=0.5)
+        probe.send_probe()
+        clock.run()
+        self.assertEqual((0, 1, 1), (probe.received, probe.lost, probe.unexpected))
+        self.assertEqual(0, len(probe.histogram))
+
+    def test_hdlc_test_responses_are_not_answered(self):
+        a, b = self.connect(HdlcInterface)
+        sent = []
+        for device in (a, b):
+            interface = device.get_interface(0)
+            interface.send = lambda frame, send=interface.send: sent.append(frame) or send(frame)
+        a.get_interface(0).send(HdlcUFrame(0x01, TEST, b'hello'))  # A response, as it's not sent to all stations
+        self.assertEqual(1, len(sent))
+        a.get_interface(0).send(HdlcUFrame(0xFF, UnnumberedCf(False, UnnumberedType.TEST), b'hello'))
+        a.get_interface(0).send(HdlcUFrame(0xFF, TEST, b'hello'))
+        self.assertEqual([(0xFF, False), (0x00, False), (0xFF, True), (0x00, True)],
+                         [(frame.address, frame.control.pf) for frame in sent[1:]])
+        self.assertEqual([], a.received)
+
+    def test_ppp_lcp_echo_without_simulated_time(self):
+        a, b = self.connect(PppInterface)
+        probe = LinkProbe(a.get_interface(0))
+        for _ in range(3):
+            probe.send_probe()
+        self.assertEqual(3, probe.received)
+        self.assertTrue(0 <= probe.histogram.max < 1)
+
+        data = PppFrame(PppProtocol.IPv4, b'Not a probe')
+        a.get_interface(0).send(data)
+        self.assertEqual([data], b.received)
+        self.assertEqual([], a.received)
+
+    def test_ppp_echo_reply(self):
+        a, b = self.connect(PppInterface)
+        echo_request = LcpPacket(LcpCode.ECHO_REQUEST, 42, bytes(4) + b'ping')
+        b.get_interface(0).send(PppFrame(PppProtocol.LCP, echo_request.bytes))
+        reply = LcpPacket.decode(b.received[0].information)
+        self.assertEqual(LcpPacket(LcpCode.ECHO_REPLY, 42, bytes(4) + b'ping'), reply)
+
+    def test_other_and_malformed_lcp_packets(self):
+        a, b = self.connect(PppInterface)
+        unknown = PppFrame(PppProtocol.LCP, b'\x0c\x01\x00\x04')  # Code 12 is not an LCP code
+        a.get_interface(0).send(unknown)
+        a.get_interface(0).send(PppFrame(PppProtocol.LCP, b'\x09\x01'))  # A truncated Echo-Request
+        self.assertEqual([unknown], b.received)
+        self.assertEqual(1, b.get_interface(0).drops.count(LcpPacket))
+
+    def test_lcp_packet_round_trip(self):
+        packet = LcpPacket(LcpCode.ECHO_REQUEST, 7, b'\x00\x00\x00\x00data')
+        self.assertEqual(b'\x09\x07\x00\x0c\x00\x00\x00\x00data', packet.bytes)
+        self.assertEqual(packet, LcpPacket.decode(packet.bytes + b'padding'))
+        with self.assertRaises(ValueError):
+            LcpPacket.decode(packet.bytes[:-1])
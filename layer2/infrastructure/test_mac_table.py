@@ -0,0 +1,105 @@
+from unittest import TestCase
+
+from layer2.infrastructure.ethernet_devices import EthernetSwitch, EthernetEndpoint
+from layer2.infrastructure.mac_table import MacTable
+from layer2.infrastructure.simulation import SimulationClock
+from layer2.mac import Mac
+
+MACS = [Mac.fromint(0x020000000000 + i) for i in range(10)]
+
+
+class TestMacTable(TestCase):
+
+    def test_learn_and_lookup(self):
+        table = MacTable()
+        table.learn(MACS[0], 1)
+        self.assertEqual(1, table.lookup(MACS[0]))
+        self.assertIsNone(table.lookup(MACS[1]))
+        self.assertEqual((1, 1, 0.5), (table.statistics.hits, table.statistics.misses, table.statistics.hit_ratio))
+
+    def test_host_moves_to_another_port(self):
+        table = MacTable()
+        table.learn(MACS[0], 1)
+        table.learn(MACS[0], 2)
+        self.assertEqual(2, table[MACS[0]])
+        self.assertEqual((0, 1), (table.entries_on(1), table.entries_on(2)))
+        self.assertEqual(1, table.statistics.moves)
+
+    def test_least_recently_learned_entry_is_evicted(self):
+        table = MacTable(capacity=3)
+        for mac in MACS[:3]:
+            table.learn(mac, 0)
+        table.learn(MACS[0], 0)  # Learned again, so MACS[1] is now the oldest
+        table.learn(MACS[3], 0)
+        self.assertEqual([MACS[2], MACS[0], MACS[3]], list(table))
+        self.assertEqual(1, table.statistics.evictions)
+
+    def test_entries_age_out(self):
+        clock = SimulationClock()
+        table = MacTable(aging_time=10.0, clock=clock)
+        table.learn(MACS[0], 0)
+        clock.schedule(6.0, table.learn, MACS[1], 0)
+        clock.schedule(8.0, table.learn, MACS[0], 0)
+        clock.run()
+        self.assertEqual(2, len(table))
+        clock.schedule(9.0, lambda: None)
+        clock.run()
+        self.assertEqual([MACS[0]], list(table))  # 17 seconds, MACS[1] was learned at 6
+        self.assertEqual(1, table.statistics.aged_out)
+
+    def test_per_port_limit(self):
+        table = MacTable(max_per_port=2)
+        results = [table.learn(mac, 0) for mac in MACS[:3]] + [table.learn(MACS[3], 1)]
+        self.assertEqual([True, True, False, True], results)
+        self.assertNotIn(MACS[2], table)
+        self.assertEqual(1, table.statistics.port_limit_refusals)
+        table.flush(0)
+        self.assertEqual([MACS[3]], list(table))
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            MacTable(capacity=0)
+        with self.assertRaises(ValueError):
+            MacTable(max_per_port=0)
+
+
+class Host(EthernetEndpoint):
+    def __init__(self, mac: Mac):
+        super().__init__(mac)
+        self.received = 0
+
+    def receive(self, frame, incoming_interface_num: int = 0):
+        if super().receive(frame, incoming_interface_num) is not None:
+            self.received += 1
+
+
+class TestSwitchWithMacTable(TestCase):
+
+    def setUp(self) -> None:
+        self.clock = SimulationClock()
+        self.switch = EthernetSwitch(3, cache=MacTable(aging_time=30.0, clock=self.clock))
+        self.hosts = [Host(mac) for mac in MACS[:3]]
+        for i, host in enumerate(self.hosts):
+            host.connect_to(self.switch, i)
+
+    def test_known_destinations_are_not_flooded(self):
+        a, b, c = self.hosts
+        a.send_data(b'to b', b.mac)
+        b.send_data(b'to a', a.mac)
+        statistics = self.switch.cache.statistics
+        self.assertEqual((1, 1, 1), (statistics.floods, statistics.hits, statistics.misses))
+        self.assertEqual(0, c.received)
+
+    def test_moved_host_is_found_after_its_entry_ages_out(self):
+        a, b, c = self.hosts
+        b.send_data(b'from b', a.mac)
+        b.disconnect()
+        c.disconnect()
+        b.connect_to(self.switch, 2)  # Where c was
+        a.send_data(b'lost', b.mac)  # Still sent to port 1
+        self.assertEqual(0, b.received)
+
+        self.clock.schedule(31.0, a.send_data, b'flooded', b.mac)
+        self.clock.run()
+        self.assertEqual(1, b.received)
+        self.assertEqual(2, self.switch.cache.statistics.aged_out)  # The entries of a and b
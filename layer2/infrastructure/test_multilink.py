@@ -0,0 +1,129 @@
+from unittest import TestCase
+
+from layer2.frame_errors import DropReason
+from layer2.infrastructure.multilink import MultilinkBundle
+from layer2.infrastructure.network_error import NetworkError
+from layer2.infrastructure.network_interface import DeviceWithInterfaces, PppInterface
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.ppp.multilink import MultilinkHeader
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+
+
+class Device(DeviceWithInterfaces):
+    def __init__(self, num_interfaces: int):
+        super().__init__(0)
+        self._interfaces = [PppInterface(i, self) for i in range(num_interfaces)]
+        self.received: list[PppFrame] = []
+        self.received_at: list[float] = []
+        self.clock = None
+
+    def receive(self, frame: PppFrame, incoming_interface_num: int) -> None:
+        self.received.append(frame)
+        if self.clock is not None:
+            self.received_at.append(self.clock.now)
+
+    def say(self, *args):
+        pass
+
+
+class TestMultilinkHeader(TestCase):
+
+    def test_long_and_short_sequence_numbers(self):
+        header = MultilinkHeader(True, False, 0x123456)
+        self.assertEqual(b'\x80\x12\x34\x56', header.bytes)
+        self.assertEqual(header, MultilinkHeader.decode(header.bytes + b'data'))
+
+        short_header = MultilinkHeader(False, True, 0xABC, short=True)
+        self.assertEqual(b'\x4A\xBC', short_header.bytes)
+        self.assertEqual(short_header, MultilinkHeader.decode(short_header.bytes, short=True))
+        with self.assertRaises(ValueError):
+            MultilinkHeader(True, True, 0x1000, short=True)
+
+
+class TestMultilinkBundle(TestCase):
+    packets = [bytes([i % 256]) * (200 + 7 * i) for i in range(100)]
+
+    def create_bundle(self, bandwidths: list[float], loss_rates: list[float] = None, delay: float = 0.005,
+                      **kwargs) -> tuple[MultilinkBundle, MultilinkBundle]:
+        self.clock = SimulationClock()
+        self.a, self.b = Device(len(bandwidths)), Device(len(bandwidths))
+        self.b.clock = self.clock
+        for i, bandwidth in enumerate(bandwidths):
+            self.a.connect_to(self.b, i, i)
+            loss_rate = 0.0 if loss_rates is None else loss_rates[i]
+            self.a.get_interface(i).channel = Channel(self.clock, bandwidth, delay, loss_rate, seed=i)
+            self.b.get_interface(i).channel = Channel(self.clock, bandwidth, delay)
+        interfaces = lambda device: [device.get_interface(i) for i in range(len(bandwidths))]
+        return MultilinkBundle(interfaces(self.a), **kwargs), MultilinkBundle(interfaces(self.b), **kwargs)
+
+    def send_all(self, bundle: MultilinkBundle) -> None:
+        for packet in self.packets:
+            bundle.send(PppProtocol.IPv4, packet)
+        self.clock.run()
+
+    def test_packets_are_fragmented_and_reassembled_in_order(self):
+        bundle_a, bundle_b = self.create_bundle([1e6, 1e6, 1e6])
+        self.send_all(bundle_a)
+        self.assertEqual(self.packets, [bytes(frame.information) for frame in self.b.received])
+        self.assertTrue(all(frame.protocol == PppProtocol.IPv4 for frame in self.b.received))
+        self.assertEqual(3 * len(self.packets), bundle_a.statistics.fragments_sent)
+        self.assertEqual(0, bundle_b.buffered)
+
+    def test_fragment_sizes_follow_link_speed(self):
+        bundle_a, _ = self.create_bundle([1e6, 3e6])
+        (slow, slow_size), (fast, fast_size) = bundle_a.fragment_sizes(1000)
+        self.assertEqual(1000, slow_size + fast_size)
+        self.assertAlmostEqual(3, (fast_size + bundle_a.fragment_overhead) / (slow_size + bundle_a.fragment_overhead),
+                               delta=0.01)
+        self.assertEqual([(bundle_a.interfaces[1], 100)], bundle_a.fragment_sizes(100))  # Small packets aren't split
+
+    def test_fragment_sizes_follow_queue_depth(self):
+        bundle_a, _ = self.create_bundle([1e6, 1e6])
+        self.a.get_interface(0).send(PppFrame(PppProtocol.IPv4, bytes(1000)))  # Occupies the first link
+        sizes = dict(bundle_a.fragment_sizes(1500))
+        self.assertGreater(sizes[bundle_a.interfaces[1]], sizes[bundle_a.interfaces[0]] + 900)
+
+    def test_throughput_scales_with_the_number_of_links(self):
+        duration = {}
+        for num_links in (1, 2, 4):
+            bundle_a, _ = self.create_bundle([1e6] * num_links)
+            self.send_all(bundle_a)
+            self.assertEqual(len(self.packets), len(self.b.received))
+            duration[num_links] = self.b.received_at[-1]
+        self.assertGreater(duration[1] / duration[2], 1.9)
+        self.assertGreater(duration[1] / duration[4], 3.6)
+
+    def test_lost_fragments_drop_only_their_packets(self):
+        bundle_a, bundle_b = self.create_bundle([1e6, 1e6], loss_rates=[0.1, 0.0])
+        self.send_all(bundle_a)
+        received = [bytes(frame.information) for frame in self.b.received]
+        self.assertLess(len(received), len(self.packets))
+        self.assertEqual([packet for packet in self.packets if packet in received], received)  # In order, uncorrupted
+        self.assertEqual(len(self.packets) - len(received), bundle_b.statistics.fragments_lost)
+
+    def test_reorder_buffer_is_bounded(self):
+        bundle_a, bundle_b = self.create_bundle([1e6, 1e6], loss_rates=[1.0, 0.0], max_buffered=10)
+        self.send_all(bundle_a)
+        self.assertLessEqual(bundle_b.buffered, 10)
+        self.assertGreater(bundle_b.statistics.buffer_overflows, 0)
+
+    def test_interface_can_be_member_of_a_single_bundle(self):
+        device = Device(2)
+        bundle = MultilinkBundle([device.get_interface(0)])
+        with self.assertRaises(NetworkError):
+            MultilinkBundle([device.get_interface(0), device.get_interface(1)])
+        bundle.leave()
+        self.assertIsNone(device.get_interface(0).bundle)
+
+    def test_undeliverable_fragments_are_dropped(self):
+        device = Device(2)
+        interfaces = [device.get_interface(0), device.get_interface(1)]
+        bundle = MultilinkBundle(list(interfaces))
+        whole = lambda sequence: MultilinkHeader(True, True, sequence).bytes
+        bundle.receive(PppFrame(PppProtocol.MULTILINK, b'\xc0\x00'), interfaces[0])  # Too short for a header
+        bundle.receive(PppFrame(PppProtocol.MULTILINK, whole(0) + b'\x00\x23data'), interfaces[0])  # Unknown protocol
+        bundle.leave(interfaces[1])
+        bundle.receive(PppFrame(PppProtocol.MULTILINK, whole(1) + b'\x00\x21data'), interfaces[1])  # Still underway
+        self.assertEqual([b'data'], [bytes(frame.information) for frame in device.received])
+        self.assertEqual((1, 1), (bundle.statistics.malformed_fragments, bundle.statistics.unknown_protocols))
+        self.assertEqual({DropReason.MALFORMED: 1, DropReason.UNKNOWN_PROTOCOL: 1}, interfaces[0].drops.by_reason())
@@ -0,0 +1,90 @@
+import zlib
+from ipaddress import IPv4Address
+from unittest import TestCase
+
+from layer2.ethernet.ethernet import EthernetFrame, EtherType
+from layer2.frame_errors import DropStatistics, DropReason
+from layer2.infrastructure.network_interface import DeviceWithInterfaces, PppInterface, EthernetInterfaceWithArp
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.mac import Mac
+from layer2.ppp.lcp import LcpPacket, LcpCode
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+from layer2.tools import crc32_to_bytes
+
+
+class Device(DeviceWithInterfaces):
+    def __init__(self, acfc: bool = False, pfc: bool = False):
+        super().__init__(0)
+        self._interfaces = [PppInterface(0, self, acfc=acfc, pfc=pfc)]
+        self.received: list[PppFrame] = []
+
+    def receive(self, frame: PppFrame, incoming_interface_num: int) -> None:
+        self.received.append(frame)
+
+    def say(self, *args):
+        pass
+
+
+class TestPppHeaderCompression(TestCase):
+
+    def test_compressed_frames_are_delivered(self):
+        for acfc, pfc in ((False, False), (True, False), (False, True), (True, True)):
+            with self.subTest(acfc=acfc, pfc=pfc):
+                a, b = Device(acfc, pfc), Device(acfc, pfc)
+                a.connect_to(b, 0, 0)
+                frame = PppFrame(PppProtocol.IPv4, b'information')
+                a.get_interface(0).send(frame)
+                self.assertEqual([(PppProtocol.IPv4, b'information')],
+                                 [(f.protocol, bytes(f.information)) for f in b.received])
+                self.assertEqual((acfc, pfc), (b.received[0].acfc, b.received[0].pfc))
+
+    def test_lcp_frames_keep_address_and_control_fields(self):
+        a, b = Device(acfc=True, pfc=True), Device(acfc=True, pfc=True)
+        a.connect_to(b, 0, 0)
+        echo_request = LcpPacket(LcpCode.ECHO_REQUEST, 1, bytes(4))
+        b.get_interface(0).send(PppFrame(PppProtocol.LCP, echo_request.bytes))
+        self.assertFalse(b.received[0].acfc)  # The echo reply sent by a
+        self.assertEqual(LcpCode.ECHO_REPLY, LcpPacket.decode(b.received[0].information).code)
+
+    def test_compression_increases_small_packet_throughput(self):
+        durations = []
+        for compress in (False, True):
+            clock = SimulationClock()
+            a, b = Device(compress, compress), Device()
+            a.connect_to(b, 0, 0)
+            a.get_interface(0).channel = Channel(clock, bandwidth=64000)
+            for _ in range(100):
+                a.get_interface(0).send(PppFrame(PppProtocol.IPv4, bytes(20)))
+            clock.run()
+            self.assertEqual(100, len(b.received))
+            durations.append(clock.now)
+        self.assertAlmostEqual(28 / 25, durations[0] / durations[1])  # 8 bytes of overhead instead of 5
+
+
+class TestReceiveErrors(TestCase):
+
+    def test_undecodable_frames_are_counted(self):
+        a, b = Device(), Device()
+        a.connect_to(b, 0, 0)
+        interface = b.get_interface(0)
+        interface.drops = DropStatistics(sample_size=2)
+        valid = PppFrame(PppProtocol.IPv4, b'information').bytes()
+        unknown_protocol = b'\xff\x03\x00\x23' + valid[4:-4]
+        unknown_protocol += crc32_to_bytes(zlib.crc32(unknown_protocol))
+        for data in (valid[:3], valid[:-1] + b'\x00', unknown_protocol, valid):
+            interface.receive(data, 0)
+        self.assertEqual(1, len(b.received))
+        self.assertEqual({DropReason.SHORT_FRAME: 1, DropReason.BAD_FCS: 1, DropReason.UNKNOWN_PROTOCOL: 1},
+                         interface.drops.by_reason())
+        self.assertEqual([valid[:-1] + b'\x00', unknown_protocol], [sample.data for sample in interface.drops.samples])
+
+    def test_unsupported_ethernet_frames_are_counted(self):
+        device = Device()
+        interface = EthernetInterfaceWithArp(0, device, IPv4Address('10.0.0.1'), Mac.fromint(0x020000000001))
+        valid = EthernetFrame(interface.mac, Mac.fromint(0x020000000002), b'information' * 5).bytes()
+        for ether_type in (EtherType.WOL, EtherType.ARP):  # A garbage ARP packet for the latter
+            data = valid[:12] + ether_type.to_bytes() + valid[14:-4]
+            interface.receive(data + crc32_to_bytes(zlib.crc32(data)), 0)
+        interface.receive(valid, 0)
+        self.assertEqual(1, len(device.received))
+        self.assertEqual({DropReason.MALFORMED: 2}, interface.drops.by_reason())
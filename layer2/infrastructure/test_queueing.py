@@ -0,0 +1,168 @@
+from unittest import TestCase
+
+from layer2.ethernet.ethernet import EthernetFrame
+from layer2.infrastructure.ethernet_devices import EthernetSwitch, EthernetEndpoint
+from layer2.infrastructure.network_error import NetworkError
+from layer2.infrastructure.queueing import EgressQueue, EgressPort, StrictPriority, DeficitRoundRobin, \
+    WeightedFairQueueing, RandomEarlyDetection, precedence_classifier
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.mac import Mac
+
+BANDWIDTH = 1e6
+
+
+def payload(tos: int, sender: int, size: int = 100) -> bytes:
+    """ The start of an IPv4 header with the TOS field, followed by the number of the sender """
+    return bytes((0x45, tos, sender)) + bytes(size - 3)
+
+
+class Host(EthernetEndpoint):
+    def __init__(self, number: int, clock: SimulationClock):
+        super().__init__(Mac.fromint(0x020000000000 + number))
+        self.number = number
+        self.clock = clock
+        self.received: list[tuple[int, float]] = []  # The sender and arrival time of each frame
+
+    def receive(self, frame, incoming_interface_num: int = 0):
+        if super().receive(frame, incoming_interface_num) is not None:
+            self.received.append((frame.payload[2], self.clock.now))
+
+    def say(self, *args):
+        pass
+
+
+class TestEgressQueueing(TestCase):
+
+    def many_to_one(self, frames: int = 50, tos=(0x00, 0x00), sizes=(100, 100), **kwargs) -> list[EgressPort]:
+        """ Hosts 0 and 1 both send frames to host 2 at line rate over the switch """
+        self.clock = SimulationClock()
+        self.switch = EthernetSwitch(3)
+        self.switch.say = lambda *args: None
+        self.hosts = [Host(i, self.clock) for i in range(3)]
+        for i, host in enumerate(self.hosts):
+            host.connect_to(self.switch, i)
+            host.get_interface(0).channel = Channel(self.clock, BANDWIDTH)
+        ports = self.switch.enable_queueing(self.clock, BANDWIDTH, **kwargs)
+        self.hosts[2].send_data(b'hello', self.hosts[0].mac)  # So the switch knows where host 2 is
+        self.clock.run()
+        for i in range(frames):
+            for sender in (0, 1):
+                self.hosts[sender].send_data(payload(tos[sender], sender, sizes[sender]), self.hosts[2].mac)
+        self.clock.run()
+        return ports
+
+    def senders(self, n: int = None) -> list[int]:
+        return [sender for sender, _ in self.hosts[2].received[:n]]
+
+    def test_frames_wait_until_the_port_is_free(self):
+        ports = self.many_to_one(frames=1)
+        self.assertEqual([0, 1], self.senders())
+        statistics = ports[2].queues[0].statistics
+        self.assertEqual(2, statistics.dequeued)
+        self.assertAlmostEqual(8 * 118 / BANDWIDTH, statistics.max_latency)  # The frames arrive at the same time
+        self.assertAlmostEqual(8 * 118 / BANDWIDTH, self.hosts[2].received[1][1] - self.hosts[2].received[0][1])
+
+    def test_strict_priority(self):
+        ports = self.many_to_one(tos=(0x00, 0xB8), num_queues=2, capacity=200)  # Host 1 sends EF traffic
+        self.assertEqual([1] * 50, self.senders(n=51)[1:])  # After the first frame of host 0 that found the port idle
+        high, low = (queue.statistics for queue in ports[2].queues)
+        self.assertLess(high.mean_latency, low.mean_latency)
+        self.assertEqual((50, 50, 0), (high.dequeued, low.dequeued, high.drops + low.drops))
+
+    def test_deficit_round_robin_shares_bandwidth_by_weight(self):
+        self.many_to_one(frames=200, tos=(0x00, 0xB8), num_queues=2, capacity=400, scheduler=DeficitRoundRobin,
+                         weights=[3.0, 1.0])
+        self.assertAlmostEqual(3 / 4, self.senders(n=100).count(1) / 100, delta=0.03)
+
+    def test_deficit_round_robin_is_fair_in_bytes(self):
+        self.many_to_one(frames=300, tos=(0x00, 0xB8), sizes=(1500, 100), num_queues=2, capacity=400,
+                         scheduler=lambda: DeficitRoundRobin(quantum=1500))
+        received = self.senders(n=160)
+        self.assertAlmostEqual(1.0, 1500 * received.count(0) / (100 * received.count(1)), delta=0.15)
+
+    def test_weighted_fair_queueing_shares_bandwidth_by_weight(self):
+        self.many_to_one(frames=200, tos=(0x00, 0xB8), num_queues=2, capacity=400, scheduler=WeightedFairQueueing,
+                         weights=[3.0, 1.0])
+        self.assertAlmostEqual(3 / 4, self.senders(n=100).count(1) / 100, delta=0.03)
+
+    def test_tail_drop(self):
+        ports = self.many_to_one(frames=100, capacity=10)
+        statistics = ports[2].queues[0].statistics
+        self.assertEqual(10, statistics.max_depth)
+        self.assertEqual(200 - len(self.hosts[2].received), statistics.tail_drops)
+        self.assertGreater(statistics.tail_drops, 80)
+        self.assertEqual(0, statistics.early_drops)
+
+    def test_random_early_detection_drops_before_the_queue_is_full(self):
+        ports = self.many_to_one(frames=200, capacity=100,
+                                 drop_policy=lambda: RandomEarlyDetection(5, 15, 0.1, weight=0.1, seed=3))
+        statistics = ports[2].queues[0].statistics
+        self.assertGreater(statistics.early_drops, 0)
+        self.assertEqual(0, statistics.tail_drops)
+        self.assertLess(statistics.max_depth, 100)
+        self.assertEqual(statistics.enqueued, len(self.hosts[2].received))
+
+    def test_classifier(self):
+        classify = precedence_classifier(4)
+        frames = [EthernetFrame(Mac(), Mac(), payload(tos, 0)) for tos in (0xE0, 0xB8, 0x28, 0x00)]
+        self.assertEqual([0, 1, 3, 3], [classify(frame) for frame in frames])
+
+    def test_egress_port_needs_a_channel(self):
+        with self.assertRaises(NetworkError):
+            EgressPort(Host(0, SimulationClock()).get_interface(0))
+
+
+class TestSchedulers(TestCase):
+
+    @staticmethod
+    def serve(scheduler, queues: list[EgressQueue], n: int) -> list[int]:
+        order = []
+        for _ in range(n):
+            index = scheduler.select(queues)
+            queues[index].pop(0.0)
+            order.append(index)
+        return order
+
+    @staticmethod
+    def fill(scheduler, queues: list[EgressQueue], sizes: list[int], n: int) -> None:
+        for _ in range(n):
+            for i, (queue, size) in enumerate(zip(queues, sizes)):
+                if queue.offer(f"frame of {size} bytes", size, 0.0, tag := scheduler.tag(i, queue, size)):
+                    scheduler.enqueued(i, tag)
+
+    def test_strict_priority_serves_lower_queues_only_when_higher_are_empty(self):
+        queues = [EgressQueue(), EgressQueue()]
+        self.fill(StrictPriority(), queues, [100, 100], 3)
+        self.assertEqual([0, 0, 0, 1, 1, 1], self.serve(StrictPriority(), queues, 6))
+
+    def test_deficit_round_robin_order(self):
+        queues = [EgressQueue(), EgressQueue()]
+        scheduler = DeficitRoundRobin(quantum=1000)
+        self.fill(scheduler, queues, [600, 300], 6)
+        # 1000 bytes per round: one frame of 600 (keeping 400 of the deficit, so two in the next round), three of 300
+        self.assertEqual([0, 1, 1, 1, 0, 0, 1, 1, 1], self.serve(scheduler, queues, 9))
+
+    def test_weighted_fair_queueing_order(self):
+        queues = [EgressQueue(weight=2.0), EgressQueue()]
+        scheduler = WeightedFairQueueing()
+        self.fill(scheduler, queues, [200, 100], 4)
+        # Finish times 100, 200, 300, 400 for queue 0 and 100, 200, 300, 400 for queue 1
+        self.assertEqual([0, 1, 0, 1, 0, 1, 0, 1], self.serve(scheduler, queues, 8))
+
+    def test_weighted_fair_queueing_ignores_dropped_frames(self):
+        queues = [EgressQueue(capacity=2), EgressQueue(capacity=20)]
+        scheduler = WeightedFairQueueing()
+        self.fill(scheduler, queues, [100, 100], 12)  # 10 frames are dropped from queue 0
+        self.assertEqual(10, queues[0].statistics.tail_drops)
+        self.assertEqual([0], self.serve(scheduler, queues, 1))
+        self.fill(scheduler, queues, [100, 100], 1)
+        # The new frame of queue 0 finishes at 300, after its frame at 200 that is still queued, rather than at 1300
+        self.assertEqual([1, 0, 1, 0, 1], self.serve(scheduler, queues, 5))
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            EgressQueue(capacity=0)
+        with self.assertRaises(ValueError):
+            RandomEarlyDetection(10, 5)
+        with self.assertRaises(ValueError):
+            EthernetSwitch(2).enable_queueing(SimulationClock(), num_queues=2, weights=[1.0])
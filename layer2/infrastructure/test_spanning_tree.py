@@ -0,0 +1,155 @@
+from unittest import TestCase
+
+from layer2.ethernet.ethernet import EthernetFrame
+from layer2.infrastructure.ethernet_devices import EthernetSwitch, EthernetEndpoint
+from layer2.infrastructure.simulation import SimulationClock
+from layer2.infrastructure.spanning_tree import Bpdu, BpduFrame, PortRole, PortState, BRIDGE_GROUP_ADDRESS, \
+    convergence_time
+from layer2.infrastructure.storm_control import StormControl
+from layer2.mac import Mac
+
+BROADCAST = Mac.fromstring("FF:FF:FF:FF:FF:FF")
+
+
+class Host(EthernetEndpoint):
+    def __init__(self, mac: Mac):
+        super().__init__(mac)
+        self.received: list[EthernetFrame] = []
+
+    def receive(self, frame, incoming_interface_num: int = 0):
+        self.received.append(frame)
+
+
+class TestBpdu(TestCase):
+
+    def test_bpdu_roundtrip(self):
+        bpdu = Bpdu(0x8000_0200_0000_0001, 4, 0x8000_0200_0000_0002, 0x8002, PortRole.DESIGNATED, proposal=True,
+                    learning=True, topology_change=True, message_age=1)
+        decoded = Bpdu.decode(bpdu.bytes())
+        self.assertEqual(bpdu.vector, decoded.vector)
+        self.assertEqual((PortRole.DESIGNATED, True, False, True, False, True),
+                         (decoded.role, decoded.proposal, decoded.agreement, decoded.learning, decoded.forwarding,
+                          decoded.topology_change))
+        self.assertEqual((1, 20, 2, 15), (decoded.message_age, decoded.max_age, decoded.hello_time,
+                                           decoded.forward_delay))
+
+    def test_bpdu_frame_roundtrip(self):
+        bpdu = Bpdu(1, 0, 1, 0x8001, PortRole.ROOT, agreement=True)
+        frame = BpduFrame(Mac.fromint(0x020000000001), bpdu)
+        self.assertEqual(BRIDGE_GROUP_ADDRESS, frame.destination)
+        decoded = BpduFrame.decode_frame(frame.bytes())
+        self.assertEqual(frame.source, decoded.source)
+        self.assertTrue(decoded.bpdu.agreement)
+
+    def test_malformed_bpdu(self):
+        with self.assertRaises(ValueError):
+            Bpdu.decode(bytes(10))
+
+
+class TestSpanningTree(TestCase):
+    """ Three switches in a triangle, with a host on port 2 of each of them. Switch 0 has the lowest bridge ID. """
+
+    def setUp(self) -> None:
+        self.clock = SimulationClock()
+        self.switches = [EthernetSwitch(3, mac=Mac.fromint(0x020000000010 + i)) for i in range(3)]
+        self.hosts = [Host(Mac.fromint(0x020000000001 + i)) for i in range(3)]
+        self.switches[0].connect_to(self.switches[1], 0, 0)
+        self.switches[1].connect_to(self.switches[2], 0, 1)
+        self.switches[2].connect_to(self.switches[0], 1, 1)
+        for host, switch in zip(self.hosts, self.switches):
+            host.connect_to(switch, 2)
+        self.trees = [switch.enable_spanning_tree(self.clock) for switch in self.switches]
+        self.clock.run(until=10.0)
+
+    def roles(self, s: int) -> list[PortRole]:
+        return [port.role for port in self.trees[s].ports]
+
+    def test_root_is_elected(self):
+        self.assertEqual([True, False, False], [tree.is_root for tree in self.trees])
+        self.assertEqual({self.trees[0].bridge_id}, {tree.root_id for tree in self.trees})
+        self.assertEqual([PortRole.DESIGNATED] * 3, self.roles(0))
+        self.assertEqual([PortRole.ROOT, PortRole.DESIGNATED, PortRole.DESIGNATED], self.roles(1))
+        self.assertEqual([PortRole.ALTERNATE, PortRole.ROOT, PortRole.DESIGNATED], self.roles(2))
+        self.assertEqual(PortState.DISCARDING, self.trees[2].port(0).state)
+
+    def test_ports_forward_without_waiting_for_the_forward_delay(self):
+        for tree in self.trees:
+            self.assertEqual([port.role is not PortRole.ALTERNATE for port in tree.ports],
+                             [port.forwarding for port in tree.ports])
+        self.assertLess(convergence_time(self.trees, 0.0), self.trees[0].forward_delay)
+
+    def test_hosts_become_edge_ports(self):
+        self.assertTrue(all(tree.port(2).edge for tree in self.trees))
+        self.assertFalse(any(tree.port(0).edge for tree in self.trees))
+
+    def test_broadcast_reaches_each_host_once(self):
+        self.hosts[1].send_data(b'who is there?', BROADCAST)
+        self.assertEqual([1, 0, 1], [len(host.received) for host in self.hosts])
+        self.assertEqual(0, sum(switch.storm_control.storms for switch in self.switches))
+
+    def test_unicast_after_learning(self):
+        self.hosts[2].send_data(b'hello', self.hosts[1].mac)
+        self.hosts[1].send_data(b'hello', self.hosts[2].mac)
+        self.assertEqual([1, 1, 1], [len(host.received) for host in self.hosts])  # Only the first frame is flooded
+
+    def test_link_failure_unblocks_the_alternate_port(self):
+        failure = self.clock.now
+        self.switches[1].disconnect(0)  # The root port of switch 2
+        self.clock.run(until=failure + 10.0)
+        self.assertEqual([PortRole.DISABLED, PortRole.ROOT, PortRole.DESIGNATED], self.roles(1))  # Through switch 2
+        self.assertEqual([PortRole.DESIGNATED, PortRole.ROOT, PortRole.DESIGNATED], self.roles(2))
+        self.assertTrue(self.trees[2].port(0).forwarding)
+        self.assertLess(self.trees[2].convergence_time, self.trees[2].forward_delay)
+
+        self.hosts[0].send_data(b'still there?', self.hosts[1].mac)
+        self.assertEqual(1, len(self.hosts[1].received))
+
+    def test_root_failure_elects_a_new_root(self):
+        for port_num in (0, 1):
+            self.switches[0].disconnect(port_num)
+        self.clock.run(until=self.clock.now + 10.0)
+        self.assertTrue(self.trees[1].is_root)
+        self.assertEqual(self.trees[1].bridge_id, self.trees[2].root_id)
+        self.assertEqual(PortRole.ROOT, self.trees[2].port(0).role)
+
+    def test_topology_change_flushes_learned_addresses(self):
+        self.hosts[0].send_data(b'hello', BROADCAST)
+        self.assertIsNotNone(self.switches[2].cache.lookup(self.hosts[0].mac))
+        self.switches[1].disconnect(0)
+        self.assertIsNone(self.switches[2].cache.lookup(self.hosts[0].mac))
+
+
+class TestStormControl(TestCase):
+
+    def test_loop_without_spanning_tree(self):
+        switches = [EthernetSwitch(3, mac=Mac.fromint(0x020000000010 + i)) for i in range(3)]
+        host = Host(Mac.fromint(0x020000000001))
+        switches[0].connect_to(switches[1], 0, 0)
+        switches[1].connect_to(switches[2], 0, 1)
+        switches[2].connect_to(switches[0], 1, 1)
+        host.connect_to(switches[0], 2)
+        host.send_data(b'storm', BROADCAST)  # Loops around the triangle until storm control stops it
+        self.assertGreaterEqual(sum(switch.storm_control.storms for switch in switches), 1)
+        self.assertEqual([0, 0, 0], [switch.storm_control.depth for switch in switches])
+
+    def test_rate_limit(self):
+        clock = SimulationClock()
+        control = StormControl(rate_limit=2, clock=clock)
+        admitted = []
+        for _ in range(3):
+            admitted.append(control.admit())
+            if admitted[-1]:
+                control.leave()
+        self.assertEqual([True, True, False], admitted)
+        self.assertEqual((1, 1), (control.storms, control.suppressed))
+        clock.run(until=1.0)
+        self.assertTrue(control.admit())
+        self.assertFalse(control.in_storm)
+
+    def test_depth_limit(self):
+        control = StormControl(max_depth=2)
+        self.assertEqual([True, True, False, False], [control.admit() for _ in range(4)])
+        self.assertEqual((1, 2), (control.storms, control.suppressed))
+        control.leave()
+        control.leave()
+        self.assertFalse(control.in_storm)
@@ -0,0 +1,112 @@
+from unittest import TestCase
+
+from layer2.ethernet.ethernet import EthernetFrame, VlanTag
+from layer2.frame_errors import DropReason
+from layer2.infrastructure.ethernet_devices import EthernetSwitch, EthernetEndpoint
+from layer2.infrastructure.vlan import VlanPort, DEFAULT_VLAN
+from layer2.mac import Mac
+
+BROADCAST = Mac.fromstring("FF:FF:FF:FF:FF:FF")
+
+
+class TestVlanPort(TestCase):
+
+    def test_access_port(self):
+        port = VlanPort.access(10)
+        self.assertEqual([10, 10, 10, None], [port.ingress_vlan(vid) for vid in (None, 0, 10, 20)])
+        self.assertFalse(port.tags(10))
+
+    def test_trunk_port(self):
+        port = VlanPort.trunk([10, 20], native=5)
+        self.assertEqual([5, 10, 5, None], [port.ingress_vlan(vid) for vid in (None, 10, 5, 30)])
+        self.assertEqual([True, False], [port.tags(10), port.tags(5)])
+        self.assertTrue(VlanPort.trunk().carries(4094))
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            VlanPort.access(0)
+        with self.assertRaises(ValueError):
+            VlanPort(vid=10, allowed=[10])
+
+
+class Host(EthernetEndpoint):
+    def __init__(self, mac: Mac):
+        super().__init__(mac)
+        self.received: list[EthernetFrame] = []
+
+    def receive(self, frame, incoming_interface_num: int = 0):
+        self.received.append(frame)
+
+
+class TestVlanSwitching(TestCase):
+    """ Two switches joined by a trunk on their port 0, with a host of VLAN 10 and of VLAN 20 on each of them """
+
+    def setUp(self) -> None:
+        self.switches = [EthernetSwitch(3), EthernetSwitch(3)]
+        self.hosts = [Host(Mac.fromint(0x020000000000 + i)) for i in range(4)]
+        for s, switch in enumerate(self.switches):
+            switch.set_trunk_port(0, [10, 20])
+            for port, vid in ((1, 10), (2, 20)):
+                switch.set_access_port(port, vid)
+                self.hosts[2 * s + port - 1].connect_to(switch, port)
+        self.switches[0].connect_to(self.switches[1], 0, 0)
+        self.a10, self.a20, self.b10, self.b20 = self.hosts
+
+    def test_flooding_stays_within_the_vlan(self):
+        self.a10.send_data(b'who is there?', BROADCAST)
+        self.assertEqual([0, 0, 1, 0], [len(host.received) for host in self.hosts])
+        self.assertIsNone(self.b10.received[0].vlan)  # The tag is removed on the access port
+        self.assertEqual(1, self.switches[1].cache_for(10).statistics.floods)
+        self.assertEqual(0, self.switches[1].cache.statistics.floods)
+
+    def test_frames_are_tagged_on_the_trunk(self):
+        trunk = self.switches[1].get_interface(0)
+        sent = []
+        transmit = trunk.transmit
+        trunk.transmit = lambda frame: sent.append(frame) or transmit(frame)
+        self.b20.send_data(b'to a', self.a20.mac)
+        self.assertEqual([VlanTag(20)], [frame.vlan for frame in sent])
+        self.assertTrue(sent[0].fcs_is_valid())
+
+    def test_addresses_are_learned_per_vlan(self):
+        self.a10.send_data(b'hello', self.b10.mac)
+        self.b10.send_data(b'hello', self.a10.mac)
+        switch = self.switches[0]
+        self.assertEqual(2, len(switch.cache_for(10)))
+        self.assertEqual(0, len(switch.cache_for(20)))
+        self.assertEqual(1, switch.cache_for(10).statistics.hits)
+
+    def test_frames_of_vlans_that_are_not_allowed_are_dropped(self):
+        self.switches[1].set_trunk_port(0, [10])
+        self.a20.send_data(b'lost', self.b20.mac)
+        self.assertEqual([], self.b20.received)
+        self.assertEqual(1, self.switches[1].get_interface(0).drops.count(reason=DropReason.VLAN_FILTERED))
+
+    def test_native_vlan_is_untagged(self):
+        for switch in self.switches:
+            switch.set_trunk_port(0, [10, 20], native=10)
+        self.a10.send_data(b'untagged', self.b10.mac)
+        self.a20.send_data(b'tagged', self.b20.mac)
+        self.assertEqual([1, 1], [len(self.b10.received), len(self.b20.received)])
+
+    def test_cut_through_with_vlans(self):
+        for switch in self.switches:
+            switch.cut_through = True
+        trunk = self.switches[0].get_interface(0)
+        sent = []
+        transmit = trunk.transmit
+        trunk.transmit = lambda frame: sent.append(frame) or transmit(frame)
+        self.a10.send_data(b'who is there?', BROADCAST)
+        self.a20.send_data(b'hello', self.b20.mac, vlan=VlanTag(0, pcp=6))  # Priority tagged
+        self.assertEqual([0, 0, 1, 1], [len(host.received) for host in self.hosts])
+        self.assertEqual([VlanTag(10), VlanTag(20, pcp=6)], [frame.vlan for frame in sent])  # The priority is kept
+        self.assertIsNone(self.b20.received[0].vlan)
+
+    def test_default_vlan(self):
+        switch = EthernetSwitch(2)
+        a, b = Host(Mac.fromint(1)), Host(Mac.fromint(2))
+        a.connect_to(switch, 0)
+        b.connect_to(switch, 1)
+        a.send_data(b'hello', b.mac)
+        self.assertEqual(1, len(b.received))
+        self.assertEqual([DEFAULT_VLAN], list(switch.caches))
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from enum import Enum
+from typing import Final, Optional, Iterable
+
+DEFAULT_VLAN: Final = 1
+
+
+class PortMode(Enum):
+    ACCESS = "access"  # Carries the frames of a single VLAN, untagged
+    TRUNK = "trunk"  # Carries the frames of several VLANs, tagged except for those of the native VLAN
+
+
+class VlanPort(object):
+    """
+    The VLAN configuration of a switch port. An access port is a member of its VLAN only. A trunk port is a member of
+    the allowed VLANs (all if allowed is None) and of its native VLAN, whose frames it sends and receives untagged.
+    """
+    __slots__ = ('mode', 'vid', 'allowed')
+
+    def __init__(self, mode: PortMode = PortMode.ACCESS, vid: int = DEFAULT_VLAN, allowed: Iterable[int] = None):
+        if not 1 <= vid < 4095:
+            raise ValueError(f"The VLAN of a port should be between 1 and 4094, got {vid}")
+        if allowed is not None and mode is not PortMode.TRUNK:
+            raise ValueError("Only trunk ports have allowed VLANs")
+        self.mode = mode
+        self.vid = vid  # The access VLAN or the native VLAN
+        self.allowed: Optional[frozenset[int]] = None if allowed is None else frozenset(allowed) | {vid}
+
+    @classmethod
+    def access(cls, vid: int = DEFAULT_VLAN) -> VlanPort:
+        return cls(PortMode.ACCESS, vid)
+
+    @classmethod
+    def trunk(cls, allowed: Iterable[int] = None, native: int = DEFAULT_VLAN) -> VlanPort:
+        return cls(PortMode.TRUNK, native, allowed)
+
+    def carries(self, vid: int) -> bool:
+        """ Whether the port is a member of the VLAN """
+        if self.mode is PortMode.ACCESS:
+            return vid == self.vid
+        return self.allowed is None or vid in self.allowed
+
+    def ingress_vlan(self, tag_vid: Optional[int]) -> Optional[int]:
+        """
+        The VLAN of a frame received on this port with a tag for tag_vid, or without a tag if it is None. Frames that
+        only carry a priority (VLAN 0) belong to the VLAN of the port. Returns None if the port does not admit the
+        frame.
+        """
+        if not tag_vid:
+            return self.vid
+        return tag_vid if self.carries(tag_vid) else None
+
+    def tags(self, vid: int) -> bool:
+        """ Whether frames of the VLAN are sent tagged on this port """
+        return self.mode is PortMode.TRUNK and vid != self.vid
+
+    def __repr__(self):
+        if self.mode is PortMode.ACCESS:
+            return f"VlanPort.access({self.vid})"
+        allowed = None if self.allowed is None else sorted(self.allowed)
+        return f"VlanPort.trunk({allowed}, native={self.vid})"
@@ -1,46 +1,94 @@
+from __future__ import annotations
+
 import os
 import re
+from typing import ClassVar, Iterable
+from weakref import WeakValueDictionary
 
 
 class Mac(object):
+    """
+    A MAC address, backed by a 48-bit integer. Instances are interned: creating a Mac for an address for which a Mac
+    already exists returns that same object. Hence equality and hashing are by identity, which makes lookups in e.g.
+    switch and ARP tables as cheap as possible, and copying a Mac simply returns it.
+    """
+    __slots__ = ('_value', '_address', '__weakref__')
+
     mac_pattern = re.compile(r"^(?:[0-9A-Fa-f]{2})([-:])(?:[0-9A-Fa-f]{2}\1){4}[0-9A-Fa-f]{2}$")
 
-    def __init__(self, address: bytes = None, separator=':', uppercase=False) -> None:
+    # Formatting defaults used by str(), these are shared by all instances
+    separator: ClassVar[str] = ':'
+    uppercase: ClassVar[bool] = False
+
+    _interned: ClassVar[WeakValueDictionary[int, Mac]] = WeakValueDictionary()
+
+    def __new__(cls, address: bytes = None) -> Mac:
         if address is None:
             address = os.urandom(6)
         if len(address) != 6:
             raise ValueError(f"A mac address consists of exactly 6 bytes, got {len(address)} instead.")
-        self._address = bytes(address)
-        self.separator = separator
-        self.uppercase = uppercase
+        return cls.fromint(int.from_bytes(address, byteorder='big'))
+
+    @classmethod
+    def fromint(cls, value: int) -> Mac:
+        if (mac := cls._interned.get(value)) is None:
+            if not (0 <= value < 2 ** 48):
+                raise ValueError(f"A mac address is a 48-bit number, got {value} instead.")
+            mac = object.__new__(cls)
+            mac._value = value
+            mac._address = value.to_bytes(6, byteorder='big')
+            cls._interned[value] = mac
+        return mac
 
     @property
-    def address(self):
+    def address(self) -> bytes:
         return self._address
 
+    @property
+    def value(self) -> int:
+        return self._value
+
     @staticmethod
-    def fromstring(mac_string: str):
+    def fromstring(mac_string: str) -> Mac:
         if not Mac.mac_pattern.match(mac_string):
             raise ValueError("mac_string should match Mac.mac_pattern")
-        return Mac(bytes.fromhex(mac_string.replace(':', '').replace('-', '')))
+        return Mac.fromint(int(mac_string.replace(mac_string[2], ''), 16))
 
-    def __str__(self) -> str:
-        string = self.address.hex(self.separator)
-        return string.upper() if self.uppercase else string
+    @staticmethod
+    def fromstrings(mac_strings: Iterable[str]) -> list[Mac]:
+        return [Mac.fromstring(mac_string) for mac_string in mac_strings]
 
-    def __eq__(self, o: object) -> bool:
-        return isinstance(o, Mac) and self.address == o.address
+    @staticmethod
+    def frombytes(data: bytes | memoryview) -> list[Mac]:
+        """ Parse the concatenation of any number of 6-byte addresses, e.g. a table of addresses read from a file """
+        if len(data) % 6 != 0:
+            raise ValueError(f"Expected a multiple of 6 bytes, got {len(data)} bytes instead.")
+        view = memoryview(data)
+        return [Mac.fromint(int.from_bytes(view[i:i + 6], byteorder='big')) for i in range(0, len(view), 6)]
 
-    def __hash__(self):
-        return self.address.__hash__()
+    def format(self, separator: str = None, uppercase: bool = None) -> str:
+        """ Format this address, any option that is not provided is taken from the class-level default """
+        string = self.address.hex(self.separator if separator is None else separator)
+        return string.upper() if (self.uppercase if uppercase is None else uppercase) else string
 
-    def __copy__(self):
-        return Mac(self.address)
+    def __str__(self) -> str:
+        return self.format()
 
-    def __deepcopy__(self, memodict={}):
-        return self.__copy__()
+    def __repr__(self) -> str:
+        return f"Mac.fromstring('{self.format(':', False)}')"
 
+    def __int__(self) -> int:
+        return self._value
 
+    # Interning guarantees that there is only a single Mac per address, so identity comparison is sufficient
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
 
+    def __reduce__(self):
+        return Mac, (self._address,)
 
+    def __copy__(self):
+        return self
 
+    def __deepcopy__(self, memodict={}):
+        return self
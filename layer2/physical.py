@@ -22,15 +22,14 @@ def create_hdlc_signal(frames: list[frame.Frame], *args) -> Callable[[float], fl
 
 
 def decode_frames_ethernet(signal: Callable[[float], float]) -> list[EthernetFrame]:
-    received_bits = NoneableBitArray(me.decode(signal))
-    return edec.decode(received_bits)
+    return list(edec.EthernetDeframer().frames(me.decode(signal)))
 
 
 def decode_frames_hdlc(signal: Callable[[float], float], mode: HdlcMode, extended: bool) -> list[HdlcFrame]:
-    received_bits = [x for x in me.decode(signal) if x is not None]
-    return frame.decode(BitArray(auto=received_bits), HdlcFrame, mode=mode, extended=extended)
+    received_bits = NoneableBitArray(me.decode(signal)).present_bits()
+    return frame.decode(BitArray(received_bits), HdlcFrame, mode=mode, extended=extended)
 
 
 def decode_frames_ppp(signal: Callable[[float], float], mode: HdlcMode) -> list[PppFrame]:
-    received_bits = [x for x in me.decode(signal) if x is not None]
-    return frame.decode(BitArray(auto=received_bits), PppFrame, mode=mode)
+    received_bits = NoneableBitArray(me.decode(signal)).present_bits()
+    return frame.decode(BitArray(received_bits), PppFrame, mode=mode)
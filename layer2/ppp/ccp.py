@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import zlib
+from enum import Enum
+
+from layer2.ppp.lcp import LcpPacket
+from layer2.ppp.point_to_point import PppProtocol
+
+_SYNC_FLUSH_TRAILER = b'\x00\x00\xff\xff'  # The empty stored block that ends every Z_SYNC_FLUSH
+_MAX_STORED_BLOCK = 2 ** 16 - 1
+
+
+class CcpCode(Enum):
+    CONFIGURE_REQUEST = 1
+    CONFIGURE_ACK = 2
+    CONFIGURE_NAK = 3
+    CONFIGURE_REJECT = 4
+    TERMINATE_REQUEST = 5
+    TERMINATE_ACK = 6
+    CODE_REJECT = 7
+    RESET_REQUEST = 14
+    RESET_ACK = 15
+
+
+class CcpPacket(LcpPacket):
+    """ A Compression Control Protocol packet (RFC 1962), which has the same format as an LCP packet """
+    __slots__ = ()
+
+    codes = CcpCode
+
+
+def is_compressible(protocol: PppProtocol) -> bool:
+    """ Whether packets of the protocol go through the compressor: network layer protocols, except compressed data """
+    return protocol.value < 0x4000 and protocol is not PppProtocol.COMPRESSED_DATAGRAM
+
+
+def _protocol_and_information(protocol: PppProtocol, information: bytes) -> bytes:
+    """ The data that is compressed: the protocol field, with protocol field compression applied, and information """
+    return protocol.value.to_bytes(1 if protocol.compressible else 2, 'big') + information
+
+
+class DeflateCompressor(object):
+    """
+    The sending half of the PPP Deflate compression method (RFC 1979). Every packet is added to the history of a
+    single deflate stream, so later packets refer back to data of earlier ones. Each compressed packet starts with a
+    16 bit sequence number, followed by the deflate output up to a sync flush without its fixed trailer.
+
+    A packet that does not get smaller is sent uncompressed, under its own protocol. It is still added to the history
+    and counted in the sequence numbers, and the decompressor adds it to its history as well.
+    """
+
+    def __init__(self, level: int = 6, window_bits: int = 15):
+        if not 9 <= window_bits <= 15:
+            raise ValueError(f"The deflate window size should be between 9 and 15 bits, got {window_bits}")
+        self.level = level
+        self.window_bits = window_bits
+        self.reset()
+
+    def reset(self) -> None:
+        self._deflate = zlib.compressobj(self.level, zlib.DEFLATED, -self.window_bits)
+        self.sequence = 0
+
+    def compress(self, protocol: PppProtocol, information: bytes) -> bytes | None:
+        """ The information field of the compressed datagram, or None if the packet should be sent uncompressed """
+        deflate = self._deflate
+        data = deflate.compress(_protocol_and_information(protocol, information)) + deflate.flush(zlib.Z_SYNC_FLUSH)
+        sequence = self.sequence
+        self.sequence = (sequence + 1) % 2 ** 16
+        compressed_length = 2 + len(data) - len(_SYNC_FLUSH_TRAILER)
+        if compressed_length >= len(information):
+            return None
+        return sequence.to_bytes(2, 'big') + data[:-len(_SYNC_FLUSH_TRAILER)]
+
+
+class DeflateDecompressor(object):
+    """ The receiving half of the PPP Deflate compression method (RFC 1979), see DeflateCompressor """
+
+    def __init__(self, window_bits: int = 15):
+        self.window_bits = window_bits
+        self.reset()
+
+    def reset(self) -> None:
+        self._inflate = zlib.decompressobj(-self.window_bits)
+        self.sequence = 0  # The sequence number of the next packet
+
+    def decompress(self, data: bytes | memoryview) -> tuple[PppProtocol, bytes]:
+        """
+        Decompress the information field of a compressed datagram. Raises a ValueError if a packet is missing or the
+        data is corrupt, after which the history is out of sync with the compressor until both are reset.
+        """
+        if len(data) < 2:
+            raise ValueError(f"A compressed datagram starts with a sequence number of 2 bytes, got {len(data)} bytes")
+        sequence = int.from_bytes(data[:2], byteorder='big')
+        if sequence != self.sequence:
+            raise ValueError(f"Expected compressed datagram {self.sequence}, got {sequence}")
+        try:
+            decompressed = self._inflate.decompress(bytes(data[2:]) + _SYNC_FLUSH_TRAILER)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt compressed datagram {sequence}: {e}") from e
+        self.sequence = (sequence + 1) % 2 ** 16
+
+        protocol_length = 1 if decompressed and decompressed[0] & 1 else 2
+        if len(decompressed) < protocol_length:
+            raise ValueError(f"Compressed datagram {sequence} holds no protocol field")
+        protocol = PppProtocol(int.from_bytes(decompressed[:protocol_length], byteorder='big'))
+        return protocol, decompressed[protocol_length:]
+
+    def add_to_history(self, protocol: PppProtocol, information: bytes) -> None:
+        """ Add a packet that was sent uncompressed to the history, as stored (not compressed) deflate blocks """
+        data = _protocol_and_information(protocol, information)
+        blocks = []
+        for start in range(0, len(data), _MAX_STORED_BLOCK):
+            block = data[start:start + _MAX_STORED_BLOCK]
+            length = len(block).to_bytes(2, 'little')
+            blocks.append(b'\x00' + length + bytes(~b & 0xFF for b in length) + block)
+        self._inflate.decompress(b''.join(blocks))
+        self.sequence = (self.sequence + 1) % 2 ** 16
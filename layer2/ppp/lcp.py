@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import builtins
+from enum import Enum
+
+
+class LcpCode(Enum):
+    CONFIGURE_REQUEST = 1
+    CONFIGURE_ACK = 2
+    CONFIGURE_NAK = 3
+    CONFIGURE_REJECT = 4
+    TERMINATE_REQUEST = 5
+    TERMINATE_ACK = 6
+    CODE_REJECT = 7
+    PROTOCOL_REJECT = 8
+    ECHO_REQUEST = 9
+    ECHO_REPLY = 10
+    DISCARD_REQUEST = 11
+
+
+class LcpPacket(object):
+    """ A Link Control Protocol packet (RFC 1661), which is carried in a PPP frame with protocol LCP """
+    __slots__ = ('code', 'identifier', 'data')
+
+    header_length = 4
+    codes: type[Enum] = LcpCode  # Other control protocols (such as CCP) use the same packet format with other codes
+
+    def __init__(self, code: Enum, identifier: int, data: bytes = b''):
+        if not (0 <= identifier < 2 ** 8):
+            raise ValueError(f"The identifier should fit in a single byte, got {identifier}")
+        self.code = code
+        self.identifier = identifier
+        self.data = data
+
+    @property
+    def bytes(self) -> builtins.bytes:
+        length = self.header_length + len(self.data)
+        return bytes((self.code.value, self.identifier)) + length.to_bytes(2, 'big') + self.data
+
+    @classmethod
+    def decode(cls, data: bytes | memoryview) -> LcpPacket:
+        """ Decode the packet at the start of data, bytes after its length field are padding and are ignored """
+        if len(data) < cls.header_length:
+            raise ValueError(f"An LCP packet has a header of 4 bytes, got {len(data)} bytes instead")
+        length = int.from_bytes(data[2:4], byteorder='big')
+        if not cls.header_length <= length <= len(data):
+            raise ValueError(f"Invalid LCP packet length {length} for {len(data)} bytes of data")
+        return cls(cls.codes(data[0]), data[1], data[cls.header_length:length])
+
+    def __eq__(self, o: object) -> bool:
+        return isinstance(o, LcpPacket) and (self.code, self.identifier, bytes(self.data)) == \
+            (o.code, o.identifier, bytes(o.data))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.code}, {self.identifier}, {bytes(self.data)!r})"
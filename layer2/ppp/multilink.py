@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import builtins
+
+
+class MultilinkHeader(object):
+    """
+    The header of a PPP Multilink fragment (RFC 1990): the begin (B) and end (E) fragment bits, followed by a sequence
+    number of 24 bits (long format, 4 bytes) or 12 bits (short format, 2 bytes).
+    """
+    __slots__ = ('begin', 'end', 'sequence', 'short')
+
+    def __init__(self, begin: bool, end: bool, sequence: int, short: bool = False):
+        if not (0 <= sequence < self.modulus_for(short)):
+            raise ValueError(f"The sequence number should fit in {12 if short else 24} bits, got {sequence}")
+        self.begin = begin
+        self.end = end
+        self.sequence = sequence
+        self.short = short
+
+    @staticmethod
+    def modulus_for(short: bool) -> int:
+        return 2 ** 12 if short else 2 ** 24
+
+    @staticmethod
+    def length_for(short: bool) -> int:
+        return 2 if short else 4
+
+    @property
+    def bytes(self) -> builtins.bytes:
+        flags = (self.begin << 7) | (self.end << 6)
+        if self.short:
+            return ((flags << 8) | self.sequence).to_bytes(2, 'big')
+        return ((flags << 24) | self.sequence).to_bytes(4, 'big')
+
+    @staticmethod
+    def decode(data: bytes | memoryview, short: bool = False) -> MultilinkHeader:
+        """ Decode the header at the start of data, the fragment data follows after length_for(short) bytes """
+        length = MultilinkHeader.length_for(short)
+        if len(data) < length:
+            raise ValueError(f"A multilink header consists of {length} bytes, got {len(data)} bytes instead")
+        sequence = int.from_bytes(data[:length], byteorder='big') & (MultilinkHeader.modulus_for(short) - 1)
+        return MultilinkHeader(bool(data[0] & 0x80), bool(data[0] & 0x40), sequence, short)
+
+    def __eq__(self, o: object) -> bool:
+        return isinstance(o, MultilinkHeader) and \
+            (self.begin, self.end, self.sequence, self.short) == (o.begin, o.end, o.sequence, o.short)
+
+    def __repr__(self):
+        return f"MultilinkHeader(begin={self.begin}, end={self.end}, sequence={self.sequence}, short={self.short})"
@@ -1,16 +1,26 @@
+import zlib
 from enum import Enum
 from typing import Final
 
-from bitstring import BitArray
 
+from layer2.frame_errors import FrameDecodeError, DropReason
 from layer2.hdlc.control_field import ControlField
 from layer2.hdlc_base import HdlcLikeBaseFrame
-from layer2.tools import crc32
+from layer2.tools import crc32_to_bytes
 
 
 class PppControlField(ControlField):
-    def __init__(self):
-        super().__init__(BitArray(auto=b'\x03'), False)
+    """ PPP always uses the control field 0x03 (unnumbered information), of which there is a single instance """
+    __slots__ = ()
+
+    def __new__(cls):
+        return _PPP_CONTROL_FIELD
+
+    def _constructor_args(self) -> tuple:
+        return ()
+
+
+_PPP_CONTROL_FIELD: Final = PppControlField._create(b'\x03', False)
 
 
 class PppProtocol(Enum):
@@ -21,49 +31,110 @@ class PppProtocol(Enum):
     IPX = 0x002B
     MULTILINK = 0x003D
     NET_BIOS = 0x003F
+    IPHC_FULL_HEADER = 0x0061
+    IPHC_COMPRESSED = 0x0065
+    IPHC_CONTEXT_STATE = 0x2065
+    COMPRESSED_DATAGRAM = 0x00FD
 
     # Network Control Protocols 8xxx-Bxxx
     IPCP = 0x8021
     IPv6CP = 0x8057
+    CCP = 0x80FD
 
     # Link-layer Control Protocols Cxxx-Fxxx
     LCP = 0xC021
 
+    @property
+    def compressible(self) -> bool:
+        """ Whether protocol field compression (PFC) can reduce the protocol field of this protocol to a single byte """
+        return self.value < 0x100
+
 
 class PppFrame(HdlcLikeBaseFrame):
+    """
+    A PPP frame. When address and control field compression (ACFC) is used the fixed address and control field are
+    left out, and with protocol field compression (PFC) the protocol field consists of a single byte for protocols
+    below 0x100 (RFC 1661). Received frames are decoded whether they are compressed or not.
+    """
+    __slots__ = ('_protocol', '_protocol_bytes', '_acfc')
+
     default_address: Final = 0xFF
 
-    def __init__(self, protocol: PppProtocol, information: bytes = None):
-        self.protocol = protocol
-        self.protocol_bytes = self.protocol.value.to_bytes(2, 'big')
-        super().__init__(self.default_address, PppControlField(), information, optional_field=self.protocol_bytes)
+    def __init__(self, protocol: PppProtocol, information: bytes = None, acfc: bool = False, pfc: bool = False):
+        self._protocol = protocol
+        self._protocol_bytes = self._protocol_field(protocol, pfc)
+        self._acfc = acfc
+        super().__init__(self.default_address, PppControlField(), information, optional_field=self._protocol_bytes)
+
+    @staticmethod
+    def _protocol_field(protocol: PppProtocol, pfc: bool) -> bytes:
+        return protocol.value.to_bytes(1 if pfc and protocol.compressible else 2, 'big')
+
+    @property
+    def protocol(self) -> PppProtocol:
+        return self._protocol
+
+    @property
+    def protocol_bytes(self) -> bytes:
+        return self._protocol_bytes
+
+    @property
+    def acfc(self) -> bool:
+        return self._acfc
+
+    @property
+    def pfc(self) -> bool:
+        return len(self._protocol_bytes) == 1
+
+    def header_fields(self) -> tuple[bytes, ...]:
+        return (self._protocol_bytes,) if self._acfc else super().header_fields()
+
+    def compressed(self, acfc: bool, pfc: bool):
+        """
+        This frame with the given compression options. Only the header changes, so for information of at least
+        CRC_COMBINE_THRESHOLD (16 KiB) the FCS is combined from the FCS of this frame; otherwise it is rehashed lazily.
+        """
+        protocol_bytes = self._protocol_field(self._protocol, pfc)
+        if acfc == self._acfc and protocol_bytes == self._protocol_bytes:
+            return self
+        return self._derive(False, _acfc=acfc, _protocol_bytes=protocol_bytes, _optional_field=protocol_bytes)
 
     @classmethod
     def interpret_frame_from_bytes(cls, decoded_bytes: bytes, **kwargs):
         return PppFrame.decode_ppp_frame_from_bytes(decoded_bytes)
 
     @staticmethod
-    def decode_ppp_frame_from_bytes(decoded_bytes: bytes):
+    def decode_ppp_frame_from_bytes(decoded_bytes: bytes | memoryview):
         """
-        Decode a single HDLC frame from the provided frame_bytes, or raise an ValueError if bytes are not compatible.
+        Decode a single PPP frame from the provided decoded_bytes, or raise a FrameDecodeError if bytes are not
+        compatible.
+        Frames with compressed address, control and/or protocol fields are recognized as such. The information field
+        of the frame is a view into decoded_bytes, so no copy is made of it.
         """
-        if (n := len(decoded_bytes)) < 8:
-            raise ValueError(f"Received frame of length {n} which can't be processed as PPP.", n)
-
-        address = decoded_bytes[0]
-        control_bytes = decoded_bytes[1:2]
-        protocol_bytes = decoded_bytes[2:4]
-        information = decoded_bytes[4:-4]
-        fcs = decoded_bytes[-4:]
-
-        calculated_fcs = crc32(decoded_bytes[:-4])
-        if fcs != calculated_fcs:
-            raise ValueError(f"The calculated FCS '{calculated_fcs}' does not equal FCS of the received frame: '{fcs}'",
-                             n, address, control_bytes, decoded_bytes)
-        if address != PppFrame.default_address:
-            raise ValueError(f"Invalid address received for a PPP frame: {address}.")
-        if control_bytes != PppControlField().bytes:
-            raise ValueError(f"Invalid control field received for a PPP frame: {control_bytes}.")
-
-        protocol = PppProtocol(int.from_bytes(protocol_bytes, byteorder='big'))
-        return PppFrame(protocol, information)
+        if (n := len(decoded_bytes)) < 5:
+            message = f"Received frame of length {n} which can't be processed as PPP."
+            raise FrameDecodeError(DropReason.SHORT_FRAME, message, decoded_bytes)
+
+        view = memoryview(decoded_bytes)
+        acfc = view[0] != PppFrame.default_address  # A protocol field never starts with 0xFF
+        if not acfc and view[1:2] != PppControlField().bytes:
+            message = f"Invalid control field received for a PPP frame: {view[1:2].tobytes()}."
+            raise FrameDecodeError(DropReason.BAD_CONTROL, message, decoded_bytes)
+        start = 0 if acfc else 2
+        pfc = bool(view[start] & 1)  # The first byte of an uncompressed protocol field is always even
+        protocol_bytes = view[start:start + (1 if pfc else 2)]
+        information = view[start + len(protocol_bytes):-4]
+        fcs = view[-4:].tobytes()
+
+        crc = zlib.crc32(view[:-4])
+        if fcs != (calculated_fcs := crc32_to_bytes(crc)):
+            message = f"The calculated FCS '{calculated_fcs}' does not equal FCS of the received frame: '{fcs}'"
+            raise FrameDecodeError(DropReason.BAD_FCS, message, decoded_bytes)
+
+        try:
+            protocol = PppProtocol(int.from_bytes(protocol_bytes, byteorder='big'))
+        except ValueError as e:
+            raise FrameDecodeError(DropReason.UNKNOWN_PROTOCOL, str(e), decoded_bytes) from e
+        frame = PppFrame(protocol, information, acfc, pfc)
+        frame._seed_cache(crc, decoded_bytes)
+        return frame
@@ -0,0 +1,66 @@
+import os
+from unittest import TestCase
+
+from layer2.ppp.ccp import CcpCode, CcpPacket, DeflateCompressor, DeflateDecompressor, is_compressible
+from layer2.ppp.point_to_point import PppProtocol
+
+
+class TestDeflate(TestCase):
+    packets = [f"GET /pages/{i}.html HTTP/1.1\r\nHost: www.example.com\r\nAccept: text/html\r\n\r\n".encode()
+               for i in range(20)]
+
+    def setUp(self):
+        self.compressor = DeflateCompressor()
+        self.decompressor = DeflateDecompressor()
+
+    def transfer(self, packet: bytes) -> int:
+        """ Send the packet from the compressor to the decompressor, returns the number of bytes sent """
+        compressed = self.compressor.compress(PppProtocol.IPv4, packet)
+        if compressed is None:
+            self.decompressor.add_to_history(PppProtocol.IPv4, packet)
+            return len(packet)
+        self.assertEqual((PppProtocol.IPv4, packet), self.decompressor.decompress(compressed))
+        return len(compressed)
+
+    def test_round_trip_uses_history_of_earlier_packets(self):
+        sizes = [self.transfer(packet) for packet in self.packets]
+        self.assertEqual(len(self.packets[0]), sizes[0])  # Too short to compress without history
+        self.assertLess(sizes[-1], len(self.packets[-1]) / 5)
+
+    def test_incompressible_packets_are_added_to_the_history(self):
+        random_data = os.urandom(100)
+        self.assertIsNone(self.compressor.compress(PppProtocol.IPv6, random_data))
+        self.decompressor.add_to_history(PppProtocol.IPv6, random_data)
+        compressed = self.compressor.compress(PppProtocol.IPv4, random_data + self.packets[0])
+        self.assertLess(len(compressed), 80)  # The random data is found in the history
+        self.assertEqual((PppProtocol.IPv4, random_data + self.packets[0]), self.decompressor.decompress(compressed))
+
+    def test_missing_packet_is_detected(self):
+        self.transfer(self.packets[0])
+        self.compressor.compress(PppProtocol.IPv4, self.packets[1])
+        with self.assertRaises(ValueError):
+            self.decompressor.decompress(self.compressor.compress(PppProtocol.IPv4, self.packets[2]))
+
+        self.compressor.reset()
+        self.decompressor.reset()
+        self.transfer(self.packets[3])
+        self.assertLess(self.transfer(self.packets[4]), len(self.packets[4]) / 2)
+
+    def test_large_uncompressed_packet_spans_several_stored_blocks(self):
+        data = os.urandom(70_000)
+        self.assertIsNone(self.compressor.compress(PppProtocol.IPv4, data))
+        self.decompressor.add_to_history(PppProtocol.IPv4, data)
+        compressed = self.compressor.compress(PppProtocol.IPv4, data[-1000:])
+        self.assertEqual((PppProtocol.IPv4, data[-1000:]), self.decompressor.decompress(compressed))
+
+    def test_compressible_protocols(self):
+        self.assertTrue(is_compressible(PppProtocol.IPv4))
+        self.assertTrue(is_compressible(PppProtocol.MULTILINK))
+        self.assertFalse(is_compressible(PppProtocol.COMPRESSED_DATAGRAM))
+        self.assertFalse(is_compressible(PppProtocol.LCP))
+        self.assertFalse(is_compressible(PppProtocol.CCP))
+
+    def test_ccp_packet(self):
+        packet = CcpPacket(CcpCode.RESET_REQUEST, 3)
+        self.assertEqual(b'\x0e\x03\x00\x04', packet.bytes)
+        self.assertEqual(packet, CcpPacket.decode(packet.bytes))
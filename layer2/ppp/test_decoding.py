@@ -19,3 +19,24 @@ class TestDecoding(TestCase):
         decoded = decode_bytes(encoded, PppFrame, mode=HdlcMode.ASYNC)
         self.assertEqual([self.ppp_frame], decoded)
 
+    def test_decode_compressed_frames(self):
+        for acfc in (False, True):
+            for pfc in (False, True):
+                with self.subTest(acfc=acfc, pfc=pfc):
+                    frame = self.ppp_frame.compressed(acfc, pfc)
+                    self.assertEqual(len(self.ppp_frame.bytes()) - 2 * acfc - pfc, len(frame.bytes()))
+                    self.assertTrue(frame.fcs_is_valid())
+                    decoded = PppFrame.decode_ppp_frame_from_bytes(frame.bytes())
+                    self.assertEqual(frame, decoded)
+                    self.assertEqual((PppProtocol.IPv4, acfc, pfc), (decoded.protocol, decoded.acfc, decoded.pfc))
+                    self.assertEqual(self.information, decoded.information)
+
+    def test_protocol_field_of_non_compressible_protocol_is_not_compressed(self):
+        frame = PppFrame(PppProtocol.LCP, b'\x09\x01\x00\x04', acfc=True, pfc=True)
+        self.assertEqual(b'\xc0\x21\x09\x01\x00\x04', frame.bytes()[:-4])
+        self.assertFalse(PppFrame.decode_ppp_frame_from_bytes(frame.bytes()).pfc)
+
+    def test_decode_compressed_frames_async_mode(self):
+        frame = PppFrame(PppProtocol.IPv6, self.information, acfc=True, pfc=True)
+        decoded = decode_bytes(encode_bytes([frame], HdlcMode.ASYNC), PppFrame, mode=HdlcMode.ASYNC)
+        self.assertEqual([frame], decoded)
@@ -23,3 +23,14 @@ class TestEncoding(TestCase):
         expected = flag + self.ppp_frame.bytes() + flag
         self.assertEqual(expected, encoded)
 
+
+    def test_frames_are_immutable(self):
+        for name, value in (('protocol', PppProtocol.LCP), ('protocol_bytes', b'\x21')):
+            with self.assertRaises(AttributeError):
+                setattr(self.ppp_frame, name, value)
+
+    def test_compressed_frame_equals_a_fresh_one(self):
+        self.ppp_frame.bytes()
+        compressed = self.ppp_frame.compressed(acfc=True, pfc=True)
+        self.assertEqual(b'\x21', compressed.protocol_bytes)
+        self.assertEqual(PppFrame(PppProtocol.IPv4, self.information, acfc=True, pfc=True).bytes(), compressed.bytes())
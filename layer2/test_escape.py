@@ -1,6 +1,7 @@
 from unittest import TestCase
 
 from layer2.escape import EscapeSchema
+from layer2.frame_errors import FrameDecodeError, DropReason
 
 
 class TestEscapeSchema(TestCase):
@@ -122,4 +123,6 @@ class TestEscapeSchema(TestCase):
         unescaped = esc_schema.unescape(escaped_data)
         expected = b'These characters  and a are not properly escaped!'
         self.assertEqual(expected, unescaped)
-
+        with self.assertRaises(FrameDecodeError) as context:
+            esc_schema.unescape(escaped_data, strict=True)  # 'Z ' is not a valid escape sequence
+        self.assertEqual(DropReason.BAD_ESCAPE, context.exception.reason)
@@ -0,0 +1,77 @@
+import random
+from unittest import TestCase
+
+from bitstring import BitArray
+
+import layer2.frame
+from layer2.frame import encode, decode, shutdown_workers
+from layer2.hdlc.control_field import InformationCf
+from layer2.hdlc.hdlc import HdlcIFrame, HdlcFrame
+from layer2.hdlc_base import HdlcMode
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+from layer2.tools import separate
+
+
+class TestSeparation(TestCase):
+
+    def test_same_sections_as_separate(self):
+        generator = random.Random(7)
+        flag = list(PppFrame.flag_bits)
+        for length in (0, 8, 15, 16, 100, 2000):
+            # Random bits with many (also overlapping) flags
+            data = [bit for _ in range(length // 8) for bit in
+                    (flag if generator.random() < 0.3 else [generator.random() < 0.8 for _ in range(8)])]
+            data += [False] + flag[1:] + flag[1:]  # Flags that overlap by a single bit
+            expected = [BitArray(auto=block) for block in separate(data, flag)]
+            self.assertEqual(expected, PppFrame.separate_frames(BitArray(auto=data)))
+
+    def test_section_bounds(self):
+        data = BitArray(auto=b'\x00\x7e\x01\x02\x7e\x7e\x03\x7e')
+        self.assertEqual([(16, 32), (40, 40), (48, 56)], PppFrame.section_bounds(data))
+
+
+class TestParallelDecoding(TestCase):
+    frames = [HdlcIFrame(i % 256, InformationCf(i % 2 == 0, i % 8, (i + 3) % 8), bytes([i % 256]) * (20 + i % 50))
+              for i in range(300)]
+
+    def test_same_result_as_sequential_decoding(self):
+        bits = encode(self.frames, HdlcMode.NORMAL)
+        sequential = decode(bits, HdlcFrame, mode=HdlcMode.NORMAL, extended=False)
+        parallel = decode(bits, HdlcFrame, workers=2, parallel_threshold=0, mode=HdlcMode.NORMAL, extended=False)
+        self.assertEqual(self.frames, sequential)
+        self.assertEqual(sequential, parallel)
+
+    def test_ppp_frames_in_async_mode(self):
+        frames = [PppFrame(PppProtocol.IPv4, f"packet {i}: {{escape}} me".encode()) for i in range(100)]
+        bits = encode(frames, HdlcMode.ASYNC)
+        sequential = decode(bits, PppFrame, mode=HdlcMode.ASYNC)
+        self.assertEqual(sequential, decode(bits, PppFrame, workers=3, parallel_threshold=0, mode=HdlcMode.ASYNC))
+
+    def test_small_data_is_decoded_sequentially(self):
+        shutdown_workers()
+        bits = encode(self.frames[:10], HdlcMode.NORMAL)
+        decoded = decode(bits, HdlcFrame, workers=5, mode=HdlcMode.NORMAL, extended=False)
+        self.assertEqual(self.frames[:10], decoded)
+        self.assertIsNone(layer2.frame._pool)
+
+    def test_a_single_pool_is_kept(self):
+        self.addCleanup(shutdown_workers)
+        bits = encode(self.frames[:10], HdlcMode.NORMAL)
+        decode(bits, HdlcFrame, workers=2, parallel_threshold=0, mode=HdlcMode.NORMAL, extended=False)
+        pool = layer2.frame._pool
+        decode(bits, HdlcFrame, workers=2, parallel_threshold=0, mode=HdlcMode.NORMAL, extended=False)
+        self.assertIs(pool, layer2.frame._pool)
+        decode(bits, HdlcFrame, workers=3, parallel_threshold=0, mode=HdlcMode.NORMAL, extended=False)
+        self.assertIsNot(pool, layer2.frame._pool)
+        with self.assertRaises(RuntimeError):
+            pool.submit(len, b'')  # The replaced pool was shut down
+        shutdown_workers()
+        self.assertIsNone(layer2.frame._pool)
+
+    def test_errors_are_raised_as_in_sequential_decoding(self):
+        bits = encode(self.frames[:20], HdlcMode.NORMAL)
+        corrupted = bits[:108] + BitArray(auto=[1] * 7) + bits[108:]  # A section that is not a whole number of bytes
+        for workers in (1, 2):
+            with self.assertRaises(ValueError):
+                decode(corrupted, HdlcFrame, workers=workers, parallel_threshold=0, mode=HdlcMode.NORMAL,
+                       extended=False)
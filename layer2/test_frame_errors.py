@@ -0,0 +1,79 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase
+
+from bitstring import BitArray
+
+from layer2.frame import decode, encode, shutdown_workers
+from layer2.frame_errors import DropStatistics, DropReason, FrameDecodeError
+from layer2.hdlc.hdlc import HdlcFrame
+from layer2.hdlc_base import HdlcMode
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+
+
+class TestDropStatistics(TestCase):
+
+    def test_counts_per_frame_type_and_reason(self):
+        drops = DropStatistics()
+        drops.record(PppFrame, FrameDecodeError(DropReason.BAD_FCS, "bad"))
+        drops.record(PppFrame, FrameDecodeError(DropReason.BAD_FCS, "bad"))
+        drops.record(HdlcFrame, FrameDecodeError(DropReason.SHORT_FRAME, "short"))
+        drops.record("EthernetFrame", ValueError("something else"))
+        self.assertEqual(4, drops.total)
+        self.assertEqual(2, drops.count(PppFrame, DropReason.BAD_FCS))
+        self.assertEqual(2, drops.count(reason=DropReason.BAD_FCS))
+        self.assertEqual(1, drops.count("EthernetFrame", DropReason.MALFORMED))
+        self.assertEqual({"PppFrame": 2, "HdlcFrame": 1, "EthernetFrame": 1}, drops.by_frame_type())
+        self.assertEqual(2, drops.by_reason()[DropReason.BAD_FCS])
+        self.assertTrue(str(drops).startswith("2 PppFrame (bad FCS)"))
+        drops.clear()
+        self.assertEqual((0, "no frames dropped"), (drops.total, str(drops)))
+
+    def test_samples_are_bounded(self):
+        drops = DropStatistics(sample_size=2)
+        for i in range(5):
+            drops.record(PppFrame, FrameDecodeError(DropReason.SHORT_FRAME, f"frame {i}"), memoryview(bytes([i])))
+        self.assertEqual([("frame 3", b'\x03'), ("frame 4", b'\x04')],
+                         [(sample.message, sample.data) for sample in drops.samples])
+        self.assertEqual(0, len(DropStatistics().samples))
+
+
+class TestDecoderDrops(TestCase):
+
+    def test_corrupted_frames_are_counted_without_output(self):
+        frames = [PppFrame(PppProtocol.IPv4, bytes([i]) * 10) for i in range(3)]
+        data = encode(frames, HdlcMode.NORMAL)
+        data.invert(8 * 8)  # In the information of the first frame
+        drops = DropStatistics(sample_size=1)
+        output = StringIO()
+        with redirect_stdout(output):
+            received = decode(data, PppFrame, mode=HdlcMode.NORMAL, drops=drops)
+        self.assertEqual("", output.getvalue())
+        self.assertEqual(frames[1:], received)
+        self.assertEqual(1, drops.count(PppFrame, DropReason.BAD_FCS))
+        self.assertEqual(DropReason.BAD_FCS, drops.samples[0].reason)
+
+    def test_drops_are_not_counted_without_statistics(self):
+        self.assertEqual([], PppFrame.safe_extract_frames([b'\xff\x03']))
+
+    def test_invalid_escapes_are_counted_in_the_drops(self):
+        self.addCleanup(shutdown_workers)
+        frames = [PppFrame(PppProtocol.IPv4, f"packet {i}".encode()) for i in range(3)]
+        data = encode(frames, HdlcMode.ASYNC)
+        corrupted = data[:48] + BitArray(auto=b'\x7d\x00') + data[48:]  # 0x00 is not an escaped byte
+        for workers in (1, 2):
+            drops = DropStatistics()
+            received = decode(corrupted, PppFrame, workers=workers, parallel_threshold=0, mode=HdlcMode.ASYNC,
+                              drops=drops)
+            self.assertEqual(frames[1:], received)
+            self.assertEqual({DropReason.BAD_ESCAPE: 1}, drops.by_reason())
+
+    def test_reasons_of_ppp_frames(self):
+        drops = DropStatistics()
+        valid = PppFrame(PppProtocol.IPv4, b'information').bytes()
+        unknown_protocol = PppFrame(PppProtocol.IPv4, b'information', pfc=True)
+        unknown_protocol = unknown_protocol._derive(True, _protocol_bytes=b'\x23', _optional_field=b'\x23').bytes()
+        PppFrame.safe_extract_frames([valid[:4], b'\xff\x05' + valid[2:], valid[:-1] + b'\x00', unknown_protocol],
+                                     drops)
+        self.assertEqual({DropReason.SHORT_FRAME: 1, DropReason.BAD_CONTROL: 1, DropReason.BAD_FCS: 1,
+                          DropReason.UNKNOWN_PROTOCOL: 1}, drops.by_reason())
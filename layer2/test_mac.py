@@ -1,3 +1,5 @@
+import pickle
+from copy import copy, deepcopy
 from unittest import TestCase
 from mac import *
 
@@ -22,9 +24,32 @@ class TestMac(TestCase):
         self.assertEqual(test_mac.address, b'\xa1\xb2\xc3\xd4\xe5\xf6')
 
     def test_other_separator(self):
-        test_mac = Mac(b'\xa1\xb2\xc3\xd4\xe5\xf6', separator='-')
-        self.assertEqual(test_mac.__str__(), "a1-b2-c3-d4-e5-f6")
+        test_mac = Mac(b'\xa1\xb2\xc3\xd4\xe5\xf6')
+        self.assertEqual(test_mac.format(separator='-'), "a1-b2-c3-d4-e5-f6")
 
     def test_capital(self):
-        test_mac = Mac(b'\xa1\xb2\xc3\xd4\xe5\xf6', uppercase=True)
-        self.assertEqual(test_mac.__str__(), "A1:B2:C3:D4:E5:F6")
+        test_mac = Mac(b'\xa1\xb2\xc3\xd4\xe5\xf6')
+        self.assertEqual(test_mac.format(uppercase=True), "A1:B2:C3:D4:E5:F6")
+
+    def test_has_no_instance_dict(self):
+        self.assertFalse(hasattr(Mac(), '__dict__'))
+
+    def test_equal_addresses_share_one_object(self):
+        test_mac = Mac(b'\xa1\xb2\xc3\xd4\xe5\xf6')
+        self.assertIs(test_mac, Mac.fromstring("a1:b2:c3:d4:e5:f6"))
+        self.assertIs(test_mac, Mac.fromint(0xa1b2c3d4e5f6))
+        self.assertIs(test_mac, copy(test_mac))
+        self.assertIs(test_mac, deepcopy(test_mac))
+        self.assertIs(test_mac, pickle.loads(pickle.dumps(test_mac)))
+        self.assertEqual(0xa1b2c3d4e5f6, int(test_mac))
+        self.assertNotEqual(test_mac, Mac(b'\xa1\xb2\xc3\xd4\xe5\xf7'))
+
+    def test_fromint_out_of_range(self):
+        with self.assertRaises(ValueError):
+            Mac.fromint(2 ** 48)
+
+    def test_bulk_parsing(self):
+        macs = Mac.frombytes(b'\xa1\xb2\xc3\xd4\xe5\xf6\x00\x00\x00\x00\x00\x01')
+        self.assertEqual(Mac.fromstrings(["a1:b2:c3:d4:e5:f6", "00-00-00-00-00-01"]), macs)
+        with self.assertRaises(ValueError):
+            Mac.frombytes(b'\x00' * 7)
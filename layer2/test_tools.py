@@ -1,10 +1,12 @@
 import operator
+import zlib
 from unittest import TestCase
 
 from bitstring import BitArray
 
 from layer2.tools import bits_to_int, bit_to_byte_generator, crc32, find_match, replace_all_matches, \
-    bits_to_bytes, interleave, separate, get_data_between_flags, stuff_bits, destuff_bits, reduce
+    bits_to_bytes, interleave, separate, get_data_between_flags, stuff_bits, destuff_bits, reduce, crc32_of, \
+    crc32_combine, crc32_replace_prefix, _shift_tables
 
 
 def bool_list(string: str):
@@ -17,6 +19,35 @@ class Test(TestCase):
         checksum = crc32(test_string)
         self.assertEqual(0xE7CCFC9A.to_bytes(4, byteorder='little'), checksum)
 
+    def test_crc32_of_parts_equals_crc32_of_concatenation(self):
+        parts = [b'According to all ', b'', b'known laws ', b'of aviation...']
+        self.assertEqual(zlib.crc32(b''.join(parts)), crc32_of(*parts))
+        self.assertEqual(zlib.crc32(b''.join(parts)), crc32_of(*parts[2:], running=crc32_of(*parts[:2])))
+
+    def test_crc32_combine(self):
+        a = b'According to all known laws of aviation, '
+        b = b'there is no way a bee should be able to fly.' * 40
+        self.assertEqual(zlib.crc32(a + b), crc32_combine(zlib.crc32(a), zlib.crc32(b), len(b)))
+        self.assertEqual(zlib.crc32(a), crc32_combine(zlib.crc32(a), zlib.crc32(b''), 0))
+
+    def test_crc32_replace_prefix(self):
+        old_prefix = b'\xa1\xb2\xc3\xd4\xe5\xf6\xff\x11\xaa\x55\xcc\x99\x08\x00'
+        new_prefix = b'\x1e\xa1\xd6\x9d\x23\x53\xff\x11\xaa\x55\xcc\x99\x81\x00\x00\x05\x08\x00'
+        suffix = b'Its wings are too small to get its fat little body off the ground.'
+        replaced = crc32_replace_prefix(zlib.crc32(old_prefix + suffix), zlib.crc32(old_prefix),
+                                        zlib.crc32(new_prefix), len(suffix))
+        self.assertEqual(zlib.crc32(new_prefix + suffix), replaced)
+
+    def test_crc32_shift_tables_are_shared_by_lengths(self):
+        _shift_tables.cache_clear()
+        prefix, other_prefix = b'\x01\x02\x03\x04', b'\x05\x06'
+        for length in (0, 1, 46, 1499, 1500, 9000, 65535, 2 ** 20 + 3):
+            suffix = bytes(i % 251 for i in range(length))
+            replaced = crc32_replace_prefix(zlib.crc32(prefix + suffix), zlib.crc32(prefix), zlib.crc32(other_prefix),
+                                            length)
+            self.assertEqual(zlib.crc32(other_prefix + suffix), replaced)
+        self.assertLessEqual(_shift_tables.cache_info().currsize, 21)  # One for each bit of the lengths
+
     #####################################
     #     Bits <-> Bytes conversions    #
     #####################################
@@ -44,6 +75,17 @@ class Test(TestCase):
         self.assertEqual(81, found_bytes[0])
         self.assertEqual(36, found_bytes[1])
         self.assertEqual(224, found_bytes[2])
+        self.assertEqual(3, len(found_bytes))
+
+    def test_bit_to_byte_generator_over_multiple_chunks(self):
+        data = bytes(range(256)) * 40
+        byte_src = bit_to_byte_generator(b for b in BitArray(bytes=data))
+        self.assertEqual(data, bytes(byte_src))
+
+    def test_bits_to_bytes_with_partial_last_byte(self):
+        bits = BitArray(bin="01010001" + "111")
+        self.assertEqual(b'\x51\x07', bits_to_bytes(list(bits)))
+        self.assertEqual(b'\x51\x07', bits_to_bytes(bits))
 
     #####################################
     #        list manipulations         #
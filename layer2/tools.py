@@ -1,7 +1,10 @@
 import zlib
-from typing import Iterable, Generator, TypeVar, Optional, Tuple, Callable
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Generator, TypeVar, Optional, Tuple, Callable, Final
 
-from bitstring import BitArray
+import numpy as np
+from bitstring import BitArray, Bits
 
 T = TypeVar('T')
 U = TypeVar('U')
@@ -13,7 +16,105 @@ U = TypeVar('U')
 
 
 def crc32(data: bytes) -> bytes:
-    return (zlib.crc32(data) & 0xFFFFFFFF).to_bytes(4, byteorder='little')
+    return crc32_to_bytes(zlib.crc32(data))
+
+
+def crc32_to_bytes(crc: int) -> bytes:
+    return (crc & 0xFFFFFFFF).to_bytes(4, byteorder='little')
+
+
+def crc32_of(*parts: bytes, running: int = 0) -> int:
+    """
+    Calculate the CRC32 of the concatenation of all parts, without actually concatenating them. The optional running
+    value is the CRC32 of any data preceding the parts.
+    """
+    for part in parts:
+        running = zlib.crc32(part, running)
+    return running
+
+
+_CRC32_POLYNOMIAL = 0xEDB88320  # Reflected representation of the polynomial used by zlib.crc32
+
+
+def _multiply_mod_p(a: int, b: int) -> int:
+    """ Multiply the polynomials a and b modulo the CRC32 polynomial (in reflected bit order, so x^0 = 1 << 31) """
+    m = 1 << 31
+    product = 0
+    while True:
+        if a & m:
+            product ^= b
+            if (a & (m - 1)) == 0:
+                break
+        m >>= 1
+        b = (b >> 1) ^ _CRC32_POLYNOMIAL if b & 1 else b >> 1
+    return product
+
+
+def _build_x_pow_2n_table() -> list[int]:
+    table = [1 << 30]  # x^1
+    for _ in range(31):
+        table.append(_multiply_mod_p(table[-1], table[-1]))
+    return table
+
+
+_X_POW_2N_TABLE = _build_x_pow_2n_table()  # x^(2^n) modulo the CRC32 polynomial
+
+
+@lru_cache(maxsize=None)
+def _shift_tables(k: int) -> tuple[list[int], ...]:
+    """
+    Shifting a CRC over 2^k zero bytes is linear in the CRC, so it can be split into 4 lookup tables (one for each byte
+    of the CRC). Shifts over other lengths apply the tables of the bits that are set in the length, as zlib combines its
+    squarings of x^8. There are at most 32 sets of tables (the powers of x^2 repeat with period 32), and only those of
+    bits that occur in the lengths of the frames are ever built, so a shift never waits for a table after the first few.
+    """
+    operator = _X_POW_2N_TABLE[(k + 3) & 31]  # x^(8 * 2^k)
+    columns = [_multiply_mod_p(operator, 1 << i) for i in range(32)]
+    tables = []
+    for k in range(4):
+        table = [0] * 256
+        for b in range(1, 256):
+            lowest_bit = b & -b
+            table[b] = table[b ^ lowest_bit] ^ columns[8 * k + lowest_bit.bit_length() - 1]
+        tables.append(table)
+    return tuple(tables)
+
+
+def _shift_crc(crc: int, n: int) -> int:
+    """ Shift the CRC over n zero bytes, with 4 lookups for each bit that is set in n """
+    k = 0
+    while n:
+        if n & 1:
+            t0, t1, t2, t3 = _shift_tables(k & 31)
+            crc = t0[crc & 0xFF] ^ t1[(crc >> 8) & 0xFF] ^ t2[(crc >> 16) & 0xFF] ^ t3[(crc >> 24) & 0xFF]
+        n >>= 1
+        k += 1
+    return crc
+
+
+def crc32_combine(crc1: int, crc2: int, length2: int) -> int:
+    """
+    Given crc1 = CRC32(A) and crc2 = CRC32(B) with length2 = len(B) this returns CRC32(A + B), without touching the data
+    of either A or B. This is the same computation as crc32_combine() from zlib.
+    """
+    return _shift_crc(crc1, length2) ^ crc2
+
+
+def crc32_replace_prefix(crc: int, old_prefix_crc: int, new_prefix_crc: int, suffix_length: int) -> int:
+    """
+    Given crc = CRC32(P + S), old_prefix_crc = CRC32(P) and new_prefix_crc = CRC32(Q) this returns CRC32(Q + S), where
+    suffix_length = len(S). The prefixes P and Q may differ in length. Since CRC32(P + S) = shift(CRC32(P)) ^ CRC32(S),
+    with the shift only depending on len(S), the suffix never has to be rehashed.
+    """
+    return crc ^ _shift_crc(old_prefix_crc ^ new_prefix_crc, suffix_length)
+
+
+def owned_bytes(data: bytes | bytearray | memoryview) -> bytes:
+    """
+    Parsers hand out views into the buffer that was received instead of copies. This returns bytes that do not refer to
+    any other buffer, e.g. for keeping data around after the receive buffer is reused. Bytes are returned as they are.
+    """
+    return data if type(data) is bytes else bytes(data)
 
 
 #####################################
@@ -21,11 +122,15 @@ def crc32(data: bytes) -> bytes:
 #####################################
 
 
+_BIT_DIGITS: Final = bytes.maketrans(b'\x00\x01', b'01')  # Translates bytes with values 0 and 1 to ASCII '0' and '1'
+_GENERATOR_CHUNK_SIZE: Final = 8 * 4096  # Number of bits that are taken from a generator at once, a multiple of 8
+
+
 def bits_to_int(bits: Iterable[bool]) -> int:
-    byte = 0
-    for b in bits:
-        byte = (byte << 1) | b
-    return byte
+    """ The number represented by the bits, with the most significant bit first """
+    if isinstance(bits, Bits):
+        return bits.uint if len(bits) > 0 else 0
+    return int(bytes(bits).translate(_BIT_DIGITS) or b'0', 2)
 
 
 def chunks(data: list[T], chunk_size: int):
@@ -33,23 +138,29 @@ def chunks(data: list[T], chunk_size: int):
         yield data[i:i + chunk_size]
 
 
-def bits_to_bytes(bits: list[bool]):
-    return bytes([bits_to_int(chunk) for chunk in chunks(bits, 8)])
+def bits_to_bytes(bits: list[bool] | Bits) -> bytes:
+    """
+    Pack the bits into bytes, with the most significant bit first. If the number of bits is not a multiple of 8, then
+    the last byte consists of the remaining bits, i.e. these are aligned to the right.
+    """
+    n_full = len(bits) - len(bits) % 8
+    if isinstance(bits, Bits):
+        packed = bits[:n_full].tobytes()
+    else:
+        packed = np.packbits(np.frombuffer(bytes(bits[:n_full]), dtype=np.uint8)).tobytes()
+    if n_full == len(bits):
+        return packed
+    return packed + bytes([bits_to_int(bits[n_full:])])
 
 
-def bit_to_byte_generator(source: Generator[bool, None, None]) -> Generator[int, None, None]:
-    source_alive = True
-    while source_alive:
-        bits = [False] * 8
-        for i in range(8):
-            try:
-                bit = next(source)
-                bits[i] = bit
-            except StopIteration:
-                source_alive = False
-                break
-        byte = bits_to_int(bits)
-        yield byte
+def bit_to_byte_generator(source: Iterable[bool]) -> Generator[int, None, None]:
+    """
+    Streaming version of bits_to_bytes: the bits are taken from the source in large chunks, and are packed all at once.
+    If the source ends halfway a byte, then this last byte is padded with 0's (i.e. the bits are aligned to the left).
+    """
+    source = iter(source)
+    while chunk := bytes(islice(source, _GENERATOR_CHUNK_SIZE)):
+        yield from np.packbits(np.frombuffer(chunk, dtype=np.uint8)).tobytes()
 
 
 #####################################
@@ -7,7 +7,7 @@ from layer3.ip.ipv6 import IPv6Packet, IPv6Header
 from layer3.ip.shared import ECN, DSCP, IPProtocol
 
 
-def packet_decoder(data: bytes):
+def packet_decoder(data: bytes | memoryview):
     version = get_ip_version(data)
     if version == IPv4Packet.VERSION:
         return ipv4_packet_decoder(data)
@@ -17,39 +17,44 @@ def packet_decoder(data: bytes):
         raise ValueError(f"Unsupported IP version: {version}")
 
 
-def get_ip_version(raw_data: bytes) -> int:
-    return BitArray(auto=raw_data[:1])[:4].uint
+def get_ip_version(raw_data: bytes | memoryview) -> int:
+    return raw_data[0] >> 4
 
 
-def ipv4_packet_decoder(data: bytes):
-    fixed_header = BitArray(auto=data[:20])
+def ipv4_packet_decoder(data: bytes | memoryview):
+    """
+    Decode an IPv4 packet. The fields are read directly from the provided buffer and the payload of the returned packet
+    is a view into this buffer, i.e. it is not copied. Use layer2.tools.owned_bytes() to get a copy if needed.
+    """
+    view = memoryview(data)
+    if len(view) < 20:
+        raise ValueError(f"Received {len(view)} bytes, which is too short for an IPv4 header")
 
-    version: int = fixed_header[:4].uint
+    version: int = view[0] >> 4
     if version != IPv4Packet.VERSION:
         raise ValueError("Version of IPv4 should be 4.")
 
-    ihl: int = fixed_header[4:8].uint
-    dscp = DSCP.from_int(fixed_header[8:14].uint)
-    ecn = ECN(fixed_header[14:16].uint)
+    ihl: int = view[0] & 0x0F
+    dscp = DSCP.from_int(view[1] >> 2)
+    ecn = ECN(view[1] & 0x03)
 
-    total_len: int = fixed_header[16:32].uint
+    total_len: int = int.from_bytes(view[2:4], byteorder='big')
     if total_len < 20:
         raise ValueError(f"total_length of the packet is invalid, expected > 20 but got {total_len}")
 
-    identification: int = fixed_header[32:48].uint
-    flags = IPv4Flag.from_bits(fixed_header[48:52])
-    fragment_offset: int = fixed_header[52:64].uint
-    ttl: int = fixed_header[64:72].uint
-    protocol = IPProtocol.from_int(fixed_header[72:80].uint)
-    header_checksum = fixed_header[80:96]
-    source = IPv4Address(fixed_header[96:128].uint)
-    destination = IPv4Address(fixed_header[128:160].uint)
+    identification: int = int.from_bytes(view[4:6], byteorder='big')
+    flags_and_offset: int = int.from_bytes(view[6:8], byteorder='big')
+    flags = IPv4Flag.from_int(flags_and_offset >> 13)
+    fragment_offset: int = flags_and_offset & 0x1FFF
+    ttl: int = view[8]
+    protocol = IPProtocol.from_int(view[9])
+    header_checksum = BitArray(uint=int.from_bytes(view[10:12], byteorder='big'), length=16)
+    source = IPv4Address(int.from_bytes(view[12:16], byteorder='big'))
+    destination = IPv4Address(int.from_bytes(view[16:20], byteorder='big'))
 
-    options_bytes = [data[4 * i: 4 * (i + 1)] for i in range(5, ihl)]
-    options = [IPv4Options.from_int(int.from_bytes(option_bytes, byteorder='big')) for option_bytes in
-               options_bytes]
+    options = [IPv4Options.from_int(int.from_bytes(view[4 * i: 4 * (i + 1)], byteorder='big')) for i in range(5, ihl)]
 
-    payload = data[4 * ihl:total_len]
+    payload = view[4 * ihl:total_len]
 
     header = IPv4Header(dscp, ecn, identification, flags, fragment_offset, ttl, protocol, len(payload), source,
                         destination, *options).overwrite_checksum(header_checksum)
@@ -59,8 +64,9 @@ def ipv4_packet_decoder(data: bytes):
     return IPv4Packet(header, payload)
 
 
-def ipv6_packet_decoder(data: bytes):
-    fixed_header = BitArray(auto=data[:40])
+def ipv6_packet_decoder(data: bytes | memoryview):
+    view = memoryview(data)
+    fixed_header = BitArray(bytes=view[:40].tobytes())
 
     version: int = fixed_header[:4].uint
     if version != IPv6Packet.VERSION:
@@ -75,7 +81,7 @@ def ipv6_packet_decoder(data: bytes):
     source = IPv6Address(fixed_header[64:192].uint)
     destination = IPv6Address(fixed_header[192:320].uint)
 
-    payload = data[40:40 + payload_len]
+    payload = view[40:40 + payload_len]
     header = IPv6Header(dscp, ecn, flow_label, payload_len, next_header, hop_limit, source, destination)
 
     return IPv6Packet(header, payload)
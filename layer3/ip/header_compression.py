@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Final, Optional
+
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+from layer3.ip.ipv4 import IPv4Packet
+from layer3.tools import checksum_of_bytes
+
+
+def _build_crc8_table() -> bytes:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xE0 if crc & 1 else crc >> 1
+        table.append(crc)
+    return bytes(table)
+
+
+_CRC8_TABLE: Final = _build_crc8_table()
+
+
+def crc8(data: bytes | memoryview) -> int:
+    """ The 8 bit CRC of ROHC (RFC 3095), with polynomial x^8 + x^2 + x + 1 """
+    crc = 0xFF
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+# Flags of the fields that are present in a compressed header, in the order in which they follow
+TOS: Final = 0x80
+IDENTIFICATION: Final = 0x40  # Absent when it changed by the same amount as between the previous two packets
+FRAGMENTATION: Final = 0x20
+TTL: Final = 0x10
+
+
+class HeaderCompressionStatistics(object):
+    """ Counters of IPv4 header compression on a link. Header bytes include the context id of compressed headers. """
+
+    def __init__(self):
+        self.full_headers_sent = 0
+        self.compressed_headers_sent = 0
+        self.packets_not_compressed = 0  # Packets that are not (valid) IPv4, sent as they are
+        self.header_bytes = 0  # Of the IPv4 headers of the packets sent with a full or compressed header
+        self.header_bytes_sent = 0
+        self.packets_decompressed = 0
+        self.crc_failures = 0
+        self.unknown_contexts = 0
+        self.truncated_headers = 0  # Compressed headers shorter than their flags require
+        self.refreshes_requested = 0  # By this end, in CONTEXT_STATE packets
+        self.refreshes_received = 0
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.header_bytes - self.header_bytes_sent
+
+    @property
+    def saved_per_packet(self) -> float:
+        packets = self.full_headers_sent + self.compressed_headers_sent
+        return self.saved_bytes / packets if packets else 0.0
+
+    def __str__(self):
+        return f"{self.full_headers_sent} full and {self.compressed_headers_sent} compressed headers sent, " \
+               f"{self.saved_bytes} bytes saved ({self.saved_per_packet:.1f} per packet), " \
+               f"{self.packets_decompressed} headers decompressed, {self.crc_failures} CRC failures, " \
+               f"{self.refreshes_requested} refreshes requested"
+
+
+class _Context(object):
+    """
+    The last header of a flow, as bytes, the last change of its identification field, and the number of compressed
+    headers sent since the last full header
+    """
+    __slots__ = ('header', 'identification_step', 'compressed_since_refresh')
+
+    def __init__(self, header: bytes):
+        self.header = header
+        self.identification_step = 1
+        self.compressed_since_refresh = 0
+
+    def next_identification(self, identification: int) -> None:
+        self.identification_step = (identification - int.from_bytes(self.header[4:6], 'big')) & 0xFFFF
+
+    @property
+    def expected_identification(self) -> int:
+        return (int.from_bytes(self.header[4:6], 'big') + self.identification_step) & 0xFFFF
+
+
+class IPv4HeaderCompression(object):
+    """
+    Compression of the IPv4 headers of the packets sent over the link of a PppInterface, in the style of IPHC (RFC 2507,
+    RFC 2509) and ROHC (RFC 3095). Both ends of the link have to enable it.
+
+    The packets of a flow share the version, header length, protocol, addresses and options. The compressor assigns each
+    flow a context id and first sends a full header (IPHC_FULL_HEADER: the context id followed by the packet), which the
+    decompressor stores as the context of the flow. Later packets are sent with a compressed header (IPHC_COMPRESSED):
+    the context id, a byte of flags that tells which of the TOS, identification, fragmentation and TTL fields changed,
+    an 8 bit CRC of the original header, and the changed fields. The identification is left out when it changed by the
+    same amount as in the previous packet, so both sequential and constant identifications are not sent. The total
+    length and header checksum are derived from the packet.
+
+    When the CRC of a decompressed header does not match, or the context is unknown, the packet is dropped and the
+    decompressor asks for a full header in a CONTEXT_STATE packet. The compressor also sends a full header after every
+    refresh_interval compressed ones, in case such a request was lost. The least recently used context id is reused when
+    there are more than max_contexts flows.
+    """
+
+    def __init__(self, interface, max_contexts: int = 16, refresh_interval: int = 64):
+        if not 0 < max_contexts <= 256:
+            raise ValueError(f"The number of contexts should be between 1 and 256, got {max_contexts}")
+        self.interface = interface
+        self.max_contexts = max_contexts
+        self.refresh_interval = refresh_interval
+        self.statistics = HeaderCompressionStatistics()
+        self._flows: OrderedDict[bytes, int] = OrderedDict()  # The static fields of each flow to its context id
+        self._sent: dict[int, _Context] = {}
+        self._received: dict[int, _Context] = {}
+        self._requested: set[int] = set()  # Context ids of which a refresh was requested, but no full header received
+        interface.header_compression = self
+
+    def detach(self) -> None:
+        if self.interface.header_compression is self:
+            self.interface.header_compression = None
+
+    # --- Compressor
+
+    @staticmethod
+    def _header_length(packet: bytes | memoryview) -> Optional[int]:
+        """ The length of the header of a valid IPv4 packet without padding, or None if it isn't one """
+        if len(packet) < 20 or packet[0] >> 4 != IPv4Packet.VERSION:
+            return None
+        header_length = 4 * (packet[0] & 0x0F)
+        if header_length < 20 or int.from_bytes(packet[2:4], 'big') != len(packet) or len(packet) < header_length:
+            return None
+        return header_length
+
+    def _context_id(self, flow: bytes) -> tuple[int, bool]:
+        """ The context id of the flow, and whether the context is new """
+        if (context_id := self._flows.get(flow)) is not None:
+            self._flows.move_to_end(flow)
+            return context_id, False
+        if len(self._flows) < self.max_contexts:
+            context_id = len(self._flows)
+        else:
+            _, context_id = self._flows.popitem(last=False)
+        self._flows[flow] = context_id
+        return context_id, True
+
+    def compress(self, frame: PppFrame) -> PppFrame:
+        """ The frame to send instead of the given frame """
+        if frame.protocol is not PppProtocol.IPv4:
+            return frame
+        packet = frame.information
+        if (header_length := self._header_length(packet)) is None:
+            self.statistics.packets_not_compressed += 1
+            return frame
+        header = bytes(packet[:header_length])
+        context_id, new = self._context_id(header[:1] + header[9:10] + header[12:])
+        self.statistics.header_bytes += header_length
+
+        context = self._sent.get(context_id)
+        if new or context is None or context.compressed_since_refresh >= self.refresh_interval:
+            self._sent[context_id] = _Context(header)
+            self.statistics.full_headers_sent += 1
+            self.statistics.header_bytes_sent += 1 + header_length
+            return PppFrame(PppProtocol.IPHC_FULL_HEADER, bytes((context_id,)) + bytes(packet))
+
+        previous = context.header
+        flags = 0
+        fields = []
+        if header[1] != previous[1]:
+            flags |= TOS
+            fields.append(header[1:2])
+        identification = int.from_bytes(header[4:6], 'big')
+        if identification != context.expected_identification:
+            flags |= IDENTIFICATION
+            fields.append(header[4:6])
+        if header[6:8] != previous[6:8]:
+            flags |= FRAGMENTATION
+            fields.append(header[6:8])
+        if header[8] != previous[8]:
+            flags |= TTL
+            fields.append(header[8:9])
+        compressed_header = bytes((context_id, flags, crc8(header))) + b''.join(fields)
+
+        context.next_identification(identification)
+        context.header = header
+        context.compressed_since_refresh += 1
+        self.statistics.compressed_headers_sent += 1
+        self.statistics.header_bytes_sent += len(compressed_header)
+        return PppFrame(PppProtocol.IPHC_COMPRESSED, compressed_header + bytes(packet[header_length:]))
+
+    def _refresh(self, context_ids: bytes | memoryview) -> None:
+        """ Send a full header with the next packet of each of the contexts """
+        for context_id in context_ids:
+            self.statistics.refreshes_received += 1
+            self._sent.pop(context_id, None)
+
+    # --- Decompressor
+
+    def receive(self, frame: PppFrame) -> Optional[PppFrame]:
+        """ The frame to process instead of the received frame, or None if there is nothing to process """
+        if frame.protocol is PppProtocol.IPHC_FULL_HEADER:
+            return self._receive_full_header(frame.information)
+        elif frame.protocol is PppProtocol.IPHC_COMPRESSED:
+            return self._decompress(frame.information)
+        elif frame.protocol is PppProtocol.IPHC_CONTEXT_STATE:
+            self._refresh(frame.information)
+            return None
+        return frame
+
+    def _receive_full_header(self, information: bytes | memoryview) -> Optional[PppFrame]:
+        if len(information) < 1:
+            return None
+        context_id, packet = information[0], information[1:]
+        header_length = self._header_length(packet)
+        if header_length is None or checksum_of_bytes(packet[:header_length]) != 0:
+            self._request_refresh(context_id)
+            return None
+        self._received[context_id] = _Context(bytes(packet[:header_length]))
+        self._requested.discard(context_id)
+        return PppFrame(PppProtocol.IPv4, packet)
+
+    def _decompress(self, information: bytes | memoryview) -> Optional[PppFrame]:
+        if len(information) < 3:
+            return None
+        context_id, flags, crc = information[0], information[1], information[2]
+        if (context := self._received.get(context_id)) is None:
+            self.statistics.unknown_contexts += 1
+            self._request_refresh(context_id)
+            return None
+
+        required = 3 + bool(flags & TOS) + 2 * bool(flags & IDENTIFICATION) + 2 * bool(flags & FRAGMENTATION) + \
+            bool(flags & TTL)
+        if len(information) < required:
+            self.statistics.truncated_headers += 1
+            self._request_refresh(context_id)
+            return None
+
+        header = bytearray(context.header)
+        position = 3
+        if flags & TOS:
+            header[1] = information[position]
+            position += 1
+        if flags & IDENTIFICATION:
+            header[4:6] = information[position:position + 2]
+            position += 2
+        else:
+            header[4:6] = context.expected_identification.to_bytes(2, 'big')
+        if flags & FRAGMENTATION:
+            header[6:8] = information[position:position + 2]
+            position += 2
+        if flags & TTL:
+            header[8] = information[position]
+            position += 1
+        payload = information[position:]
+        header[2:4] = (len(header) + len(payload)).to_bytes(2, 'big')
+        header[10:12] = b'\x00\x00'
+        header[10:12] = checksum_of_bytes(header).to_bytes(2, 'big')
+
+        if crc8(header) != crc:
+            self.statistics.crc_failures += 1
+            del self._received[context_id]
+            self._request_refresh(context_id)
+            return None
+        context.next_identification(int.from_bytes(header[4:6], 'big'))
+        context.header = bytes(header)
+        self.statistics.packets_decompressed += 1
+        return PppFrame(PppProtocol.IPv4, context.header + bytes(payload))
+
+    def _request_refresh(self, context_id: int) -> None:
+        if context_id not in self._requested:
+            self._requested.add(context_id)
+            self.statistics.refreshes_requested += 1
+            self.interface.send(PppFrame(PppProtocol.IPHC_CONTEXT_STATE, bytes((context_id,))))
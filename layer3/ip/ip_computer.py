@@ -11,8 +11,9 @@ from layer3.ip.ipv4 import IPv4Packet, IPv4Header
 
 
 class ComputerWithIpCapability(EthernetEndpointWithArp):
-    def __init__(self, ip4: IPv4Address, ip6: IPv6Address, mac: Mac = None, name: str = ""):
-        super().__init__(ip4, mac, name + f"({ip4})")
+    def __init__(self, ip4: IPv4Address, ip6: IPv6Address, mac: Mac = None, name: str = "",
+                 mtu: int = EthernetFrame.MAX_PAYLOAD):
+        super().__init__(ip4, mac, name + f"({ip4})", mtu)
         self.ip4 = ip4
         self.ip6 = ip6
         self.ip6_cache: dict[IPv6Address, Mac] = {}
@@ -35,7 +36,7 @@ class ComputerWithIpCapability(EthernetEndpointWithArp):
             else:
                 raise NotImplementedError(f"Ether type {frame.ether_type} not yet supported")  # TODO: implement ipv6
         else:
-            self.say("Unsupported frame received, dropping it.")
+            self.log.warning("Unsupported frame received, dropping it.")
 
     def send_over_ip(self, target_ip4: IPv4Address, data: bytes):
         packet = IPv4Packet(header=IPv4Header.default_header(self.ip4, target_ip4, len(data)), payload=data)
@@ -43,29 +44,29 @@ class ComputerWithIpCapability(EthernetEndpointWithArp):
 
     def send_ip_packet(self, packet: IPv4Packet):
         if packet.destination not in self.ip4_cache:
-            self.say(f"Unknown physical address for ip {packet.destination}, sending out ARP")
+            self.log.info("Unknown physical address for ip %s, sending out ARP", packet.destination)
             self.get_interface(0).send_arp_for(packet.destination)
 
         if packet.destination not in self.ip4_cache:
-            self.say("Destination not found after ARP, sending packet to default gateway")
+            self.log.info("Destination not found after ARP, sending packet to default gateway")
             self.send_packet_to_gateway(packet)
         else:
             target_mac = self.ip4_cache[packet.destination]
-            self.say(f"Destination ip {packet.destination} has physical address {target_mac}.")
-            if len(packet) > EthernetFrame.MAX_PAYLOAD:
-                self.say("Packet too large, it needs fragmentation")
+            self.log.debug("Destination ip %s has physical address %s.", packet.destination, target_mac)
+            if len(packet) > self.get_interface(0).mtu:
+                self.log.warning("Packet too large, it needs fragmentation")
                 raise NotImplementedError("Fragmentation not yet available")
             else:
-                self.say("Sending packet now...")
+                self.log.debug("Sending packet now...")
                 self.send_data(packet.bytes, target_mac, EtherType.IPV4)
 
     def send_packet_to_gateway(self, packet: IPv4Packet):
         if self.default_gateway_ip4 not in self.ip4_cache:
-            self.say(f"Unknown physical address for ip {self.default_gateway_ip4}, sending out ARP")
+            self.log.info("Unknown physical address for ip %s, sending out ARP", self.default_gateway_ip4)
             self.get_interface(0).send_arp_for(self.default_gateway_ip4)
 
         if self.default_gateway_ip4 not in self.ip4_cache:
-            self.say(f"Unknown physical address for ip {self.default_gateway_ip4}, dropping packet.")
+            self.log.warning("Unknown physical address for ip %s, dropping packet.", self.default_gateway_ip4)
             return
         else:
             self.send_data(packet.bytes, self.ip4_cache[self.default_gateway_ip4])
@@ -73,10 +74,11 @@ class ComputerWithIpCapability(EthernetEndpointWithArp):
     def process_ipv4(self, frame: EthernetFrame):
         try:
             packet = ipv4_packet_decoder(frame.payload)
-            self.say(f"Received from {packet.source} the following packet payload:\n    > {packet.payload}")
+            self.log.debug("Received from %s the following packet payload:\n    > %s", packet.source, packet.payload)
             return packet.payload
         except ValueError as e:
-            self.say(f"Error while decoding packet inside frame from {frame.source}, it will be dropped. Cause:", e)
+            self.log.warning("Error while decoding packet inside frame from %s, it will be dropped. Cause: %s",
+                             frame.source, e)
 
 
 
@@ -38,7 +38,7 @@ class IpRouter(DeviceWithInterfaces):  # A pure router. Consumer routers do have
                 self.interface_addresses[i] = interface.ip4
                 self.interface_networks[i] = IPv4Network((interface.ip4, 24), strict=False)
             else:
-                print("WARNING! Interface without IP address!!")
+                self.log.warning("Interface %d has no IP address", i)
 
     def send(self, packet, outgoing_interface_num: int) -> None:
         interface = self.get_interface(outgoing_interface_num)
@@ -64,12 +64,12 @@ class IpRouter(DeviceWithInterfaces):  # A pure router. Consumer routers do have
             raise NetworkError(f"Interface {interface_num} is not an Ethernet Interface with ARP, cannot find mac")
         cache = interface.ip4_cache
         if ip_dest not in cache.keys():
-            self.say(f"Unknown physical address for target {ip_dest}, sending out ARP...")
+            self.log.info("Unknown physical address for target %s, sending out ARP...", ip_dest)
             interface.send_arp_for(ip_dest)
         if ip_dest not in cache.keys():
             raise NetworkError(f"Unknown target {ip_dest}, no response from ARP on interface {interface_num}.")
         else:
-            self.say(f"Physical address for target {ip_dest} is known to be {cache[ip_dest]}")
+            self.log.debug("Physical address for target %s is known to be %s", ip_dest, cache[ip_dest])
             return cache[ip_dest]
 
     def receive(self, frame, incoming_interface_num: int) -> None:
@@ -92,12 +92,12 @@ class IpRouter(DeviceWithInterfaces):  # A pure router. Consumer routers do have
                     self.nack(packet, frame, incoming_interface_num)
 
     def process_ipv4_packet(self, packet: IPv4Packet, incoming_interface_num: int):
-        self.say("Processing ipv4 packet...")
+        self.log.debug("Processing ipv4 packet...")
         destination = packet.destination
 
         # Check if packet is addressed at self
         if destination == self.interface_addresses[incoming_interface_num]:
-            self.say(f"Received packet addressed at me! Payload:\n    > {packet.payload}")
+            self.log.info("Received packet addressed at me! Payload:\n    > %s", packet.payload)
             return
 
         # Check if packet is addressed at something local to this router
@@ -121,17 +121,17 @@ class IpRouter(DeviceWithInterfaces):  # A pure router. Consumer routers do have
                 self.nack(packet, None, incoming_interface_num)
 
     def send_ipv4_local(self, packet, interface_num: int):
-        self.say(f"Destination is local on interface {interface_num}")
+        self.log.debug("Destination is local on interface %d", interface_num)
         packet.decrease_ttl()
         self.send(packet, interface_num)
 
     def forward_ipv4(self, packet, interface_num: int):
-        self.say(f"Found route for destination, forwarding on interface {interface_num}")
+        self.log.debug("Found route for destination, forwarding on interface %d", interface_num)
         packet.decrease_ttl()
         self.send(packet, interface_num)
 
     def forward_ipv4_default(self, packet):
-        self.say(f"No route found for destination, forwarding to default")
+        self.log.debug("No route found for destination, forwarding to default")
         packet.decrease_ttl()
         self.send(packet, self.default_interface_num)
 
@@ -144,7 +144,7 @@ class IpRouter(DeviceWithInterfaces):  # A pure router. Consumer routers do have
     def process_ethernet_frame(self, frame: EthernetFrameBase, incoming_interface_num: int) -> Optional[bytes]:
         if not isinstance(frame, EthernetFrameBase):
             raise NetworkError("Expected to receive an ethernet frame on an ethernet interface")
-        self.say("Received ethernet frame...")
+        self.log.debug("Received ethernet frame...")
 
         if isinstance(frame, EthernetFrame):
             if frame.ether_type == EtherType.ARP:
@@ -155,27 +155,28 @@ class IpRouter(DeviceWithInterfaces):  # A pure router. Consumer routers do have
             else:
                 raise NotImplementedError(f"Ether type {frame.ether_type} not yet supported")  # TODO: implement ipv6
         else:
-            self.say("Unsupported frame received, dropping it.")
+            self.log.warning("Unsupported frame received, dropping it.")
             return None
 
     def extract_ipv4_payload(self, frame: EthernetFrame) -> bytes:
         try:
             packet = ipv4_packet_decoder(frame.payload)
-            self.say(f"Received from {packet.source} the following packet payload:\n    > {packet.payload}")
+            self.log.debug("Received from %s the following packet payload:\n    > %s", packet.source, packet.payload)
             return packet
         except ValueError as e:
-            self.say(f"Error while decoding packet inside frame from {frame.source}, it will be dropped. Cause:", e)
+            self.log.warning("Error while decoding packet inside frame from %s, it will be dropped. Cause: %s",
+                             frame.source, e)
 
     def process_hdlc_frame(self, frame: HdlcFrame) -> Optional[bytes]:
         if not isinstance(frame, HdlcFrame):
             raise NetworkError("Expected to receive an HDLC frame on an HDLC interface")
-        self.say("Received HDLC frame, extracting payload...")
+        self.log.debug("Received HDLC frame, extracting payload...")
         return frame.information
 
     def process_ppp_frame(self, frame: PppFrame) -> Optional[bytes]:
         if not isinstance(frame, PppFrame):
             raise NetworkError("Expected to receive an PPP frame on an PPP interface")
-        self.say("Received PPP frame, extracting payload...")
+        self.log.debug("Received PPP frame, extracting payload...")
         return frame.information
 
 
@@ -12,6 +12,8 @@ from layer3.tools import checksum
 
 # TODO: fragmentation of large packets
 class IPv4Packet(object):
+    __slots__ = ('header', 'payload')
+
     VERSION: Final = 4
 
     def __init__(self, header: IPv4Header, payload: bytes):
@@ -56,6 +58,10 @@ class IPv4Packet(object):
 
 
 class IPv4Header(object):
+    __slots__ = ('version', 'dscp', 'ecn', 'identification', 'flags', 'fragment_offset', 'time_to_live', 'protocol',
+                 'header_checksum', 'source', 'destination', 'options', 'ihl', 'total_length', 'source_ip',
+                 'destination_ip')
+
     VERSION: Final = 4
     header_byte_len: Final = 20
 
@@ -162,6 +168,13 @@ class IPv4Flag(object):
             raise ValueError("First bit of IPv4 flag must be 0")
         return IPv4Flag(bits[1] == 1, bits[2] == 1)
 
+    @classmethod
+    def from_int(cls, n: int):
+        """ Create the flags from the value of the 3 flag bits """
+        if n & 0b100:
+            raise ValueError("First bit of IPv4 flag must be 0")
+        return IPv4Flag(bool(n & 0b010), bool(n & 0b001))
+
     def __eq__(self, other):
         return isinstance(other, self.__class__) and self.df == other.df and self.mf == other.mf
 
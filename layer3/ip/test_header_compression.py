@@ -0,0 +1,142 @@
+from ipaddress import IPv4Address
+from unittest import TestCase
+
+from layer2.infrastructure.network_interface import DeviceWithInterfaces, PppInterface
+from layer2.infrastructure.simulation import SimulationClock, Channel
+from layer2.ppp.point_to_point import PppFrame, PppProtocol
+from layer3.ip.decoding import ipv4_packet_decoder
+from layer3.ip.header_compression import IPv4HeaderCompression, crc8
+from layer3.ip.ipv4 import IPv4Packet, IPv4Header, IPv4Flag, IPv4Options
+from layer3.ip.shared import DSCP, ECN, IPProtocol
+
+
+class Device(DeviceWithInterfaces):
+    def __init__(self):
+        super().__init__(0)
+        self._interfaces = [PppInterface(0, self)]
+        self.received: list[PppFrame] = []
+
+    def receive(self, frame: PppFrame, incoming_interface_num: int) -> None:
+        self.received.append(frame)
+
+
+def packet(identification: int, payload: bytes = b'payload', source: str = "10.0.0.1", ttl: int = 64,
+           dscp: DSCP = DSCP.CS0, *options: IPv4Options) -> IPv4Packet:
+    header = IPv4Header(dscp, ECN.NON_ECT, identification, IPv4Flag(True, False), 0, ttl, IPProtocol.UDP, len(payload),
+                        IPv4Address(source), IPv4Address("10.0.0.2"), *options)
+    return IPv4Packet(header, payload)
+
+
+class TestIPv4HeaderCompression(TestCase):
+
+    def connect(self, clock: SimulationClock = None, drop_filter=None, loss_rate: float = 0.0, **kwargs):
+        self.a, self.b = Device(), Device()
+        self.a.connect_to(self.b, 0, 0)
+        if clock is not None:
+            self.a.get_interface(0).channel = Channel(clock, loss_rate=loss_rate, drop_filter=drop_filter, seed=5)
+            self.b.get_interface(0).channel = Channel(clock)
+        compression_a = IPv4HeaderCompression(self.a.get_interface(0), **kwargs)
+        compression_b = IPv4HeaderCompression(self.b.get_interface(0), **kwargs)
+        return compression_a, compression_b
+
+    def send_all(self, packets: list[IPv4Packet]) -> None:
+        for ip_packet in packets:
+            self.a.get_interface(0).send(PppFrame(PppProtocol.IPv4, ip_packet.bytes))
+
+    def received_packets(self) -> list[IPv4Packet]:
+        self.assertTrue(all(frame.protocol is PppProtocol.IPv4 for frame in self.b.received))
+        return [ipv4_packet_decoder(frame.information) for frame in self.b.received]
+
+    def test_headers_are_restored(self):
+        compression_a, compression_b = self.connect()
+        packets = [packet(i) for i in range(10)] + [packet(0) for _ in range(5)] + \
+                  [packet(7, ttl=63), packet(1000, dscp=DSCP.EF), packet(1001, b'another payload', ttl=10),
+                   packet(1002, bytes(1000), "10.0.0.1", 10, DSCP.EF, IPv4Options.NOP)]
+        self.send_all(packets)
+        self.assertEqual(packets, self.received_packets())
+        self.assertEqual(2, compression_a.statistics.full_headers_sent)  # The packet with options is a new flow
+        self.assertEqual(len(packets) - 2, compression_b.statistics.packets_decompressed)
+
+    def test_saved_bytes_per_packet(self):
+        compression_a, _ = self.connect(refresh_interval=1000)
+        self.send_all([packet(i) for i in range(100)])
+        self.assertEqual(99, compression_a.statistics.compressed_headers_sent)
+        self.assertEqual(99 * 17 - 1, compression_a.statistics.saved_bytes)  # 3 byte headers instead of 20
+        self.assertAlmostEqual(16.82, compression_a.statistics.saved_per_packet)
+
+    def test_other_frames_pass_unchanged(self):
+        compression_a, _ = self.connect()
+        frames = [PppFrame(PppProtocol.IPv6, b'not ipv4'), PppFrame(PppProtocol.IPv4, b'too short for ipv4')]
+        for frame in frames:
+            self.a.get_interface(0).send(frame)
+        self.assertEqual(frames, self.b.received)
+        self.assertEqual(1, compression_a.statistics.packets_not_compressed)
+
+    def test_contexts_are_reused(self):
+        compression_a, _ = self.connect(max_contexts=2)
+        packets = [packet(i, source=f"10.0.0.{10 + i % 3}") for i in range(30)]
+        self.send_all(packets)
+        self.assertEqual(packets, self.received_packets())
+        self.assertEqual(30, compression_a.statistics.full_headers_sent)  # Round robin over 3 flows evicts every time
+
+    def test_lost_full_header_is_detected_by_crc(self):
+        clock = SimulationClock()
+        full_headers = []
+
+        def drop_second_full_header(data: bytes) -> bool:
+            is_full_header = PppFrame.decode_ppp_frame_from_bytes(data).protocol is PppProtocol.IPHC_FULL_HEADER
+            full_headers.append(is_full_header)
+            return is_full_header and full_headers.count(True) == 2
+
+        compression_a, compression_b = self.connect(clock, drop_second_full_header, max_contexts=1)
+        packets = [packet(i) for i in range(5)] + [packet(i, source="10.0.0.9") for i in range(5)]
+        self.send_all(packets)
+        clock.run()
+        self.send_all(packets[5:])  # The second flow gets a new full header on request of b
+        clock.run()
+        self.assertEqual(packets, self.received_packets())
+        self.assertEqual(1, compression_b.statistics.crc_failures)  # Decompressed with the context of the first flow
+        self.assertEqual(3, compression_b.statistics.unknown_contexts)  # Dropped until the context is refreshed
+        self.assertEqual((1, 1), (compression_b.statistics.refreshes_requested,
+                                  compression_a.statistics.refreshes_received))
+
+    def test_recovery_from_losses(self):
+        clock = SimulationClock()
+        compression_a, compression_b = self.connect(clock, loss_rate=0.1, refresh_interval=16)
+        packets = [packet(i, source=f"10.0.0.{10 + i % 4}") for i in range(400)]
+        for i, ip_packet in enumerate(packets):
+            clock.schedule(0.001 * i, self.send_all, [ip_packet])
+        clock.run()
+        received = [bytes(frame.information) for frame in self.b.received]
+        sent = [ip_packet.bytes for ip_packet in packets]
+        delivered = set(received)
+        self.assertEqual([p for p in sent if p in delivered], received)  # In order, with the original headers
+        self.assertGreater(len(received), 0.75 * len(packets))
+        self.assertGreater(compression_b.statistics.refreshes_requested, 0)
+        self.assertGreater(compression_a.statistics.saved_per_packet, 10)
+
+    def test_combined_with_payload_compression(self):
+        compression_a, _ = self.connect()
+        self.a.get_interface(0).enable_compression()
+        self.b.get_interface(0).enable_compression()
+        packets = [packet(i, f"Packet number {i} with a compressible payload".encode()) for i in range(20)]
+        self.send_all(packets)
+        self.assertEqual(packets, self.received_packets())
+        self.assertEqual(19, compression_a.statistics.compressed_headers_sent)
+
+    def test_truncated_compressed_headers_are_dropped(self):
+        compression_a, compression_b = self.connect()
+        self.send_all([packet(0)])
+        context_id = next(iter(compression_b._received))
+        for information in (bytes([context_id, 0x80, 0]), bytes([context_id, 0x40, 0, 0x12])):  # TOS, IDENTIFICATION
+            self.assertIsNone(compression_b.receive(PppFrame(PppProtocol.IPHC_COMPRESSED, information)))
+        self.assertEqual(2, compression_b.statistics.truncated_headers)
+        self.assertEqual(1, compression_b.statistics.refreshes_requested)
+        self.assertEqual(1, compression_a.statistics.refreshes_received)
+
+    def test_crc_detects_single_bit_errors(self):
+        header = packet(1).header.bytes
+        for i in range(8 * len(header)):
+            corrupted = bytearray(header)
+            corrupted[i // 8] ^= 0x80 >> (i % 8)
+            self.assertNotEqual(crc8(header), crc8(corrupted))
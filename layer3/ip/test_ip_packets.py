@@ -29,6 +29,12 @@ class Test(TestCase):
         self.assertEqual(4, get_ip_version(ip4bytes))
         self.assertEqual(self.ip4packet, decoded_packet)
 
+    def test_ipv4_from_memoryview_does_not_copy_payload(self):
+        received = bytearray(self.ip4packet.bytes)
+        decoded_packet = packet_decoder(memoryview(received))
+        self.assertEqual(self.ip4packet, decoded_packet)
+        self.assertIs(received, decoded_packet.payload.obj)
+
     def test_ipv6_from_bytes(self):
         ip6bytes = self.ip6packet.bytes
         decoded_packet = packet_decoder(ip6bytes)
@@ -97,3 +103,4 @@ class Test(TestCase):
     def test_IPv4Flag(self):
         flag = IPv4Flag.from_bits(BitArray(bin="001"))
         self.assertEqual(IPv4Flag(False, True), flag)
+        self.assertEqual(IPv4Flag(True, False), IPv4Flag.from_int(0b010))
@@ -86,6 +86,26 @@ class TestIpRouter(TestCase):
         
         """
 
+    def test_router_drops_packets_that_exceed_the_mtu_of_the_outgoing_interface(self):
+        mac_router = Mac.fromstring("CE:CE:CE:CE:CE:CE")
+        router_eth0 = EthernetInterfaceWithArp(0, None, IPv4Address("192.168.178.1"), mac_router, mtu=9000)
+        router_eth1 = EthernetInterfaceWithArp(1, None, IPv4Address("10.0.0.1"), mac_router)
+        router = IpRouter([router_eth0, router_eth1], "Router")
+        router.interface_networks[1] = ip_network("10.0.0.0/8")
+        computer_a = ComputerWithIpCapability(self.ip_a, None, self.macA, "A", mtu=9000)
+        computer_b = ComputerWithIpCapability(self.ip_b, None, self.macB, "B", mtu=9000)
+        computer_a.connect_to(router, 0)
+        computer_b.connect_to(router, 1)
+
+        computer_a.send_over_ip(self.ip_b, bytes(4000))
+        computer_a.send_over_ip(self.ip_b, bytes(1000))
+        self.assertEqual(0, router_eth0.drops.total)
+        self.assertEqual(1, router_eth1.oversize_sent)
+
+        router_eth1.mtu = 9000
+        computer_a.send_over_ip(self.ip_b, bytes(4000))
+        self.assertEqual(1, router_eth1.oversize_sent)
+
     def test_sending_ip_packet_over_default_gateway(self):
         mac_router_a = Mac.fromstring("CE:CE:CE:CE:CE:CE")
         router_a_internal_ip = IPv4Address("192.168.178.1")
@@ -2,7 +2,7 @@ from unittest import TestCase
 
 from bitstring import BitArray
 
-from layer3.tools import checksum, int_to_bits, bits_to_int
+from layer3.tools import checksum, int_to_bits, bits_to_int, checksum_of_bytes
 
 
 class Test(TestCase):
@@ -12,9 +12,21 @@ class Test(TestCase):
     def test_bits_to_int(self):
         self.assertEqual(11, bits_to_int([1, 1, 0, 1]))
 
+    def test_int_bits_round_trip(self):
+        self.assertEqual([0], int_to_bits(0))
+        self.assertEqual(0, bits_to_int([]))
+        n = 0x2a05d018076cb685c898aa3a42c79d21
+        self.assertEqual(n.bit_length(), len(int_to_bits(n)))
+        self.assertEqual(n, bits_to_int(int_to_bits(n)))
+
     def test_checksum(self):
         # example taken from wikipedia, with calculate_checksum bits replaced with vv  vv zeroes
         data = BitArray(auto=b'\x45\x00\x00\x73\x00\x00\x40\x00\x40\x11\x00\x00\xc0\xa8\x00\x01\xc0\xa8\x00\xc7')
         chksum = checksum(data)
         expected = BitArray(uint=0xb861, length=16)
         self.assertEqual(expected, chksum)
+
+    def test_checksum_of_bytes(self):
+        data = b'\x45\x00\x00\x73\x00\x00\x40\x00\x40\x11\x00\x00\xc0\xa8\x00\x01\xc0\xa8\x00\xc7'
+        self.assertEqual(0xb861, checksum_of_bytes(data))
+        self.assertEqual(0, checksum_of_bytes(data[:10] + b'\xb8\x61' + data[12:]))
@@ -1,25 +1,21 @@
-from typing import List
+import struct
+from typing import List, Final
 
 from bitstring import BitArray
 
 
+_TO_BIT_VALUES: Final = bytes.maketrans(b'01', b'\x00\x01')
+_TO_BIT_DIGITS: Final = bytes.maketrans(b'\x00\x01', b'01')
+
+
 def int_to_bits(n: int) -> List[int]:
-    bits = []
-    remainder = n
-    while True:
-        bit_i = remainder & 1
-        bits.append(bit_i)
-        remainder = remainder >> 1
-        if remainder == 0:
-            break
-    return bits
+    """ The binary representation of n, with the least significant bit first """
+    return list(bin(n)[:1:-1].encode().translate(_TO_BIT_VALUES))
 
 
 def bits_to_int(bits: List[int]) -> int:
-    x = 0
-    for bit in reversed(bits):
-        x = (x << 1) | bit
-    return x
+    """ The number represented by the bits, with the least significant bit first """
+    return int(bytes(bits[::-1]).translate(_TO_BIT_DIGITS) or b'0', 2)
 
 
 def checksum(bits: BitArray) -> BitArray:
@@ -32,3 +28,11 @@ def checksum(bits: BitArray) -> BitArray:
     chk = ~chk & 0xffff
     chk_bits = BitArray(uint=chk, length=16)
     return chk_bits[8:] + chk_bits[:8]  # switch around the order
+
+
+def checksum_of_bytes(data: bytes | memoryview) -> int:
+    """ The same checksum as checksum(), of data with an even number of bytes, as the value of the 16 bit field """
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    while total >> 16:
+        total = (total & 0xffff) + (total >> 16)
+    return ~total & 0xffff
@@ -1,5 +1,6 @@
 from typing import List, Generic, TypeVar
 
+from layer3.tools import int_to_bits, bits_to_int
 from layer3.trie.trie import AbstractGenericTrie
 
 V = TypeVar('V')
@@ -30,25 +31,6 @@ class BinaryGenericTrie(Generic[V], AbstractGenericTrie[int, List[int], V]):
         return bits_to_int(internal_key)
 
 
-def int_to_bits(n: int) -> List[int]:
-    bits = []
-    remainder = n
-    while True:
-        bit_i = remainder & 1
-        bits.append(bit_i)
-        remainder = remainder >> 1
-        if remainder == 0:
-            break
-    return bits
-
-
-def bits_to_int(bits: List[int]) -> int:
-    x = 0
-    for bit in reversed(bits):
-        x = (x << 1) | bit
-    return x
-
-
 class ReversedKeyBinaryGenericTrie32(Generic[V], AbstractGenericTrie[int, List[int], V]):
     """
     Trie with 32 bit integer keys in reverse order, i.e. the 1st layer below the root corresponds to the 32nd bit with